@@ -0,0 +1,35 @@
+"""
+Create booking_days table (one row per booking per travel day) and fill it from bookings
+Kept current by services/booking_occupancy_service.py listeners + booking_rollup_cron.py
+"""
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS booking_days (
+    day DATE NOT NULL,
+    booking_id INT NOT NULL,
+
+    PRIMARY KEY (day, booking_id),
+    INDEX idx_booking_days_booking (booking_id),
+    CONSTRAINT fk_booking_days_booking FOREIGN KEY (booking_id)
+        REFERENCES bookings (id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+if __name__ == '__main__':
+    from sqlalchemy import text
+    from app import app, db
+    from services.booking_occupancy_service import BookingOccupancyService
+
+    with app.app_context():
+        try:
+            print("Creating booking_days table...")
+            db.session.execute(text(CREATE_TABLE_SQL))
+            db.session.commit()
+            print("✅ Table booking_days created successfully!")
+
+            print("📦 Building travel days from bookings...")
+            result = BookingOccupancyService.reconcile()
+            print(f"✅ {result['bookings']} bookings indexed ({result['rows']} day rows)")
+        except Exception as e:
+            print(f"❌ Error creating table: {e}")
+            db.session.rollback()
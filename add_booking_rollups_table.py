@@ -0,0 +1,36 @@
+"""
+Create booking_daily_rollups table for the dashboard and fill it from bookings
+Kept current by services/booking_rollup_service.py listeners + booking_rollup_cron.py
+"""
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS booking_daily_rollups (
+    day DATE NOT NULL,
+    status VARCHAR(50) NOT NULL DEFAULT '',
+    booking_type VARCHAR(50) NOT NULL DEFAULT '',
+    booking_count INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0.00,
+
+    PRIMARY KEY (day, status, booking_type),
+    INDEX idx_status_day (status, day)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+if __name__ == '__main__':
+    from sqlalchemy import text
+    from app import app, db
+    from services.booking_rollup_service import BookingRollupService
+
+    with app.app_context():
+        try:
+            print("Creating booking_daily_rollups table...")
+            db.session.execute(text(CREATE_TABLE_SQL))
+            db.session.commit()
+            print("✅ Table booking_daily_rollups created successfully!")
+
+            print("📦 Building rollups from bookings...")
+            result = BookingRollupService.reconcile()
+            print(f"✅ {result['rows']} rollup rows built")
+        except Exception as e:
+            print(f"❌ Error creating table: {e}")
+            db.session.rollback()
@@ -0,0 +1,41 @@
+"""
+Create document_sequences table used by services/sequence_service.py
+One counter row per (sequence, period) for quote, invoice and booking numbers
+"""
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS document_sequences (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(32) NOT NULL,
+    period VARCHAR(16) NOT NULL,
+    last_value INT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+    UNIQUE KEY uq_document_sequences_name_period (name, period)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+if __name__ == '__main__':
+    from sqlalchemy import text
+    from app import app, db
+    from services.sequence_service import SequenceService, SEQUENCES
+
+    with app.app_context():
+        try:
+            print("Creating document_sequences table...")
+            db.session.execute(text(CREATE_TABLE_SQL))
+            db.session.commit()
+            print("✅ Table document_sequences created successfully!")
+
+            # Seed counters from numbers already stored so new numbers never collide
+            for name in SEQUENCES:
+                report = SequenceService.audit(name, fix=True)
+                fixed = [period for period, row in report.items() if row.get('fixed')]
+                print(f"📦 {name}: {len(report)} periods found, {len(fixed)} counters seeded")
+                for period, row in report.items():
+                    if row['duplicates']:
+                        print(f"  ⚠️ {period}: duplicates {row['duplicates']}")
+
+        except Exception as e:
+            print(f"❌ Error creating table: {e}")
+            db.session.rollback()
@@ -0,0 +1,87 @@
+"""
+Create stored_artifacts / artifact_deletions tables and track the files already on disk
+Kept current by services/storage_lifecycle_service.py (track on write, sweep + reconcile)
+"""
+
+CREATE_TABLES_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS stored_artifacts (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        path VARCHAR(500) NOT NULL,
+        kind VARCHAR(30) NOT NULL,
+        booking_id INT NULL,
+        owner_id INT NULL,
+        size_bytes BIGINT NOT NULL DEFAULT 0,
+        created_at DATETIME NOT NULL,
+        expires_at DATETIME NULL,
+
+        UNIQUE KEY uq_stored_artifacts_path (path),
+        INDEX idx_stored_artifacts_expires (expires_at),
+        INDEX idx_stored_artifacts_kind_created (kind, created_at),
+        INDEX idx_stored_artifacts_booking (booking_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS artifact_deletions (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        path VARCHAR(500) NOT NULL,
+        kind VARCHAR(30) NOT NULL,
+        booking_id INT NULL,
+        owner_id INT NULL,
+        size_bytes BIGINT NOT NULL DEFAULT 0,
+        reason VARCHAR(20) NOT NULL,
+        deleted_at DATETIME NOT NULL,
+
+        INDEX idx_artifact_deletions_deleted (deleted_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """,
+]
+
+
+def track_voucher_files():
+    """Active voucher_files rows keep their own expires_at and owner"""
+    import os
+    from models.voucher_sharing import VoucherFile
+    from services.storage_lifecycle_service import StorageLifecycleService
+
+    tracked = 0
+    last_id = 0
+    while True:
+        chunk = VoucherFile.query.filter(
+            VoucherFile.is_active == True,  # noqa: E712
+            VoucherFile.id > last_id,
+        ).order_by(VoucherFile.id).limit(500).all()
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+        for voucher_file in chunk:
+            if os.path.exists(voucher_file.file_path):
+                tracked += StorageLifecycleService.track(
+                    voucher_file.file_path, 'voucher_file', expires_at=voucher_file.expires_at,
+                    booking_id=voucher_file.voucher_id, owner_id=voucher_file.id)
+    return tracked
+
+
+if __name__ == '__main__':
+    from sqlalchemy import text
+    from app import app, db
+    from services.storage_lifecycle_service import StorageLifecycleService, register_default_roots
+
+    with app.app_context():
+        try:
+            print("Creating stored_artifacts / artifact_deletions tables...")
+            for sql in CREATE_TABLES_SQL:
+                db.session.execute(text(sql))
+            db.session.commit()
+            print("✅ Tables created successfully!")
+
+            print("📦 Tracking voucher files...")
+            print(f"✅ {track_voucher_files()} voucher files tracked")
+
+            print("📦 Scanning PNG cache / share directories...")
+            register_default_roots()
+            result = StorageLifecycleService.reconcile()
+            print(f"✅ {result['added']} files tracked ({result['scanned']} scanned)")
+        except Exception as e:
+            print(f"❌ Error creating tables: {e}")
+            db.session.rollback()
@@ -7,11 +7,6 @@ try:
 except AttributeError:
     pass  # Windows doesn't support time.tzset()
 
-# Import ultra-aggressive datetime fix FIRST - this MUST come before ANY SQLAlchemy imports
-import ultra_aggressive_datetime_fix
-ultra_aggressive_datetime_fix.ultra_aggressive_patch()
-ultra_aggressive_datetime_fix.apply_engine_level_patch()
-
 from flask import Flask, send_from_directory
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
@@ -22,10 +17,9 @@ import logging
 from logging.handlers import RotatingFileHandler
 from datetime import datetime
 from extensions import db, login_manager, mail
-# Import critical datetime fix FIRST to patch SQLAlchemy
-import critical_datetime_fix
-# Import datetime compatibility fix for MariaDB
-import datetime_fix
+# MariaDB session settings (UTC, NO_ZERO_DATE); date/time columns use models/column_types.py
+from models.column_types import install_session_settings
+install_session_settings()
 # Import timezone helper for Thailand timezone
 from utils.timezone_helper import now_thailand, format_thai_datetime
 
@@ -79,130 +73,29 @@ def create_app():
         """Format datetime in Thailand timezone"""
         return format_thai_datetime(dt, format_str)
     
-    # Add custom filter for HTML to line breaks conversion
+    # HTML-to-text filters (utils/text_normalize.py: precompiled, memoized per input)
+    from markupsafe import Markup
+    from utils import text_normalize
+
     @app.template_filter('html_to_linebreaks')
     def html_to_linebreaks(content):
         """Convert HTML tags to line breaks for display"""
-        if not content:
-            return ""
-        
-        import re
-        from html import unescape
-        from markupsafe import Markup
-        
-        # First decode HTML entities
-        content = unescape(content)
-        
-        # Replace pattern "คลิกดูเพิ่ม {URL}" with clickable link BEFORE stripping HTML
-        content = re.sub(
-            r'คลิกดูเพิ่ม\s+(https?://[^\s<]+)',
-            r'<a href="\1" target="_blank">คลิกดูเพิ่ม</a>',
-            content
-        )
-        
-        # Replace <p> with paragraph breaks
-        content = re.sub(r'<p[^>]*>', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'</p>', '\n\n', content, flags=re.IGNORECASE)
-        
-        # Replace various BR tags with newlines
-        content = re.sub(r'<br\s*/?>', '\n', content, flags=re.IGNORECASE)
-        content = re.sub(r'<br[^>]*>', '\n', content, flags=re.IGNORECASE)
-        
-        # Strip HTML tags EXCEPT for anchor tags
-        content = re.sub(r'<(?!/?a\b)[^>]+>', '', content, flags=re.IGNORECASE)
-        
-        # Clean up whitespace
-        content = re.sub(r'[ \t]+', ' ', content)  # Multiple spaces to single space
-        content = re.sub(r'\n[ \t]+', '\n', content)  # Remove spaces after newlines
-        content = re.sub(r'[ \t]+\n', '\n', content)  # Remove spaces before newlines
-        content = re.sub(r'\n{3,}', '\n\n', content)  # Max 2 consecutive newlines
-        
-        return Markup(content.strip())
+        return Markup(text_normalize.html_to_linebreaks(content))
 
-    # Add custom filter for newlines to br tags
     @app.template_filter('nl2br')
     def nl2br_filter(text):
         """Convert newlines to HTML br tags"""
-        if not text:
-            return ""
-        from markupsafe import Markup
-        import re
-        # Replace pattern "คลิกดูเพิ่ม {URL}" with clickable link
-        text = str(text)
-        text = re.sub(
-            r'คลิกดูเพิ่ม\s+(https?://[^\s<]+)',
-            r'<a href="\1" target="_blank">คลิกดูเพิ่ม</a>',
-            text
-        )
-        # Replace \r\n, \r, and \n with <br>
-        result = text.replace('\r\n', '<br>').replace('\r', '<br>').replace('\n', '<br>')
-        return Markup(result)
+        return Markup(text_normalize.nl2br(text))
 
-    # Add custom filter for flight info processing
     @app.template_filter('flight_info_to_text')
     def flight_info_to_text(content):
         """Convert HTML flight info to textarea-friendly text"""
-        if not content:
-            return ''
-        
-        import re
-        
-        # Convert HTML line breaks to newlines
-        result = content.replace('<br>', '\n')
-        result = result.replace('<br/>', '\n')
-        result = result.replace('<br />', '\n')
-        
-        # Convert closing </p> tags to newlines first (for paragraph separation)
-        result = result.replace('</p>', '\n')
-        
-        # Remove opening HTML tags
-        result = result.replace('<p>', '')
-        result = result.replace('<div>', '')
-        result = result.replace('</div>', '')
-        
-        # Strip any remaining HTML tags
-        result = re.sub(r'<[^>]+>', '', result)
-        
-        # Normalize line breaks
-        result = result.replace('\r\n', '\n')
-        result = result.replace('\r', '\n')
-        
-        return result.strip()
-    
+        return text_normalize.flight_info_to_text(content)
+
     @app.template_filter('service_detail_to_text')
     def service_detail_to_text(content):
         """Convert service detail content to display-friendly text with proper line breaks"""
-        if not content:
-            return ''
-        
-        import re
-        
-        # Convert HTML line breaks to newlines
-        result = content.replace('<br>', '\n')
-        result = result.replace('<br/>', '\n')
-        result = result.replace('<br />', '\n')
-        
-        # Convert closing </p> tags to newlines first (for paragraph separation)
-        result = result.replace('</p>', '\n')
-        
-        # Remove opening HTML tags
-        result = result.replace('<p>', '')
-        result = result.replace('<div>', '')
-        result = result.replace('</div>', '')
-        
-        # Strip any remaining HTML tags
-        result = re.sub(r'<[^>]+>', '', result)
-        
-        # Convert literal \n strings to actual newlines (for database stored as escaped)
-        result = result.replace('\\n', '\n')
-        result = result.replace('\\r\\n', '\n')
-        result = result.replace('\\r', '\n')
-        
-        # Normalize line breaks
-        result = result.replace('\r\n', '\n')
-        result = result.replace('\r', '\n')
-        
-        return result.strip()
+        return text_normalize.service_detail_to_text(content)
     
     # Initialize extensions with app
     db.init_app(app)
@@ -210,13 +103,51 @@ def create_app():
     # Initialize Flask-Mail
     mail.init_app(app)
     
+    # Shared cache (Redis, in-process fallback) - app.extensions['cache']
+    from services import cache_service
+    cache_service.init_app(app)
+    from services import metrics_service
+    metrics_service.init_app(app)
+    from services import profiling_service
+    profiling_service.init_app(app)
+    
     # Import models to register event listeners
     try:
         import models_mariadb
         app.logger.info("✅ Models with event listeners imported successfully")
     except ImportError as e:
         app.logger.warning(f"⚠️ Could not import models_mariadb: {e}")
-    
+
+    # Keep dashboard rollups current on booking insert/update/delete
+    try:
+        from services.booking_rollup_service import BookingRollupService
+        with app.app_context():
+            BookingRollupService.setup_listeners()
+    except Exception as e:
+        app.logger.warning(f"⚠️ Could not set up booking rollups: {e}")
+
+    # Keep the booking_days travel-day index current (calendar / conflict queries)
+    try:
+        from services.booking_occupancy_service import BookingOccupancyService
+        with app.app_context():
+            BookingOccupancyService.setup_listeners()
+    except Exception as e:
+        app.logger.warning(f"⚠️ Could not set up booking travel-day index: {e}")
+
+    # Booking cache / generated PDF invalidation and quote sync after commit (invalidation bus)
+    try:
+        from services.universal_sync_hooks import initialize_universal_sync
+        initialize_universal_sync()
+    except Exception as e:
+        app.logger.warning(f"⚠️ Could not set up booking sync hooks: {e}")
+
+    # Drop cached task alert counts (navbar badge) when tasks change
+    try:
+        from services.task_query_service import TaskQueryService
+        TaskQueryService.setup_listeners()
+    except Exception as e:
+        app.logger.warning(f"⚠️ Could not set up task alert counters: {e}")
+
     # Configure SQLAlchemy session options
     if hasattr(app.config, 'SQLALCHEMY_SESSION_OPTIONS'):
         from sqlalchemy.orm import sessionmaker
@@ -315,6 +246,15 @@ def create_app():
         flight_template_admin = None
         print(f"❌ Failed to import flight_template_admin: {e}")
         
+    # Profiling Admin (sampling profiler / slow-request recorder)
+    try:
+        from routes.profiling_admin import profiling_admin
+        PROFILING_ADMIN_AVAILABLE = True
+    except ImportError as e:
+        PROFILING_ADMIN_AVAILABLE = False
+        profiling_admin = None
+        print(f"❌ Failed to import profiling_admin: {e}")
+        
     # Test blueprint for debugging
     from routes.test import test_bp
     
@@ -424,6 +364,11 @@ def create_app():
         app.register_blueprint(flight_template_admin)  # Already has url_prefix='/admin/flight-template'
         print("✅ Flight Template Admin registered")
     
+    # Profiling Admin
+    if PROFILING_ADMIN_AVAILABLE and profiling_admin:
+        app.register_blueprint(profiling_admin)  # Already has url_prefix='/admin/profiling'
+        print("✅ Profiling Admin registered")
+    
     # Account Report
     if ACCOUNT_REPORT_AVAILABLE and account_report:
         app.register_blueprint(account_report)  # Already has url_prefix='/account-report'
@@ -814,23 +759,8 @@ def create_app():
         except Exception as e:
             app.logger.warning(f'Auto-migrate bookings columns failed: {e}')
 
-    # Background PNG cache cleanup thread
-    try:
-        import threading, time as _time
-        from routes.voucher import cleanup_png_cache
-        def _png_cleanup_loop():
-            while True:
-                try:
-                    removed = cleanup_png_cache(24)
-                    if removed:
-                        app.logger.info('PNG cache cleanup removed %s file(s)', removed)
-                except Exception:
-                    pass
-                _time.sleep(3600)  # run hourly
-        t = threading.Thread(target=_png_cleanup_loop, daemon=True)
-        t.start()
-    except Exception:
-        pass
+    # The background storage sweep is started by the serving process, not here:
+    # gunicorn post_fork (deploy/gunicorn.conf.py) or the development server below.
     
     # Admin unlock verification endpoint
     @app.route('/api/admin/verify-unlock', methods=['POST'])
@@ -922,9 +852,7 @@ def create_app():
                 fresh_user = db.session.query(User).filter_by(id=current_user.id).first()
                 
                 if fresh_user:
-                    # DEBUG: Log the role information
-                    app.logger.info(f"USER DEBUG: username={fresh_user.username}, role={fresh_user.role}, is_admin={fresh_user.is_admin}")
-                    print(f"🔍 USER DEBUG: {fresh_user.username} | Role: {fresh_user.role} | Admin: {fresh_user.is_admin}")
+                    app.logger.debug(f"USER DEBUG: username={fresh_user.username}, role={fresh_user.role}, is_admin={fresh_user.is_admin}")
                     
                     # Force update current_user attributes with fresh data
                     # This ensures the template always sees the latest role from database
@@ -935,7 +863,6 @@ def create_app():
             except Exception as e:
                 # Log error but don't break the request
                 app.logger.error(f"Error refreshing user: {e}")
-                print(f"Error refreshing user: {e}")
     
     # User loader - moved inside create_app() to ensure it works with app context
     @login_manager.user_loader
@@ -959,5 +886,8 @@ app = create_app()
 
 
 if __name__ == '__main__':
+    # Expired PNG cache pages, share images and voucher files
+    from services.storage_lifecycle_service import start_background_sweep
+    start_background_sweep(app)
     # Run the Flask development server
     app.run(host='0.0.0.0', port=5001, debug=False)
@@ -13,14 +13,10 @@ from datetime import datetime
 # Add the project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Import ultra-aggressive datetime fix FIRST
-import ultra_aggressive_datetime_fix
-ultra_aggressive_datetime_fix.ultra_aggressive_patch()
-ultra_aggressive_datetime_fix.apply_engine_level_patch()
-
 from flask import Flask
 from config import Config
 from extensions import db
+from models.column_types import install_session_settings
 from services.booking_auto_completion import BookingAutoCompletionService
 
 def create_app():
@@ -30,6 +26,7 @@ def create_app():
     
     # Initialize extensions
     db.init_app(app)
+    install_session_settings()
     
     return app
 
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Booking Rollup Cron Job
+Nightly reconciliation of booking_daily_rollups and booking_days against bookings
+
+Listeners keep both tables current; this job corrects any drift (raw SQL
+updates, manual fixes in adminer, failed transactions outside the ORM).
+
+ใช้งาน:
+1. เพิ่มใน crontab: 30 2 * * * /Applications/python/voucher-ro_v1.1/.venv/bin/python /Applications/python/voucher-ro_v1.1/booking_rollup_cron.py
+2. หรือรันด้วยตนเอง: python3 booking_rollup_cron.py [--days 90]   (ไม่ระบุ = ทั้งหมด)
+"""
+import sys
+import os
+import argparse
+
+# เพิ่ม path ของ app
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from services.booking_rollup_service import BookingRollupService
+from services.booking_occupancy_service import BookingOccupancyService
+from datetime import timedelta
+from utils.datetime_utils import naive_utc_now
+import logging
+
+# Setup logging
+os.makedirs('logs', exist_ok=True)
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('logs/booking_rollup_cron.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    """Main cron job function"""
+    parser = argparse.ArgumentParser(description='Reconcile booking dashboard rollups')
+    parser.add_argument('--days', type=int, default=None, help='Only rebuild the last N days (default: all)')
+    args = parser.parse_args()
+    
+    logger.info("=" * 60)
+    logger.info("Starting Booking Rollup Cron Job")
+    logger.info(f"Timestamp: {naive_utc_now()}")
+    
+    start = (naive_utc_now() - timedelta(days=args.days)).date() if args.days else None
+    
+    with app.app_context():
+        try:
+            result = BookingRollupService.reconcile(start=start)
+            logger.info(f"Rebuilt {result['rows']} rollup rows, {result['drifted']} had drifted")
+        except Exception as e:
+            logger.error(f"Error in booking rollup cron: {e}", exc_info=True)
+        
+        if BookingOccupancyService.setup_listeners():
+            try:
+                result = BookingOccupancyService.reconcile()
+                logger.info(f"Travel days: {result['bookings']} bookings indexed, {result['drifted']} rewritten")
+            except Exception as e:
+                logger.error(f"Error reconciling booking_days: {e}", exc_info=True)
+    
+    logger.info("Booking Rollup Cron Job completed")
+    logger.info("=" * 60)
+
+if __name__ == '__main__':
+    main()
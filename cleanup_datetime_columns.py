@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Clean corrupt DATETIME / TIME values (zero dates, out-of-day times)
+แก้ข้อมูลวันที่/เวลาที่เสียในฐานข้อมูล แทนการ patch SQLAlchemy / PyMySQL ทั้งระบบ
+
+Rows written before NO_ZERO_DATE was enforced can hold '0000-00-00 00:00:00'
+(PyMySQL returns those as strings) and TIME columns can hold values outside
+a clock day. models/column_types.py loads such values as NULL; this script
+rewrites them in the database so every row round-trips cleanly:
+
+    nullable columns        -> NULL
+    bookings.time_limit     -> created_at (or now) since it is NOT NULL
+    created_at / updated_at -> the other one, or now
+
+ใช้งาน:
+    python cleanup_datetime_columns.py            # dry run: count only
+    python cleanup_datetime_columns.py --apply
+"""
+
+import argparse
+
+# (table, column, replacement SQL or None for NULL)
+DATETIME_COLUMNS = [
+    ('bookings', 'invoice_paid_date', None),
+    ('bookings', 'confirmed_at', None),
+    ('bookings', 'quoted_at', None),
+    ('bookings', 'invoiced_at', None),
+    ('bookings', 'paid_at', None),
+    ('bookings', 'vouchered_at', None),
+    ('bookings', 'completed_at', None),
+    ('bookings', 'created_at', 'COALESCE(NULLIF(CAST(updated_at AS CHAR), \'0000-00-00 00:00:00\'), UTC_TIMESTAMP())'),
+    ('bookings', 'updated_at', 'COALESCE(NULLIF(CAST(created_at AS CHAR), \'0000-00-00 00:00:00\'), UTC_TIMESTAMP())'),
+    ('bookings', 'time_limit', 'COALESCE(NULLIF(CAST(created_at AS CHAR), \'0000-00-00 00:00:00\'), UTC_TIMESTAMP())'),
+    ('customers', 'created_at', 'UTC_TIMESTAMP()'),
+    ('customers', 'updated_at', 'COALESCE(NULLIF(CAST(created_at AS CHAR), \'0000-00-00 00:00:00\'), UTC_TIMESTAMP())'),
+]
+
+TIME_COLUMNS = [
+    ('bookings', 'pickup_time'),
+    ('group_buy_payments', 'transfer_time'),
+]
+
+
+def zero_datetime_condition(column):
+    # Compare as text: with NO_ZERO_DATE on, zero literals are rejected in comparisons
+    return f"(CAST({column} AS CHAR) LIKE '0000-00-00%' OR CAST({column} AS CHAR) LIKE '%-00-%' " \
+           f"OR CAST({column} AS CHAR) LIKE '%-00 %')"
+
+
+def out_of_day_time_condition(column):
+    return f"({column} < '00:00:00' OR {column} >= '24:00:00')"
+
+
+def cleanup(apply=False):
+    from sqlalchemy import text
+    from app import app, db
+
+    plan = [(table, column, zero_datetime_condition(column), replacement or 'NULL')
+            for table, column, replacement in DATETIME_COLUMNS]
+    plan += [(table, column, out_of_day_time_condition(column), 'NULL') for table, column in TIME_COLUMNS]
+
+    total = 0
+    with app.app_context():
+        try:
+            # The connect listener enables NO_ZERO_DATE; relax it so the rows can be read and rewritten
+            db.session.execute(text("SET SESSION sql_mode = 'STRICT_TRANS_TABLES'"))
+            for table, column, condition, replacement in plan:
+                count = db.session.execute(text(
+                    f'SELECT COUNT(*) FROM {table} WHERE {column} IS NOT NULL AND {condition}'
+                )).scalar() or 0
+                total += count
+                if not count:
+                    continue
+                print(f"{'🔧' if apply else '🔍'} {table}.{column}: {count} corrupt values -> {replacement}")
+                if apply:
+                    db.session.execute(text(
+                        f'UPDATE {table} SET {column} = {replacement} WHERE {column} IS NOT NULL AND {condition}'
+                    ))
+            if apply:
+                db.session.commit()
+        except Exception as e:
+            print(f"❌ Error cleaning date/time columns: {e}")
+            db.session.rollback()
+            raise
+
+    if not total:
+        print("✅ No corrupt DATETIME / TIME values found")
+    elif apply:
+        print(f"✅ {total} values rewritten")
+    else:
+        print(f"ℹ️ {total} values would be rewritten - run again with --apply")
+    return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rewrite zero dates / out-of-day times')
+    parser.add_argument('--apply', action='store_true', help='write the changes (default: dry run)')
+    args = parser.parse_args()
+    cleanup(apply=args.apply)
@@ -99,6 +99,11 @@ class Config:
     # File Upload Configuration
     UPLOAD_FOLDER = 'static/uploads'
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB max file size for multiple images
+    # Voucher uploads are streamed to disk; images are downscaled in the background (services/upload_pipeline.py)
+    VOUCHER_UPLOAD_MAX_BYTES = int(os.environ.get('VOUCHER_UPLOAD_MAX_BYTES', str(20 * 1024 * 1024)))
+    VOUCHER_FILE_MAX_BYTES = int(os.environ.get('VOUCHER_FILE_MAX_BYTES', str(50 * 1024 * 1024)))
+    VOUCHER_IMAGE_MAX_WIDTH = int(os.environ.get('VOUCHER_IMAGE_MAX_WIDTH', '1600'))
+    VOUCHER_IMAGE_QUALITY = int(os.environ.get('VOUCHER_IMAGE_QUALITY', '85'))
     
     # Public URL Configuration
     # For development, you can set PUBLIC_BASE_URL=http://localhost:5001 in environment
@@ -106,6 +111,31 @@ class Config:
     PUBLIC_BASE_URL = os.environ.get('PUBLIC_BASE_URL') or 'https://booking.dhakulchan.net'
     FORCE_HTTPS_DOMAINS = ['booking.dhakulchan.net', 'dhakulchan.net']
     
+    # Shared cache / cross-worker state (services/cache_service.py)
+    # CACHE_BACKEND: auto (Redis if reachable, else in-process), redis, memory
+    REDIS_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND') or 'auto'
+    CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX') or 'voucher'
+    # Memoized quote HTML / PDF renders (services/weasyprint_quote_generator.py), seconds
+    QUOTE_RENDER_TTL = int(os.environ.get('QUOTE_RENDER_TTL', str(24 * 3600)))
+    
+    # Request metrics (services/metrics_service.py) - served at /api/metrics
+    # METRICS_TOKEN: bearer token for scrapers (Authorization header); without it only admins may read
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR = os.environ.get('METRICS_DIR')  # default: instance/metrics
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_N_PLUS_ONE_THRESHOLD = int(os.environ.get('METRICS_N_PLUS_ONE_THRESHOLD', '10'))
+    
+    # Profiling (services/profiling_service.py) - opt-in, admin page at /admin/profiling
+    # Requests slower than PROFILING_SLOW_REQUEST_MS are saved with their stacks and SQL trace
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+    PROFILING_DIR = os.environ.get('PROFILING_DIR')  # default: instance/profiles
+    PROFILING_SLOW_REQUEST_MS = int(os.environ.get('PROFILING_SLOW_REQUEST_MS', '2000'))
+    PROFILING_SAMPLE_INTERVAL_MS = int(os.environ.get('PROFILING_SAMPLE_INTERVAL_MS', '10'))
+    PROFILING_MAX_PROFILES = int(os.environ.get('PROFILING_MAX_PROFILES', '200'))
+    PROFILING_MAX_ARM_SECONDS = int(os.environ.get('PROFILING_MAX_ARM_SECONDS', '60'))
+    PROFILING_ENDPOINTS = os.environ.get('PROFILING_ENDPOINTS')  # comma-separated; empty = all
+    
     # Development mode detection
     DEVELOPMENT_MODE = os.environ.get('FLASK_ENV') == 'development' or os.environ.get('DEBUG') == 'True'
     
@@ -113,6 +143,10 @@ class Config:
     TURNSTILE_SITE_KEY = os.environ.get('TURNSTILE_SITE_KEY') or '0x4AAAAAAAzvKq_OuZqNKMAG'
     TURNSTILE_SECRET_KEY = os.environ.get('TURNSTILE_SECRET_KEY') or '0x4AAAAAAAzvKyIGP5BsRam65wZ_nTBD51u'
 
+    # Group buy: groups that expire short of participants become 'failed' and their paid
+    # participants 'refund_pending'. When true, auto_refund_cron.py refunds them as well.
+    GROUP_BUY_AUTO_REFUND_FAILED = os.environ.get('GROUP_BUY_AUTO_REFUND_FAILED', 'false').lower() in {'1','true','yes'}
+
     # Stripe Payment Configuration
     STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY') or 'pk_test_your_key_here'
     STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY') or 'sk_test_your_key_here'
@@ -125,3 +159,18 @@ class Config:
     PDF_ALLOWED_TAGS = [t.strip() for t in os.environ.get('PDF_ALLOWED_TAGS', 'b,strong,i,em,u,br,p,ul,ol,li').split(',') if t.strip()]
     PDF_TERMS_LIST_STYLE = os.environ.get('PDF_TERMS_LIST_STYLE', 'number')
     PDF_TERMS_INCLUDE_VOUCHER = os.environ.get('PDF_TERMS_INCLUDE_VOUCHER', 'true').lower() in {'1','true','yes'}
+
+    # QR code cache (services/qr_generator.py): in-memory LRU keyed by payload hash.
+    # The disk tier shares rendered files between workers; QR_CACHE_DIR defaults to static/qr_codes.
+    QR_CACHE_MAX_ENTRIES = int(os.environ.get('QR_CACHE_MAX_ENTRIES', '512'))
+    QR_CACHE_DISK_ENABLED = os.environ.get('QR_CACHE_DISK_ENABLED', 'false').lower() in {'1','true','yes'}
+    QR_CACHE_DIR = os.environ.get('QR_CACHE_DIR', '')
+    QR_CACHE_DISK_MAX_FILES = int(os.environ.get('QR_CACHE_DISK_MAX_FILES', '2000'))
+
+    # Storage lifecycle (services/storage_lifecycle_service.py): tracked files are
+    # deleted in chunks once expires_at passes; deletions go to artifact_deletions.
+    STORAGE_SWEEP_CHUNK = int(os.environ.get('STORAGE_SWEEP_CHUNK', '500'))
+    STORAGE_SWEEP_INTERVAL = int(os.environ.get('STORAGE_SWEEP_INTERVAL', '3600'))  # seconds; 0 = cron only (cleanup_expired_files.py)
+    STORAGE_JOURNAL_RETENTION_DAYS = int(os.environ.get('STORAGE_JOURNAL_RETENTION_DAYS', '180'))
+    PNG_CACHE_TTL_HOURS = int(os.environ.get('PNG_CACHE_TTL_HOURS', '24'))
+    SHARE_ASSET_TTL_DAYS = int(os.environ.get('SHARE_ASSET_TTL_DAYS', '90'))
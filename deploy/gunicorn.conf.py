@@ -1,7 +1,10 @@
 # Gunicorn configuration file for Voucher System Production
 bind = "127.0.0.1:5000"
 workers = 3
-worker_class = "sync"
+# Threaded workers: NFC long-poll requests (/api/passport/nfc/wait) hold a
+# thread for up to 25s instead of blocking a whole sync worker.
+worker_class = "gthread"
+threads = 8
 worker_connections = 1000
 timeout = 300
 keepalive = 30
@@ -23,6 +26,20 @@ limit_request_field_size = 8190
 # Performance
 preload_app = True
 
+
+def post_fork(server, worker):
+    """Per-worker setup after the fork from the preloaded master"""
+    from app import app
+    from extensions import db
+    from services.storage_lifecycle_service import start_background_sweep
+
+    # Connections the master opened while creating the app must not be shared;
+    # close=False leaves the master's sockets alone, the worker opens its own.
+    with app.app_context():
+        db.engine.dispose(close=False)
+    # Hourly expired-file sweep (STORAGE_SWEEP_INTERVAL=0: use cleanup_expired_files.py from cron)
+    start_background_sweep(app)
+
 # Process naming
 proc_name = "voucher-system"
 
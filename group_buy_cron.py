@@ -41,10 +41,10 @@ def main():
             
             # ตรวจสอบกลุ่มที่หมดเวลา
             logger.info("Checking for expired groups...")
-            expired_count = service.check_expired_groups()
+            failed_count = service.check_expired_groups()
             
-            if expired_count > 0:
-                logger.info(f"Processed {expired_count} expired groups")
+            if failed_count > 0:
+                logger.info(f"Marked {failed_count} expired groups as failed")
             else:
                 logger.info("No expired groups found")
             
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Convert Booking JSON TEXT columns to native MariaDB / MySQL JSON columns (optional)
+เปลี่ยนคอลัมน์ JSON ของ bookings จาก TEXT เป็น JSON
+
+    bookings.products, daily_services, voucher_images, voucher_album_ids
+
+On MariaDB JSON is LONGTEXT with a JSON_VALID() check, so reads still return
+text and Booking.get_*() decode it (with orjson when installed) once per
+loaded value. The check guarantees every stored value decodes on the first
+try; the Booking setters already write NULL instead of undecodable text.
+
+guest_list is left as TEXT: it also stores legacy HTML / one-guest-per-line
+text (passport upload) that get_guest_list() parses.
+
+Before the ALTER, values that JSON_VALID() rejects are saved to
+instance/migrations/booking_json_invalid_<timestamp>.json and rewritten:
+
+    - NaN / Infinity (older json.dumps writes) become null inside the value;
+      the rest of the list is kept
+    - anything else does not decode (get_*() returned [] for it) and is set
+      to NULL, so the getters return the same lists afterwards
+
+ใช้งาน:
+    python migrate_booking_json_columns.py            # dry run: count only
+    python migrate_booking_json_columns.py --apply
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+
+from utils import json_codec
+
+JSON_COLUMNS = ['products', 'daily_services', 'voucher_images', 'voucher_album_ids']
+BACKUP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'migrations')
+
+
+def _repair(value):
+    """Strict JSON text for a value JSON_VALID() rejected, or None when it does not decode at all"""
+    if not value or not value.strip():
+        return None
+    try:
+        return json_codec.dumps(json_codec.loads(value))
+    except json_codec.JSONDecodeError:
+        return None
+
+
+def migrate(apply=False):
+    from sqlalchemy import bindparam, text
+    from app import app, db
+
+    with app.app_context():
+        if db.engine.dialect.name not in ('mysql', 'mariadb'):
+            print(f"ℹ️ {db.engine.dialect.name} database: JSON columns are only converted on MariaDB / MySQL")
+            return 0
+
+        invalid = {}
+        for column in JSON_COLUMNS:
+            data_type = db.session.execute(text(
+                "SELECT DATA_TYPE FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'bookings' AND COLUMN_NAME = :column"
+            ), {'column': column}).scalar()
+            # MariaDB reports its JSON alias as longtext; a JSON_VALID check means it was converted
+            converted = data_type == 'json' or db.session.execute(text(
+                "SELECT COUNT(*) FROM information_schema.CHECK_CONSTRAINTS "
+                "WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = 'bookings' AND CHECK_CLAUSE LIKE :clause"
+            ), {'clause': f'%json_valid(`{column}`)%'}).scalar()
+            if converted:
+                print(f"✅ bookings.{column} is already a JSON column")
+                continue
+            rows = db.session.execute(text(
+                f"SELECT id, {column} FROM bookings WHERE {column} IS NOT NULL AND "
+                f"({column} = '' OR JSON_VALID({column}) = 0)"
+            )).fetchall()
+            invalid[column] = [{'id': row[0], 'value': row[1], 'fixed': _repair(row[1])} for row in rows]
+            fixed = sum(1 for row in invalid[column] if row['fixed'] is not None)
+            print(f"{'🔧' if apply else '🔍'} bookings.{column}: TEXT -> JSON, "
+                  f"{fixed} values with NaN / Infinity -> null, {len(rows) - fixed} undecodable values -> NULL")
+
+        if not invalid:
+            return 0
+        if not apply:
+            print("ℹ️ Dry run - run again with --apply")
+            return len(invalid)
+
+        try:
+            if any(invalid.values()):
+                os.makedirs(BACKUP_DIR, exist_ok=True)
+                backup = os.path.join(BACKUP_DIR, f"booking_json_invalid_{datetime.now():%Y%m%d_%H%M%S}.json")
+                with open(backup, 'w', encoding='utf-8') as f:
+                    json.dump(invalid, f, ensure_ascii=False, indent=2)
+                print(f"📄 Original values saved to {backup}")
+            for column, rows in invalid.items():
+                fixed = [{'id': row['id'], 'value': row['fixed']} for row in rows if row['fixed'] is not None]
+                if fixed:
+                    db.session.execute(text(f"UPDATE bookings SET {column} = :value WHERE id = :id"), fixed)
+                undecodable = [row['id'] for row in rows if row['fixed'] is None]
+                if undecodable:
+                    db.session.execute(text(f"UPDATE bookings SET {column} = NULL WHERE id IN :ids")
+                                       .bindparams(bindparam('ids', expanding=True)),
+                                       {'ids': undecodable})
+            db.session.commit()
+            # DDL commits implicitly on MariaDB; run it after the data is clean
+            for column in invalid:
+                db.session.execute(text(f"ALTER TABLE bookings MODIFY {column} JSON NULL"))
+                print(f"✅ bookings.{column} converted to JSON")
+            db.session.commit()
+        except Exception as e:
+            print(f"❌ Error converting JSON columns: {e}")
+            db.session.rollback()
+            raise
+    return len(invalid)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert Booking JSON TEXT columns to native JSON columns')
+    parser.add_argument('--apply', action='store_true', help='write the changes (default: dry run)')
+    args = parser.parse_args()
+    migrate(apply=args.apply)
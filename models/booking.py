@@ -1,6 +1,71 @@
 from extensions import db
+from models.column_types import SafeDateTime, SafeTime
+from sqlalchemy import event
+from utils import json_codec
 from utils.datetime_utils import naive_utc_now
 import json
+import logging
+import re
+
+# TEXT columns holding JSON; decoded values are cached per instance (see Booking._decoded_json)
+JSON_COLUMNS = ('guest_list', 'daily_services', 'voucher_images', 'voucher_album_ids', 'products')
+_GUEST_HTML_TAG = re.compile(r'<[^>]+>')
+
+
+def _parse_json_list(raw):
+    if not raw:
+        return []
+    if not isinstance(raw, (str, bytes)):
+        return raw  # native JSON column already decoded by the driver
+    try:
+        return json_codec.loads(raw)
+    except json_codec.JSONDecodeError:
+        return []
+
+
+def _parse_guest_list(raw):
+    if not raw:
+        return []
+    if not isinstance(raw, (str, bytes)):
+        return raw
+    try:
+        # Try JSON format first
+        return json_codec.loads(raw)
+    except json_codec.JSONDecodeError:
+        # Handle legacy HTML / plain text format: <br> to newlines, drop tags, one guest per line
+        text_with_breaks = raw.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
+        clean_text = _GUEST_HTML_TAG.sub('', text_with_breaks)
+        return [line.strip() for line in clean_text.split('\n') if line.strip()]
+
+
+def _fresh(value):
+    """Copy of a cached list, one level deep, so callers can append / edit items before set_*()"""
+    if isinstance(value, list):
+        return [dict(item) if isinstance(item, dict) else item for item in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def _json_text(value):
+    """Column value for set_*(): lists are dumped, JSON strings kept, undecodable text dropped.
+
+    get_*() already returned [] for undecodable text; storing NULL instead keeps
+    writes valid once the column is a native JSON column (migrate_booking_json_columns.py).
+    NaN / Infinity (which JSON_VALID() rejects) are stored as null.
+    """
+    if isinstance(value, list):
+        return json_codec.dumps(value)
+    if isinstance(value, str) and not json_codec.is_valid(value):
+        try:
+            return json_codec.dumps(json_codec.loads(value))
+        except json_codec.JSONDecodeError:
+            pass
+        if value.strip():
+            logging.getLogger(__name__).warning("⚠️ Dropping non-JSON value for a JSON column: %.60r", value)
+        return None
+    return value
+
 
 class Booking(db.Model):
     __tablename__ = 'bookings'
@@ -18,7 +83,7 @@ class Booking(db.Model):
     invoice_status = db.Column(db.String(20))  # paid, sent, draft, cancelled
     invoice_amount = db.Column(db.Numeric(10, 2))  # invoice amount
     is_paid = db.Column(db.Boolean, default=False)  # payment status
-    invoice_paid_date = db.Column(db.DateTime)  # payment date
+    invoice_paid_date = db.Column(SafeDateTime)  # payment date
     
     # Booking Details
     booking_type = db.Column(db.String(50), nullable=False)  # 'tour', 'hotel', 'transport'
@@ -35,12 +100,12 @@ class Booking(db.Model):
     STATUS_CANCELLED = 'cancelled'
     
     # Workflow Timestamps
-    confirmed_at = db.Column(db.DateTime)
-    quoted_at = db.Column(db.DateTime) 
-    invoiced_at = db.Column(db.DateTime)
-    paid_at = db.Column(db.DateTime)
-    vouchered_at = db.Column(db.DateTime)
-    completed_at = db.Column(db.DateTime)
+    confirmed_at = db.Column(SafeDateTime)
+    quoted_at = db.Column(SafeDateTime) 
+    invoiced_at = db.Column(SafeDateTime)
+    paid_at = db.Column(SafeDateTime)
+    vouchered_at = db.Column(SafeDateTime)
+    completed_at = db.Column(SafeDateTime)
     
     # Travel Information
     arrival_date = db.Column(db.Date)
@@ -74,7 +139,7 @@ class Booking(db.Model):
     # MPV Booking Specific Fields
     pickup_point = db.Column(db.String(255))
     destination = db.Column(db.String(255))
-    pickup_time = db.Column(db.Time)
+    pickup_time = db.Column(SafeTime)
     vehicle_type = db.Column(db.String(100))
     
     # Tour Voucher Specific Fields
@@ -104,12 +169,12 @@ class Booking(db.Model):
     currency = db.Column(db.String(10), default='THB')
     
     # Time and Deadline Management
-    time_limit = db.Column(db.DateTime, nullable=False)  # Time limit for booking confirmation (Required)
+    time_limit = db.Column(SafeDateTime, nullable=False)  # Time limit for booking confirmation (Required)
     due_date = db.Column(db.Date)  # Due date for payment or action
     
     # Metadata
-    created_at = db.Column(db.DateTime, default=naive_utc_now)
-    updated_at = db.Column(db.DateTime, default=naive_utc_now, onupdate=naive_utc_now)
+    created_at = db.Column(SafeDateTime, default=naive_utc_now)
+    updated_at = db.Column(SafeDateTime, default=naive_utc_now, onupdate=naive_utc_now)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     vendor_id = db.Column(db.Integer, db.ForeignKey('vendors.id'))  # legacy usage
     supplier_id = db.Column(db.Integer, db.ForeignKey('vendors.id'))  # new Supplier FK (soft rename)
@@ -134,23 +199,26 @@ class Booking(db.Model):
     def __repr__(self):
         return f'<Booking {self.booking_reference}>'
     
+    def _decoded_json(self, column, parse):
+        """Decode a JSON column once per loaded value.
+
+        The cache lives on the instance and is keyed by the raw column value
+        object: assignments (set_*(), direct writes) drop it through the
+        attribute set event, and a refresh / expire loads a new object, so a
+        stale entry is never returned. Callers get a copy (see _fresh).
+        """
+        raw = getattr(self, column)
+        cache = self.__dict__.get('_json_cache')
+        if cache is None:
+            cache = self.__dict__['_json_cache'] = {}
+        entry = cache.get(column)
+        if entry is None or entry[0] is not raw:
+            entry = cache[column] = (raw, parse(raw))
+        return _fresh(entry[1])
+
     def get_guest_list(self):
-        """Return guest list as Python list"""
-        if self.guest_list:
-            try:
-                # Try JSON format first
-                return json.loads(self.guest_list)
-            except json.JSONDecodeError:
-                # Handle legacy HTML format
-                import re
-                # First convert <br> tags to newlines
-                text_with_breaks = self.guest_list.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
-                # Remove all HTML tags
-                clean_text = re.sub(r'<[^>]+>', '', text_with_breaks)
-                # Split by newlines and filter empty lines
-                lines = [line.strip() for line in clean_text.split('\n') if line.strip()]
-                return lines
-        return []
+        """Return guest list as Python list (JSON, or legacy HTML / one guest per line)"""
+        return self._decoded_json('guest_list', _parse_guest_list)
     
     def set_guest_list(self, guests):
         """Set guest list from Python list"""
@@ -453,35 +521,19 @@ class Booking(db.Model):
     
     def get_daily_services(self):
         """Return daily services as Python list"""
-        if self.daily_services:
-            try:
-                return json.loads(self.daily_services)
-            except json.JSONDecodeError:
-                return []
-        return []
+        return self._decoded_json('daily_services', _parse_json_list)
     
     def set_daily_services(self, services):
         """Set daily services from Python list"""
-        if isinstance(services, list):
-            self.daily_services = json.dumps(services)
-        else:
-            self.daily_services = services
+        self.daily_services = _json_text(services)
     
     def get_products(self):
         """Return products list as Python list"""
-        if self.products:
-            try:
-                return json.loads(self.products)
-            except json.JSONDecodeError:
-                return []
-        return []
+        return self._decoded_json('products', _parse_json_list)
     
     def set_products(self, products):
         """Set products list from Python list"""
-        if isinstance(products, list):
-            self.products = json.dumps(products)
-        else:
-            self.products = products
+        self.products = _json_text(products)
     
     def get_voucher_rows(self):
         """Return voucher rows (map from daily_services). Each row dict keys:
@@ -513,23 +565,15 @@ class Booking(db.Model):
                         'service_by': r.get('service_by',''),
                         'type': r.get('type','')
                     })
-            self.daily_services = json.dumps(safe)
+            self.daily_services = json_codec.dumps(safe)
 
     def get_voucher_images(self):
         """Return voucher images as Python list"""
-        if self.voucher_images:
-            try:
-                return json.loads(self.voucher_images)
-            except json.JSONDecodeError:
-                return []
-        return []
+        return self._decoded_json('voucher_images', _parse_json_list)
 
     def set_voucher_images(self, images):
         """Set voucher images from Python list"""
-        if isinstance(images, list):
-            self.voucher_images = json.dumps(images)
-        else:
-            self.voucher_images = images
+        self.voucher_images = _json_text(images)
 
     def add_voucher_image(self, image_data):
         """Add a single voucher image to the list"""
@@ -545,19 +589,12 @@ class Booking(db.Model):
     
     def get_voucher_album_ids(self):
         """Get list of selected voucher album IDs"""
-        if self.voucher_album_ids:
-            try:
-                return json.loads(self.voucher_album_ids)
-            except:
-                return []
-        return []
+        return self._decoded_json('voucher_album_ids', _parse_json_list)
     
     def set_voucher_album_ids(self, album_ids):
         """Set voucher album IDs"""
-        if isinstance(album_ids, list):
-            self.voucher_album_ids = json.dumps(album_ids)
-        elif isinstance(album_ids, str):
-            self.voucher_album_ids = album_ids
+        if isinstance(album_ids, (list, str)):
+            self.voucher_album_ids = _json_text(album_ids)
         else:
             self.voucher_album_ids = json.dumps([])
     
@@ -855,3 +892,15 @@ class Booking(db.Model):
         # 3. Haven't synced recently
         return (self.quote_id and 
                 (not self.invoice_number or not self.is_invoice_paid()))
+
+
+def _invalidate_json_cache(column):
+    def listener(target, value, oldvalue, initiator):
+        cache = target.__dict__.get('_json_cache')
+        if cache:
+            cache.pop(column, None)
+    return listener
+
+
+for _column in JSON_COLUMNS:
+    event.listen(getattr(Booking, _column), 'set', _invalidate_json_cache(_column))
@@ -0,0 +1,17 @@
+"""
+Booking Day Model
+One row per booking per travel day, for indexed calendar / conflict / occupancy lookups.
+Maintained by services/booking_occupancy_service.py
+"""
+from extensions import db
+
+
+class BookingDay(db.Model):
+    __tablename__ = 'booking_days'
+
+    day = db.Column(db.Date, primary_key=True)  # arrival_date .. departure_date (inclusive)
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id', ondelete='CASCADE'),
+                           primary_key=True, index=True)
+
+    def __repr__(self):
+        return f'<BookingDay {self.day} booking={self.booking_id}>'
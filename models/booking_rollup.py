@@ -0,0 +1,20 @@
+"""
+Booking Daily Rollup Model
+Pre-aggregated booking counts and revenue per creation day, status and type.
+Maintained by services/booking_rollup_service.py
+"""
+from extensions import db
+from decimal import Decimal
+
+
+class BookingDailyRollup(db.Model):
+    __tablename__ = 'booking_daily_rollups'
+
+    day = db.Column(db.Date, primary_key=True)                   # DATE(bookings.created_at)
+    status = db.Column(db.String(50), primary_key=True)          # '' when NULL
+    booking_type = db.Column(db.String(50), primary_key=True)    # '' when NULL
+    booking_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=Decimal('0.00'))  # SUM(total_amount)
+
+    def __repr__(self):
+        return f'<BookingDailyRollup {self.day} {self.status}/{self.booking_type}={self.booking_count}>'
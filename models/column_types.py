@@ -0,0 +1,146 @@
+"""
+Column types for MariaDB date/time values
+แปลงค่า DATETIME / TIME จาก PyMySQL เป็น datetime / time โดยตรง (แทน monkeypatch ทั้งระบบ)
+
+PyMySQL hands back ``datetime`` for valid DATETIME values, ``timedelta`` for
+TIME, and the raw string when a value cannot be converted (zero dates such
+as ``0000-00-00 00:00:00``, or TIME values outside a clock day).
+SQLAlchemy's MySQL TIME processor assumes a ``timedelta`` and fails on those
+strings. Instead of patching every MySQL type globally, the columns that
+have held such values use:
+
+    SafeDateTime - DATETIME; zero/invalid values load as None
+    SafeTime     - TIME; timedelta / string / time all load as ``time``
+
+Valid values take one class check per value. Other dialects (SQLite in
+scripts and benchmarks) keep SQLAlchemy's standard processing.
+
+cleanup_datetime_columns.py rewrites the stored corrupt values, and
+``install_session_settings()`` keeps NO_ZERO_DATE on for new writes.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import DateTime, Time, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import TypeDecorator
+
+logger = logging.getLogger(__name__)
+
+MYSQL_DIALECTS = {'mysql', 'mariadb'}
+SECONDS_PER_DAY = 24 * 60 * 60
+
+SESSION_SETTINGS = (
+    "SET time_zone = '+00:00'",
+    "SET sql_mode = 'STRICT_TRANS_TABLES,NO_ZERO_DATE,NO_ZERO_IN_DATE,ERROR_FOR_DIVISION_BY_ZERO'",
+)
+
+
+def _text(value):
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode('ascii', 'replace')
+    return value.strip() if isinstance(value, str) else None
+
+
+def to_datetime(value):
+    """datetime for a DATETIME driver value; None for NULL, zero or unparseable values"""
+    if value is None or value.__class__ is datetime:
+        return value
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    text = _text(value)
+    if not text or text.startswith('0000-00-00'):
+        return None
+    try:
+        return datetime.fromisoformat(text[:-1] if text.endswith('Z') else text)
+    except ValueError:
+        logger.warning(f'Unreadable DATETIME value {text!r} loaded as NULL')
+        return None
+
+
+def to_time(value):
+    """time for a TIME driver value; None for NULL, out-of-day or unparseable values"""
+    if value is None or value.__class__ is time:
+        return value
+    if isinstance(value, timedelta):
+        seconds = value.days * SECONDS_PER_DAY + value.seconds
+        if 0 <= seconds < SECONDS_PER_DAY:
+            return time(seconds // 3600, seconds % 3600 // 60, seconds % 60, value.microseconds)
+        logger.warning(f'TIME value {value} is outside a clock day, loaded as NULL')
+        return None
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    text = _text(value)
+    if not text:
+        return None
+    try:
+        return time.fromisoformat(text)
+    except ValueError:
+        pass
+    try:
+        # MySQL also returns single-digit hours ('9:30:00') and odd fractions
+        parts = [int(float(part)) for part in text.split(':')]
+        return time(*parts[:3])
+    except (TypeError, ValueError):
+        logger.warning(f'Unreadable TIME value {text!r} loaded as NULL')
+        return None
+
+
+class SafeDateTime(TypeDecorator):
+    """DATETIME that loads zero/invalid MariaDB values as None"""
+
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            return to_datetime(value)
+        return value
+
+    def result_processor(self, dialect, coltype):
+        if dialect.name in MYSQL_DIALECTS:
+            return to_datetime
+        return super().result_processor(dialect, coltype)
+
+
+class SafeTime(TypeDecorator):
+    """TIME that always loads as ``datetime.time`` (PyMySQL returns timedelta or str)"""
+
+    impl = Time
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, (str, timedelta)):
+            return to_time(value)
+        return value
+
+    def result_processor(self, dialect, coltype):
+        if dialect.name in MYSQL_DIALECTS:
+            return to_time
+        return super().result_processor(dialect, coltype)
+
+
+def _apply_session_settings(dbapi_connection, connection_record):
+    """UTC session time zone and strict date modes on every new MariaDB connection"""
+    if not type(dbapi_connection).__module__.startswith(('pymysql', 'mysql', 'MySQLdb', 'mariadb')):
+        return
+    try:
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in SESSION_SETTINGS:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+    except Exception as e:
+        logger.warning(f'⚠️ Could not apply MariaDB session settings: {e}')
+
+
+def install_session_settings():
+    """Register the connect listener for every engine (idempotent)"""
+    if not event.contains(Engine, 'connect', _apply_session_settings):
+        event.listen(Engine, 'connect', _apply_session_settings)
@@ -1,10 +1,7 @@
 from extensions import db
 from utils.datetime_utils import naive_utc_now
 from sqlalchemy import Column, Integer, String, Text, DECIMAL, DateTime
-from datetime_fix import SafeDateTime
-from extensions import db
-# Initialize datetime compatibility - TEMPORARILY DISABLED
-import datetime_fix
+from models.column_types import SafeDateTime
 
 
 
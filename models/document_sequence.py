@@ -0,0 +1,31 @@
+"""
+Document Sequence Model
+Counter rows used by services/sequence_service.py to allocate quote,
+invoice and booking reference numbers.
+"""
+from extensions import db
+from datetime import datetime
+
+
+class DocumentSequence(db.Model):
+    __tablename__ = 'document_sequences'
+    __table_args__ = (
+        db.UniqueConstraint('name', 'period', name='uq_document_sequences_name_period'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(32), nullable=False)       # 'quote', 'invoice', 'booking'
+    period = db.Column(db.String(16), nullable=False)     # e.g. '2601' (YYMM) or '260115' (YYMMDD)
+    last_value = db.Column(db.Integer, nullable=False, default=0)  # last number handed out
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DocumentSequence {self.name}/{self.period}={self.last_value}>'
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'period': self.period,
+            'last_value': self.last_value,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
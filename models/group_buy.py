@@ -113,11 +113,23 @@ class GroupBuyCampaign(db.Model):
             return float(self.discount_percentage)
         return (self.savings_amount / float(self.regular_price)) * 100
     
+    def attach_stats(self, stats):
+        """Attach precomputed stats (services/group_buy_stats_service.py) for this request"""
+        self._group_stats = stats
+    
+    @property
+    def group_stats(self):
+        """Stats attached by GroupBuyStatsService.attach(), or None"""
+        return self.__dict__.get('_group_stats')
+    
     @property
     def inventory_used(self):
         """Inventory ที่ใช้ไปแล้ว - นับจากจำนวนกลุ่มจริง"""
         if not self.total_slots:
             return 0
+        # ใช้ค่าที่คำนวณไว้แล้ว (query เดียวทั้งหน้า) ถ้ามี
+        if self.group_stats is not None:
+            return self.group_stats['inventory_used']
         # นับจำนวนกลุ่มที่ active หรือ success
         used_groups = GroupBuyGroup.query.filter(
             GroupBuyGroup.campaign_id == self.id,
@@ -454,7 +466,7 @@ class GroupBuyParticipant(db.Model):
     
     # Payment Status
     payment_id = db.Column(db.Integer, db.ForeignKey('group_buy_payments.id'))
-    payment_status = db.Column(db.String(50), default='pending')  # pending, paid, refunded, failed
+    payment_status = db.Column(db.String(50), default='pending')  # pending, authorized, paid, released, refund_pending, refunded, failed
     payment_amount = db.Column(db.Numeric(12, 2))
     payment_reference = db.Column(db.String(255))
     payment_date = db.Column(db.DateTime)
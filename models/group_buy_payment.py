@@ -2,6 +2,7 @@
 Payment System Models for Group Buy
 """
 from extensions import db
+from models.column_types import SafeTime
 from datetime import datetime
 
 def naive_utc_now():
@@ -56,7 +57,7 @@ class GroupBuyPayment(db.Model):
     # Bank Transfer fields
     bank_account_id = db.Column(db.Integer)
     transfer_date = db.Column(db.Date)
-    transfer_time = db.Column(db.Time)
+    transfer_time = db.Column(SafeTime)
     slip_image = db.Column(db.String(500))
     
     # Stripe fields
@@ -89,66 +89,9 @@ class Quote(db.Model):
         return ''.join(secrets.choice(alphabet) for _ in range(64))
         
     def _generate_quote_number(self):
-        """Generate unique quote number using app_settings for next number"""
-        from app import db
-        from sqlalchemy import text
-        
-        # Get current next_quote_number from app_settings
-        result = db.session.execute(
-            text("SELECT setting_value FROM app_settings WHERE setting_key = 'next_quote_number'")
-        ).fetchone()
-        
-        if result and result[0]:
-            # Parse the current format (e.g., "2511026" or "QT2601001")
-            current_value = result[0].strip()
-            
-            # Remove QT prefix if exists
-            if current_value.startswith('QT'):
-                current_value = current_value[2:]
-            
-            # Extract numeric part and increment
-            try:
-                # For format like "2601001", we want the full number
-                current_number = int(current_value)
-                next_number = current_number + 1
-                
-                # Format: YYMM + running number (e.g., 2601001, 2601002, etc.)
-                quote_number = f'QT{next_number}'
-            except ValueError:
-                # Fallback to default if parsing fails
-                quote_number = 'QT2601001'
-                next_number = 2601001
-        else:
-            # Initialize if not exists
-            quote_number = 'QT2601001'
-            next_number = 2601001
-        
-        # Verify uniqueness
-        from models.booking import Booking
-        max_attempts = 100
-        attempts = 0
-        
-        while attempts < max_attempts:
-            existing_quote = Quote.query.filter(Quote.quote_number == quote_number).first()
-            existing_booking = Booking.query.filter(Booking.quote_number == quote_number).first()
-            
-            if not existing_quote and not existing_booking:
-                # Update app_settings with next number
-                db.session.execute(
-                    text("UPDATE app_settings SET setting_value = :next_value, updated_at = NOW() WHERE setting_key = 'next_quote_number'"),
-                    {"next_value": str(next_number + 1)}
-                )
-                return quote_number
-            
-            # Number already exists, increment and try again
-            next_number += 1
-            quote_number = f'QT{next_number}'
-            attempts += 1
-        
-        # Fallback if all attempts failed
-        import time
-        fallback = f'QT{int(time.time()) % 10000000}'
-        return fallback
+        """Generate unique quote number from the central document sequence"""
+        from services.sequence_service import SequenceService
+        return SequenceService.next_number('quote')
     
     @property
     def is_expired(self):
@@ -0,0 +1,43 @@
+"""
+Stored Artifact Models
+Generated / uploaded files on disk with their expiry, plus a journal of deletions.
+Maintained by services/storage_lifecycle_service.py
+"""
+from extensions import db
+from utils.datetime_utils import naive_utc_now
+
+
+class StoredArtifact(db.Model):
+    __tablename__ = 'stored_artifacts'
+
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(500), nullable=False, unique=True)
+    kind = db.Column(db.String(30), nullable=False)  # voucher_file, png_cache, share_qr, share_social, document
+    booking_id = db.Column(db.Integer, index=True)
+    owner_id = db.Column(db.Integer)  # row that owns the file (e.g. voucher_files.id)
+    size_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=naive_utc_now)
+    expires_at = db.Column(db.DateTime, index=True)  # NULL = kept until purged
+
+    __table_args__ = (
+        db.Index('idx_stored_artifacts_kind_created', 'kind', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<StoredArtifact {self.kind} {self.path}>'
+
+
+class ArtifactDeletion(db.Model):
+    __tablename__ = 'artifact_deletions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(500), nullable=False)
+    kind = db.Column(db.String(30), nullable=False)
+    booking_id = db.Column(db.Integer)
+    owner_id = db.Column(db.Integer)
+    size_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    reason = db.Column(db.String(20), nullable=False)  # expired, purged, missing
+    deleted_at = db.Column(db.DateTime, nullable=False, default=naive_utc_now, index=True)
+
+    def __repr__(self):
+        return f'<ArtifactDeletion {self.reason} {self.path}>'
@@ -245,6 +245,13 @@ def system_health():
             'environment': os.environ.get('FLASK_ENV', 'production')
         }
         
+        # Cache backend และ hit/miss ของ worker นี้ (ไม่นับเป็นองค์ประกอบที่ต้อง healthy)
+        try:
+            from services.cache_service import get_cache
+            health_status['cache'] = get_cache().stats()
+        except Exception as cache_error:
+            health_status['cache'] = {'error': str(cache_error)}
+        
         # ตรวจสอบว่าทุกองค์ประกอบทำงานได้
         all_healthy = all(health_status['components'].values())
         if not all_healthy:
@@ -260,6 +267,33 @@ def system_health():
             'timestamp': int(time.time())
         }), 500
 
+@api_enhanced_bp.route('/metrics')
+def metrics():
+    """
+    Prometheus metrics (latency, SQL per request, render timings) of all workers
+    เมตริกสำหรับ Prometheus - ต้องส่ง METRICS_TOKEN (Authorization: Bearer) หรือเป็น admin
+
+    No localhost exemption: nginx proxies every request from 127.0.0.1, and the
+    token is not read from the query string (it would land in access logs).
+    """
+    import hmac
+    from services import metrics_service
+    
+    token = current_app.config.get('METRICS_TOKEN')
+    auth = request.headers.get('Authorization', '')
+    supplied = auth[len('Bearer '):] if auth.startswith('Bearer ') else ''
+    allowed = (
+        (token and supplied and hmac.compare_digest(supplied, token))
+        or (current_user.is_authenticated and getattr(current_user, 'is_admin', False))
+    )
+    if not allowed:
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    
+    return current_app.response_class(
+        metrics_service.render_prometheus(),
+        mimetype='text/plain; version=0.0.4'
+    )
+
 # Error handlers สำหรับ Enhanced API
 @api_enhanced_bp.errorhandler(404)
 def api_not_found(error):
@@ -2290,7 +2290,7 @@ def generate_service_proposal_pdf(booking_id):
 def generate_service_proposal_png(booking_id):
     """Generate PNG image from Service Proposal PDF using ClassicPDFGenerator"""
     from services.classic_pdf_generator import ClassicPDFGenerator
-    from services.pdf_image import pdf_to_png_bytes_list, pdf_to_long_png_bytes
+    from services.pdf_image import pdf_to_long_png_bytes
     from flask import send_file, abort, Response
     import io, os
     
@@ -2354,22 +2354,11 @@ def generate_service_proposal_png(booking_id):
             if os.path.exists(pdf_path):
                 os.remove(pdf_path)
         
-        # Convert PDF to PNG (all pages)
-        png_list = pdf_to_png_bytes_list(pdf_bytes, zoom=2.0)
-        if not png_list:
+        # Convert PDF to PNG (all pages stacked vertically, rasterized once)
+        png_bytes = pdf_to_long_png_bytes(pdf_bytes, zoom=2.0, page_spacing=30)
+        if not png_bytes:
             abort(500, description="PNG conversion failed")
         
-        # Check if PDF has multiple pages
-        if len(png_list) > 1:
-            # Create long PNG with all pages stacked vertically
-            png_bytes = pdf_to_long_png_bytes(pdf_bytes, zoom=2.0, page_spacing=30)
-            if not png_bytes:
-                # Fallback to first page if long PNG fails
-                png_bytes = png_list[0]
-        else:
-            # Single page PDF
-            png_bytes = png_list[0]
-        
         # Return PNG image
         return Response(
             png_bytes,
@@ -2396,7 +2385,7 @@ def generate_service_proposal_png(booking_id):
 def generate_booking_png(booking_id):
     """Generate PNG image from Service Proposal PDF using Classic PDF Generator with PNG conversion"""
     from services.classic_pdf_generator import ClassicPDFGenerator
-    from services.pdf_image import pdf_to_png_bytes_list
+    from services.pdf_image import pdf_to_long_png_bytes
     from flask import send_file, abort, Response
     import io, os
     
@@ -2470,23 +2459,11 @@ def generate_booking_png(booking_id):
             if os.path.exists(pdf_path):
                 os.remove(pdf_path)
         
-        # Convert PDF to PNG (all pages)
-        png_list = pdf_to_png_bytes_list(pdf_bytes, zoom=2.0)
-        if not png_list:
+        # Convert PDF to PNG (all pages stacked vertically, rasterized once)
+        png_bytes = pdf_to_long_png_bytes(pdf_bytes, zoom=2.0, page_spacing=30)
+        if not png_bytes:
             flash('Error converting PDF to PNG', 'error')
             return redirect(url_for('booking.view', id=booking_id))
-        
-        # Check if PDF has multiple pages
-        if len(png_list) > 1:
-            from services.pdf_image import pdf_to_long_png_bytes
-            # Create long PNG with all pages stacked vertically
-            png_bytes = pdf_to_long_png_bytes(pdf_bytes, zoom=2.0, page_spacing=30)
-            if not png_bytes:
-                # Fallback to first page if long PNG fails
-                png_bytes = png_list[0]
-        else:
-            # Single page - use as is
-            png_bytes = png_list[0]
         filename = f'booking_{booking.booking_reference}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png'
         
         return Response(
@@ -3878,24 +3855,18 @@ def test_generate_quote_pdf(booking_id):
 def generate_quote_pdf_public(booking_id):
     """Generate Quote PDF for booking - Public access with WeasyPrint + Jinja2"""
     try:
-        # ⭐ REAL-TIME DATA SYNC: ดึงข้อมูลล่าสุดจาก database แบบ force refresh
-        from extensions import db
-        from services.universal_booking_extractor import UniversalBookingExtractor
-        
-        # Clear any cached data and force fresh query
-        db.session.close()
+        # Use WeasyPrint Quote Generator with quote_template_final_v2.html
+        from services.weasyprint_quote_generator import WeasyPrintQuoteGenerator
         
-        # Get fresh booking data using Universal Extractor
-        booking = UniversalBookingExtractor.get_fresh_booking_data(booking_id)
+        # ⭐ REAL-TIME DATA SYNC: booking + customer + quote number ใน query เดียว
+        # (generator ใช้ข้อมูลชุดนี้ และ reuse PDF เดิมถ้าเนื้อหาไม่เปลี่ยน)
+        quote_generator = WeasyPrintQuoteGenerator()
+        booking = quote_generator.fresh_booking(booking_id)
         if not booking:
             return f'Booking {booking_id} not found', 404
             
         logger.info(f'Generating Quote PDF for booking {booking.booking_reference} (WeasyPrint + Jinja2)')
         
-        # Use WeasyPrint Quote Generator with quote_template_final_v2.html
-        from services.weasyprint_quote_generator import WeasyPrintQuoteGenerator
-        
-        quote_generator = WeasyPrintQuoteGenerator()
         pdf_filename = quote_generator.generate_quote_pdf(booking)
         
         if pdf_filename:
@@ -7,6 +7,9 @@ from models.booking import Booking
 from models.booking_task import BookingTask
 from models.user import User
 from extensions import db
+from sqlalchemy.orm import joinedload
+from services.booking_occupancy_service import BookingOccupancyService
+from services.task_query_service import TaskQueryService, DEADLINE_WINDOWS, TASK_PAGE_SIZE, TASK_PAGE_MAX
 from datetime import datetime, date, timedelta
 from utils.logging_config import get_logger
 from services.email_service import EmailService
@@ -55,8 +58,12 @@ def calendar_events():
         start_date = request.args.get('start')
         end_date = request.args.get('end')
         
-        # Build query
-        query = Booking.query
+        # JOIN with users table to get creator information
+        query = db.session.query(
+            Booking, User.username, User.role
+        ).outerjoin(
+            User, Booking.created_by == User.id
+        ).options(joinedload(Booking.customer))
         
         if start_date and end_date:
             # Handle timezone format from FullCalendar (e.g., 2025-11-30T00:00:00+07:00)
@@ -66,8 +73,9 @@ def calendar_events():
             start = datetime.strptime(start_str, '%Y-%m-%d').date()
             end = datetime.strptime(end_str, '%Y-%m-%d').date()
             
-            # Get bookings within date range
+            # Get bookings within date range (booking_days narrows the candidates by index)
             query = query.filter(
+                BookingOccupancyService.overlap_filter(start, end),
                 db.or_(
                     db.and_(Booking.arrival_date >= start, Booking.arrival_date <= end),
                     db.and_(Booking.departure_date >= start, Booking.departure_date <= end),
@@ -75,14 +83,7 @@ def calendar_events():
                 )
             )
         
-        # JOIN with users table to get creator information
-        bookings_with_users = db.session.query(
-            Booking, User.username, User.role
-        ).outerjoin(
-            User, Booking.created_by == User.id
-        ).filter(
-            Booking.id.in_([b.id for b in query.all()])
-        ).all()
+        bookings_with_users = query.all()
         
         events = []
         for booking, created_by_name, created_by_role in bookings_with_users:
@@ -199,8 +200,9 @@ def check_booking_conflicts():
         end = datetime.strptime(departure_date, '%Y-%m-%d').date()
         
         # Find overlapping bookings
-        query = Booking.query.filter(
+        query = Booking.query.options(joinedload(Booking.customer)).filter(
             Booking.status.in_(['confirmed', 'paid', 'vouchered']),
+            BookingOccupancyService.overlap_filter(start, end),
             db.or_(
                 db.and_(Booking.arrival_date >= start, Booking.arrival_date < end),
                 db.and_(Booking.departure_date > start, Booking.departure_date <= end),
@@ -220,8 +222,8 @@ def check_booking_conflicts():
                 'id': b.id,
                 'reference': b.booking_reference,
                 'customer': b.customer.name if b.customer else 'N/A',
-                'arrival': b.arrival_date.strftime('%Y-%m-%d'),
-                'departure': b.departure_date.strftime('%Y-%m-%d'),
+                'arrival': b.arrival_date.strftime('%Y-%m-%d') if b.arrival_date else 'N/A',
+                'departure': b.departure_date.strftime('%Y-%m-%d') if b.departure_date else 'N/A',
                 'status': b.status
             } for b in conflicts]
         })
@@ -230,6 +232,33 @@ def check_booking_conflicts():
         return jsonify({'error': str(e)}), 500
 
 
+@calendar_bp.route('/api/calendar/occupancy')
+@login_required
+def calendar_occupancy():
+    """Bookings and passengers travelling on each day (per-day capacity)"""
+    try:
+        start_date = request.args.get('start')
+        end_date = request.args.get('end')
+        if not start_date or not end_date:
+            return jsonify({'error': 'Missing dates'}), 400
+        
+        start = datetime.strptime(start_date.split('T')[0], '%Y-%m-%d').date()
+        end = datetime.strptime(end_date.split('T')[0], '%Y-%m-%d').date()
+        if end < start or (end - start).days > 370:
+            return jsonify({'error': 'Invalid date range (max 370 days)'}), 400
+        
+        statuses = [s for s in request.args.get('status', '').split(',') if s] or None
+        return jsonify({
+            'days': BookingOccupancyService.daily_occupancy(start, end, statuses),
+            'indexed': BookingOccupancyService.is_available()
+        })
+    except ValueError:
+        return jsonify({'error': 'Invalid date format (YYYY-MM-DD)'}), 400
+    except Exception as e:
+        logger.error(f"Error fetching occupancy: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
 # ============================================================================
 # DAILY REPORT
 # ============================================================================
@@ -258,7 +287,10 @@ def daily_report_data():
             Booking, User.username, User.role
         ).outerjoin(
             User, Booking.created_by == User.id
+        ).options(
+            joinedload(Booking.customer)
         ).filter(
+            BookingOccupancyService.overlap_filter(start_date, end_date),
             db.or_(
                 db.and_(Booking.arrival_date >= start_date, Booking.arrival_date <= end_date),
                 db.and_(Booking.departure_date >= start_date, Booking.departure_date <= end_date)
@@ -794,29 +826,54 @@ def send_task_line(task_id):
 @calendar_bp.route('/api/tasks/all', methods=['GET'])
 @login_required
 def get_all_tasks():
-    """Get all tasks with booking and customer info"""
+    """Get top-level tasks with booking and customer info, one keyset page at a time
+    
+    Query args: cursor, limit, status, priority, assigned (me | unassigned | user id),
+    deadline (overdue | today | this_week | upcoming), deadline_from, deadline_to, booking_id
+    """
     try:
-        tasks = BookingTask.query.filter_by(parent_task_id=None).order_by(
-            BookingTask.is_completed.asc(),
-            BookingTask.deadline.asc(),
-            BookingTask.created_at.desc()
-        ).all()
-        
-        tasks_data = []
-        for task in tasks:
-            task_dict = task.to_dict(include_subtasks=False)
-            
-            # Add booking info
-            if task.booking:
-                task_dict['booking_reference'] = task.booking.booking_reference
-                task_dict['customer_name'] = task.booking.customer.name if task.booking.customer else None
-            
-            tasks_data.append(task_dict)
+        assigned = request.args.get('assigned') or request.args.get('assigned_to')
+        if assigned == 'me':
+            assigned = current_user.id
+        elif assigned and assigned != 'unassigned' and not str(assigned).isdigit():
+            return jsonify({'error': 'Invalid assigned filter'}), 400
+        
+        deadline = request.args.get('deadline') or None
+        if deadline and deadline not in DEADLINE_WINDOWS:
+            return jsonify({'error': 'Invalid deadline filter'}), 400
+        
+        def parse_day(name):
+            value = request.args.get(name)
+            return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+        
+        try:
+            limit = max(1, min(int(request.args.get('limit', TASK_PAGE_SIZE)), TASK_PAGE_MAX))
+            deadline_from, deadline_to = parse_day('deadline_from'), parse_day('deadline_to')
+            booking_id = request.args.get('booking_id', type=int)
+        except ValueError:
+            return jsonify({'error': 'Invalid limit or date (YYYY-MM-DD)'}), 400
+        
+        query = TaskQueryService.filtered_query(
+            assigned_to=assigned or None,
+            status=request.args.get('status') or None,
+            priority=request.args.get('priority') or None,
+            deadline=deadline,
+            deadline_from=deadline_from,
+            deadline_to=deadline_to,
+            booking_id=booking_id
+        )
+        cursor = request.args.get('cursor')
+        tasks, next_cursor = TaskQueryService.page(query, cursor, limit)
         
-        return jsonify({
+        response = {
             'success': True,
-            'tasks': tasks_data
-        })
+            'tasks': [TaskQueryService.serialize(task) for task in tasks],
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }
+        if not cursor:
+            response['summary'] = TaskQueryService.summary(current_user.id)
+        return jsonify(response)
     except Exception as e:
         logger.error(f"Error fetching all tasks: {e}")
         return jsonify({'error': str(e)}), 500
@@ -839,7 +896,7 @@ def check_task_deadlines():
         tomorrow = today + timedelta(days=1)
         
         # Find overdue tasks
-        overdue_tasks = BookingTask.query.filter(
+        overdue_tasks = BookingTask.query.options(*TaskQueryService.list_options()).filter(
             and_(
                 BookingTask.deadline < today,
                 BookingTask.is_completed == False,
@@ -848,7 +905,7 @@ def check_task_deadlines():
         ).all()
         
         # Find tasks due today
-        due_today = BookingTask.query.filter(
+        due_today = BookingTask.query.options(*TaskQueryService.list_options()).filter(
             and_(
                 BookingTask.deadline == today,
                 BookingTask.is_completed == False,
@@ -857,7 +914,7 @@ def check_task_deadlines():
         ).all()
         
         # Find tasks due tomorrow
-        due_tomorrow = BookingTask.query.filter(
+        due_tomorrow = BookingTask.query.options(*TaskQueryService.list_options()).filter(
             and_(
                 BookingTask.deadline == tomorrow,
                 BookingTask.is_completed == False,
@@ -991,25 +1048,16 @@ def check_task_deadlines():
 def get_task_alert_count():
     """Get count of tasks with alerts (overdue and due today) for current user"""
     try:
-        from sqlalchemy import and_, or_
         today = date.today()
         
-        # Count overdue and due today tasks assigned to current user
-        alert_count = BookingTask.query.filter(
-            and_(
-                or_(
-                    BookingTask.deadline < today,
-                    BookingTask.deadline == today
-                ),
-                BookingTask.is_completed == False,
-                BookingTask.assigned_to == current_user.id,
-                BookingTask.parent_task_id.is_(None)
-            )
-        ).count()
+        # Overdue and due today tasks assigned to current user (cached per user, dropped on task writes)
+        counts = TaskQueryService.alert_counts(current_user.id, today)
         
         return jsonify({
             'success': True,
-            'alert_count': alert_count
+            'alert_count': counts['total'],
+            'overdue': counts['overdue'],
+            'due_today': counts['due_today']
         })
     except Exception as e:
         logger.error(f"Error getting alert count: {e}")
@@ -2,8 +2,12 @@ from flask import Blueprint, render_template, request, jsonify, current_app, ses
 from flask_login import login_required, current_user
 from models.customer import Customer
 from models.user import User
+from services.booking_rollup_service import BookingRollupService
+from services.cache_service import get_cache
 from extensions import db
+from utils.datetime_utils import naive_utc_now
 from datetime import datetime, timedelta
+from decimal import Decimal
 from sqlalchemy import func, text
 import pymysql
 
@@ -38,9 +42,77 @@ class BookingDisplay:
         # Create customer object for template compatibility
         self.customer = CustomerDisplay(customer_name or 'No Customer')
 
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+    except ValueError:
+        return None
+
+def _booking_stats(date_from=None, date_to=None):
+    """Booking stats from booking_daily_rollups; scans bookings instead when the
+    rollups are not maintained (table missing, BOOKING_ROLLUPS_ENABLED=false or
+    created after startup - see BookingRollupService.setup_listeners)."""
+    if BookingRollupService.is_available():
+        try:
+            return BookingRollupService.summary(date_from, date_to)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning(f"Booking rollups unavailable, scanning bookings: {e}")
+    
+    conditions = []
+    params = {}
+    if date_from:
+        conditions.append('created_at >= :date_from')
+        params['date_from'] = date_from
+    if date_to:
+        conditions.append('created_at < :date_to')
+        params['date_to'] = date_to + timedelta(days=1)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    # Same month boundary as BookingRollupService.summary()
+    params['revenue_from'] = date_from or naive_utc_now().date().replace(day=1)
+    rows = db.session.execute(text(f"""
+        SELECT status, booking_type, COUNT(*) AS bookings,
+               COALESCE(SUM(CASE WHEN status = 'confirmed' AND created_at >= :revenue_from
+                                 THEN total_amount ELSE 0 END), 0) AS confirmed_revenue
+        FROM bookings{where}
+        GROUP BY status, booking_type
+    """), params).fetchall()
+    
+    status_counts = {}
+    type_counts = {}
+    for row in rows:
+        status_counts[row.status] = status_counts.get(row.status, 0) + row.bookings
+        type_counts[row.booking_type] = type_counts.get(row.booking_type, 0) + row.bookings
+    return {
+        'total_bookings': sum(status_counts.values()),
+        'status_counts': status_counts,
+        'confirmed_revenue': sum((row.confirmed_revenue or 0) for row in rows),
+        'booking_types': sorted(type_counts.items(), key=lambda item: -item[1]),
+    }
+
+def _booking_daily_series(date_from, date_to, status=None):
+    """[(day, bookings, revenue)] per creation day; live scan when the rollups are not maintained"""
+    if BookingRollupService.is_available():
+        return BookingRollupService.daily_series(date_from, date_to, status=status)
+    params = {'date_from': date_from, 'date_to': date_to + timedelta(days=1)}
+    status_sql = ''
+    if status:
+        status_sql = ' AND status = :status'
+        params['status'] = status
+    rows = db.session.execute(text(f"""
+        SELECT DATE(created_at) AS day, COUNT(*) AS bookings, COALESCE(SUM(total_amount), 0) AS revenue
+        FROM bookings
+        WHERE created_at >= :date_from AND created_at < :date_to{status_sql}
+        GROUP BY DATE(created_at) ORDER BY DATE(created_at)
+    """), params).fetchall()
+    return [(row.day, int(row.bookings or 0), Decimal(str(row.revenue or 0))) for row in rows]
+
 @dashboard_bp.route('/')
 @login_required
 def index():
+    # Optional date range (?from=YYYY-MM-DD&to=YYYY-MM-DD) on booking creation day
+    date_from = _parse_date(request.args.get('from'))
+    date_to = _parse_date(request.args.get('to'))
     try:
         # Use direct database connection to bypass SQLAlchemy datetime processor
         connection = pymysql.connect(
@@ -52,29 +124,12 @@ def index():
         )
         
         with connection.cursor() as cursor:
-            # Total customers
-            cursor.execute("SELECT COUNT(*) FROM customers")
-            total_customers = cursor.fetchone()[0]
-            
-            # Total bookings
-            cursor.execute("SELECT COUNT(*) FROM bookings")  
-            total_bookings = cursor.fetchone()[0]
-            
-            # Bookings by status
-            cursor.execute("SELECT COUNT(*) FROM bookings WHERE status = 'draft'")
-            draft_bookings = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM bookings WHERE status = 'pending'")
-            pending_bookings = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM bookings WHERE status = 'confirmed'")
-            confirmed_bookings = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM bookings WHERE status = 'cancelled'")
-            cancelled_bookings = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM bookings WHERE status = 'vouchered'")
-            vouchered_bookings = cursor.fetchone()[0]
+            # Total customers (cached briefly; it only feeds a summary card)
+            total_customers = get_cache().get('dashboard', 'total_customers')
+            if total_customers is None:
+                cursor.execute("SELECT COUNT(*) FROM customers")
+                total_customers = cursor.fetchone()[0]
+                get_cache().set('dashboard', 'total_customers', total_customers, ttl=300, tags=['customers'])
             
             # Recent bookings with customer names
             cursor.execute("""
@@ -87,25 +142,19 @@ def index():
             recent_bookings_data = cursor.fetchall()
             recent_bookings = [BookingDisplay(*row) for row in recent_bookings_data]
             
-            # Monthly revenue
-            cursor.execute("""
-                SELECT COALESCE(SUM(total_amount), 0) 
-                FROM bookings 
-                WHERE status = 'confirmed' 
-                AND created_at >= DATE_FORMAT(NOW(), '%Y-%m-01')
-            """)
-            monthly_revenue = cursor.fetchone()[0] or 0
-            
-            # Booking types distribution  
-            cursor.execute("""
-                SELECT booking_type, COUNT(*) 
-                FROM bookings 
-                GROUP BY booking_type
-            """)
-            booking_types = cursor.fetchall()
-            
         connection.close()
         
+        # Booking counts, revenue and types from pre-aggregated rollups
+        stats = _booking_stats(date_from, date_to)
+        total_bookings = stats['total_bookings']
+        draft_bookings = stats['status_counts'].get('draft', 0)
+        pending_bookings = stats['status_counts'].get('pending', 0)
+        confirmed_bookings = stats['status_counts'].get('confirmed', 0)
+        cancelled_bookings = stats['status_counts'].get('cancelled', 0)
+        vouchered_bookings = stats['status_counts'].get('vouchered', 0)
+        monthly_revenue = stats['confirmed_revenue']
+        booking_types = stats['booking_types']
+        
     except Exception as e:
         current_app.logger.error(f"Database error: {e}")
         # Return minimal dashboard if database fails
@@ -152,4 +201,30 @@ def index():
                              vouchered_bookings=vouchered_bookings,
                              recent_bookings=recent_bookings,
                              monthly_revenue=monthly_revenue,
-                             booking_types=booking_types)
\ No newline at end of file
+                             booking_types=booking_types)
+
+
+@dashboard_bp.route('/dashboard/booking-stats')
+@login_required
+def booking_stats():
+    """Booking stats and per-day series for a date range (JSON, served from rollups when maintained)"""
+    date_to = _parse_date(request.args.get('to')) or datetime.now().date()
+    date_from = _parse_date(request.args.get('from')) or date_to - timedelta(days=29)
+    try:
+        stats = _booking_stats(date_from, date_to)
+        series = _booking_daily_series(date_from, date_to, status=request.args.get('status'))
+    except Exception as e:
+        current_app.logger.error(f"Booking stats error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    return jsonify({
+        'success': True,
+        'from': date_from.isoformat(),
+        'to': date_to.isoformat(),
+        'total_bookings': stats['total_bookings'],
+        'status_counts': stats['status_counts'],
+        'confirmed_revenue': float(stats['confirmed_revenue']),
+        'booking_types': [{'type': t, 'count': c} for t, c in stats['booking_types']],
+        'daily': [{'day': d.isoformat() if hasattr(d, 'isoformat') else str(d), 'bookings': n, 'revenue': float(r)}
+                  for d, n, r in series],
+    })
@@ -8,6 +8,7 @@ from functools import wraps
 from models.group_buy import GroupBuyCampaign, GroupBuyGroup, GroupBuyParticipant
 from models.group_buy_payment import GroupBuyPayment, GroupBuyBankAccount
 from services.group_buy_service import GroupBuyService
+from services.group_buy_stats_service import GroupBuyStatsService
 from extensions import db
 from utils.datetime_utils import naive_utc_now
 from utils.timezone_helper import now_thailand, get_thailand_timestamp
@@ -80,19 +81,17 @@ def index():
         GroupBuyCampaign.created_at.desc()
     ).all()
     
-    # สถิติ
+    # สถิติ - query เดียว (group by campaign, status)
+    totals = GroupBuyStatsService.totals(GroupBuyStatsService.attach(campaigns))
     active_campaigns = sum(1 for c in campaigns if c.is_active_now)
-    total_groups = GroupBuyGroup.query.count()
-    successful_groups = GroupBuyGroup.query.filter_by(status='success').count()
-    active_groups = GroupBuyGroup.query.filter_by(status='active').count()
     
     return render_template('group_buy/admin/index.html',
                          campaigns=campaigns,
                          stats={
                              'active_campaigns': active_campaigns,
-                             'total_groups': total_groups,
-                             'successful_groups': successful_groups,
-                             'active_groups': active_groups
+                             'total_groups': totals['total_groups'],
+                             'successful_groups': totals['successful_groups'],
+                             'active_groups': totals['active_groups']
                          })
 
 @bp.route('/campaigns')
@@ -104,6 +103,7 @@ def campaigns():
         GroupBuyCampaign.featured.desc(),
         GroupBuyCampaign.created_at.desc()
     ).all()
+    GroupBuyStatsService.attach(campaigns)
     
     return render_template('group_buy/admin/campaigns.html', campaigns=campaigns)
 
@@ -318,27 +318,8 @@ def view_campaign(campaign_id):
         GroupBuyGroup.created_at.desc()
     ).all()
     
-    # สถิติของแคมเปญ
-    total_groups = len(groups)
-    successful_groups = sum(1 for g in groups if g.status == 'success')
-    active_groups = sum(1 for g in groups if g.status == 'active')
-    failed_groups = sum(1 for g in groups if g.status == 'failed')
-    
-    total_participants = sum(g.current_participants for g in groups)
-    total_revenue = sum(
-        float(g.campaign.group_price) * g.current_participants 
-        for g in groups if g.status == 'success'
-    )
-    
-    stats = {
-        'total_groups': total_groups,
-        'successful_groups': successful_groups,
-        'active_groups': active_groups,
-        'failed_groups': failed_groups,
-        'total_participants': total_participants,
-        'total_revenue': total_revenue,
-        'success_rate': (successful_groups / total_groups * 100) if total_groups > 0 else 0
-    }
+    # สถิติของแคมเปญ (รวม inventory ที่ template ใช้ - ไม่ต้อง COUNT ซ้ำ)
+    stats = GroupBuyStatsService.attach([campaign])[campaign.id]
     
     return render_template('group_buy/admin/view_campaign.html',
                          campaign=campaign,
@@ -1028,14 +1009,16 @@ def campaign_stats_api(campaign_id):
     """API: สถิติของแคมเปญ (สำหรับ AJAX)"""
     campaign = GroupBuyCampaign.query.get_or_404(campaign_id)
     
-    groups = GroupBuyGroup.query.filter_by(campaign_id=campaign_id).all()
+    row = GroupBuyStatsService.attach([campaign])[campaign.id]
     
     stats = {
-        'total_groups': len(groups),
-        'successful_groups': sum(1 for g in groups if g.status == 'success'),
-        'active_groups': sum(1 for g in groups if g.status == 'active'),
-        'failed_groups': sum(1 for g in groups if g.status == 'failed'),
-        'total_participants': sum(g.current_participants for g in groups),
+        'total_groups': row['total_groups'],
+        'successful_groups': row['successful_groups'],
+        'active_groups': row['active_groups'],
+        'failed_groups': row['failed_groups'],
+        'cancelled_groups': row['cancelled_groups'],
+        'total_participants': row['total_participants'],
+        'total_pax': row['total_pax'],
         'inventory_used': campaign.inventory_used,
         'inventory_remaining': campaign.inventory_remaining
     }
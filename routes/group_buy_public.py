@@ -5,6 +5,7 @@ Group Buy Public Routes
 from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for, session, current_app
 from models.group_buy import GroupBuyCampaign, GroupBuyGroup, GroupBuyParticipant
 from services.group_buy_service import GroupBuyService
+from services.group_buy_stats_service import GroupBuyStatsService
 from extensions import db
 from utils.turnstile import verify_turnstile_from_request
 import logging
@@ -23,6 +24,8 @@ def index():
         product_type=product_type,
         featured_only=featured_only
     )
+    # inventory_remaining ของทุกแคมเปญใน query เดียว
+    GroupBuyStatsService.attach(campaigns)
     
     return render_template('group_buy/public/index.html', campaigns=campaigns)
 
@@ -5,24 +5,79 @@ Handles QR Code + Mobile NFC passport reading workflow
 from flask import Blueprint, request, jsonify
 import secrets
 import time
-from datetime import datetime, timedelta
+from services.cache_service import get_cache
 
 passport_nfc_bp = Blueprint('passport_nfc', __name__)
 
-# In-memory session storage (use Redis in production)
-nfc_sessions = {}
+# Sessions live in the shared cache (Redis when available) so polling and the
+# mobile submit can land on any gunicorn worker. Expired sessions drop out by TTL.
+NFC_NAMESPACE = 'nfc'
 
 # Session expiry time (5 minutes)
 SESSION_EXPIRY_SECONDS = 300
 
+# Longest a /wait request is held open; browsers simply reconnect
+LONG_POLL_SECONDS = 25
 
-def cleanup_expired_sessions():
-    """Remove expired sessions"""
-    now = datetime.now()
-    expired = [token for token, data in nfc_sessions.items() 
-               if data['expires_at'] < now]
-    for token in expired:
-        del nfc_sessions[token]
+# Statuses after which the desktop stops waiting
+FINAL_STATUSES = ('completed', 'error', 'expired')
+
+
+def get_nfc_session(token):
+    """Session dict or None when missing/expired"""
+    session = get_cache().get(NFC_NAMESPACE, token)
+    if session and session['expires_at'] < time.time():
+        return None
+    return session
+
+
+def update_nfc_session(token, notify=True, **changes):
+    """Atomically merge changes into a session; returns the new session or None
+
+    ``notify`` bumps the session version and wakes long-poll waiters.
+    """
+    def apply(session):
+        session = {**session, **changes}
+        if notify:
+            session['version'] = session.get('version', 0) + 1
+        return session
+
+    session = get_cache().update(NFC_NAMESPACE, token, apply)
+    if session is not None and notify:
+        get_cache().publish(NFC_NAMESPACE, token)
+    return session
+
+
+def _nfc_status_response(token, session):
+    """Status payload shared by the polling and long-poll endpoints"""
+    if session is None:
+        return jsonify({
+            'status': 'expired',
+            'message': 'Session not found or expired'
+        })
+    
+    # Update last check time (not a state change - waiters are not woken)
+    session = update_nfc_session(token, notify=False, last_check=time.time()) or session
+    
+    # Return current status
+    response = {
+        'status': session['status'],
+        'version': session.get('version', 0)
+    }
+    
+    if session['status'] == 'completed' and session['data']:
+        # Clean up completed session on retrieval (only one poller gets the data)
+        completed = get_cache().pop(NFC_NAMESPACE, token)
+        if not completed:
+            return jsonify({
+                'status': 'expired',
+                'message': 'Session not found or expired'
+            })
+        response['data'] = completed['data']
+    elif session['status'] == 'error':
+        response['message'] = session.get('error_message', 'Unknown error')
+        
+    return jsonify(response)
 
 
 @passport_nfc_bp.route('/api/passport/nfc/session', methods=['POST'])
@@ -38,29 +93,28 @@ def create_nfc_session():
         }
     """
     try:
-        # Clean up old sessions
-        cleanup_expired_sessions()
-        
         # Generate secure token
         token = secrets.token_urlsafe(32)
         
-        # Calculate expiry
-        expires_at = datetime.now() + timedelta(seconds=SESSION_EXPIRY_SECONDS)
-        
-        # Store session
-        nfc_sessions[token] = {
+        # Store session (timestamps are epoch seconds)
+        now = time.time()
+        stored = get_cache().set(NFC_NAMESPACE, token, {
             'status': 'waiting',  # waiting, scanning, completed, expired, error
             'data': None,
-            'created_at': datetime.now(),
-            'expires_at': expires_at,
-            'last_check': datetime.now()
-        }
+            'created_at': now,
+            'expires_at': now + SESSION_EXPIRY_SECONDS,
+            'last_check': now,
+            'version': 0
+        }, ttl=SESSION_EXPIRY_SECONDS)
+        if not stored:
+            raise RuntimeError('Could not store NFC session')
         
         return jsonify({
             'success': True,
             'session_token': token,
             'expires_in': SESSION_EXPIRY_SECONDS,
-            'qr_url': f'/mobile/nfc-scan?token={token}'
+            'qr_url': f'/mobile/nfc-scan?token={token}',
+            'wait_url': f'/api/passport/nfc/wait/{token}'
         })
         
     except Exception as e:
@@ -86,40 +140,53 @@ def check_nfc_status(token):
         }
     """
     try:
-        cleanup_expired_sessions()
-        
-        if token not in nfc_sessions:
-            return jsonify({
-                'status': 'expired',
-                'message': 'Session not found or expired'
-            })
-        
-        session = nfc_sessions[token]
-        
-        # Check if expired
-        if session['expires_at'] < datetime.now():
-            session['status'] = 'expired'
-            return jsonify({
-                'status': 'expired',
-                'message': 'Session has expired'
-            })
+        return _nfc_status_response(token, get_nfc_session(token))
         
-        # Update last check time
-        session['last_check'] = datetime.now()
-        
-        # Return current status
-        response = {
-            'status': session['status']
-        }
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+
+@passport_nfc_bp.route('/api/passport/nfc/wait/<token>', methods=['GET'])
+def wait_nfc_status(token):
+    """
+    Long-poll the status of an NFC scanning session
+    
+    Holds the request until the session changes (mobile starts scanning,
+    submits data or reports an error), the session expires, or
+    LONG_POLL_SECONDS pass. The browser then calls again with the returned
+    version; one held connection replaces a stream of /check polls.
+    
+    Query params:
+        since: last version seen (omit for the current state immediately)
+        timeout: seconds to wait, at most LONG_POLL_SECONDS
         
-        if session['status'] == 'completed' and session['data']:
-            response['data'] = session['data']
-            # Clean up completed session after retrieval
-            del nfc_sessions[token]
-        elif session['status'] == 'error':
-            response['message'] = session.get('error_message', 'Unknown error')
-            
-        return jsonify(response)
+    Returns:
+        Same payload as /check, plus "version"
+    """
+    try:
+        since = request.args.get('since', -1, type=int)
+        timeout = request.args.get('timeout', LONG_POLL_SECONDS, type=float)
+        deadline = time.time() + max(0.0, min(timeout, LONG_POLL_SECONDS))
+        
+        # Subscribe before reading so a change between read and wait is not missed
+        with get_cache().subscribe(NFC_NAMESPACE, token) as subscription:
+            session = get_nfc_session(token)
+            while (session is not None
+                   and session.get('version', 0) <= since
+                   and session['status'] not in FINAL_STATUSES):
+                now = time.time()
+                remaining = min(deadline, session['expires_at']) - now
+                if remaining <= 0:
+                    break
+                subscription.wait(remaining)
+                session = get_nfc_session(token)
+        
+        if session is not None and session['expires_at'] <= time.time():
+            session = None
+        return _nfc_status_response(token, session)
         
     except Exception as e:
         return jsonify({
@@ -140,22 +207,21 @@ def update_scanning_status(token):
         {"success": true}
     """
     try:
-        if token not in nfc_sessions:
+        session = get_cache().get(NFC_NAMESPACE, token)
+        if session is None:
             return jsonify({
                 'success': False,
                 'error': 'Session not found'
             }), 404
         
-        session = nfc_sessions[token]
-        
-        if session['expires_at'] < datetime.now():
+        if session['expires_at'] < time.time():
             return jsonify({
                 'success': False,
                 'error': 'Session expired'
             }), 410
         
         # Update status to scanning
-        session['status'] = 'scanning'
+        update_nfc_session(token, status='scanning')
         
         return jsonify({'success': True})
         
@@ -203,15 +269,14 @@ def submit_nfc_data():
         
         token = json_data['token']
         
-        if token not in nfc_sessions:
+        session = get_cache().get(NFC_NAMESPACE, token)
+        if session is None:
             return jsonify({
                 'success': False,
                 'error': 'Session not found'
             }), 404
         
-        session = nfc_sessions[token]
-        
-        if session['expires_at'] < datetime.now():
+        if session['expires_at'] < time.time():
             return jsonify({
                 'success': False,
                 'error': 'Session expired'
@@ -219,8 +284,7 @@ def submit_nfc_data():
         
         # Validate data
         if 'data' not in json_data:
-            session['status'] = 'error'
-            session['error_message'] = 'No passport data provided'
+            update_nfc_session(token, status='error', error_message='No passport data provided')
             return jsonify({
                 'success': False,
                 'error': 'No data provided'
@@ -235,16 +299,15 @@ def submit_nfc_data():
         missing_fields = [f for f in required_fields if not passport_data.get(f)]
         
         if missing_fields:
-            session['status'] = 'error'
-            session['error_message'] = f'Missing fields: {", ".join(missing_fields)}'
+            update_nfc_session(token, status='error',
+                               error_message=f'Missing fields: {", ".join(missing_fields)}')
             return jsonify({
                 'success': False,
                 'error': f'Missing required fields: {", ".join(missing_fields)}'
             }), 400
         
         # Store the data
-        session['status'] = 'completed'
-        session['data'] = passport_data
+        update_nfc_session(token, status='completed', data=passport_data)
         
         return jsonify({
             'success': True,
@@ -254,9 +317,8 @@ def submit_nfc_data():
     except Exception as e:
         # Update session with error if token is available
         try:
-            if 'token' in json_data and json_data['token'] in nfc_sessions:
-                nfc_sessions[json_data['token']]['status'] = 'error'
-                nfc_sessions[json_data['token']]['error_message'] = str(e)
+            if 'token' in json_data:
+                update_nfc_session(json_data['token'], status='error', error_message=str(e))
         except:
             pass
             
@@ -281,7 +343,7 @@ def mobile_nfc_scan_page():
         return jsonify({'error': 'Missing token'}), 400
     
     # Check if session exists
-    if token not in nfc_sessions:
+    if get_nfc_session(token) is None:
         return """
         <html>
         <head>
@@ -12,7 +12,7 @@ import tempfile
 import hashlib
 import logging
 from datetime import datetime
-from utils.passport_mrz_processor import PassportMRZProcessor, convert_pdf_to_images, cleanup_temp_files
+from utils.passport_mrz_processor import PassportMRZProcessor, render_pdf_pages, cleanup_temp_files
 from app import db
 
 logger = logging.getLogger(__name__)
@@ -83,40 +83,42 @@ def upload_passport():
         filename = secure_filename(file.filename)
         file_ext = filename.rsplit('.', 1)[1].lower()
         
-        temp_file = tempfile.NamedTemporaryFile(
-            delete=False,
-            suffix=f'.{file_ext}',
-            prefix='passport_'
-        )
-        temp_file.write(file_content)
-        temp_file.close()
-        
         logger.info(f"Uploaded passport file: {filename} (hash: {file_hash}, size: {file_size} bytes)")
         
-        temp_files_to_cleanup = [temp_file.name]
+        temp_files_to_cleanup = []
         
         try:
             # Process based on file type
             if file_ext == 'pdf':
-                # Convert PDF to images
-                image_paths = convert_pdf_to_images(temp_file.name)
-                temp_files_to_cleanup.extend(image_paths)
+                # Render first page (usually contains passport data page) in memory - no temp files
+                try:
+                    pages = render_pdf_pages(file_content)
+                except Exception as pdf_error:
+                    logger.error(f"PDF render failed: {pdf_error}")
+                    pages = []
                 
-                if not image_paths:
+                if not pages:
                     return jsonify({
                         'success': False,
                         'error': 'Could not convert PDF to images'
                     }), 500
                 
-                # Process first page (usually contains passport data page)
-                image_path = image_paths[0]
+                image_path = pages[0]
             else:
+                temp_file = tempfile.NamedTemporaryFile(
+                    delete=False,
+                    suffix=f'.{file_ext}',
+                    prefix='passport_'
+                )
+                temp_file.write(file_content)
+                temp_file.close()
+                temp_files_to_cleanup.append(temp_file.name)
                 image_path = temp_file.name
             
             # Extract MRZ data
             logger.info(f"=== Starting passport MRZ extraction for: {filename} ===")
             processor = PassportMRZProcessor()
-            result = processor.process_passport(image_path)
+            result = processor.process_passport(image_path, label=file_hash[:12])
             logger.info(f"=== Passport extraction result: {result.get('success', False)} ===")
             
             # Store extraction session (for confirmation later)
@@ -337,27 +339,29 @@ def batch_upload_passports():
                     filename = secure_filename(file.filename)
                     file_ext = filename.rsplit('.', 1)[1].lower()
                     
-                    temp_file = tempfile.NamedTemporaryFile(
-                        delete=False,
-                        suffix=f'.{file_ext}',
-                        prefix='passport_batch_'
-                    )
-                    temp_file.write(file_content)
-                    temp_file.close()
-                    
-                    temp_files = [temp_file.name]
+                    temp_files = []
                     
                     try:
                         if file_ext == 'pdf':
-                            image_paths = convert_pdf_to_images(temp_file.name)
-                            temp_files.extend(image_paths)
-                            image_path = image_paths[0] if image_paths else temp_file.name
+                            # First page rendered in memory - no temp files
+                            pages = render_pdf_pages(file_content)
+                            if not pages:
+                                raise ValueError('Could not convert PDF to images')
+                            image_path = pages[0]
                         else:
+                            temp_file = tempfile.NamedTemporaryFile(
+                                delete=False,
+                                suffix=f'.{file_ext}',
+                                prefix='passport_batch_'
+                            )
+                            temp_file.write(file_content)
+                            temp_file.close()
+                            temp_files.append(temp_file.name)
                             image_path = temp_file.name
                         
                         logger.info(f"=== Processing passport: {filename} ===")
                         processor = PassportMRZProcessor()
-                        result = processor.process_passport(image_path)
+                        result = processor.process_passport(image_path, label=file_hash[:12])
                         logger.info(f"=== Result for {filename}: success={result.get('success')} ===")
                         
                         result['filename'] = filename
@@ -0,0 +1,59 @@
+"""
+Profiling Admin Routes
+หน้าดู profile ที่บันทึกไว้ (slow requests / armed captures) และสั่งเริ่ม sampling profiler
+"""
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, abort
+from functools import wraps
+from flask_login import current_user, login_required
+
+from services import profiling_service
+
+profiling_admin = Blueprint('profiling_admin', __name__, url_prefix='/admin/profiling')
+
+def admin_required(f):
+    """Decorator to require Administrator access"""
+    @wraps(f)
+    @login_required
+    def decorated_function(*args, **kwargs):
+        if not (current_user.has_role('Administrator') or current_user.is_admin):
+            flash('⛔ Access denied. Administrator privileges required.', 'danger')
+            return redirect(url_for('index'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+@profiling_admin.route('/')
+@admin_required
+def index():
+    """List saved profiles, newest first"""
+    kind = request.args.get('kind', '', type=str)
+    profiles = profiling_service.list_profiles()
+    if kind:
+        profiles = [p for p in profiles if p.get('kind') == kind]
+    return render_template('admin/profiling/index.html',
+                           profiles=profiles,
+                           kind=kind,
+                           enabled=profiling_service.is_enabled(),
+                           settings=profiling_service.settings())
+
+@profiling_admin.route('/arm', methods=['POST'])
+@admin_required
+def arm():
+    """Sample every thread of the worker that receives this request for N seconds"""
+    if not profiling_service.is_enabled():
+        flash('⚠️ Profiling is disabled. Set PROFILING_ENABLED=true to use it.', 'warning')
+        return redirect(url_for('profiling_admin.index'))
+    seconds = profiling_service.arm(request.form.get('seconds', 10, type=int), requested_by=current_user.username)
+    flash(f'🔬 Profiler armed for {seconds}s. Reload this page afterwards to see the profile.', 'success')
+    return redirect(url_for('profiling_admin.index'))
+
+@profiling_admin.route('/files/<path:filename>')
+@admin_required
+def download(filename):
+    """Download one profile file (collapsed stacks, speedscope JSON or SQL trace)"""
+    path = profiling_service.profile_path(filename)
+    if path is None:
+        abort(404)
+    mimetype = 'text/plain' if filename.endswith('.txt') else 'application/json'
+    return send_file(path, mimetype=mimetype, as_attachment=request.args.get('download') == '1',
+                     download_name=filename)
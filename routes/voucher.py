@@ -3,6 +3,8 @@ from flask_login import login_required, current_user
 from models.booking import Booking
 from models.customer import Customer
 from extensions import db
+from sqlalchemy import func
+from sqlalchemy.orm import load_only, selectinload, lazyload
 
 # Import sharing models with error handling
 try:
@@ -14,13 +16,19 @@ from datetime import datetime
 import os
 import time
 from werkzeug.utils import secure_filename
-from PIL import Image as PILImage
 import io
 import hmac
 import hashlib
 import base64
 from datetime import timedelta
 from utils.datetime_utils import utc_now, utc_ts
+from config import Config
+from services.cache_service import get_cache
+from services.invalidation_bus import artifact_index
+from services.storage_lifecycle_service import StorageLifecycleService
+from services.upload_pipeline import (
+    UploadTooLarge, discard, finalize, optimize_image, stream_to_disk, upload_pool
+)
 
 try:
     from services.pdf_image import pdf_to_png_bytes_list, pdf_page_to_png_bytes, pdf_page_count
@@ -83,6 +91,27 @@ try:
 except Exception as e:
     print(f"❌ PNG cache directory error: {e}")
 
+PNG_CACHE_TTL = timedelta(hours=Config.PNG_CACHE_TTL_HOURS)
+VOUCHER_FILES_DIR = os.path.join('static', 'uploads', 'voucher_files')
+StorageLifecycleService.register_root('png_cache', PNG_CACHE_DIR, PNG_CACHE_TTL)
+# Fallback for files without a VoucherFile row (same 120 days as VoucherFile.set_expiry_from_booking)
+VOUCHER_FILE_TTL = timedelta(days=120)
+
+
+def _voucher_file_owners(filenames):
+    """Expiry / booking of the VoucherFile rows that own these files (used by reconcile)"""
+    if not VoucherFile or not filenames:
+        return {}
+    rows = (db.session.query(VoucherFile.filename, VoucherFile.expires_at, VoucherFile.voucher_id, VoucherFile.id)
+            .filter(VoucherFile.filename.in_(filenames)).all())
+    return {
+        filename: {'expires_at': expires_at, 'booking_id': voucher_id, 'owner_id': file_id}
+        for filename, expires_at, voucher_id, file_id in rows
+    }
+
+
+StorageLifecycleService.register_root('voucher_file', VOUCHER_FILES_DIR, VOUCHER_FILE_TTL, lookup=_voucher_file_owners)
+
 def _ensure_pdf_image_loaded():  # pragma: no cover (diagnostic helper)
     """Attempt lazy import of pdf image helpers if previously failed at module import time.
     Updates globals and _PDF_IMAGE_IMPORT_ERROR.
@@ -151,25 +180,53 @@ def _ensure_voucher_png_cached(booking, pdf_bytes: bytes, page_index: int, scale
     try:
         with open(path, 'wb') as fh:
             fh.write(data)
+        artifact_index.register(booking.id, path, kind='png_cache', ttl=PNG_CACHE_TTL)
     except Exception:
         pass
     return path if os.path.exists(path) else None
 
+def _build_voucher_png_zip(booking, pdf_bytes: bytes, scale: int, zoom: float):
+    """Zip every voucher page as PNG, parsing the PDF once.
+
+    Cached pages are copied from the PNG cache; missing pages are rendered
+    from a single RasterSession, written to the cache and to the zip from
+    the same bytes. PNGs are already compressed, so entries are stored.
+    Returns a BytesIO positioned at 0, or None when the PDF has no pages.
+    """
+    import zipfile
+    from services.pdf_image import RasterSession
+    zip_buf = io.BytesIO()
+    with RasterSession(pdf_bytes, zoom=zoom) as session:
+        if not session.page_count:
+            return None
+        with zipfile.ZipFile(zip_buf, 'w', compression=zipfile.ZIP_STORED) as zf:
+            for p in range(session.page_count):
+                path = _voucher_png_cache_path(booking, p, scale)
+                if os.path.exists(path):
+                    zf.write(path, arcname=os.path.basename(path))
+                    continue
+                data = session.render_png(p)
+                if not data:
+                    continue
+                try:
+                    with open(path, 'wb') as fh:
+                        fh.write(data)
+                    artifact_index.register(booking.id, path, kind='png_cache', ttl=PNG_CACHE_TTL)
+                except Exception:
+                    pass
+                zf.writestr(os.path.basename(path), data)
+    zip_buf.seek(0)
+    return zip_buf
+
 def cleanup_png_cache(max_age_hours: int = 24):
-    import time
-    cutoff = time.time() - max_age_hours*3600
-    removed = 0
+    """Remove PNG cache pages older than max_age_hours (tracked rows only, no directory listing)"""
     try:
-        for fname in os.listdir(PNG_CACHE_DIR):
-            fpath = os.path.join(PNG_CACHE_DIR, fname)
-            try:
-                if os.path.isfile(fpath) and os.path.getmtime(fpath) < cutoff:
-                    os.remove(fpath); removed += 1
-            except Exception:
-                continue
-    except Exception:
-        pass
-    return removed
+        result = StorageLifecycleService.sweep(
+            kinds=['png_cache'], created_before=utc_now().replace(tzinfo=None) - timedelta(hours=max_age_hours))
+        return result['files']
+    except Exception as e:
+        current_app.logger.warning(f'PNG cache cleanup failed: {e}')
+        return 0
 
 @voucher_bp.route('/png-cache/cleanup')
 @login_required
@@ -281,68 +338,191 @@ def test_list():
         print(f"DEBUG: Template error: {e}")
         return f"Error rendering template: {str(e)}"
 
+# Bookings that can have vouchers
+VOUCHER_LIST_STATUSES = ['confirmed', 'quoted', 'paid', 'vouchered', 'completed']
+VOUCHER_PAGE_SIZE = 50
+VOUCHER_PAGE_MAX = 200
+
+def _voucher_list_query():
+    """Filtered voucher query from request args, loading only what the list templates use.
+
+    Customers come in one extra ``IN`` query per page (selectinload) instead of
+    one query per row, and the joined ``supplier`` load is skipped.
+    """
+    status_filter = request.args.get('status', '')
+    search = request.args.get('search', '')
+    date_from = request.args.get('date_from', '')
+
+    query = Booking.query.filter(Booking.status.in_(VOUCHER_LIST_STATUSES)).options(
+        load_only(
+            Booking.id, Booking.booking_reference, Booking.booking_type, Booking.status,
+            Booking.total_amount, Booking.currency, Booking.arrival_date, Booking.departure_date,
+            Booking.created_at, Booking.customer_id,
+        ),
+        selectinload(Booking.customer).load_only(
+            Customer.id, Customer.name, Customer.first_name, Customer.last_name, Customer.email,
+        ),
+        lazyload(Booking.supplier),
+    )
+
+    # Apply status filter if provided
+    if status_filter:
+        query = query.filter(Booking.status == status_filter)
+
+    if search:
+        query = query.join(Customer).filter(
+            db.or_(
+                Customer.first_name.contains(search),
+                Customer.last_name.contains(search),
+                Customer.email.contains(search),
+                Booking.booking_reference.contains(search)
+            )
+        )
+
+    if date_from:
+        try:
+            date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
+            query = query.filter(Booking.created_at >= date_from_obj)
+        except ValueError:
+            pass
+
+    return query, bool(status_filter or search or date_from)
+
+def _encode_voucher_cursor(booking):
+    created = booking.created_at.isoformat() if booking.created_at else ''
+    return f'{created}|{booking.id}'
+
+def _voucher_page(query, cursor=None, limit=VOUCHER_PAGE_SIZE):
+    """Keyset page ordered by (created_at DESC, id DESC); returns (rows, next_cursor).
+
+    The cursor is the last row's ``created_at|id``. NULL created_at rows sort
+    last (MariaDB DESC order) and are paged by id alone.
+    """
+    if cursor:
+        try:
+            created, _, last_id = cursor.rpartition('|')
+            last_id = int(last_id)
+            if created:
+                created = datetime.fromisoformat(created)
+                query = query.filter(db.or_(
+                    Booking.created_at < created,
+                    db.and_(Booking.created_at == created, Booking.id < last_id),
+                    Booking.created_at.is_(None),
+                ))
+            else:
+                query = query.filter(Booking.created_at.is_(None), Booking.id < last_id)
+        except ValueError:
+            current_app.logger.warning(f'Ignoring invalid voucher list cursor: {cursor!r}')
+
+    rows = query.order_by(Booking.created_at.desc(), Booking.id.desc()).limit(limit + 1).all()
+    next_cursor = _encode_voucher_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def _voucher_stats(query=None, filtered=False):
+    """Status counts for the stats cards in one GROUP BY query.
+
+    ``total`` is the size of the filtered list; it costs one more COUNT only
+    when filters are applied.
+    """
+    # Shared across workers; dropped by the 'bookings' tag when a booking commits
+    counts = get_cache().get_or_set('voucher_list', 'status_counts', lambda: dict(
+        db.session.query(Booking.status, func.count(Booking.id))
+        .filter(Booking.status.in_(VOUCHER_LIST_STATUSES))
+        .group_by(Booking.status)
+        .all()
+    ), ttl=60, tags=['bookings'])
+    stats = {
+        'active': sum(counts.get(status, 0) for status in ('confirmed', 'quoted', 'paid', 'vouchered')),
+        'used': 0,
+        'expired': 0,
+        'vouchered': counts.get('vouchered', 0),
+        'paid': counts.get('paid', 0),
+        'quoted': counts.get('quoted', 0),
+        'confirmed': counts.get('confirmed', 0),
+        'completed': counts.get('completed', 0),
+    }
+    if filtered and query is not None:
+        stats['total'] = query.order_by(None).with_entities(func.count(Booking.id)).scalar() or 0
+    else:
+        stats['total'] = sum(counts.values())
+    return stats
+
+def _voucher_page_limit():
+    try:
+        return max(1, min(int(request.args.get('limit', VOUCHER_PAGE_SIZE)), VOUCHER_PAGE_MAX))
+    except (TypeError, ValueError):
+        return VOUCHER_PAGE_SIZE
+
 @voucher_bp.route('/')
 @voucher_bp.route('/list', endpoint='list')
 @login_required
 def list_vouchers():  # renamed from list to avoid shadowing built-in list
-    """List all vouchers (all relevant statuses: confirmed, quoted, paid, vouchered, completed)"""
-    try:
-        status_filter = request.args.get('status', '')
-        voucher_type_filter = request.args.get('voucher_type', '')  # currently unused
-        search = request.args.get('search', '')
-        date_from = request.args.get('date_from', '')
-
-        # Show all bookings that can have vouchers (confirmed, quoted, paid, vouchered, completed)
-        query = Booking.query.filter(
-            Booking.status.in_(['confirmed', 'quoted', 'paid', 'vouchered', 'completed'])
-        )
-        
-        # Apply status filter if provided
-        if status_filter:
-            query = query.filter(Booking.status == status_filter)
-
-        if search:
-            query = query.join(Customer).filter(
-                db.or_(
-                    Customer.first_name.contains(search),
-                    Customer.last_name.contains(search),
-                    Customer.email.contains(search),
-                    Booking.booking_reference.contains(search)
-                )
-            )
+    """List vouchers (confirmed, quoted, paid, vouchered, completed), first page only.
 
-        if date_from:
-            try:
-                date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-                query = query.filter(Booking.created_at >= date_from_obj)
-            except ValueError:
-                pass
-
-        vouchers = query.order_by(Booking.created_at.desc()).all()
-
-        # Calculate stats for all relevant statuses
-        stats = {
-            'active': Booking.query.filter(Booking.status.in_(['confirmed', 'quoted', 'paid', 'vouchered'])).count(),
-            'used': 0,
-            'expired': 0,
-            'vouchered': Booking.query.filter(Booking.status == 'vouchered').count(),
-            'paid': Booking.query.filter(Booking.status == 'paid').count(),
-            'quoted': Booking.query.filter(Booking.status == 'quoted').count(),
-            'confirmed': Booking.query.filter(Booking.status == 'confirmed').count(),
-        }
+    Further pages are loaded by infinite scroll from ``/voucher/api/list``.
+    """
+    try:
+        query, filtered = _voucher_list_query()
+        vouchers, next_cursor = _voucher_page(query, request.args.get('cursor'), _voucher_page_limit())
+        stats = _voucher_stats(query, filtered)
 
         language = session.get('language', 'en')
         template_name = f'voucher/list_{language}.html'
+        context = dict(vouchers=vouchers, stats=stats, now=datetime.now, next_cursor=next_cursor, row_offset=0)
         try:
-            return render_template(template_name, vouchers=vouchers, stats=stats, now=datetime.now)
+            return render_template(template_name, **context)
         except Exception as render_error:
             current_app.logger.error(f'Failed to render {template_name}: {render_error}')
-            return render_template('voucher/list_en.html', vouchers=vouchers, stats=stats, now=datetime.now)
+            return render_template('voucher/list_en.html', **context)
     except Exception as e:
         current_app.logger.exception(f'Error in list_vouchers: {e}')
         flash(f'Error loading voucher list: {str(e)}', 'error')
         return redirect(url_for('booking.list'))
 
+@voucher_bp.route('/api/list')
+@login_required
+def api_list_vouchers():
+    """Next page of the voucher list (same filters as the list page).
+
+    Query args: cursor, limit, status, search, date_from, format=html|json.
+    ``format=html`` returns table rows rendered with the list template for infinite scroll.
+    """
+    try:
+        query, _ = _voucher_list_query()
+        vouchers, next_cursor = _voucher_page(query, request.args.get('cursor'), _voucher_page_limit())
+
+        if request.args.get('format') == 'html':
+            language = session.get('language', 'en')
+            rows_template = 'voucher/_list_rows_th.html' if language == 'th' else 'voucher/_list_rows_en.html'
+            html = render_template(rows_template, vouchers=vouchers, now=datetime.now,
+                                   row_offset=request.args.get('offset', 0, type=int))
+            return jsonify({'success': True, 'html': html, 'count': len(vouchers), 'next_cursor': next_cursor})
+
+        return jsonify({
+            'success': True,
+            'count': len(vouchers),
+            'next_cursor': next_cursor,
+            'vouchers': [{
+                'id': b.id,
+                'booking_reference': b.booking_reference,
+                'booking_type': b.booking_type,
+                'status': b.status,
+                'total_amount': float(b.total_amount or 0),
+                'currency': b.currency,
+                'arrival_date': b.arrival_date.isoformat() if b.arrival_date else None,
+                'departure_date': b.departure_date.isoformat() if b.departure_date else None,
+                'created_at': b.created_at.isoformat() if b.created_at else None,
+                'customer': {
+                    'id': b.customer.id,
+                    'name': b.customer.full_name,
+                    'email': b.customer.email,
+                } if b.customer else None,
+            } for b in vouchers],
+        })
+    except Exception as e:
+        current_app.logger.exception(f'Error in api_list_vouchers: {e}')
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @voucher_bp.route('/<int:id>')
 @login_required
 def view(id):
@@ -406,20 +586,15 @@ def update(id):
     flash('Updated', 'success')
     return redirect(url_for('voucher.view', id=id))
 
-def _process_voucher_image_upload(file, booking):
-    cfg = current_app.config
-    max_size = cfg.get('VOUCHER_IMAGE_MAX_SIZE', 1_000_000)
-    allowed = set(cfg.get('VOUCHER_IMAGE_ALLOWED_EXT', []))
-    filename = secure_filename(file.filename)
-    if '.' not in filename:
-        current_app.logger.warning('Invalid image: no extension'); return None
-    ext = filename.rsplit('.',1)[-1].lower()
-    if allowed and ext not in allowed:
-        current_app.logger.warning('Invalid image type'); return None
-    file.seek(0, os.SEEK_END); sz = file.tell(); file.seek(0)
-    if sz > max_size:
-        current_app.logger.warning('Image too large (>1MB)'); return None
-    rel_dir = 'uploads/voucher_images'
+VOUCHER_IMAGE_REL_DIR = 'uploads/voucher_images'
+VOUCHER_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+_voucher_image_dir = None
+
+def _get_voucher_image_dir():
+    """Writable voucher image directory (resolved once per process)"""
+    global _voucher_image_dir
+    if _voucher_image_dir:
+        return _voucher_image_dir
     
     # Use adaptive path with write-test for development vs production
     possible_paths = [
@@ -428,7 +603,6 @@ def _process_voucher_image_upload(file, booking):
         'static/uploads/voucher_images'                                 # Development
     ]
     
-    abs_dir = None
     for path in possible_paths:
         try:
             os.makedirs(path, exist_ok=True)
@@ -438,38 +612,67 @@ def _process_voucher_image_upload(file, booking):
                 f.write('test')
             os.remove(test_file)
             # If we got here, this path is writable
-            abs_dir = path
-            break
+            _voucher_image_dir = path
+            return path
         except (PermissionError, OSError):
             continue
     
-    if not abs_dir:
-        # Fallback to current directory
-        abs_dir = 'static/uploads/voucher_images'
-        os.makedirs(abs_dir, exist_ok=True)
+    # Fallback to current directory
+    os.makedirs('static/uploads/voucher_images', exist_ok=True)
+    _voucher_image_dir = 'static/uploads/voucher_images'
+    return _voucher_image_dir
+
+def _store_voucher_image(file, booking, known_hashes):
+    """Stream one upload to disk, dedupe by content hash and queue the resize.
     
-    new_name = f"booking_{booking.id}_{int(time.time())}.{ext}"
-    abs_path = os.path.join(abs_dir, new_name)
-    # Save temp then resize/compress if needed
-    file.save(abs_path)
+    Returns a per-file status dict: status is 'queued' (stored, optimising in the
+    background), 'duplicate' (same content already on this booking) or 'rejected'.
+    New images also carry 'path' and 'sha256'.
+    """
+    cfg = current_app.config
+    filename = secure_filename(file.filename or '')
+    result = {'filename': file.filename}
+    ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    allowed = set(cfg.get('VOUCHER_IMAGE_ALLOWED_EXT') or VOUCHER_IMAGE_EXTENSIONS)
+    if ext not in allowed:
+        result.update(status='rejected', error=f'Invalid file type. Allowed: {", ".join(sorted(allowed))}')
+        return result
+    
+    abs_dir = _get_voucher_image_dir()
+    max_bytes = cfg.get('VOUCHER_UPLOAD_MAX_BYTES', 20 * 1024 * 1024)
     try:
-        with PILImage.open(abs_path) as im:
-            im_format = im.format
-            max_w = cfg.get('VOUCHER_IMAGE_MAX_WIDTH', 1600)
-            if im.width > max_w:
-                ratio = max_w / float(im.width)
-                new_size = (max_w, int(im.height * ratio))
-                im = im.resize(new_size, PILImage.LANCZOS)
-            # Re-save compressed (if JPEG / WEBP)
-            if im_format in {'JPEG','JPG','WEBP','PNG'}:
-                quality = cfg.get('VOUCHER_IMAGE_QUALITY', 85)
-                im.save(abs_path, optimize=True, quality=quality)
-    except Exception as e:
-        current_app.logger.warning(f'Image post-process failed: {e}')
+        part_path, sha256, size = stream_to_disk(file, abs_dir, max_bytes=max_bytes)
+    except UploadTooLarge:
+        result.update(status='rejected', error=f'File too large (max: {max_bytes // (1024 * 1024)}MB)')
+        return result
+    
+    if sha256 in known_hashes:
+        discard(part_path)
+        result.update(status='duplicate', sha256=sha256)
+        return result
+    
+    # Content-addressed name: the same original uploaded twice maps to one file
+    new_name = f"booking_{booking.id}_{sha256[:16]}.{ext}"
+    abs_path = os.path.join(abs_dir, new_name)
+    if finalize(part_path, abs_path):
+        upload_pool.submit(optimize_image, abs_path,
+                           cfg.get('VOUCHER_IMAGE_MAX_WIDTH', 1600),
+                           cfg.get('VOUCHER_IMAGE_QUALITY', 85))
+    known_hashes.add(sha256)
     
     # Return relative path for multi-image system
-    relative_path = f"{rel_dir}/{new_name}?v={int(time.time())}"
-    return relative_path
+    result.update(status='queued', sha256=sha256, size=size,
+                  path=f"{VOUCHER_IMAGE_REL_DIR}/{new_name}?v={int(time.time())}")
+    return result
+
+def _process_voucher_image_upload(file, booking):
+    """Store a single voucher image; returns its relative path or None"""
+    known = {img.get('sha256') for img in booking.get_voucher_images() if isinstance(img, dict)}
+    result = _store_voucher_image(file, booking, known - {None})
+    if result['status'] == 'rejected':
+        current_app.logger.warning(f"Invalid image {result['filename']}: {result['error']}")
+        return None
+    return result.get('path')
 
 @voucher_bp.route('/<int:id>/delete-image', methods=['POST'])
 @login_required
@@ -544,74 +747,63 @@ def upload_images(id):
         current_app.logger.warning(f'Image upload: No files received for booking {id}')
         return jsonify({'success': False, 'error': 'No files provided'}), 400
     
-    uploaded_images = []
-    max_size = 1048576  # 1MB
-    allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+    current_images = booking.get_voucher_images()
+    known_hashes = {img.get('sha256') for img in current_images if isinstance(img, dict) and img.get('sha256')}
+    results = []
     
     for file in files:
         if not file or not file.filename:
             current_app.logger.warning(f'Skipping empty file in upload for booking {id}')
             continue
-            
-        # Check file extension
-        if not ('.' in file.filename and file.filename.rsplit('.', 1)[1].lower() in allowed_extensions):
-            current_app.logger.warning(f'Invalid file type for booking {id}: {file.filename}')
-            return jsonify({'success': False, 'error': f'Invalid file type: {file.filename}. Allowed: {", ".join(allowed_extensions)}'}), 400
-            
-        # Check file size
-        file.seek(0, 2)  # Seek to end
-        size = file.tell()
-        file.seek(0)  # Reset to beginning
-        
-        if size > max_size:
-            current_app.logger.warning(f'File too large for booking {id}: {file.filename} ({size} bytes)')
-            return jsonify({'success': False, 'error': f'File too large: {file.filename} ({size} bytes, max: {max_size})'}), 400
-        
         try:
-            # Process each image and add to voucher_images list
-            relative_path = _process_voucher_image_upload(file, booking)
-            
-            if relative_path:
-                # Add to voucher_images list
-                current_images = booking.get_voucher_images()
-                image_id = f'img_{int(time.time())}_{len(current_images)}'
-                
-                # Extract filename and query parameter separately
-                clean_path = relative_path.split('?')[0]
-                query_param = relative_path.split('?')[1] if '?' in relative_path else ''
-                base_url = url_for('static', filename=clean_path)
-                if query_param:
-                    base_url += f'?{query_param}'
-                
-                image_data = {
-                    'id': image_id,
-                    'url': base_url,
-                    'filename': file.filename,
-                    'path': relative_path
-                }
-                
-                current_images.append(image_data)
-                booking.set_voucher_images(current_images)
-                
-                uploaded_images.append(image_data)
-                current_app.logger.info(f'Successfully uploaded image for booking {id}: {file.filename}')
-            else:
-                current_app.logger.error(f'Failed to process image for booking {id}: {file.filename}')
-                return jsonify({'success': False, 'error': f'Failed to process image: {file.filename}'}), 500
-                
+            result = _store_voucher_image(file, booking, known_hashes)
         except Exception as e:
             current_app.logger.error(f'Upload exception for booking {id}, file {file.filename}: {str(e)}')
-            return jsonify({'success': False, 'error': f'Upload failed for {file.filename}: {str(e)}'}), 500
+            result = {'filename': file.filename, 'status': 'rejected', 'error': 'Upload failed'}
+        if result['status'] == 'rejected':
+            current_app.logger.warning(f"Rejected upload for booking {id}: {file.filename} ({result['error']})")
+        results.append(result)
+    
+    # Append every new image with one JSON decode/encode per batch
+    uploaded_images = []
+    now = int(time.time())
+    for result in results:
+        if result['status'] != 'queued':
+            continue
+        relative_path = result.pop('path')
+        clean_path, _, query_param = relative_path.partition('?')
+        base_url = url_for('static', filename=clean_path)
+        if query_param:
+            base_url += f'?{query_param}'
+        image_data = {
+            'id': f"img_{now}_{result['sha256'][:8]}",
+            'url': base_url,
+            'filename': result['filename'],
+            'path': relative_path,
+            'sha256': result['sha256'],
+        }
+        result['id'] = image_data['id']
+        uploaded_images.append(image_data)
     
     if uploaded_images:
         try:
+            # Re-read under a row lock so concurrent batches do not drop each other's images
+            db.session.refresh(booking, with_for_update=True)
+            current_images = booking.get_voucher_images()
+            current_images.extend(uploaded_images)
+            booking.set_voucher_images(current_images)
             db.session.commit()
             current_app.logger.info(f'Successfully uploaded {len(uploaded_images)} images for booking {id}')
         except Exception as e:
+            db.session.rollback()
             current_app.logger.error(f'Database commit failed for booking {id}: {str(e)}')
-            return jsonify({'success': False, 'error': 'Database save failed'}), 500
+            return jsonify({'success': False, 'error': 'Database save failed', 'files': results}), 500
     
-    return jsonify({'success': True, 'images': uploaded_images})
+    if not any(result['status'] != 'rejected' for result in results):
+        errors = '; '.join(f"{r['filename']}: {r['error']}" for r in results) or 'No files provided'
+        return jsonify({'success': False, 'error': errors, 'files': results}), 400
+    
+    return jsonify({'success': True, 'images': uploaded_images, 'files': results})
 
 @voucher_bp.route('/<int:id>/reorder-images', methods=['POST'])
 @login_required
@@ -936,8 +1128,8 @@ def qr_code(id):
     qr_generator = QRGenerator()
     
     try:
-        qr_path = qr_generator.generate_voucher_qr(booking)
-        return send_file(qr_path, mimetype='image/png')
+        png = qr_generator.png_bytes(qr_generator.voucher_qr_text(booking))
+        return send_file(io.BytesIO(png), mimetype='image/png')
     except Exception as e:
         flash(f'Error generating QR code: {str(e)}', 'error')
         return redirect(url_for('voucher.view', id=id))
@@ -1059,16 +1251,9 @@ def save_rows_api(id):
         elif album_ids is not None:
             current_app.logger.debug(f"voucher_album_ids not a list: {type(album_ids)}")
 
-        # ลบ cache PNG voucher ทุกครั้งที่แก้ไขข้อมูล
+        # ลบ cache PNG voucher ทุกครั้งที่แก้ไขข้อมูล (ทุกขนาด/ทุกหน้า ตาม artifact index)
         try:
-            scale_list = [200, 150, 100, 300]  # รองรับหลายขนาด
-            page_max = 5  # ลบได้สูงสุด 5 หน้า
-            for scale in scale_list:
-                for page_index in range(page_max):
-                    from routes.voucher import _voucher_png_cache_path
-                    cache_path = _voucher_png_cache_path(booking, page_index, scale)
-                    if os.path.exists(cache_path):
-                        os.remove(cache_path)
+            artifact_index.purge(booking.id)
         except Exception as e:
             current_app.logger.warning(f'Failed to clear voucher PNG cache: {e}')
         # Supplier persistence
@@ -1205,23 +1390,9 @@ def voucher_image_png(id):
         
         # All pages zipped
         if request.args.get('all') == '1':
-            pages_total = pdf_page_count(pdf_bytes)
-            if not pages_total:
+            zip_buf = _build_voucher_png_zip(booking, pdf_bytes, scale, zoom)
+            if zip_buf is None:
                 return jsonify({'success': False, 'message': 'No pages'}), 500
-            import zipfile
-            zip_buf = io.BytesIO()
-            with zipfile.ZipFile(zip_buf, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
-                for p in range(pages_total):
-                    cached_path = _ensure_voucher_png_cached(booking, pdf_bytes, p, scale, zoom)
-                    if cached_path and os.path.exists(cached_path):
-                        with open(cached_path,'rb') as fh:
-                            zf.writestr(os.path.basename(cached_path), fh.read())
-                    else:
-                        # fallback direct render
-                        from services.pdf_image import pdf_page_to_png_bytes
-                        data = pdf_page_to_png_bytes(pdf_bytes, p, zoom=zoom)
-                        zf.writestr(f'voucher_{booking.id}_p{p+1}.png', data)
-            zip_buf.seek(0)
             return send_file(zip_buf, mimetype='application/zip', download_name=f'voucher_{booking.id}_images.zip')
         # Single page
         page_param = request.args.get('page', '1')
@@ -1293,20 +1464,9 @@ def voucher_image_png_public(id):
             return send_file(buf, mimetype='image/png', download_name=f'voucher_{booking.id}_combined.png')
         
         if request.args.get('all') == '1':
-            pages_total = pdf_page_count(pdf_bytes)
-            import zipfile
-            zip_buf = io.BytesIO()
-            with zipfile.ZipFile(zip_buf, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
-                for p in range(pages_total):
-                    cached_path = _ensure_voucher_png_cached(booking, pdf_bytes, p, scale, zoom)
-                    if cached_path and os.path.exists(cached_path):
-                        with open(cached_path,'rb') as fh:
-                            zf.writestr(os.path.basename(cached_path), fh.read())
-                    else:
-                        from services.pdf_image import pdf_page_to_png_bytes
-                        data = pdf_page_to_png_bytes(pdf_bytes, p, zoom=zoom)
-                        zf.writestr(f'voucher_{booking.id}_p{p+1}.png', data)
-            zip_buf.seek(0)
+            zip_buf = _build_voucher_png_zip(booking, pdf_bytes, scale, zoom)
+            if zip_buf is None:
+                return jsonify({'success': False, 'message': 'No pages'}), 500
             return send_file(zip_buf, mimetype='application/zip', download_name=f'voucher_{booking.id}_images.zip')
         page_param = request.args.get('page', '1')
         try:
@@ -1656,9 +1816,13 @@ def upload_files(voucher_id):
         uploaded_files = []
         
         # Create upload directory
-        upload_dir = os.path.join('static', 'uploads', 'voucher_files')
+        upload_dir = VOUCHER_FILES_DIR
         os.makedirs(upload_dir, exist_ok=True)
         
+        max_bytes = current_app.config.get('VOUCHER_FILE_MAX_BYTES', 50 * 1024 * 1024)
+        batch_hashes = set()
+        skipped = []
+        
         for file in files:
             if file and file.filename:
                 # Generate unique filename
@@ -1666,8 +1830,18 @@ def upload_files(voucher_id):
                 unique_filename = f"{uuid.uuid4()}_{original_filename}"
                 file_path = os.path.join(upload_dir, unique_filename)
                 
-                # Save file
-                file.save(file_path)
+                # Stream to disk in chunks (size-capped, hashed)
+                try:
+                    part_path, sha256, size = stream_to_disk(file, upload_dir, max_bytes=max_bytes)
+                except UploadTooLarge:
+                    skipped.append({'filename': file.filename, 'error': f'File too large (max: {max_bytes // (1024 * 1024)}MB)'})
+                    continue
+                if sha256 in batch_hashes:
+                    discard(part_path)
+                    skipped.append({'filename': file.filename, 'error': 'Duplicate file in this upload'})
+                    continue
+                batch_hashes.add(sha256)
+                finalize(part_path, file_path)
                 
                 # Create database record
                 voucher_file = VoucherFile(
@@ -1676,7 +1850,7 @@ def upload_files(voucher_id):
                     original_filename=original_filename,
                     title=title,
                     file_path=file_path,
-                    file_size=os.path.getsize(file_path),
+                    file_size=size,
                     mime_type=file.content_type
                 )
                 
@@ -1684,13 +1858,20 @@ def upload_files(voucher_id):
                 voucher_file.set_expiry_from_booking(booking)
                 
                 db.session.add(voucher_file)
-                uploaded_files.append(voucher_file.to_dict())
+                uploaded_files.append(voucher_file)
         
+        db.session.flush()
+        tracked = [(f.file_path, f.expires_at, f.id, f.file_size) for f in uploaded_files]
+        uploaded_files = [f.to_dict() for f in uploaded_files]
         db.session.commit()
+        for file_path, expires_at, file_id, size in tracked:
+            StorageLifecycleService.track(file_path, 'voucher_file', expires_at=expires_at,
+                                          booking_id=voucher_id, owner_id=file_id, size=size)
         
         return jsonify({
             'success': True,
             'files': uploaded_files,
+            'skipped': skipped,
             'message': f'Uploaded {len(uploaded_files)} files successfully'
         })
         
@@ -1734,12 +1915,14 @@ def delete_file_api(voucher_id, file_id):
     
     try:
         # Delete physical file
-        if os.path.exists(voucher_file.file_path):
-            os.remove(voucher_file.file_path)
+        file_path = voucher_file.file_path
+        if os.path.exists(file_path):
+            os.remove(file_path)
         
         # Delete database record
         db.session.delete(voucher_file)
         db.session.commit()
+        StorageLifecycleService.forget([file_path], reason='purged')
         
         return jsonify({'success': True, 'message': 'File deleted successfully'})
         
@@ -1995,37 +2178,17 @@ def public_links(token):
 @voucher_bp.route('/cleanup-expired-files')
 @login_required
 def cleanup_expired_files():
-    """Cleanup expired voucher files"""
-    from datetime import datetime
-    
+    """Cleanup expired voucher files (chunked, journaled in artifact_deletions)"""
     try:
-        expired_files = VoucherFile.query.filter(
-            VoucherFile.expires_at < datetime.utcnow(),
-            VoucherFile.is_active == True
-        ).all()
-        
-        deleted_count = 0
-        for file in expired_files:
-            try:
-                # Delete physical file
-                if os.path.exists(file.file_path):
-                    os.remove(file.file_path)
-                
-                # Mark as inactive
-                file.is_active = False
-                deleted_count += 1
-                
-            except Exception as e:
-                current_app.logger.error(f'Error deleting expired file {file.id}: {e}')
-        
-        db.session.commit()
-        
+        result = StorageLifecycleService.sweep(kinds=['voucher_file'])
         return jsonify({
             'success': True,
-            'message': f'Cleaned up {deleted_count} expired files'
+            'message': f"Cleaned up {result['files']} expired files",
+            'bytes_reclaimed': result['bytes'],
+            'missing': result['missing'],
+            'errors': result['errors'],
         })
         
     except Exception as e:
         current_app.logger.error(f'Error in cleanup: {e}')
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -11,12 +11,6 @@ except AttributeError:
 from reportlab_fix import patch_reportlab_md5
 patch_reportlab_md5()
 
-# Apply ultra-aggressive datetime fix FIRST - CRITICAL for SQLAlchemy TIME handling
-import ultra_aggressive_datetime_fix
-ultra_aggressive_datetime_fix.ultra_aggressive_patch()
-ultra_aggressive_datetime_fix.apply_engine_level_patch()
-print("🚀 Ultra-aggressive datetime fix applied in run.py")
-
 from app import create_app, db
 from models.user import User
 from models.customer import Customer
@@ -0,0 +1,207 @@
+"""
+Synthetic booking fixtures for offline benchmarks
+ข้อมูล booking จำลอง (ไทย/อังกฤษ) สำหรับวัดผลโดยไม่ต้องใช้ฐานข้อมูลจริง
+
+Every fixture is deterministic (seeded) so results are comparable between
+runs and against a stored baseline.
+"""
+
+import json
+import os
+import random
+from datetime import date, datetime, timedelta
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Images are written under the normal voucher upload folder so generators
+# resolve them exactly like real uploads; remove_fixture_images() cleans up.
+FIXTURE_IMAGE_DIR = os.path.join('uploads', 'voucher_images', '_benchmark')
+
+# name -> shape of the booking
+FIXTURES = {
+    'small_en': {'guests': 1, 'images': 0, 'itinerary_days': 1, 'script': 'en'},
+    'family_th': {'guests': 4, 'images': 2, 'itinerary_days': 5, 'script': 'th'},
+    'group_mixed': {'guests': 30, 'images': 5, 'itinerary_days': 12, 'script': 'mixed'},
+    'long_itinerary': {'guests': 10, 'images': 0, 'itinerary_days': 60, 'script': 'mixed'},
+    'large_group': {'guests': 100, 'images': 20, 'itinerary_days': 30, 'script': 'mixed'},
+}
+
+THAI_FIRST = ['สมชาย', 'สมหญิง', 'ประยุทธ', 'วิไลวรรณ', 'ณัฐพล', 'กิตติพงษ์', 'ศิริพร', 'อรุณี', 'ธนากร', 'พิมพ์ชนก']
+THAI_LAST = ['ใจดี', 'รักไทย', 'ศรีสุข', 'วงศ์สวัสดิ์', 'แสงทอง', 'บุญมา', 'ทองคำ', 'พึ่งบุญ']
+EN_FIRST = ['JOHN', 'MARY', 'DAVID', 'SARAH', 'MICHAEL', 'EMMA', 'WEI', 'HIROSHI', 'ANNA', 'LUCAS']
+EN_LAST = ['SMITH', 'JOHNSON', 'CHEN', 'TANAKA', 'BROWN', 'WONG', 'GARCIA', 'MULLER']
+
+TH_ACTIVITIES = [
+    'รับที่สนามบินสุวรรณภูมิ เดินทางเข้าที่พัก',
+    'ชมวัดพระแก้วและพระบรมมหาราชวัง รับประทานอาหารกลางวันที่ร้านอาหารริมน้ำ',
+    'ล่องเรือแม่น้ำเจ้าพระยา ชมวิวยามเย็น',
+    'เดินทางสู่พัทยา เที่ยวเกาะล้าน ดำน้ำดูปะการัง',
+    'อิสระช้อปปิ้งตลาดนัดจตุจักร',
+]
+EN_ACTIVITIES = [
+    'Airport pick-up at Suvarnabhumi (BKK), transfer to hotel',
+    'Grand Palace & Temple of the Emerald Buddha, lunch at riverside restaurant',
+    'Chao Phraya dinner cruise with live music',
+    'Transfer to Pattaya, speedboat to Coral Island, snorkelling',
+    'Free day for shopping at Chatuchak Weekend Market',
+]
+
+
+def _rng(name):
+    return random.Random(f'pdf-benchmark:{name}')
+
+
+def _guest_name(rng, script):
+    if script == 'th' or (script == 'mixed' and rng.random() < 0.5):
+        return f'{rng.choice(THAI_FIRST)} {rng.choice(THAI_LAST)}'
+    return f'{rng.choice(EN_LAST)}/{rng.choice(EN_FIRST)} MR'
+
+
+def guest_list_text(rng, count, script):
+    return '\n'.join(f'{i}. {_guest_name(rng, script)}' for i in range(1, count + 1))
+
+
+def itinerary_text(rng, days, script):
+    lines = []
+    for day in range(1, days + 1):
+        activities = []
+        if script in ('th', 'mixed'):
+            activities.append(rng.choice(TH_ACTIVITIES))
+        if script in ('en', 'mixed'):
+            activities.append(rng.choice(EN_ACTIVITIES))
+        lines.append(f'Day {day}: ' + ' / '.join(activities))
+    return '\n'.join(lines)
+
+
+def products_for(rng, spec):
+    adults = max(1, spec['guests'] - spec['guests'] // 4)
+    children = spec['guests'] - adults
+    products = [
+        {'name': 'ADT ผู้ใหญ่ / Adult', 'quantity': adults, 'price': 3750.0, 'amount': adults * 3750.0},
+    ]
+    if children:
+        products.append({'name': 'CHD เด็ก / Child', 'quantity': children, 'price': 2900.0, 'amount': children * 2900.0})
+    for day in range(min(spec['itinerary_days'], 10)):
+        price = float(rng.choice([500, 850, 1200, 1800]))
+        products.append({'name': f'Day {day + 1} excursion', 'quantity': spec['guests'], 'price': price,
+                         'amount': price * spec['guests']})
+    products.append({'name': 'ส่วนลดกรุ๊ป / Group discount', 'quantity': 1, 'price': -500.0, 'amount': -500.0,
+                     'is_negative': True})
+    return products, adults, children
+
+
+def write_fixture_images(count):
+    """Create ``count`` small PNG images; returns voucher_images entries"""
+    if not count:
+        return []
+    from PIL import Image, ImageDraw
+
+    directory = os.path.join(PROJECT_ROOT, 'static', FIXTURE_IMAGE_DIR)
+    os.makedirs(directory, exist_ok=True)
+    entries = []
+    for i in range(count):
+        filename = f'fixture_{i:02d}.png'
+        path = os.path.join(directory, filename)
+        if not os.path.exists(path):
+            image = Image.new('RGB', (1200, 800), ((i * 37) % 255, (i * 91) % 255, (i * 53) % 255))
+            ImageDraw.Draw(image).rectangle([100, 100, 1100, 700], outline=(255, 255, 255), width=12)
+            image.save(path, 'PNG')
+        entries.append({
+            'id': f'fixture-{i}',
+            'url': f'/static/{FIXTURE_IMAGE_DIR}/{filename}'.replace(os.sep, '/'),
+            'filename': filename,
+            'title': f'Fixture image {i + 1}',
+        })
+    return entries
+
+
+def remove_fixture_images():
+    import shutil
+    shutil.rmtree(os.path.join(PROJECT_ROOT, 'static', FIXTURE_IMAGE_DIR), ignore_errors=True)
+
+
+def create_fixture_bookings(session, names=None):
+    """Insert one customer + booking per fixture; returns {name: booking_id}"""
+    from models.booking import Booking
+    from models.customer import Customer
+
+    created = {}
+    for name in names or FIXTURES:
+        spec = FIXTURES[name]
+        rng = _rng(name)
+        products, adults, children = products_for(rng, spec)
+        start = date(2026, 1, 10)
+
+        customer = Customer(
+            name=_guest_name(rng, spec['script']) if spec['script'] != 'en' else 'JOHN SMITH',
+            email=f'{name}@example.com',
+            phone='+66812345678',
+            address='710 Prachauthit Road, Huai Kwang, Bangkok 10310',
+        )
+        session.add(customer)
+        session.flush()
+
+        booking = Booking(
+            customer_id=customer.id,
+            booking_reference=f'BKBENCH{name.upper()}'[:100],
+            booking_type='tour',
+            status='quoted',
+            quote_number=f'QT26010{len(created) + 1:03d}',
+            arrival_date=start,
+            departure_date=start + timedelta(days=spec['itinerary_days']),
+            traveling_period_start=start,
+            traveling_period_end=start + timedelta(days=spec['itinerary_days']),
+            adults=adults,
+            children=children,
+            infants=0,
+            total_pax=spec['guests'],
+            guest_list=guest_list_text(rng, spec['guests'], spec['script']),
+            party_name=f'Benchmark {name}',
+            description=itinerary_text(rng, spec['itinerary_days'], spec['script']),
+            flight_info='TG 641 BKK-NRT 10JAN 08:00-16:10\nTG 642 NRT-BKK 20JAN 17:30-22:30',
+            hotel_name='Centara Grand / เซ็นทารา แกรนด์',
+            special_request='Vegetarian meals for 2 guests / อาหารมังสวิรัติ 2 ท่าน',
+            products=json.dumps(products, ensure_ascii=False),
+            voucher_images=json.dumps(write_fixture_images(spec['images'])),
+            total_amount=sum(p['amount'] for p in products),
+            currency='THB',
+            time_limit=datetime(2026, 1, 5, 12, 0),
+            due_date=date(2026, 1, 5),
+        )
+        session.add(booking)
+        session.flush()
+        created[name] = booking.id
+
+    session.commit()
+    return created
+
+
+def booking_data_dict(booking):
+    """Dict form used by the booking_data based generators (classic / modern)"""
+    customer = booking.customer
+    return {
+        'booking_id': booking.booking_reference,
+        'booking_reference': booking.booking_reference,
+        'guest_name': customer.name if customer else 'Unknown Guest',
+        'guest_email': customer.email if customer else '',
+        'guest_phone': customer.phone if customer else '',
+        'customer_name': customer.name if customer else '',
+        'guest_list': booking.guest_list or '',
+        'adults': booking.adults or 0,
+        'children': booking.children or 0,
+        'infants': booking.infants or 0,
+        'total_guests': booking.total_pax or 0,
+        'flight_info': booking.flight_info or '',
+        'service_detail': booking.description or '',
+        'description': booking.description or '',
+        'created_date': (booking.created_at or datetime.now()).strftime('%d.%b.%Y'),
+        'arrival_date': booking.arrival_date.strftime('%d %b %Y') if booking.arrival_date else 'N/A',
+        'departure_date': booking.departure_date.strftime('%d %b %Y') if booking.departure_date else 'N/A',
+        'traveling_period': f'{booking.traveling_period_start} - {booking.traveling_period_end}',
+        'total_amount': float(booking.total_amount or 0),
+        'products_json': booking.products or '[]',
+        'status': booking.status,
+        'quote_number': booking.quote_number,
+        'booking_type': booking.booking_type,
+        'party_name': booking.party_name,
+    }
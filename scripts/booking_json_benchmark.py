@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Booking JSON Column Benchmark
+เปรียบเทียบ Booking.get_products() / get_daily_services() / ... แบบ json.loads ทุกครั้ง กับ cache ต่อ instance
+
+Builds Booking instances with a large itinerary (daily services, products,
+voucher images, album IDs, a legacy HTML guest list) and replays what one
+voucher / PDF request does: every getter called several times (template,
+BookingWrapper, generator). Timed per request:
+
+    legacy - json.loads (and the regex guest-list fallback) on every call, as before
+    cached - Booking getters: decoded once per loaded value, callers get a copy
+
+The decoder is orjson when installed, stdlib json otherwise (shown in the
+output). Getter results must equal the legacy ones, a caller mutating a
+result must not change the next call, and an assignment must be seen by the
+next call; the exit code is 1 otherwise. No database is needed.
+
+ใช้งาน:
+    python scripts/booking_json_benchmark.py
+    python scripts/booking_json_benchmark.py --services 120 --calls 8
+    make booking-json-benchmark
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+import models  # noqa: E402,F401  (registers every mapper Booking refers to)
+from models.booking import Booking  # noqa: E402
+from utils import json_codec  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, 'instance', 'benchmarks', 'booking_json_benchmark.json')
+GETTERS = ('get_products', 'get_daily_services', 'get_voucher_images', 'get_voucher_album_ids', 'get_guest_list')
+
+
+# ---------------------------------------------------------------------------
+# Legacy getters (as they were)
+# ---------------------------------------------------------------------------
+def legacy_json(raw):
+    if raw:
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return []
+    return []
+
+
+def legacy_guest_list(raw):
+    if raw:
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            text_with_breaks = raw.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
+            clean_text = re.sub(r'<[^>]+>', '', text_with_breaks)
+            return [line.strip() for line in clean_text.split('\n') if line.strip()]
+    return []
+
+
+LEGACY = {
+    'get_products': lambda b: legacy_json(b.products),
+    'get_daily_services': lambda b: legacy_json(b.daily_services),
+    'get_voucher_images': lambda b: legacy_json(b.voucher_images),
+    'get_voucher_album_ids': lambda b: legacy_json(b.voucher_album_ids),
+    'get_guest_list': lambda b: legacy_guest_list(b.guest_list),
+}
+
+
+# ---------------------------------------------------------------------------
+# Data
+# ---------------------------------------------------------------------------
+def build_booking(services, seed):
+    rng = random.Random(seed)
+    booking = Booking()
+    booking.daily_services = json.dumps([{
+        'arrival': f'2025-03-{day % 28 + 1:02d}', 'departure': f'2025-03-{(day + 1) % 28 + 1:02d}',
+        'service_by': rng.choice(['Ocean Park Hotel', 'โรงแรมดิสนีย์แลนด์', 'Big Bus Tours']),
+        'description': 'รับที่โรงแรม 08:00 น. / Pickup 08:00 - ' + 'รายละเอียดทัวร์ ' * rng.randint(5, 40),
+        'type': rng.choice(['Hotel', 'Tour', 'Transfer']),
+    } for day in range(services)])
+    booking.products = json.dumps([{
+        'name': f'Product {i} ทัวร์ฮ่องกง', 'quantity': rng.randint(1, 6),
+        'price': round(rng.uniform(300, 9000), 2), 'amount': round(rng.uniform(300, 50000), 2),
+    } for i in range(services // 2 + 1)])
+    booking.voucher_images = json.dumps([{
+        'id': f'img{i}', 'path': f'uploads/voucher_images/{seed}_{i}.jpg', 'sha256': f'{rng.getrandbits(128):032x}',
+    } for i in range(rng.randint(2, 20))])
+    booking.voucher_album_ids = json.dumps(rng.sample(range(1, 400), rng.randint(1, 12)))
+    booking.guest_list = '<p>' + '<br>'.join(f'Guest {i} นาย ทดสอบ' for i in range(rng.randint(2, 30))) + '</p>'
+    return booking
+
+
+def replay(bookings, getters, calls):
+    for booking in bookings:
+        for _ in range(calls):
+            for name in GETTERS:
+                getters[name](booking)
+
+
+def time_runs(fn, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def check(bookings):
+    failures = []
+    for booking in bookings:
+        for name in GETTERS:
+            if getattr(booking, name)() != LEGACY[name](booking):
+                failures.append(f'{name}: differs from legacy for booking seed {booking.booking_reference}')
+    booking = bookings[0]
+    products = booking.get_products()
+    products.append({'name': 'extra'})
+    products[0]['name'] = 'changed'
+    if booking.get_products() != LEGACY['get_products'](booking):
+        failures.append('get_products: caller mutation leaked into the cache')
+    booking.set_products([{'name': 'new'}])
+    if booking.get_products() != [{'name': 'new'}]:
+        failures.append('set_products: next get_products() returned the old value')
+    booking.daily_services = '[]'
+    if booking.get_daily_services() != []:
+        failures.append('daily_services assignment: next get_daily_services() returned the old value')
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Booking JSON column decoding')
+    parser.add_argument('--bookings', type=int, default=50, help='bookings per request batch')
+    parser.add_argument('--services', type=int, default=60, help='daily services per booking')
+    parser.add_argument('--calls', type=int, default=5, help='calls per getter per request')
+    parser.add_argument('--runs', type=int, default=5, help='timed runs per variant')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='results JSON path')
+    args = parser.parse_args(argv)
+
+    decoder = 'orjson' if json_codec.orjson is not None else 'json'
+    print(f'📦 {args.bookings} bookings x {args.services} daily services, {args.calls} calls per getter '
+          f'(decoder: {decoder})', flush=True)
+
+    def fresh_bookings():
+        return [build_booking(args.services, seed) for seed in range(args.bookings)]
+
+    legacy_bookings = fresh_bookings()
+    legacy = time_runs(lambda: replay(legacy_bookings, LEGACY, args.calls), args.runs)
+    cached_getters = {name: getattr(Booking, name) for name in GETTERS}
+    cached_samples = []
+    for _ in range(args.runs):
+        bookings = fresh_bookings()  # every request loads its own instances: the first call decodes
+        cached_samples.append(time_runs(lambda: replay(bookings, cached_getters, args.calls), 1))
+    cached = statistics.median(cached_samples)
+
+    per_request = {'legacy_ms': round(legacy / args.bookings * 1000, 3),
+                   'cached_ms': round(cached / args.bookings * 1000, 3)}
+    speedup = legacy / cached if cached else 0
+    print(f"▶ legacy {per_request['legacy_ms']:>8.3f}ms per booking request")
+    print(f"▶ cached {per_request['cached_ms']:>8.3f}ms per booking request  ({speedup:.1f}x)")
+
+    check_bookings = fresh_bookings()
+    for seed, booking in enumerate(check_bookings):
+        booking.booking_reference = str(seed)
+    failures = check(check_bookings)
+    for failure in failures:
+        print(f'❌ {failure}')
+    if not failures:
+        print(f'✅ {len(check_bookings)} bookings x {len(GETTERS)} getters match; mutation and invalidation checks pass')
+
+    payload = {
+        'meta': {'timestamp': datetime.now().isoformat(timespec='seconds'), 'decoder': decoder,
+                 'bookings': args.bookings, 'services': args.services, 'calls': args.calls, 'runs': args.runs},
+        'per_request': per_request,
+        'speedup': round(speedup, 2),
+        'failures': failures,
+    }
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+    print(f'\n📄 Results written to {args.output}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
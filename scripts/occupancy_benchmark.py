@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Booking Occupancy Benchmark
+เปรียบเทียบ query ช่วงวันเดินทางแบบเดิม (OR 3 เงื่อนไข) กับ booking_days index
+
+Generates N synthetic bookings (default 100k) in scratch tables
+``bench_bookings`` / ``bench_booking_days`` with the production indexes,
+builds the travel-day rows with the same span rules as
+services/booking_occupancy_service.py, then times the calendar, conflict,
+daily-report and per-day occupancy queries both ways and checks that the
+indexed version returns exactly the same bookings.
+
+ใช้งาน:
+    python scripts/occupancy_benchmark.py                              # SQLite ชั่วคราว, 100k bookings
+    python scripts/occupancy_benchmark.py --bookings 20000 --queries 50
+    python scripts/occupancy_benchmark.py --database-url mysql+mysqlconnector://user:pw@host/scratch_db
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+from sqlalchemy import (  # noqa: E402
+    Column, Date, Index, Integer, MetaData, String, Table, and_, create_engine, func, or_, select
+)
+
+from services.booking_occupancy_service import BookingOccupancyService  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, 'instance', 'benchmarks', 'occupancy_benchmark.json')
+STATUSES = ['draft', 'pending', 'confirmed', 'quoted', 'paid', 'vouchered', 'completed', 'cancelled']
+CONFLICT_STATUSES = ['confirmed', 'paid', 'vouchered']
+FIRST_DAY = date(2024, 1, 1)
+SPAN_YEARS = 3
+
+metadata = MetaData()
+bookings = Table(
+    'bench_bookings', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('status', String(50)),
+    Column('arrival_date', Date),
+    Column('departure_date', Date),
+    Column('traveling_period_start', Date),
+    Column('traveling_period_end', Date),
+    Column('total_pax', Integer),
+    Index('idx_bench_dates', 'arrival_date', 'departure_date'),  # same as bookings.idx_dates
+    Index('idx_bench_status', 'status'),
+)
+booking_days = Table(
+    'bench_booking_days', metadata,
+    Column('day', Date, primary_key=True),
+    Column('booking_id', Integer, primary_key=True),
+    Index('idx_bench_booking_days_booking', 'booking_id'),
+)
+
+
+# ---------------------------------------------------------------------------
+# Data
+# ---------------------------------------------------------------------------
+def generate_bookings(count, seed=42):
+    rng = random.Random(seed)
+    horizon = SPAN_YEARS * 365
+    rows = []
+    for booking_id in range(1, count + 1):
+        arrival = FIRST_DAY + timedelta(days=rng.randrange(horizon))
+        length = min(int(rng.lognormvariate(1.4, 0.7)), 45)
+        departure = arrival + timedelta(days=length)
+        roll = rng.random()
+        if roll < 0.02:
+            departure = None                                    # arrival only
+        elif roll < 0.03:
+            arrival, departure = None, None                     # dates only in traveling_period
+        elif roll < 0.032:
+            departure = arrival + timedelta(days=rng.randrange(400, 3000))  # typo'd year
+        period_start = arrival or FIRST_DAY + timedelta(days=rng.randrange(horizon))
+        rows.append({
+            'id': booking_id,
+            'status': rng.choice(STATUSES),
+            'arrival_date': arrival,
+            'departure_date': departure,
+            'traveling_period_start': period_start,
+            'traveling_period_end': departure or period_start + timedelta(days=length),
+            'total_pax': rng.randint(1, 40),
+        })
+    return rows
+
+
+def day_rows(booking_rows):
+    for row in booking_rows:
+        span = BookingOccupancyService.travel_span(
+            row['arrival_date'], row['departure_date'],
+            row['traveling_period_start'], row['traveling_period_end'])
+        for day in BookingOccupancyService._expand(span):
+            yield {'day': day, 'booking_id': row['id']}
+
+
+def insert_chunked(connection, table, rows, chunk_size=5000):
+    chunk = []
+    total = 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            connection.execute(table.insert(), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        connection.execute(table.insert(), chunk)
+        total += len(chunk)
+    return total
+
+
+# ---------------------------------------------------------------------------
+# Queries: the predicates in routes/booking_calendar.py, with and without
+# the booking_days candidate filter
+# ---------------------------------------------------------------------------
+b = bookings.c
+
+
+def calendar_predicate(start, end):
+    return or_(
+        and_(b.arrival_date >= start, b.arrival_date <= end),
+        and_(b.departure_date >= start, b.departure_date <= end),
+        and_(b.arrival_date <= start, b.departure_date >= end),
+    )
+
+
+def conflict_predicate(start, end):
+    return and_(
+        b.status.in_(CONFLICT_STATUSES),
+        or_(
+            and_(b.arrival_date >= start, b.arrival_date < end),
+            and_(b.departure_date > start, b.departure_date <= end),
+            and_(b.arrival_date <= start, b.departure_date >= end),
+        ),
+    )
+
+
+def daily_report_predicate(start, end):
+    return or_(
+        and_(b.arrival_date >= start, b.arrival_date <= end),
+        and_(b.departure_date >= start, b.departure_date <= end),
+    )
+
+
+def indexed(predicate, start, end):
+    candidates = select(booking_days.c.booking_id).where(booking_days.c.day.between(start, end))
+    return and_(b.id.in_(candidates), predicate)
+
+
+def occupancy_scan(start, end):
+    """Per-day counts without the index: fetch overlapping bookings and expand in Python"""
+    return select(b.arrival_date, b.departure_date, b.traveling_period_start, b.traveling_period_end,
+                  b.total_pax).where(calendar_predicate(start, end))
+
+
+def occupancy_indexed(start, end):
+    return select(
+        booking_days.c.day, func.count(booking_days.c.booking_id), func.sum(b.total_pax)
+    ).select_from(
+        booking_days.join(bookings, bookings.c.id == booking_days.c.booking_id)
+    ).where(booking_days.c.day.between(start, end)).group_by(booking_days.c.day)
+
+
+def windows(kind, count, seed=7):
+    rng = random.Random(f'{seed}:{kind}')
+    horizon = SPAN_YEARS * 365
+    lengths = {'calendar': (35, 42), 'conflict': (2, 14), 'daily_report': (0, 0), 'occupancy': (28, 31)}
+    low, high = lengths[kind]
+    for _ in range(count):
+        start = FIRST_DAY + timedelta(days=rng.randrange(horizon))
+        yield start, start + timedelta(days=rng.randint(low, high))
+
+
+def timed(connection, statement):
+    started = time.perf_counter()
+    rows = connection.execute(statement).fetchall()
+    return time.perf_counter() - started, rows
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'p95_ms': round(ordered[int(len(ordered) * 0.95) - 1 if len(ordered) > 1 else 0] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def run_case(connection, kind, predicate_factory, count):
+    legacy, fast, mismatches, matched = [], [], 0, 0
+    for start, end in windows(kind, count):
+        predicate = predicate_factory(start, end)
+        t_old, old_rows = timed(connection, select(b.id).where(predicate))
+        t_new, new_rows = timed(connection, select(b.id).where(indexed(predicate, start, end)))
+        legacy.append(t_old)
+        fast.append(t_new)
+        old_ids, new_ids = {r[0] for r in old_rows}, {r[0] for r in new_rows}
+        matched += len(old_ids)
+        if old_ids != new_ids:
+            mismatches += 1
+    return {'case': kind, 'queries': count, 'avg_rows': round(matched / max(count, 1), 1),
+            'mismatches': mismatches, 'legacy': summarize(legacy), 'indexed': summarize(fast)}
+
+
+def run_occupancy(connection, count):
+    legacy, fast = [], []
+    for start, end in windows('occupancy', count):
+        t_old, rows = timed(connection, occupancy_scan(start, end))
+        started = time.perf_counter()
+        per_day = {}
+        for row in rows:
+            for day in BookingOccupancyService._expand(BookingOccupancyService.travel_span(*row[:4])):
+                if start <= day <= end:
+                    per_day[day] = per_day.get(day, 0) + 1
+        legacy.append(t_old + time.perf_counter() - started)
+        t_new, _ = timed(connection, occupancy_indexed(start, end))
+        fast.append(t_new)
+    return {'case': 'occupancy', 'queries': count, 'avg_rows': None, 'mismatches': None,
+            'legacy': summarize(legacy), 'indexed': summarize(fast)}
+
+
+def print_table(results):
+    print(f"\n{'case':<14} {'rows':>8} {'legacy med':>11} {'p95':>9} {'indexed med':>12} {'p95':>9} {'speedup':>8}")
+    for row in results:
+        speedup = row['legacy']['median_ms'] / row['indexed']['median_ms'] if row['indexed']['median_ms'] else 0
+        print(f"{row['case']:<14} {row['avg_rows'] if row['avg_rows'] is not None else '-':>8} "
+              f"{row['legacy']['median_ms']:>9.2f}ms {row['legacy']['p95_ms']:>7.2f}ms "
+              f"{row['indexed']['median_ms']:>10.2f}ms {row['indexed']['p95_ms']:>7.2f}ms {speedup:>7.1f}x")
+        if row['mismatches']:
+            print(f"  ❌ {row['mismatches']} windows returned different bookings")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the booking_days travel-day index')
+    parser.add_argument('--bookings', type=int, default=100000, help='synthetic bookings to generate')
+    parser.add_argument('--queries', type=int, default=200, help='random windows per query type')
+    parser.add_argument('--database-url', help='scratch database (default: temporary SQLite file)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='results JSON path')
+    parser.add_argument('--keep', action='store_true', help='keep the bench_* tables afterwards')
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='occupancy_bench_'), 'bench.db')}"
+    engine = create_engine(database_url)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+    try:
+        print(f'📦 Generating {args.bookings:,} bookings ...', flush=True)
+        rows = generate_bookings(args.bookings)
+        with engine.begin() as connection:
+            insert_chunked(connection, bookings, rows)
+            started = time.perf_counter()
+            day_count = insert_chunked(connection, booking_days, day_rows(rows))
+            build_seconds = time.perf_counter() - started
+        print(f'🗓  {day_count:,} booking_days rows built in {build_seconds:.1f}s '
+              f'({day_count / args.bookings:.1f} per booking)', flush=True)
+        if engine.dialect.name == 'sqlite':
+            with engine.begin() as connection:
+                connection.exec_driver_sql('ANALYZE')
+
+        results = []
+        with engine.connect() as connection:
+            for kind, factory in (('calendar', calendar_predicate), ('conflict', conflict_predicate),
+                                  ('daily_report', daily_report_predicate)):
+                print(f'▶ {kind} ...', flush=True)
+                results.append(run_case(connection, kind, factory, args.queries))
+            print('▶ occupancy ...', flush=True)
+            results.append(run_occupancy(connection, max(args.queries // 4, 1)))
+    finally:
+        if not args.keep:
+            metadata.drop_all(engine)
+
+    print_table(results)
+    payload = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'database': engine.dialect.name,
+            'bookings': args.bookings,
+            'booking_days': day_count,
+            'build_seconds': round(build_seconds, 2),
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+    print(f'\n📄 Results written to {args.output}')
+    return 1 if any(row['mismatches'] for row in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+PDF Rendering Benchmark
+วัดผล document generator ทุกตัวแบบ offline (SQLite + ข้อมูลจำลอง)
+
+Each (generator, fixture) case runs in a forked child process against a
+throwaway SQLite database, so timings and memory are not polluted by earlier
+cases. Recorded per case: wall time (cold first run, min, median, max), peak
+RSS, RSS growth over the pre-run high-water mark, output size and page count.
+Results go to JSON and are compared to a stored baseline; the exit code is 1
+when a case got slower / bigger than the tolerance or started failing.
+
+ใช้งาน:
+    python scripts/pdf_benchmark.py --runs 3                  # ทุก generator ทุก fixture
+    python scripts/pdf_benchmark.py --only weasyprint_quote --fixtures large_group
+    python scripts/pdf_benchmark.py --list
+    python scripts/pdf_benchmark.py --update-baseline          # บันทึก baseline ใหม่
+    make benchmark
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, SCRIPT_DIR)
+
+from benchmark_fixtures import FIXTURES, booking_data_dict, create_fixture_bookings, remove_fixture_images  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, 'benchmarks', 'pdf_baseline.json')
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, 'instance', 'benchmarks', 'pdf_benchmark.json')
+
+logger = logging.getLogger('pdf_benchmark')
+
+
+# ---------------------------------------------------------------------------
+# Generators: each entry takes a booking and returns the callable to time.
+# Construction happens inside the callable because routes build a new
+# generator per request.
+# ---------------------------------------------------------------------------
+
+def _products(booking):
+    try:
+        return json.loads(booking.products or '[]')
+    except ValueError:
+        return []
+
+
+def _classic_service_proposal(booking):
+    from services.classic_pdf_generator import ClassicPDFGenerator
+    data, products = booking_data_dict(booking), _products(booking)
+    return lambda: ClassicPDFGenerator().generate_pdf(data, products)
+
+
+def _classic_quote(booking):
+    from services.classic_pdf_generator_quote import ClassicPDFGenerator
+    return lambda: ClassicPDFGenerator().generate_quote_pdf(booking)
+
+
+def _classic_receipt(booking):
+    from services.classic_pdf_generator_receipt import ClassicPDFGenerator
+    return lambda: ClassicPDFGenerator().generate_quote_pdf(booking)
+
+
+def _tour_voucher_v2(booking):
+    from services.tour_voucher_weasyprint_v2 import TourVoucherWeasyPrintV2
+    return lambda: TourVoucherWeasyPrintV2().generate_tour_voucher_v2_bytes(booking)
+
+
+def _modern_weasyprint(booking):
+    from services.weasyprint_generator_v2 import ModernWeasyPrintGenerator
+    data, products = booking_data_dict(booking), _products(booking)
+    return lambda: ModernWeasyPrintGenerator().generate_service_proposal(data, products)
+
+
+def _weasyprint_quote(booking):
+    from services.weasyprint_quote_generator import WeasyPrintQuoteGenerator
+    return lambda: WeasyPrintQuoteGenerator().generate_quote_pdf(booking)
+
+
+def _pdf_generator_voucher(booking):
+    from services.pdf_generator import PDFGenerator
+    return lambda: PDFGenerator().generate_tour_voucher_bytes(booking)
+
+
+def _simple_service_proposal(booking):
+    from services.pdf_generator import PDFGenerator
+    return lambda: PDFGenerator().generate_booking_pdf(booking)
+
+
+def _pdf_to_png(booking):
+    # วัดเฉพาะ PDF -> PNG (PDF สร้างครั้งเดียวนอกช่วงจับเวลา)
+    from services.pdf_image import pdf_to_png_bytes_list
+    from services.tour_voucher_weasyprint_v2 import TourVoucherWeasyPrintV2
+    pdf_bytes = TourVoucherWeasyPrintV2().generate_tour_voucher_v2_bytes(booking)
+    return lambda: pdf_to_png_bytes_list(pdf_bytes)
+
+
+GENERATORS = {
+    'classic_service_proposal': _classic_service_proposal,
+    'classic_quote': _classic_quote,
+    'classic_receipt': _classic_receipt,
+    'tour_voucher_v2': _tour_voucher_v2,
+    'modern_weasyprint': _modern_weasyprint,
+    'weasyprint_quote': _weasyprint_quote,
+    'pdf_generator_voucher': _pdf_generator_voucher,
+    'simple_service_proposal': _simple_service_proposal,
+    'pdf_to_png': _pdf_to_png,
+}
+
+
+# ---------------------------------------------------------------------------
+# Measuring
+# ---------------------------------------------------------------------------
+
+def _maxrss_mb():
+    """Peak RSS of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _page_count(pdf_bytes):
+    try:
+        from services.pdf_image import pdf_page_count
+        pages = pdf_page_count(pdf_bytes)
+        if pages:
+            return pages
+    except Exception:
+        pass
+    return len(re.findall(rb'/Type\s*/Page(?![s\w])', pdf_bytes))
+
+
+def _resolve_output(result):
+    """Normalize a generator result to (size_bytes, pages, files_to_remove)"""
+    if isinstance(result, tuple):
+        result = result[0]
+    if isinstance(result, (bytes, bytearray)):
+        return len(result), _page_count(bytes(result)), []
+    if isinstance(result, list):  # PNG pages
+        return sum(len(page) for page in result), len(result), []
+    if isinstance(result, str):
+        from services.classic_pdf_generator import get_writable_output_dir
+        for path in (result, os.path.join('static', 'generated', result),
+                     os.path.join(get_writable_output_dir(), result)):
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                return len(data), _page_count(data), [path]
+        raise RuntimeError(f'generator returned {result!r} but no such file exists')
+    raise RuntimeError(f'generator returned {type(result).__name__}: {result!r}')
+
+
+def _run_case(generator_name, booking_id, runs, warm):
+    """Run one case in the current process; returns the result dict"""
+    from app import app
+    from extensions import db
+    from models.booking import Booking
+    from services.cache_service import get_cache
+
+    with app.app_context():
+        booking = db.session.get(Booking, booking_id)
+        rss_before = _maxrss_mb()
+        case = GENERATORS[generator_name](booking)
+
+        timings = []
+        size = pages = None
+        for _ in range(runs):
+            if not warm:
+                get_cache().clear()
+            started = time.perf_counter()
+            result = case()
+            timings.append(time.perf_counter() - started)
+            size, pages, files = _resolve_output(result)
+            for path in files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        peak = _maxrss_mb()
+        return {
+            'status': 'ok',
+            'runs': runs,
+            'cold_s': round(timings[0], 4),
+            'min_s': round(min(timings), 4),
+            'median_s': round(statistics.median(timings), 4),
+            'max_s': round(max(timings), 4),
+            'peak_rss_mb': round(peak, 1),
+            'rss_delta_mb': round(max(0.0, peak - rss_before), 1),
+            'output_bytes': size,
+            'pages': pages,
+        }
+
+
+def _child(conn, generator_name, booking_id, runs, warm):
+    try:
+        conn.send(_run_case(generator_name, booking_id, runs, warm))
+    except Exception as e:
+        conn.send({'status': 'error', 'error': f'{type(e).__name__}: {e}', 'traceback': traceback.format_exc()})
+    finally:
+        conn.close()
+
+
+def run_isolated(generator_name, booking_id, runs, warm, timeout):
+    """Run a case in a forked child (fresh peak RSS); in-process where fork is unavailable"""
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        try:
+            result = _run_case(generator_name, booking_id, runs, warm)
+        except Exception as e:
+            result = {'status': 'error', 'error': f'{type(e).__name__}: {e}', 'traceback': traceback.format_exc()}
+        result['isolated'] = False
+        return result
+
+    ctx = multiprocessing.get_context('fork')
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_child, args=(child_conn, generator_name, booking_id, runs, warm))
+    process.start()
+    child_conn.close()
+    if parent_conn.poll(timeout):
+        result = parent_conn.recv()
+    else:
+        result = {'status': 'error', 'error': f'timeout after {timeout}s'}
+    process.join(5)
+    if process.is_alive():
+        process.terminate()
+    result['isolated'] = True
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Baseline
+# ---------------------------------------------------------------------------
+
+def case_key(row):
+    return f"{row['generator']}/{row['fixture']}"
+
+
+def compare_to_baseline(results, baseline, time_tolerance, rss_tolerance, min_time_delta, min_rss_delta):
+    """Return (regressions, notes) comparing results to baseline rows"""
+    expected = {case_key(row): row for row in baseline.get('results', [])}
+    regressions, notes = [], []
+    for row in results:
+        key = case_key(row)
+        base = expected.get(key)
+        if not base or base.get('status') != 'ok':
+            continue
+        if row['status'] != 'ok':
+            regressions.append(f"{key}: now failing ({row.get('error')})")
+            continue
+
+        slower = row['median_s'] - base['median_s']
+        if slower > min_time_delta and row['median_s'] > base['median_s'] * (1 + time_tolerance):
+            regressions.append(f"{key}: median {base['median_s']:.3f}s -> {row['median_s']:.3f}s")
+
+        grown = row['rss_delta_mb'] - base['rss_delta_mb']
+        if grown > min_rss_delta and row['rss_delta_mb'] > base['rss_delta_mb'] * (1 + rss_tolerance):
+            regressions.append(f"{key}: memory +{base['rss_delta_mb']:.0f}MB -> +{row['rss_delta_mb']:.0f}MB")
+
+        if row['pages'] != base.get('pages'):
+            notes.append(f"{key}: pages {base.get('pages')} -> {row['pages']}")
+        if base.get('output_bytes') and abs(row['output_bytes'] - base['output_bytes']) > base['output_bytes'] * 0.5:
+            notes.append(f"{key}: output {base['output_bytes']:,} -> {row['output_bytes']:,} bytes")
+    return regressions, notes
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+
+
+def print_table(results):
+    print(f"{'case':<45} {'cold':>8} {'median':>8} {'rss+MB':>7} {'bytes':>10} {'pages':>5}")
+    for row in results:
+        if row['status'] == 'ok':
+            print(f"{case_key(row):<45} {row['cold_s']:>8.3f} {row['median_s']:>8.3f} "
+                  f"{row['rss_delta_mb']:>7.1f} {row['output_bytes']:>10,} {row['pages']:>5}")
+        else:
+            print(f"{case_key(row):<45} ERROR {row.get('error')}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark every PDF/PNG document generator offline')
+    parser.add_argument('--runs', type=int, default=3, help='renders per case (first one is reported as cold)')
+    parser.add_argument('--only', nargs='+', choices=sorted(GENERATORS), help='generators to run')
+    parser.add_argument('--fixtures', nargs='+', choices=sorted(FIXTURES), help='fixtures to run')
+    parser.add_argument('--warm', action='store_true', help='keep the shared cache between runs (memoized renders)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='results JSON path')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON path')
+    parser.add_argument('--update-baseline', action='store_true', help='write results as the new baseline')
+    parser.add_argument('--time-tolerance', type=float, default=0.25, help='allowed median slowdown (0.25 = 25%%)')
+    parser.add_argument('--rss-tolerance', type=float, default=0.30, help='allowed memory growth (0.30 = 30%%)')
+    parser.add_argument('--min-time-delta', type=float, default=0.05, help='ignore slowdowns below this many seconds')
+    parser.add_argument('--min-rss-delta', type=float, default=20.0, help='ignore memory growth below this many MB')
+    parser.add_argument('--timeout', type=int, default=600, help='seconds per case')
+    parser.add_argument('--list', action='store_true', help='list generators and fixtures')
+    parser.add_argument('--quiet', action='store_true', help='only print the summary')
+    parser.add_argument('--verbose', action='store_true', help='show generator logging')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print('Generators:', ', '.join(sorted(GENERATORS)))
+        for name, spec in FIXTURES.items():
+            print(f'Fixture {name}: {spec}')
+        return 0
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    workdir = tempfile.mkdtemp(prefix='pdf_benchmark_')
+    # ต้องตั้งค่าก่อน import app (config อ่านตอน import)
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'pdf_benchmark.db')}"
+    os.environ['CACHE_BACKEND'] = 'memory'
+    os.environ['BOOKING_ROLLUPS_ENABLED'] = 'false'
+    os.chdir(PROJECT_ROOT)
+
+    from app import app
+    from extensions import db
+
+    generators = args.only or list(GENERATORS)
+    fixtures = args.fixtures or list(FIXTURES)
+    results = []
+    try:
+        with app.app_context():
+            booking_ids = create_fixture_bookings(db.session, fixtures)
+            # child processes open their own SQLite connections
+            db.session.remove()
+            db.engine.dispose()
+
+        for generator_name in generators:
+            for fixture in fixtures:
+                if not args.quiet:
+                    print(f'▶ {generator_name} / {fixture} ...', flush=True)
+                row = {'generator': generator_name, 'fixture': fixture}
+                row.update(run_isolated(generator_name, booking_ids[fixture], args.runs, args.warm, args.timeout))
+                if row['status'] != 'ok' and not args.quiet:
+                    print(row.get('traceback') or row.get('error'))
+                row.pop('traceback', None)
+                results.append(row)
+    finally:
+        remove_fixture_images()
+
+    payload = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': args.runs,
+            'warm': args.warm,
+        },
+        'results': results,
+    }
+    _write_json(args.output, payload)
+
+    print_table(results)
+    print(f'\n📄 Results written to {args.output}')
+
+    if args.update_baseline:
+        _write_json(args.baseline, payload)
+        print(f'📌 Baseline updated: {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'⚠️ No baseline at {args.baseline} (run with --update-baseline to create one)')
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions, notes = compare_to_baseline(results, baseline, args.time_tolerance, args.rss_tolerance,
+                                             args.min_time_delta, args.min_rss_delta)
+    for note in notes:
+        print(f'ℹ️ {note}')
+    if regressions:
+        print(f'\n❌ {len(regressions)} regression(s) vs baseline {baseline.get("meta", {}).get("commit")}:')
+        for line in regressions:
+            print(f'  - {line}')
+        return 1
+    print('✅ No regressions vs baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Row Conversion Benchmark
+เปรียบเทียบการแปลงค่า DATETIME / TIME แบบ monkeypatch เดิม กับ models/column_types.py
+
+Builds N Booking-shaped driver rows (what PyMySQL hands back: ten DATETIME
+values and one TIME as ``timedelta``, plus a small share of zero-date /
+out-of-day strings) and times turning them into Python values with:
+
+    legacy - the processors the removed datetime_fix / ultra_aggressive_datetime_fix
+             modules installed on every MySQL DATETIME / TIME column, plus the
+             global before_cursor_execute hook from critical_datetime_fix
+    typed  - SafeDateTime / SafeTime result processors for the mysql+pymysql dialect
+
+No database is needed. The correctness cases also run and the exit code is
+1 when a converted value differs from the expected one.
+
+ใช้งาน:
+    python scripts/row_conversion_benchmark.py
+    python scripts/row_conversion_benchmark.py --rows 200000 --runs 5
+    make row-conversion-benchmark
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, time as dt_time, timedelta
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+from sqlalchemy.dialects.mysql import pymysql as mysql_pymysql  # noqa: E402
+
+from models.column_types import SafeDateTime, SafeTime  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, 'instance', 'benchmarks', 'row_conversion_benchmark.json')
+DATETIME_COLUMNS = 10   # Booking: invoice_paid_date .. completed_at, time_limit, created_at, updated_at
+CORRUPT_SHARE = 0.01
+BOOKING_SELECT = (
+    'SELECT bookings.id, bookings.booking_reference, bookings.customer_id, bookings.status, '
+    'bookings.pickup_time, bookings.time_limit, bookings.created_at, bookings.updated_at '
+    'FROM bookings WHERE bookings.id = %(pk_1)s'
+)
+
+# The removed modules logged every unparseable value; keep the comparison about conversion cost
+logging.getLogger('legacy').disabled = True
+logging.getLogger('models.column_types').disabled = True
+legacy_logger = logging.getLogger('legacy')
+
+
+# ---------------------------------------------------------------------------
+# Legacy processors (as installed by the removed modules)
+# ---------------------------------------------------------------------------
+def legacy_parse_datetime(value):
+    if '.' in value and value.count(':') >= 2:
+        value = value.split('.')[0]
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    legacy_logger.warning(f'Could not parse datetime: {value}')
+    return None
+
+
+def legacy_datetime(value):
+    """datetime_fix.SafeMySQLDateTime.result_processor"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return legacy_parse_datetime(value)
+    try:
+        return legacy_parse_datetime(str(value))
+    except Exception:
+        return None
+
+
+def legacy_time(value):
+    """ultra_aggressive_datetime_fix: every non-time value goes through str() and split"""
+    if value is None:
+        return None
+    if isinstance(value, dt_time):
+        return value
+    if isinstance(value, str):
+        try:
+            clean_value = value.split('.')[0] if '.' in value else value
+            parts = clean_value.split(':')
+            if len(parts) == 3:
+                return dt_time(int(parts[0]), int(parts[1]), int(parts[2]))
+            if len(parts) == 2:
+                return dt_time(int(parts[0]), int(parts[1]))
+            return None
+        except (ValueError, IndexError):
+            legacy_logger.warning(f'Could not parse time string {value!r}')
+            return None
+    try:
+        return legacy_time(str(value))
+    except Exception:
+        return None
+
+
+def legacy_before_cursor_execute(statement, parameters):
+    """critical_datetime_fix hook, run for every statement on every engine"""
+    if 'booking' in statement.lower() and '45' in str(parameters):
+        legacy_logger.info(f'Executing query for booking 45: {statement}')
+
+
+# ---------------------------------------------------------------------------
+# Data
+# ---------------------------------------------------------------------------
+def generate_rows(count, seed=42):
+    rng = random.Random(seed)
+    base = datetime(2024, 1, 1)
+    rows = []
+    for _ in range(count):
+        created = base + timedelta(seconds=rng.randrange(3 * 365 * 86400))
+        values = [created + timedelta(hours=rng.randrange(1, 2000)) if rng.random() < 0.6 else None
+                  for _ in range(DATETIME_COLUMNS - 3)]
+        values += [created + timedelta(days=3), created, created + timedelta(minutes=rng.randrange(100000))]
+        pickup = timedelta(seconds=rng.randrange(86400)) if rng.random() < 0.7 else None
+        if rng.random() < CORRUPT_SHARE:
+            values[rng.randrange(DATETIME_COLUMNS)] = '0000-00-00 00:00:00'
+        if rng.random() < CORRUPT_SHARE:
+            pickup = timedelta(hours=rng.choice([25, 30, -1]))
+        rows.append(tuple(values) + (pickup,))
+    return rows
+
+
+def processors(kind):
+    if kind == 'legacy':
+        return [legacy_datetime] * DATETIME_COLUMNS + [legacy_time]
+    dialect = mysql_pymysql.dialect()
+    return [SafeDateTime()._cached_result_processor(dialect, None)] * DATETIME_COLUMNS + \
+           [SafeTime()._cached_result_processor(dialect, None)]
+
+
+def materialize(rows, procs):
+    return [tuple(proc(value) for proc, value in zip(procs, row)) for row in rows]
+
+
+def time_runs(fn, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+# ---------------------------------------------------------------------------
+# Correctness
+# ---------------------------------------------------------------------------
+CASES = [
+    ('datetime', None, None),
+    ('datetime', datetime(2025, 3, 1, 9, 30, 5, 120000), datetime(2025, 3, 1, 9, 30, 5, 120000)),
+    ('datetime', '0000-00-00 00:00:00', None),
+    ('datetime', '2025-03-01 09:30:05', datetime(2025, 3, 1, 9, 30, 5)),
+    ('datetime', '2025-03-01 09:30:05.250000', datetime(2025, 3, 1, 9, 30, 5, 250000)),
+    ('datetime', 'garbage', None),
+    ('time', None, None),
+    ('time', timedelta(hours=9, minutes=5), dt_time(9, 5)),
+    ('time', timedelta(hours=9, microseconds=500), dt_time(9, 0, 0, 500)),
+    ('time', timedelta(0), dt_time(0, 0)),
+    ('time', timedelta(hours=25), None),
+    ('time', timedelta(hours=-1), None),
+    ('time', '07:45:00', dt_time(7, 45)),
+    ('time', '7:45', dt_time(7, 45)),
+    ('time', dt_time(18, 0), dt_time(18, 0)),
+]
+
+
+def check_cases():
+    dialect = mysql_pymysql.dialect()
+    procs = {'datetime': SafeDateTime()._cached_result_processor(dialect, None),
+             'time': SafeTime()._cached_result_processor(dialect, None)}
+    failures = []
+    for kind, value, expected in CASES:
+        got = procs[kind](value)
+        if got != expected:
+            failures.append({'kind': kind, 'value': repr(value), 'expected': repr(expected), 'got': repr(got)})
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark DATETIME / TIME row conversion')
+    parser.add_argument('--rows', type=int, default=100000, help='synthetic Booking rows')
+    parser.add_argument('--runs', type=int, default=3, help='timed runs per variant')
+    parser.add_argument('--statements', type=int, default=200000, help='statements for the hook overhead')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='results JSON path')
+    args = parser.parse_args(argv)
+
+    print(f'📦 Generating {args.rows:,} Booking rows ...', flush=True)
+    rows = generate_rows(args.rows)
+
+    results = {}
+    for kind in ('legacy', 'typed'):
+        procs = processors(kind)
+        samples = time_runs(lambda: materialize(rows, procs), args.runs)
+        median = statistics.median(samples)
+        results[kind] = {
+            'median_ms': round(median * 1000, 2),
+            'min_ms': round(min(samples) * 1000, 2),
+            'rows_per_sec': int(args.rows / median) if median else None,
+        }
+        print(f"▶ {kind:<7} {results[kind]['median_ms']:>9.1f}ms  {results[kind]['rows_per_sec']:>12,} rows/s")
+
+    parameters = {'pk_1': 1234}
+    hook = time_runs(lambda: [legacy_before_cursor_execute(BOOKING_SELECT, parameters)
+                              for _ in range(args.statements)], args.runs)
+    hook_us = statistics.median(hook) / args.statements * 1e6
+    speedup = results['legacy']['median_ms'] / results['typed']['median_ms'] if results['typed']['median_ms'] else 0
+    print(f'\n⚡ typed conversion {speedup:.1f}x faster; '
+          f'removed before_cursor_execute hook saves {hook_us:.2f}µs per statement')
+
+    failures = check_cases()
+    for failure in failures:
+        print(f"❌ {failure['kind']} {failure['value']}: expected {failure['expected']}, got {failure['got']}")
+    if not failures:
+        print(f'✅ {len(CASES)} conversion cases match')
+
+    payload = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'rows': args.rows,
+            'runs': args.runs,
+            'corrupt_share': CORRUPT_SHARE,
+        },
+        'results': results,
+        'speedup': round(speedup, 2),
+        'hook_us_per_statement': round(hook_us, 3),
+        'failures': failures,
+    }
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+    print(f'\n📄 Results written to {args.output}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Script Segment Benchmark
+เปรียบเทียบการตรวจ/แยกข้อความไทย-อังกฤษ-จีนแบบวนทีละตัวอักษรเดิม กับ utils/script_segments.py
+
+For each check the legacy implementation (copied below as it was in
+ClassicPDFGenerator.has_thai_text / format_mixed_text, the WeasyPrint
+section builders and utils.pdf_fonts.select_font_for_text) and the new one
+run over a corpus of booking-like strings: customer names, tour names and
+descriptions in Thai, English and Chinese, flight info, CJK punctuation and
+the characters on either side of every range boundary. Timed per call:
+
+    legacy - old per-character scan
+    cold   - new implementation, memo cleared before every pass (one regex pass per string)
+    warm   - new implementation through the LRU memo (style check -> format -> paragraph)
+
+The corpus and the legacy scans come from test_script_segments.py, which
+also asserts segment() round-trips and range boundaries. Outputs must be
+identical here too; the exit code is 1 on any mismatch.
+
+ใช้งาน:
+    python scripts/script_segment_benchmark.py
+    python scripts/script_segment_benchmark.py --iterations 2000
+    make script-segment-benchmark
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils import script_segments  # noqa: E402
+# Corpus and legacy scans are shared with the tests
+from test_script_segments import PARITY as CASES, build_corpus  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, 'instance', 'benchmarks', 'script_segment_benchmark.json')
+
+
+def time_calls(fn, inputs, iterations, before_pass=None):
+    samples = []
+    for _ in range(iterations):
+        if before_pass:
+            before_pass()
+        started = time.perf_counter()
+        for text in inputs:
+            fn(text)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) / len(inputs) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Thai/Latin/CJK script detection and segmentation')
+    parser.add_argument('--inputs', type=int, default=300, help='distinct corpus entries')
+    parser.add_argument('--iterations', type=int, default=300, help='passes over the corpus')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='results JSON path')
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus(args.inputs)
+    results, mismatches = [], []
+    print(f"\n{'check':<20} {'legacy µs':>10} {'cold µs':>9} {'warm µs':>9} {'cold x':>7} {'warm x':>7}")
+    for name, legacy, current in CASES:
+        for text in corpus:
+            if legacy(text) != current(text):
+                mismatches.append({'check': name, 'input': text, 'legacy': legacy(text), 'new': current(text)})
+        legacy_us = time_calls(legacy, corpus, args.iterations)
+        cold_us = time_calls(current, corpus, args.iterations, before_pass=script_segments.clear_caches)
+        current(corpus[0])
+        warm_us = time_calls(current, corpus, args.iterations)
+        row = {'check': name, 'legacy_us': round(legacy_us, 3), 'cold_us': round(cold_us, 3),
+               'warm_us': round(warm_us, 3)}
+        results.append(row)
+        print(f"{name:<20} {legacy_us:>10.2f} {cold_us:>9.2f} {warm_us:>9.2f} "
+              f"{legacy_us / cold_us:>6.1f}x {legacy_us / warm_us:>6.1f}x")
+
+    for mismatch in mismatches[:10]:
+        print(f"❌ {mismatch['check']}: {mismatch['input']!r}\n   legacy {mismatch['legacy']!r}\n   new    {mismatch['new']!r}")
+    if not mismatches:
+        print(f'\n✅ {len(corpus)} inputs x {len(CASES)} checks produce identical output')
+
+    payload = {
+        'meta': {'timestamp': datetime.now().isoformat(timespec='seconds'),
+                 'inputs': args.inputs, 'iterations': args.iterations},
+        'results': results,
+        'mismatches': len(mismatches),
+        'cache': script_segments.cache_info(),
+    }
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+    print(f'📄 Results written to {args.output}')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
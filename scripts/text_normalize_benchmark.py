@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Text Normalization Benchmark
+เปรียบเทียบ filter แปลง HTML -> text แบบเดิม (re.sub หลายรอบต่อครั้ง) กับ utils/text_normalize.py
+
+For each normalizer the legacy implementation (as it was in app.py,
+utils/pdf_html.py, utils/pdf_sanitize.py and ClassicPDFGenerator.clean_html_tags)
+and the new one run over a corpus of booking-like inputs: flight info, daily
+services with Thai text and "คลิกดูเพิ่ม" links, descriptions with bullets.
+Timed per call:
+
+    legacy - old implementation
+    cold   - new implementation, memo bypassed (tokenizer + precompiled patterns)
+    warm   - new implementation through the LRU memo (list -> view -> PDF re-renders)
+
+The corpus and the legacy filters come from test_text_normalize.py, which
+also asserts parity on tag / sanitizer edge cases and the stray '<' change.
+Outputs must be identical here too; the exit code is 1 on any mismatch.
+
+ใช้งาน:
+    python scripts/text_normalize_benchmark.py
+    python scripts/text_normalize_benchmark.py --iterations 5000
+    make text-normalize-benchmark
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils import text_normalize  # noqa: E402
+# Corpus and legacy filters are shared with the tests
+from test_text_normalize import PARITY as CASES, build_corpus  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, 'instance', 'benchmarks', 'text_normalize_benchmark.json')
+
+
+UNCACHED = {
+    'html_to_linebreaks': text_normalize._html_to_linebreaks.uncached,
+    'nl2br': text_normalize._nl2br.uncached,
+    'flight_info_to_text': text_normalize._flight_info_to_text.uncached,
+    'service_detail_to_text': text_normalize._service_detail_to_text.uncached,
+    'clean_simple_html': lambda text: text_normalize._clean_simple_html.uncached(
+        text, text_normalize._allowed_pdf_tags()),
+    'sanitize_text_block': text_normalize._sanitize_text_block.uncached,
+    'pdf_plain_text': text_normalize._pdf_plain_text.uncached,
+}
+
+
+def time_calls(fn, inputs, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        for text in inputs:
+            fn(text)
+        samples.append((time.perf_counter() - started) / len(inputs))
+    return statistics.median(samples) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark HTML-to-text normalization')
+    parser.add_argument('--inputs', type=int, default=200, help='distinct corpus entries')
+    parser.add_argument('--iterations', type=int, default=200, help='passes over the corpus')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='results JSON path')
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus(args.inputs)
+    results, mismatches = [], []
+    print(f"\n{'filter':<24} {'legacy µs':>10} {'cold µs':>9} {'warm µs':>9} {'cold x':>7} {'warm x':>7}")
+    for name, legacy, current in CASES:
+        for text in corpus:
+            if legacy(text) != current(text):
+                mismatches.append({'filter': name, 'input': text,
+                                   'legacy': legacy(text), 'new': current(text)})
+        legacy_us = time_calls(legacy, corpus, args.iterations)
+        cold_us = time_calls(UNCACHED[name], corpus, args.iterations)
+        current(corpus[0])
+        warm_us = time_calls(current, corpus, args.iterations)
+        row = {'filter': name, 'legacy_us': round(legacy_us, 2), 'cold_us': round(cold_us, 2),
+               'warm_us': round(warm_us, 2)}
+        results.append(row)
+        print(f"{name:<24} {legacy_us:>10.2f} {cold_us:>9.2f} {warm_us:>9.2f} "
+              f"{legacy_us / cold_us:>6.1f}x {legacy_us / warm_us:>6.1f}x")
+
+    for mismatch in mismatches[:10]:
+        print(f"❌ {mismatch['filter']}: {mismatch['input']!r}\n   legacy {mismatch['legacy']!r}\n   new    {mismatch['new']!r}")
+    if not mismatches:
+        print(f'\n✅ {len(corpus)} inputs x {len(CASES)} filters produce identical output')
+
+    payload = {
+        'meta': {'timestamp': datetime.now().isoformat(timespec='seconds'),
+                 'inputs': args.inputs, 'iterations': args.iterations},
+        'results': results,
+        'mismatches': len(mismatches),
+        'cache': text_normalize.cache_info(),
+    }
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+    print(f'📄 Results written to {args.output}')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
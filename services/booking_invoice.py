@@ -6,6 +6,7 @@ Handles basic booking invoice operations without external integration
 from datetime import datetime, timedelta
 from models.booking import Booking
 from models.customer import Customer
+from services.sequence_service import SequenceService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -108,11 +109,9 @@ class BookingInvoiceService:
         return {'success': True, 'message': 'Invoice ready for manual sending'}
     
     def _generate_invoice_number(self):
-        """Generate internal invoice number"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        return f"AR{timestamp}"
+        """Generate internal invoice number (AR + YYMM + running number)"""
+        return SequenceService.next_number('invoice')
     
     def _generate_quote_number(self):
-        """Generate internal quote number"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        return f"QT{timestamp}"
+        """Generate internal quote number (QT + YYMM + running number)"""
+        return SequenceService.next_number('quote')
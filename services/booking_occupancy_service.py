@@ -0,0 +1,304 @@
+"""
+Booking Occupancy Service - travel-day index for calendar and conflict queries.
+
+``booking_days`` holds one row per booking per travel day, keyed on
+``(day, booking_id)``. "Which bookings travel between X and Y" becomes a
+range scan on that primary key instead of three ``OR``-ed date comparisons
+on ``bookings``, which MariaDB cannot answer from one index:
+
+    Booking.id IN (SELECT booking_id FROM booking_days WHERE day BETWEEN :start AND :end)
+
+The travel span is ``arrival_date .. departure_date`` (the columns the
+calendar, conflict and daily-report filters compare), falling back to
+``traveling_period_start/end`` when arrival/departure are missing. The
+lookup is a superset of every overlap rule used by those routes, so they
+keep their own predicates and only use the index to narrow the candidates.
+
+Mapper listeners on ``Booking`` rewrite a booking's rows on the flush
+connection whenever one of the date columns changes, so the index commits or
+rolls back with the booking write. Writes that bypass the ORM are corrected
+by ``reconcile()`` (nightly from booking_rollup_cron.py, or on demand):
+
+    python -m services.booking_occupancy_service reconcile
+"""
+
+import logging
+import os
+from datetime import date, timedelta
+
+from sqlalchemy import bindparam, event, func, inspect, text, true
+
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+OCCUPANCY_TABLE = 'booking_days'
+
+# Booking attributes that decide the travel span
+TRACKED_FIELDS = ('arrival_date', 'departure_date', 'traveling_period_start', 'traveling_period_end')
+
+# Spans are indexed in full so the lookup stays a superset of the overlap
+# rules, even for mistyped years (2025 -> 2028). Beyond ten years a span is
+# clipped to its first MAX_SPAN_DAYS days plus the departure day.
+MAX_SPAN_DAYS = 3660
+
+RECONCILE_CHUNK_SIZE = 2000
+
+
+class BookingOccupancyService:
+    """Maintain and query booking_days"""
+
+    _listeners_installed = False
+
+    # ------------------------------------------------------------------
+    # Event listeners
+    # ------------------------------------------------------------------
+    @classmethod
+    def setup_listeners(cls):
+        """Attach Booking insert/update/delete listeners (idempotent).
+
+        Skipped when BOOKING_DAYS_ENABLED=false or the table has not been
+        created yet (run add_booking_days_table.py); the routes then fall
+        back to their plain date filters.
+        """
+        if cls._listeners_installed:
+            return True
+        if os.environ.get('BOOKING_DAYS_ENABLED', 'true').lower() not in {'1', 'true', 'yes'}:
+            logger.info('Booking travel-day index disabled by BOOKING_DAYS_ENABLED')
+            return False
+        try:
+            if not inspect(db.engine).has_table(OCCUPANCY_TABLE):
+                logger.warning(f'⚠️ {OCCUPANCY_TABLE} not found - run add_booking_days_table.py')
+                return False
+            from models.booking import Booking
+            event.listen(Booking, 'after_insert', cls.after_booking_insert)
+            event.listen(Booking, 'after_update', cls.after_booking_update)
+            event.listen(Booking, 'before_delete', cls.before_booking_delete)
+            cls._listeners_installed = True
+            logger.info('✅ Booking travel-day listeners installed')
+            return True
+        except Exception as e:
+            logger.error(f'❌ Could not install booking travel-day listeners: {e}')
+            return False
+
+    @classmethod
+    def is_available(cls):
+        """True when booking_days exists and is being maintained"""
+        return cls._listeners_installed
+
+    @classmethod
+    def after_booking_insert(cls, mapper, connection, target):
+        cls._replace(connection, {target.id: cls.travel_days(target)})
+
+    @classmethod
+    def after_booking_update(cls, mapper, connection, target):
+        state = inspect(target)
+        if any(state.attrs[name].history.has_changes() for name in TRACKED_FIELDS):
+            cls._replace(connection, {target.id: cls.travel_days(target)})
+
+    @classmethod
+    def before_booking_delete(cls, mapper, connection, target):
+        # ON DELETE CASCADE covers MariaDB; this also keeps SQLite (no FK enforcement) clean
+        cls._replace(connection, {target.id: []})
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def travel_span(arrival_date, departure_date, period_start=None, period_end=None):
+        """(first_day, last_day) of a booking, or None without any date"""
+        start = arrival_date or period_start
+        end = departure_date or period_end
+        if start is None and end is None:
+            return None
+        start, end = start or end, end or start
+        return (end, start) if end < start else (start, end)
+
+    @classmethod
+    def travel_days(cls, booking):
+        """Days to index for a Booking (or any row with the four date attributes)"""
+        span = cls.travel_span(booking.arrival_date, booking.departure_date,
+                               booking.traveling_period_start, booking.traveling_period_end)
+        return cls._expand(span)
+
+    @staticmethod
+    def _expand(span):
+        if span is None:
+            return []
+        start, end = span
+        length = (end - start).days + 1
+        days = [start + timedelta(days=offset) for offset in range(min(length, MAX_SPAN_DAYS))]
+        if length > MAX_SPAN_DAYS:
+            days.append(end)
+        return days
+
+    @staticmethod
+    def _replace(connection, days_by_booking):
+        """Rewrite the rows of the given bookings ({booking_id: [day, ...]})."""
+        if not days_by_booking:
+            return
+        booking_ids = list(days_by_booking)
+        rows = [{'day': day, 'booking_id': booking_id}
+                for booking_id, days in days_by_booking.items() for day in days]
+        try:
+            connection.execute(text(
+                f'DELETE FROM {OCCUPANCY_TABLE} WHERE booking_id IN :booking_ids'
+            ).bindparams(bindparam('booking_ids', expanding=True)), {'booking_ids': booking_ids})
+            if rows:
+                connection.execute(text(
+                    f'INSERT INTO {OCCUPANCY_TABLE} (day, booking_id) VALUES (:day, :booking_id)'
+                ), rows)
+        except Exception as e:
+            # Never fail the booking write; the nightly reconcile corrects the drift.
+            logger.error(f'❌ Booking travel-day update failed for bookings {booking_ids[:10]}: {e}')
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    @staticmethod
+    def booking_ids_between(start, end):
+        """SELECT of booking ids with at least one travel day in [start, end]"""
+        from models.booking_day import BookingDay
+        return db.select(BookingDay.booking_id).where(BookingDay.day.between(start, end))
+
+    @classmethod
+    def overlap_filter(cls, start, end):
+        """``Booking.id IN (...)`` for bookings travelling in [start, end].
+
+        Returns ``true()`` when booking_days is unavailable so callers can
+        always combine it with their own date predicates.
+        """
+        if not cls.is_available():
+            return true()
+        from models.booking import Booking
+        return Booking.id.in_(cls.booking_ids_between(start, end))
+
+    @classmethod
+    def daily_occupancy(cls, start, end, statuses=None):
+        """[{'date', 'bookings', 'pax'}] for every day in [start, end].
+
+        Counts bookings travelling on each day (optionally only ``statuses``)
+        and their ``total_pax``.
+        """
+        from models.booking import Booking
+
+        per_day = {}
+        if cls.is_available():
+            from models.booking_day import BookingDay
+            query = db.session.query(
+                BookingDay.day,
+                func.count(BookingDay.booking_id),
+                func.coalesce(func.sum(Booking.total_pax), 0),
+            ).join(
+                Booking, Booking.id == BookingDay.booking_id
+            ).filter(
+                BookingDay.day.between(start, end)
+            )
+            if statuses:
+                query = query.filter(Booking.status.in_(list(statuses)))
+            for day, bookings, pax in query.group_by(BookingDay.day).all():
+                if isinstance(day, str):
+                    day = date.fromisoformat(day)
+                per_day[day] = (int(bookings), int(pax or 0))
+        else:
+            # Fallback: expand spans in Python (one scan of bookings)
+            query = db.session.query(
+                Booking.arrival_date, Booking.departure_date,
+                Booking.traveling_period_start, Booking.traveling_period_end, Booking.total_pax
+            )
+            if statuses:
+                query = query.filter(Booking.status.in_(list(statuses)))
+            for row in query.all():
+                for day in cls._expand(cls.travel_span(*row[:4])):
+                    if start <= day <= end:
+                        bookings, pax = per_day.get(day, (0, 0))
+                        per_day[day] = (bookings + 1, pax + (row.total_pax or 0))
+
+        result = []
+        day = start
+        while day <= end:
+            bookings, pax = per_day.get(day, (0, 0))
+            result.append({'date': day.isoformat(), 'bookings': bookings, 'pax': pax})
+            day += timedelta(days=1)
+        return result
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+    @classmethod
+    def reconcile(cls, chunk_size=RECONCILE_CHUNK_SIZE):
+        """Compare booking_days with bookings and rewrite the bookings that drifted.
+
+        Returns {'bookings': bookings indexed, 'rows': day rows, 'drifted': bookings rewritten}.
+        """
+        from models.booking import Booking
+
+        current = {
+            row[0]: (str(row[1]), str(row[2]), int(row[3]))
+            for row in db.session.execute(text(
+                f'SELECT booking_id, MIN(day), MAX(day), COUNT(*) FROM {OCCUPANCY_TABLE} GROUP BY booking_id'
+            ))
+        }
+
+        pending = {}
+        seen = set()
+        bookings = rows = rewritten = 0
+        last_id = 0
+        try:
+            while True:
+                chunk = db.session.query(
+                    Booking.id, Booking.arrival_date, Booking.departure_date,
+                    Booking.traveling_period_start, Booking.traveling_period_end
+                ).filter(Booking.id > last_id).order_by(Booking.id).limit(chunk_size).all()
+                if not chunk:
+                    break
+                last_id = chunk[-1].id
+                for row in chunk:
+                    seen.add(row.id)
+                    days = cls._expand(cls.travel_span(*row[1:]))
+                    if days:
+                        bookings += 1
+                        rows += len(days)
+                    expected = (str(min(days)), str(max(days)), len(days)) if days else None
+                    if current.get(row.id) != expected:
+                        pending[row.id] = days
+                if len(pending) >= chunk_size:
+                    cls._replace(db.session.connection(), pending)
+                    db.session.commit()
+                    rewritten += len(pending)
+                    pending = {}
+
+            # rows of bookings that no longer exist
+            for booking_id in set(current) - seen:
+                pending[booking_id] = []
+            cls._replace(db.session.connection(), pending)
+            db.session.commit()
+            rewritten += len(pending)
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if rewritten:
+            logger.warning(f'⚠️ Booking travel days: {rewritten} bookings drifted and were rewritten')
+        else:
+            logger.info(f'✅ Booking travel days consistent ({bookings} bookings, {rows} rows)')
+        return {'bookings': bookings, 'rows': rows, 'drifted': rewritten}
+
+
+def main(argv=None):
+    import argparse
+    import json
+    from app import app
+
+    parser = argparse.ArgumentParser(description='Booking travel-day index (booking_days)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('reconcile', help='Rewrite booking_days rows that differ from bookings')
+    parser.parse_args(argv)
+
+    with app.app_context():
+        result = BookingOccupancyService.reconcile()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
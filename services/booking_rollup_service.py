@@ -0,0 +1,324 @@
+"""
+Booking Rollup Service - pre-aggregated dashboard counters.
+
+``booking_daily_rollups`` holds one row per (creation day, status,
+booking_type) with a booking count and a revenue sum. Mapper listeners on
+``Booking`` apply +1/-1 deltas on the flush connection, so a rollup change
+commits or rolls back together with the booking write:
+
+    insert             +1 on (day, status, type)
+    status/type/amount -1 on the old key, +1 on the new key
+    delete             -1 on (day, status, type)
+
+The dashboard then reads a few dozen pre-aggregated rows instead of scanning
+``bookings`` ten times, and any date range is a range scan on the rollup
+primary key.
+
+Writes that bypass the ORM (raw SQL, adminer) are not seen by the listeners;
+``reconcile()`` rebuilds a date range from ``bookings`` and reports drift.
+It runs nightly from booking_rollup_cron.py and from the command line:
+
+    python -m services.booking_rollup_service reconcile [--start 2026-01-01] [--end 2026-01-31]
+"""
+
+import logging
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import Numeric, bindparam, event, inspect, text
+
+from extensions import db
+from utils.datetime_utils import naive_utc_now
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TABLE = 'booking_daily_rollups'
+
+# Booking attributes that move a booking between rollup rows
+TRACKED_FIELDS = ('created_at', 'status', 'booking_type', 'total_amount')
+
+# Typed so Decimal revenue binds on every driver (sqlite3 has no Decimal adapter)
+_REVENUE = bindparam('revenue', type_=Numeric(14, 2))
+
+
+class BookingRollupService:
+    """Maintain and query booking_daily_rollups"""
+
+    _listeners_installed = False
+
+    # ------------------------------------------------------------------
+    # Event listeners
+    # ------------------------------------------------------------------
+    @classmethod
+    def setup_listeners(cls):
+        """Attach Booking insert/update/delete listeners (idempotent).
+
+        Skipped when BOOKING_ROLLUPS_ENABLED=false or the rollup table has not
+        been created yet (run add_booking_rollups_table.py), so booking writes
+        never fail because of a missing table.
+        """
+        if cls._listeners_installed:
+            return True
+        if os.environ.get('BOOKING_ROLLUPS_ENABLED', 'true').lower() not in {'1', 'true', 'yes'}:
+            logger.info('Booking rollups disabled by BOOKING_ROLLUPS_ENABLED')
+            return False
+        try:
+            if not inspect(db.engine).has_table(ROLLUP_TABLE):
+                logger.warning(f'⚠️ {ROLLUP_TABLE} not found - run add_booking_rollups_table.py')
+                return False
+            from models.booking import Booking
+            # active_history loads the previous value when a tracked attribute
+            # is set after commit (expired), so updates know which row to decrement.
+            for name in TRACKED_FIELDS:
+                event.listen(getattr(Booking, name), 'set', cls._track_set, active_history=True)
+            event.listen(Booking, 'after_insert', cls.after_booking_insert)
+            event.listen(Booking, 'after_update', cls.after_booking_update)
+            event.listen(Booking, 'after_delete', cls.after_booking_delete)
+            cls._listeners_installed = True
+            logger.info('✅ Booking rollup listeners installed')
+            return True
+        except Exception as e:
+            logger.error(f'❌ Could not install booking rollup listeners: {e}')
+            return False
+
+    @classmethod
+    def is_available(cls):
+        """True when booking_daily_rollups exists and is being maintained"""
+        return cls._listeners_installed
+
+    @staticmethod
+    def _track_set(target, value, oldvalue, initiator):
+        """No-op; registered only for ``active_history``."""
+
+    @classmethod
+    def after_booking_insert(cls, mapper, connection, target):
+        cls._apply(connection, [(cls._key(target), 1, cls._amount(target.total_amount))])
+
+    @classmethod
+    def after_booking_delete(cls, mapper, connection, target):
+        cls._apply(connection, [(cls._key(target, committed=True), -1, -cls._amount(cls._old(target, 'total_amount')))])
+
+    @classmethod
+    def after_booking_update(cls, mapper, connection, target):
+        state = inspect(target)
+        if not any(state.attrs[name].history.has_changes() for name in TRACKED_FIELDS):
+            return
+        old_key = cls._key(target, committed=True)
+        new_key = cls._key(target)
+        old_amount = cls._amount(cls._old(target, 'total_amount'))
+        new_amount = cls._amount(target.total_amount)
+        if old_key == new_key:
+            if old_amount != new_amount:
+                cls._apply(connection, [(new_key, 0, new_amount - old_amount)])
+            return
+        cls._apply(connection, [(old_key, -1, -old_amount), (new_key, 1, new_amount)])
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _old(target, name):
+        """Value before this flush (current value when the attribute is unchanged)."""
+        history = inspect(target).attrs[name].history
+        if history.deleted:
+            return history.deleted[0]
+        if history.unchanged:
+            return history.unchanged[0]
+        return getattr(target, name)
+
+    @classmethod
+    def _key(cls, target, committed=False):
+        get = (lambda name: cls._old(target, name)) if committed else (lambda name: getattr(target, name))
+        created_at = get('created_at') or naive_utc_now()
+        day = created_at.date() if isinstance(created_at, datetime) else created_at
+        return day, get('status') or '', get('booking_type') or ''
+
+    @staticmethod
+    def _amount(value):
+        try:
+            return Decimal(str(value)) if value is not None else Decimal('0')
+        except Exception:
+            return Decimal('0')
+
+    @classmethod
+    def _apply(cls, connection, deltas):
+        """Upsert (key, count_delta, revenue_delta) rows on the flush connection."""
+        if connection.dialect.name in ('mysql', 'mariadb'):
+            sql = (
+                f'INSERT INTO {ROLLUP_TABLE} (day, status, booking_type, booking_count, revenue) '
+                'VALUES (:day, :status, :booking_type, :count, :revenue) '
+                'ON DUPLICATE KEY UPDATE booking_count = booking_count + VALUES(booking_count), '
+                'revenue = revenue + VALUES(revenue)'
+            )
+        else:
+            sql = (
+                f'INSERT INTO {ROLLUP_TABLE} (day, status, booking_type, booking_count, revenue) '
+                'VALUES (:day, :status, :booking_type, :count, :revenue) '
+                'ON CONFLICT (day, status, booking_type) DO UPDATE SET '
+                f'booking_count = {ROLLUP_TABLE}.booking_count + excluded.booking_count, '
+                f'revenue = {ROLLUP_TABLE}.revenue + excluded.revenue'
+            )
+        params = [
+            {'day': day, 'status': status, 'booking_type': booking_type, 'count': count, 'revenue': revenue}
+            for (day, status, booking_type), count, revenue in deltas
+        ]
+        try:
+            connection.execute(text(sql).bindparams(_REVENUE), params)
+        except Exception as e:
+            # Never fail the booking write; the nightly reconcile corrects the drift.
+            logger.error(f'❌ Booking rollup update failed ({params}): {e}')
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    @staticmethod
+    def summary(start=None, end=None, revenue_from=None):
+        """Dashboard figures from the rollups in one query.
+
+        Args:
+            start, end: inclusive creation-day range (default: all time)
+            revenue_from: first day counted in ``confirmed_revenue``
+                (default: ``start`` or the first day of the current month)
+
+        Returns dict with total_bookings, status_counts, confirmed_revenue and
+        booking_types as (type, count) tuples ordered by count.
+        """
+        if revenue_from is None:
+            revenue_from = start or naive_utc_now().date().replace(day=1)
+        conditions = ['booking_count <> 0']
+        params = {'revenue_from': revenue_from}
+        if start:
+            conditions.append('day >= :start')
+            params['start'] = start
+        if end:
+            conditions.append('day <= :end')
+            params['end'] = end
+        rows = db.session.execute(text(
+            'SELECT status, booking_type, SUM(booking_count) AS bookings, '
+            "SUM(CASE WHEN status = 'confirmed' AND day >= :revenue_from THEN revenue ELSE 0 END) AS confirmed_revenue "
+            f'FROM {ROLLUP_TABLE} WHERE {" AND ".join(conditions)} '
+            'GROUP BY status, booking_type'
+        ), params).fetchall()
+
+        status_counts = defaultdict(int)
+        type_counts = defaultdict(int)
+        confirmed_revenue = Decimal('0')
+        for row in rows:
+            count = int(row.bookings or 0)
+            status_counts[row.status] += count
+            type_counts[row.booking_type or None] += count
+            confirmed_revenue += Decimal(str(row.confirmed_revenue or 0))
+        return {
+            'total_bookings': sum(status_counts.values()),
+            'status_counts': dict(status_counts),
+            'confirmed_revenue': confirmed_revenue,
+            'booking_types': sorted(type_counts.items(), key=lambda item: -item[1]),
+        }
+
+    @staticmethod
+    def daily_series(start, end, status=None):
+        """[(day, bookings, revenue)] per day in the range, for charts."""
+        params = {'start': start, 'end': end}
+        status_sql = ''
+        if status:
+            status_sql = ' AND status = :status'
+            params['status'] = status
+        rows = db.session.execute(text(
+            'SELECT day, SUM(booking_count) AS bookings, SUM(revenue) AS revenue '
+            f'FROM {ROLLUP_TABLE} WHERE day BETWEEN :start AND :end{status_sql} '
+            'GROUP BY day ORDER BY day'
+        ), params).fetchall()
+        return [(row.day, int(row.bookings or 0), Decimal(str(row.revenue or 0))) for row in rows]
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+    @staticmethod
+    def reconcile(start=None, end=None):
+        """Rebuild rollups for a creation-day range (default: everything) from bookings.
+
+        Returns {'rows': rebuilt row count, 'drifted': rows that differed}.
+        """
+        conditions, params = [], {}
+        if start:
+            conditions.append('day >= :start')
+            params['start'] = start
+        if end:
+            conditions.append('day <= :end')
+            params['end'] = end
+        rollup_where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+
+        booking_conditions = []
+        if start:
+            booking_conditions.append('created_at >= :start')
+        if end:
+            booking_conditions.append('created_at < :end_exclusive')
+            params['end_exclusive'] = end + timedelta(days=1)
+        booking_where = f' WHERE {" AND ".join(booking_conditions)}' if booking_conditions else ''
+
+        fresh_sql = (
+            "SELECT DATE(created_at) AS day, COALESCE(status, '') AS status, "
+            "COALESCE(booking_type, '') AS booking_type, COUNT(*) AS booking_count, "
+            'COALESCE(SUM(total_amount), 0) AS revenue '
+            f'FROM bookings{booking_where} '
+            "GROUP BY DATE(created_at), COALESCE(status, ''), COALESCE(booking_type, '')"
+        )
+
+        try:
+            current = {
+                (str(row.day), row.status, row.booking_type): (int(row.booking_count), Decimal(str(row.revenue)))
+                for row in db.session.execute(text(
+                    f'SELECT day, status, booking_type, booking_count, revenue FROM {ROLLUP_TABLE}{rollup_where}'
+                ), params)
+                if row.booking_count
+            }
+            fresh = {
+                (str(row.day), row.status, row.booking_type): (int(row.booking_count), Decimal(str(row.revenue)))
+                for row in db.session.execute(text(fresh_sql), params)
+                if row.day is not None
+            }
+
+            db.session.execute(text(f'DELETE FROM {ROLLUP_TABLE}{rollup_where}'), params)
+            if fresh:
+                db.session.execute(text(
+                    f'INSERT INTO {ROLLUP_TABLE} (day, status, booking_type, booking_count, revenue) '
+                    'VALUES (:day, :status, :booking_type, :booking_count, :revenue)'
+                ).bindparams(_REVENUE), [
+                    {'day': key[0], 'status': key[1], 'booking_type': key[2],
+                     'booking_count': value[0], 'revenue': value[1]}
+                    for key, value in fresh.items()
+                ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        drifted = sum(1 for key in set(current) | set(fresh) if current.get(key) != fresh.get(key))
+        if drifted:
+            logger.warning(f'⚠️ Booking rollups: {drifted} rows drifted and were corrected')
+        else:
+            logger.info(f'✅ Booking rollups consistent ({len(fresh)} rows)')
+        return {'rows': len(fresh), 'drifted': drifted}
+
+
+def main(argv=None):
+    import argparse
+    import json
+    from app import app
+
+    parser = argparse.ArgumentParser(description='Booking dashboard rollups')
+    sub = parser.add_subparsers(dest='command', required=True)
+    reconcile_cmd = sub.add_parser('reconcile', help='Rebuild rollups from bookings and report drift')
+    reconcile_cmd.add_argument('--start', type=date.fromisoformat, help='First creation day, e.g. 2026-01-01')
+    reconcile_cmd.add_argument('--end', type=date.fromisoformat, help='Last creation day (inclusive)')
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        result = BookingRollupService.reconcile(start=args.start, end=args.end)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
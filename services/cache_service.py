@@ -0,0 +1,554 @@
+"""
+Cache Service - shared cache and short-lived state for all gunicorn workers.
+
+One small API over two backends:
+
+    RedisBackend   shared by every worker (and host); used when REDIS_URL answers
+    MemoryBackend  in-process LRU with TTLs; fallback when Redis is unavailable
+
+Keys are namespaced (``<prefix>:<namespace>:<key>``), values are JSON, and
+every entry may carry tags so related entries can be dropped together:
+
+    cache = get_cache()
+    cache.set('nfc', token, session, ttl=300)
+    stats = cache.get_or_set('voucher_list', 'status_counts', load_counts, ttl=60, tags=['bookings'])
+    cache.invalidate_tags(['booking:42', 'bookings'])
+
+Per-namespace hit/miss counters (per process) are available from ``stats()``.
+
+Entries can also be watched: ``publish(namespace, key)`` wakes every
+``subscribe(namespace, key)`` waiter (Redis pub/sub, or a Condition in the
+in-process backend), which lets long-poll endpoints block until state changes:
+
+    with cache.subscribe('nfc', token) as subscription:
+        while not ready():
+            subscription.wait(timeout)
+
+Configuration (environment or app.config):
+    CACHE_BACKEND     auto (default) | redis | memory
+    REDIS_URL         redis://localhost:6379/0; ``fakeredis://`` uses fakeredis (tests/dev)
+    CACHE_KEY_PREFIX  voucher
+    CACHE_MAX_ENTRIES 4096 (memory backend)
+
+Tests can inject a backend directly: ``Cache(RedisBackend(fakeredis.FakeRedis()))``.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Tag sets outlive the entries they point to; stale members are harmless.
+TAG_TTL_SECONDS = 24 * 3600
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU with per-key expiry, tag sets and member sets"""
+
+    shared = False
+    name = 'memory'
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> (expires_at or None, value)
+        self._tags = defaultdict(set)      # tag key -> keys
+        self._key_tags = defaultdict(set)  # key -> tag keys, to keep tag sets bounded
+        self._lock = threading.RLock()
+        self._channels = {}  # key -> _MemoryChannel while someone is subscribed
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.time():
+            self._drop(key)
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def _store(self, key, value, ttl):
+        self._data[key] = (time.time() + ttl if ttl else None, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._drop(next(iter(self._data)))
+
+    def _drop(self, key):
+        found = self._data.pop(key, None) is not None
+        for tag_key in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag_key]
+        return found
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return None if entry is None else entry[1]
+
+    def set(self, key, raw, ttl=None, tag_keys=()):
+        with self._lock:
+            self._store(key, raw, ttl)
+            for tag_key in tag_keys:
+                self._tags[tag_key].add(key)
+                self._key_tags[key].add(tag_key)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._drop(key)
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._live(key)
+            self._drop(key)
+            return None if entry is None else entry[1]
+
+    def update(self, key, fn):
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                return None
+            raw = fn(entry[1])
+            self._data[key] = (entry[0], raw)
+            return raw
+
+    def incr(self, key, amount, ttl=None):
+        with self._lock:
+            entry = self._live(key)
+            value = int(entry[1]) + amount if entry else amount
+            if entry:
+                self._data[key] = (entry[0], str(value).encode())
+            else:
+                self._store(key, str(value).encode(), ttl)
+            return value
+
+    def invalidate_tags(self, tag_keys):
+        removed = 0
+        with self._lock:
+            for tag_key in tag_keys:
+                for key in list(self._tags.get(tag_key, ())):
+                    if self._drop(key):
+                        removed += 1
+                self._tags.pop(tag_key, None)
+        return removed
+
+    def add_members(self, key, members, ttl=None):
+        with self._lock:
+            entry = self._live(key)
+            current = set(entry[1]) if entry else set()
+            current.update(members)
+            self._store(key, frozenset(current), ttl)
+
+    def members(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return set(entry[1]) if entry else set()
+
+    def clear(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                self._drop(key)
+
+    def publish(self, key):
+        with self._lock:
+            channel = self._channels.get(key)
+        if channel is not None:
+            channel.notify()
+
+    def subscribe(self, key):
+        with self._lock:
+            channel = self._channels.get(key)
+            if channel is None:
+                channel = self._channels[key] = _MemoryChannel()
+            channel.subscribers += 1
+        return _MemorySubscription(self, key, channel)
+
+    def _unsubscribe(self, key, channel):
+        with self._lock:
+            channel.subscribers -= 1
+            if channel.subscribers <= 0 and self._channels.get(key) is channel:
+                del self._channels[key]
+
+
+class _MemoryChannel:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.generation = 0
+        self.subscribers = 0
+
+    def notify(self):
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+
+class _MemorySubscription:
+    def __init__(self, backend, key, channel):
+        self._backend = backend
+        self._key = key
+        self._channel = channel
+        self._seen = channel.generation
+
+    def wait(self, timeout):
+        """Block until a publish after the last wait (True) or timeout (False)."""
+        channel = self._channel
+        with channel.condition:
+            if channel.generation == self._seen:
+                channel.condition.wait(timeout)
+            notified = channel.generation != self._seen
+            self._seen = channel.generation
+        return notified
+
+    def close(self):
+        self._backend._unsubscribe(self._key, self._channel)
+
+
+class RedisBackend:
+    """Backend over a redis-py (or fakeredis) client"""
+
+    shared = True
+    name = 'redis'
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, raw, ttl=None, tag_keys=()):
+        with self.client.pipeline() as pipe:
+            pipe.set(key, raw, ex=ttl or None)
+            for tag_key in tag_keys:
+                pipe.sadd(tag_key, key)
+                pipe.expire(tag_key, max(TAG_TTL_SECONDS, ttl or 0))
+            pipe.execute()
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*keys)
+
+    def pop(self, key):
+        with self.client.pipeline() as pipe:
+            pipe.get(key)
+            pipe.delete(key)
+            raw, _ = pipe.execute()
+        return raw
+
+    def update(self, key, fn):
+        """Optimistic read-modify-write (WATCH/MULTI) that keeps the key's TTL."""
+        from redis.exceptions import WatchError
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    current = pipe.get(key)
+                    if current is None:
+                        pipe.unwatch()
+                        return None
+                    ttl_ms = pipe.pttl(key)
+                    raw = fn(current)
+                    pipe.multi()
+                    pipe.set(key, raw, px=ttl_ms if ttl_ms and ttl_ms > 0 else None)
+                    pipe.execute()
+                    return raw
+                except WatchError:
+                    continue
+
+    def incr(self, key, amount, ttl=None):
+        value = int(self.client.incrby(key, amount))
+        if ttl and value == amount:
+            # First increment created the counter
+            self.client.expire(key, ttl)
+        return value
+
+    def invalidate_tags(self, tag_keys):
+        removed = 0
+        for tag_key in tag_keys:
+            keys = list(self.client.smembers(tag_key))
+            if keys:
+                removed += self.client.delete(*keys)
+            self.client.delete(tag_key)
+        return removed
+
+    def add_members(self, key, members, ttl=None):
+        if not members:
+            return
+        with self.client.pipeline() as pipe:
+            pipe.sadd(key, *members)
+            if ttl:
+                pipe.expire(key, ttl)
+            pipe.execute()
+
+    def members(self, key):
+        return {m.decode() if isinstance(m, bytes) else m for m in self.client.smembers(key)}
+
+    def clear(self, prefix):
+        keys = list(self.client.scan_iter(match=f'{prefix}*', count=500))
+        for i in range(0, len(keys), 500):
+            self.client.delete(*keys[i:i + 500])
+
+    def publish(self, key):
+        self.client.publish(key, b'1')
+
+    def subscribe(self, key):
+        return _RedisSubscription(self.client, key)
+
+
+class _RedisSubscription:
+    def __init__(self, client, channel):
+        self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(channel)
+
+    def wait(self, timeout):
+        """True when a message arrived; may return early on subscribe confirmations."""
+        return self._pubsub.get_message(timeout=timeout) is not None
+
+    def close(self):
+        self._pubsub.close()
+
+
+class _SleepSubscription:
+    """Used when subscribing fails: waiters fall back to a short server-side poll."""
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, 1.0))
+        return False
+
+    def close(self):
+        pass
+
+
+class Cache:
+    """Namespaced JSON cache with TTLs, tags and hit/miss counters"""
+
+    def __init__(self, backend, prefix='voucher'):
+        self.backend = backend
+        self.prefix = prefix
+        self._stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'sets': 0, 'errors': 0})
+
+    @property
+    def shared(self):
+        """True when every worker sees the same data (Redis)"""
+        return self.backend.shared
+
+    # ------------------------------------------------------------------
+    # Keys and serialization
+    # ------------------------------------------------------------------
+    def key(self, namespace, key):
+        return f'{self.prefix}:{namespace}:{key}'
+
+    def _tag_key(self, tag):
+        return f'{self.prefix}:tag:{tag}'
+
+    @staticmethod
+    def _dumps(value):
+        return json.dumps(value, default=str, separators=(',', ':')).encode('utf-8')
+
+    @staticmethod
+    def _loads(raw):
+        return json.loads(raw) if raw is not None else None
+
+    def _error(self, namespace, op, e):
+        self._stats[namespace]['errors'] += 1
+        logger.warning(f'⚠️ Cache {op} failed ({self.backend.name}, {namespace}): {e}')
+
+    # ------------------------------------------------------------------
+    # Basic operations
+    # ------------------------------------------------------------------
+    def get(self, namespace, key, default=None):
+        try:
+            raw = self.backend.get(self.key(namespace, key))
+        except Exception as e:
+            self._error(namespace, 'get', e)
+            return default
+        if raw is None:
+            self._stats[namespace]['misses'] += 1
+            return default
+        self._stats[namespace]['hits'] += 1
+        return self._loads(raw)
+
+    def set(self, namespace, key, value, ttl=None, tags=()):
+        try:
+            self.backend.set(self.key(namespace, key), self._dumps(value), ttl,
+                             [self._tag_key(tag) for tag in tags])
+            self._stats[namespace]['sets'] += 1
+            return True
+        except Exception as e:
+            self._error(namespace, 'set', e)
+            return False
+
+    def delete(self, namespace, *keys):
+        try:
+            self.backend.delete(*[self.key(namespace, key) for key in keys])
+        except Exception as e:
+            self._error(namespace, 'delete', e)
+
+    def pop(self, namespace, key, default=None):
+        """Get and delete in one step (e.g. one-shot results)."""
+        try:
+            raw = self.backend.pop(self.key(namespace, key))
+        except Exception as e:
+            self._error(namespace, 'pop', e)
+            return default
+        if raw is None:
+            self._stats[namespace]['misses'] += 1
+            return default
+        self._stats[namespace]['hits'] += 1
+        return self._loads(raw)
+
+    def update(self, namespace, key, fn):
+        """Atomically replace a value with ``fn(value)``, keeping its TTL.
+
+        Returns the new value, or None when the key does not exist.
+        """
+        try:
+            raw = self.backend.update(self.key(namespace, key), lambda current: self._dumps(fn(self._loads(current))))
+        except Exception as e:
+            self._error(namespace, 'update', e)
+            return None
+        return self._loads(raw)
+
+    def get_or_set(self, namespace, key, factory, ttl=None, tags=()):
+        value = self.get(namespace, key)
+        if value is None:
+            value = factory()
+            if value is not None:
+                self.set(namespace, key, value, ttl=ttl, tags=tags)
+        return value
+
+    def incr(self, namespace, key, amount=1, ttl=None):
+        """Atomic counter; ``ttl`` applies when the counter is created."""
+        try:
+            return self.backend.incr(self.key(namespace, key), amount, ttl)
+        except Exception as e:
+            self._error(namespace, 'incr', e)
+            return None
+
+    # ------------------------------------------------------------------
+    # Tags and sets
+    # ------------------------------------------------------------------
+    def invalidate_tags(self, tags):
+        """Delete every entry stored with any of the tags; returns entries removed."""
+        try:
+            return self.backend.invalidate_tags([self._tag_key(tag) for tag in tags])
+        except Exception as e:
+            self._error('tag', 'invalidate', e)
+            return 0
+
+    def add_members(self, namespace, key, *members, ttl=None):
+        try:
+            self.backend.add_members(self.key(namespace, key), [str(m) for m in members], ttl)
+        except Exception as e:
+            self._error(namespace, 'add_members', e)
+
+    def members(self, namespace, key):
+        try:
+            return self.backend.members(self.key(namespace, key))
+        except Exception as e:
+            self._error(namespace, 'members', e)
+            return set()
+
+    def clear(self, namespace=None):
+        prefix = f'{self.prefix}:{namespace}:' if namespace else f'{self.prefix}:'
+        try:
+            self.backend.clear(prefix)
+        except Exception as e:
+            self._error(namespace or '*', 'clear', e)
+
+    # ------------------------------------------------------------------
+    # Change notification
+    # ------------------------------------------------------------------
+    def publish(self, namespace, key):
+        """Wake everyone subscribed to this entry."""
+        try:
+            self.backend.publish(self.key(namespace, key))
+        except Exception as e:
+            self._error(namespace, 'publish', e)
+
+    @contextmanager
+    def subscribe(self, namespace, key):
+        """Subscription with ``wait(timeout) -> bool``; subscribe before reading state to not miss a publish."""
+        try:
+            subscription = self.backend.subscribe(self.key(namespace, key))
+        except Exception as e:
+            self._error(namespace, 'subscribe', e)
+            subscription = _SleepSubscription()
+        try:
+            yield subscription
+        finally:
+            subscription.close()
+
+    # ------------------------------------------------------------------
+    # Counters
+    # ------------------------------------------------------------------
+    def stats(self):
+        """Per-namespace counters for this process, plus the backend in use."""
+        namespaces = {ns: dict(counts) for ns, counts in self._stats.items()}
+        for counts in namespaces.values():
+            lookups = counts['hits'] + counts['misses']
+            counts['hit_rate'] = round(counts['hits'] / lookups, 3) if lookups else None
+        return {'backend': self.backend.name, 'shared': self.shared, 'namespaces': namespaces}
+
+
+# ----------------------------------------------------------------------
+# Process-wide instance
+# ----------------------------------------------------------------------
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _setting(name, default=None, config=None):
+    if config is not None and config.get(name):
+        return config.get(name)
+    return os.environ.get(name, default)
+
+
+def create_cache(config=None):
+    """Build a Cache from configuration, falling back to memory if Redis is unreachable."""
+    backend_name = (_setting('CACHE_BACKEND', 'auto', config) or 'auto').lower()
+    prefix = _setting('CACHE_KEY_PREFIX', 'voucher', config)
+    max_entries = int(_setting('CACHE_MAX_ENTRIES', '4096', config))
+
+    if backend_name in ('auto', 'redis'):
+        url = _setting('REDIS_URL', 'redis://localhost:6379/0', config)
+        try:
+            if url.startswith('fakeredis://'):
+                import fakeredis
+                client = fakeredis.FakeRedis()
+            else:
+                import redis
+                client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            client.ping()
+            logger.info(f'✅ Cache backend: redis ({url.split("@")[-1]})')
+            return Cache(RedisBackend(client), prefix=prefix)
+        except Exception as e:
+            level = logging.ERROR if backend_name == 'redis' else logging.INFO
+            logger.log(level, f'Redis unavailable ({e}); using in-process cache - state is per worker')
+
+    return Cache(MemoryBackend(max_entries=max_entries), prefix=prefix)
+
+
+def init_app(app):
+    """Create the process cache from app.config and expose it as app.extensions['cache']."""
+    global _cache
+    with _cache_lock:
+        _cache = create_cache(app.config)
+    app.extensions['cache'] = _cache
+    return _cache
+
+
+def get_cache():
+    """Process-wide cache (created from the environment on first use)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_cache()
+    return _cache
@@ -21,6 +21,9 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER, TA_JUSTIFY
 
+from utils.text_normalize import pdf_plain_text
+from utils.script_segments import contains_thai, font_markup
+
 logger = logging.getLogger(__name__)
 
 def get_writable_output_dir(subdirs=''):
@@ -401,28 +404,6 @@ class ClassicPDFGenerator:
         
         return styles
 
-    def has_thai_text(self, text):
-        """Enhanced Thai text detection"""
-        if not text:
-            return False
-        
-        # Check for Thai Unicode range
-        thai_chars = 0
-        total_chars = 0
-        
-        for char in str(text):
-            if char.isalpha():  # Only count alphabetic characters
-                total_chars += 1
-                if '\u0e00' <= char <= '\u0e7f':  # Thai Unicode range
-                    thai_chars += 1
-        
-        # If more than 10% of alphabetic characters are Thai, consider it Thai text
-        if total_chars > 0:
-            thai_ratio = thai_chars / total_chars
-            return thai_ratio > 0.1
-        
-        return False
-
     def get_appropriate_style(self, text, style_type='normal'):
         """Get appropriate style based on text content and type"""
         has_thai = self.has_thai_text(text)
@@ -442,41 +423,8 @@ class ClassicPDFGenerator:
         """Format text with mixed Thai/English fonts inline with explicit font tags"""
         if not text:
             return ""
-        
-        import re
-        
-        # Use text as-is (should already be cleaned by caller)
-        clean_text = str(text)
-        
-        # If text has Thai characters, use proper Thai font handling
-        if self.has_thai_text(clean_text):
-            # Split text into Thai and non-Thai segments more precisely
-            result = ""
-            i = 0
-            while i < len(clean_text):
-                char = clean_text[i]
-                
-                # Check if current character is Thai
-                if '\u0E00' <= char <= '\u0E7F':  # Thai Unicode range
-                    # Find consecutive Thai characters
-                    thai_segment = ""
-                    while i < len(clean_text) and '\u0E00' <= clean_text[i] <= '\u0E7F':
-                        thai_segment += clean_text[i]
-                        i += 1
-                    result += f'<font name="NotoSansThai-Regular">{thai_segment}</font>'
-                else:
-                    # Find consecutive non-Thai characters
-                    non_thai_segment = ""
-                    while i < len(clean_text) and not ('\u0E00' <= clean_text[i] <= '\u0E7F'):
-                        non_thai_segment += clean_text[i]
-                        i += 1
-                    # Use Helvetica for English/numbers/symbols
-                    result += f'<font name="Helvetica">{non_thai_segment}</font>'
-            
-            return result
-        else:
-            # Pure English/numbers - use Helvetica
-            return f'<font name="Helvetica">{clean_text}</font>'
+        # Thai runs in NotoSansThai, English/numbers/symbols in Helvetica (segmented once per string)
+        return font_markup(text, 'NotoSansThai-Regular', 'Helvetica')
 
     def create_mixed_paragraph(self, text, style_name='ModernThai'):
         """Create paragraph with mixed font support and proper line break handling"""
@@ -548,138 +496,7 @@ class ClassicPDFGenerator:
 
     def clean_html_tags(self, text):
         """Clean HTML tags from text and handle line breaks properly"""
-        if not text:
-            return ""
-        
-        import re
-        
-        # Convert text to string
-        text = str(text)
-        
-        # CRITICAL: Handle line breaks FIRST before any other processing
-        # Convert Windows line endings (\r\n) to <br /> tags first
-        text = text.replace('\r\n', '<br />')
-        text = text.replace('\r', '<br />')  
-        text = text.replace('\n', '<br />')
-        
-        # Convert HTML line breaks and paragraph tags
-        text = re.sub(r'<br\s*/?>', '<br />', text, flags=re.IGNORECASE)
-        text = re.sub(r'<p\s*>', '<br />', text, flags=re.IGNORECASE)
-        text = re.sub(r'</p\s*>', '<br />', text, flags=re.IGNORECASE)
-        
-        # Convert pipes to line breaks (for flight info)
-        text = text.replace('|', '<br />')
-        
-        # Remove all other HTML tags
-        clean = re.compile(r'<(?!br\s)[^>]*>')
-        text = re.sub(clean, '', text)
-        
-        # Convert <br /> tags to actual newlines
-        text = text.replace('<br />', '\n')
-        
-        # Clean up multiple consecutive newlines
-        text = re.sub(r'\n{3,}', '\n\n', text)  # 3+ newlines → 2 newlines  
-        text = re.sub(r'\n{2}', '\n', text)     # 2 newlines → 1 newline
-        
-        # Remove leading/trailing whitespace but preserve internal newlines
-        lines = text.split('\n')
-        clean_lines = [line.strip() for line in lines]
-        
-        # Remove empty lines at start and end only
-        while clean_lines and not clean_lines[0]:
-            clean_lines.pop(0)
-        while clean_lines and not clean_lines[-1]:
-            clean_lines.pop()
-            
-        return '\n'.join(clean_lines)
-        text = re.sub(r'</p\s*>', '<br/>', text, flags=re.IGNORECASE)    # Closing P tags  
-        text = re.sub(r'<br\s*/?>', '<br/>', text, flags=re.IGNORECASE)  # Normalize br tags
-        text = re.sub(r'</br\s*>', '<br/>', text, flags=re.IGNORECASE)   # Handle closing br (including typo)
-        text = re.sub(r'<div\s*/?>', '<br/>', text, flags=re.IGNORECASE) # Div tags
-        text = re.sub(r'</div>', '<br/>', text, flags=re.IGNORECASE)     # Closing div tags
-        text = re.sub(r'<li\s*/?>', '<br/>', text, flags=re.IGNORECASE)  # List items
-        text = re.sub(r'</li>', '<br/>', text, flags=re.IGNORECASE)      # Closing li tags
-        
-        # Escaped characters (process first before actual line endings convert them)
-        text = text.replace('\\r\\n', '<br/>')                         # Escaped Windows line endings
-        text = text.replace('\\n\\r', '<br/>')                        # Escaped combinations
-        text = text.replace('\\\\n', '<br/>')                          # Double escaped newline
-        text = text.replace('\\\\r', '<br/>')                          # Double escaped carriage return
-        text = text.replace('\\n', '<br/>')                            # Escaped newlines
-        text = text.replace('\\r', '<br/>')                           # Escaped carriage return
-        
-        # DEBUG: Print before line ending conversion
-        print(f"🔍 BEFORE line endings conversion: {repr(text[:100])}")
-        
-        # Actual line endings (after escaped ones) - CRITICAL CONVERSION
-        text = text.replace('\r\n', '<br/>')                          # Windows line endings
-        text = text.replace('\r', '<br/>')                            # Mac line endings
-        text = text.replace('\n', '<br/>')                            # Unix line endings
-        
-        # DEBUG: Print after line ending conversion
-        print(f"🔍 AFTER line endings conversion: {repr(text[:100])}")
-        
-        # Common typos and variations
-        text = text.replace('/r/n', '<br/>')                          # Typo combinations (before single chars)
-        text = text.replace('/n', '<br/>')                             # Common typo for 
-
-        text = text.replace('/r', '<br/>')                            # Typo for 
-        
-        # Enter key representations
-        text = re.sub(r'\[enter\]', '<br/>', text, flags=re.IGNORECASE)
-        text = re.sub(r'\<enter\>', '<br/>', text, flags=re.IGNORECASE)
-        text = re.sub(r'&lt;enter&gt;', '<br/>', text, flags=re.IGNORECASE)
-        text = re.sub(r'\{enter\}', '<br/>', text, flags=re.IGNORECASE)
-        text = re.sub(r'\(enter\)', '<br/>', text, flags=re.IGNORECASE)
-        
-        # PIPE CHARACTER HANDLING - Convert pipes to line breaks (CRITICAL FOR FLIGHT INFO)
-        # Handle multiple types of pipe separators
-        text = text.replace('|', '<br/>')                             # Single pipe (PRIMARY FIX)
-        text = text.replace('||', '<br/>')                            # Double pipe
-        text = re.sub(r'\s*\|\s*', '<br/>', text)                     # Pipe with spaces
-        
-        # Special characters that might represent line breaks
-        text = text.replace('|n|', '<br/>')                           # Pipe notation
-        text = text.replace('###', '<br/>')                           # Hash notation
-        text = text.replace('---', '<br/>')                           # Dash notation
-        
-        # Remove all other HTML tags except our normalized br tags
-        clean = re.compile('<(?!br/)[^>]*>')
-        text = re.sub(clean, '', text)
-        
-        # Convert br tags to actual line breaks for PDF rendering
-        text = text.replace('<br/>', '\n')
-        
-        # DEBUG: Print after br to newline conversion
-        print(f"DEBUG clean_html_tags AFTER br to newline: {repr(text)}")
-        
-        # Clean up multiple consecutive line breaks but preserve intentional line breaks
-        # Replace 3+ consecutive newlines with 2 (paragraph break)
-        # Replace 2 consecutive newlines with 1 (single line break)
-        import re
-        text = re.sub(r'\n{3,}', '\n\n', text)  # 3+ newlines → 2 newlines (paragraph)
-        text = re.sub(r'\n{2}', '\n', text)     # 2 newlines → 1 newline (single break)
-        
-        # Clean up extra whitespace but preserve ALL intentional line breaks
-        lines = text.split('\n')
-        clean_lines = []
-        for line in lines:
-            stripped = line.strip()
-            # Keep ALL lines including empty ones for proper line breaks
-            clean_lines.append(stripped)
-        
-        # Remove only leading/trailing empty lines, preserve internal ones
-        while clean_lines and not clean_lines[0]:
-            clean_lines.pop(0)
-        while clean_lines and not clean_lines[-1]:
-            clean_lines.pop()
-        
-        result = '\n'.join(clean_lines)
-        
-        # DEBUG: Print final result
-        print(f"DEBUG clean_html_tags FINAL: {repr(result)}")
-        
-        return result
+        return pdf_plain_text(text)
 
     def format_text_with_font(self, text, use_thai=None):
         """Format text with appropriate font based on content, supporting mixed languages"""
@@ -747,12 +564,8 @@ class ClassicPDFGenerator:
 
     def has_thai_text(self, text):
         """Check if text contains Thai characters"""
-        if not text:
-            return False
-        for char in text:
-            if '\u0e00' <= char <= '\u0e7f':  # Thai Unicode range
-                return True
-        return False
+        return contains_thai(text)
+
     def _enhance_flight_info_handling(self, flight_info):
         """Enhanced flight info handling - clean HTML and show all data (less strict filtering)"""
         if not flight_info or not flight_info.strip():
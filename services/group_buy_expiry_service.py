@@ -0,0 +1,192 @@
+"""
+Group Buy Expiry Service
+ประมวลผลกลุ่ม/การชำระเงินที่หมดเวลาเป็นชุด (chunk) แทนทีละแถวใน transaction เดียว
+
+Each chunk claims at most ``chunk_size`` rows with
+``SELECT ... FOR UPDATE SKIP LOCKED``, applies the status changes with
+set-based UPDATEs and commits before the next chunk, so a campaign with
+thousands of participants never holds row locks for the whole run and two
+cron runs never block each other. Notifications are queued as
+``group_buy_notifications`` rows (``sent_at`` NULL) in the same chunk and
+delivered separately.
+"""
+
+import logging
+
+from extensions import db
+from models.group_buy import (
+    GroupBuyCampaign, GroupBuyGroup,
+    GroupBuyParticipant, GroupBuyNotification
+)
+from models.group_buy_payment import GroupBuyPayment
+from utils.datetime_utils import naive_utc_now
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 200
+
+
+class GroupBuyExpiryService:
+    """Chunked batch processing for expired group-buy groups and payments"""
+
+    @staticmethod
+    def _claim(query, id_column, after_id, chunk_size):
+        """Lock the next chunk of rows (keyset on id), skipping rows locked by another worker"""
+        return query.filter(id_column > after_id).order_by(id_column).limit(
+            chunk_size
+        ).with_for_update(skip_locked=True).all()
+
+    @staticmethod
+    def _full_by_campaign_pax(rows):
+        """Group ids whose campaign max_pax is already reached (same rule as GroupBuyGroup.is_full)"""
+        from services.group_buy_stats_service import GroupBuyStatsService
+
+        campaign_ids = {row.campaign_id for row in rows}
+        max_pax = dict(db.session.query(GroupBuyCampaign.id, GroupBuyCampaign.max_pax).filter(
+            GroupBuyCampaign.id.in_(campaign_ids),
+            GroupBuyCampaign.max_pax.isnot(None),
+            GroupBuyCampaign.max_pax > 0
+        ).all()) if campaign_ids else {}
+        if not max_pax:
+            return set()
+
+        stats = GroupBuyStatsService.campaign_stats(max_pax.keys())
+        full_campaigns = {cid for cid, limit in max_pax.items() if stats[cid]['total_pax'] >= limit}
+        return {row.id for row in rows if row.campaign_id in full_campaigns}
+
+    @classmethod
+    def expire_groups(cls, chunk_size=DEFAULT_CHUNK_SIZE, max_chunks=None):
+        """Mark expired, not-full active groups as failed; returns the number of groups failed"""
+        now = naive_utc_now()
+        candidates = db.session.query(
+            GroupBuyGroup.id, GroupBuyGroup.campaign_id, GroupBuyGroup.group_code
+        ).filter(
+            GroupBuyGroup.status == 'active',
+            GroupBuyGroup.expires_at < now,
+            GroupBuyGroup.current_participants < GroupBuyGroup.required_participants
+        )
+
+        failed_total = 0
+        last_id = 0
+        chunks = 0
+        while max_chunks is None or chunks < max_chunks:
+            try:
+                rows = cls._claim(candidates, GroupBuyGroup.id, last_id, chunk_size)
+                if not rows:
+                    db.session.rollback()
+                    break
+                last_id = rows[-1].id
+                chunks += 1
+
+                skip = cls._full_by_campaign_pax(rows)
+                rows = [row for row in rows if row.id not in skip]
+                ids = [row.id for row in rows]
+                if ids:
+                    db.session.query(GroupBuyGroup).filter(
+                        GroupBuyGroup.id.in_(ids),
+                        GroupBuyGroup.status == 'active'
+                    ).update({
+                        GroupBuyGroup.status: 'failed',
+                        GroupBuyGroup.cancelled_at: now
+                    }, synchronize_session=False)
+
+                    # ชำระแล้ว -> รอคืนเงิน (group_buy_refund_service คืนเงินแล้วเปลี่ยนเป็น refunded)
+                    db.session.query(GroupBuyParticipant).filter(
+                        GroupBuyParticipant.group_id.in_(ids),
+                        GroupBuyParticipant.payment_status == 'paid'
+                    ).update({
+                        GroupBuyParticipant.payment_status: 'refund_pending'
+                    }, synchronize_session=False)
+
+                    # กันวงเงินไว้เฉยๆ (ยังไม่ได้ตัดเงิน) -> ปล่อย authorization ไม่มีอะไรต้องคืน
+                    db.session.query(GroupBuyParticipant).filter(
+                        GroupBuyParticipant.group_id.in_(ids),
+                        GroupBuyParticipant.payment_status == 'authorized'
+                    ).update({
+                        GroupBuyParticipant.payment_status: 'released'
+                    }, synchronize_session=False)
+
+                    db.session.execute(GroupBuyNotification.__table__.insert(), [{
+                        'group_id': row.id,
+                        'notification_type': 'group_failed',
+                        'message': f"กลุ่ม {row.group_code} ไม่สำเร็จ (ไม่ครบจำนวนคน)",
+                        'created_at': now,
+                    } for row in rows])
+
+                db.session.commit()
+                failed_total += len(ids)
+                logger.info(f"⏰ Expired group chunk: {len(ids)} failed, {len(skip)} full by campaign pax (last id {last_id})")
+
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"❌ Error expiring group chunk after id {last_id}: {e}")
+                raise
+
+        return failed_total
+
+    @classmethod
+    def expire_payments(cls, chunk_size=DEFAULT_CHUNK_SIZE, max_chunks=None):
+        """Fail pending payments past their timeout (and their participants); returns the count"""
+        now = naive_utc_now()
+        candidates = db.session.query(GroupBuyPayment.id).filter(
+            GroupBuyPayment.payment_status == 'pending',
+            GroupBuyPayment.payment_timeout < now
+        )
+
+        cancelled_total = 0
+        last_id = 0
+        chunks = 0
+        while max_chunks is None or chunks < max_chunks:
+            try:
+                rows = cls._claim(candidates, GroupBuyPayment.id, last_id, chunk_size)
+                if not rows:
+                    db.session.rollback()
+                    break
+                ids = [row.id for row in rows]
+                last_id = ids[-1]
+                chunks += 1
+
+                db.session.query(GroupBuyPayment).filter(
+                    GroupBuyPayment.id.in_(ids),
+                    GroupBuyPayment.payment_status == 'pending'
+                ).update({
+                    GroupBuyPayment.payment_status: 'failed',
+                    GroupBuyPayment.admin_notes: 'Payment timeout - auto cancelled',
+                    GroupBuyPayment.updated_at: now
+                }, synchronize_session=False)
+
+                db.session.query(GroupBuyParticipant).filter(
+                    GroupBuyParticipant.payment_id.in_(ids)
+                ).update({
+                    GroupBuyParticipant.payment_status: 'failed'
+                }, synchronize_session=False)
+
+                db.session.commit()
+                cancelled_total += len(ids)
+                logger.info(f"⏰ Cancelled {len(ids)} expired payments (last id {last_id})")
+
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"❌ Error expiring payment chunk after id {last_id}: {e}")
+                raise
+
+        return cancelled_total
+
+    @staticmethod
+    def refund_candidate_groups(statuses=('expired', 'cancelled'), payment_statuses=('paid',),
+                                chunk_size=DEFAULT_CHUNK_SIZE):
+        """Yield chunks of group ids in ``statuses`` that still have participants in ``payment_statuses``.
+
+        One query per chunk instead of a COUNT per group.
+        """
+        last_id = 0
+        while True:
+            ids = [row[0] for row in db.session.query(GroupBuyGroup.id).filter(
+                GroupBuyGroup.id > last_id,
+                GroupBuyGroup.status.in_(list(statuses)),
+                GroupBuyGroup.participants.any(GroupBuyParticipant.payment_status.in_(list(payment_statuses)))
+            ).order_by(GroupBuyGroup.id).limit(chunk_size).all()]
+            if not ids:
+                return
+            last_id = ids[-1]
+            yield ids
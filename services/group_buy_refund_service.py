@@ -5,17 +5,21 @@ Auto Refund System for Group Buy
 from extensions import db
 from models.group_buy import GroupBuyCampaign, GroupBuyGroup, GroupBuyParticipant
 from models.group_buy_payment import GroupBuyPayment
+from services.group_buy_expiry_service import GroupBuyExpiryService, DEFAULT_CHUNK_SIZE
+from config import Config
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
-def process_failed_group_refunds(group_id: int) -> dict:
+def process_failed_group_refunds(group_id: int, statuses=('expired', 'cancelled'), payment_statuses=('paid',)) -> dict:
     """
     คืนเงินให้สมาชิกทุกคนในกลุ่มที่ล้มเหลว
     
     Args:
         group_id: ID ของกลุ่มที่ล้มเหลว
+        statuses: สถานะกลุ่มที่คืนเงินได้
+        payment_statuses: สถานะของสมาชิกที่ต้องคืนเงิน
     
     Returns:
         dict: สรุปผลการคืนเงิน
@@ -25,13 +29,13 @@ def process_failed_group_refunds(group_id: int) -> dict:
         if not group:
             return {'success': False, 'error': 'Group not found'}
         
-        if group.status not in ['expired', 'cancelled']:
+        if group.status not in statuses:
             return {'success': False, 'error': f'Group status is {group.status}, cannot refund'}
         
-        # ดึงสมาชิกทั้งหมดที่ชำระเงินแล้ว
-        participants = GroupBuyParticipant.query.filter_by(
-            group_id=group_id,
-            payment_status='paid'
+        # ดึงสมาชิกทั้งหมดที่ชำระเงินแล้ว (หรือรอคืนเงิน)
+        participants = GroupBuyParticipant.query.filter(
+            GroupBuyParticipant.group_id == group_id,
+            GroupBuyParticipant.payment_status.in_(list(payment_statuses))
         ).all()
         
         refunded_count = 0
@@ -57,6 +61,11 @@ def process_failed_group_refunds(group_id: int) -> dict:
                     else:
                         failed_count += 1
                         logger.error(f"❌ Failed to refund payment {payment.id}: {refund_result.get('error')}")
+                
+                elif payment and payment.payment_status == 'refunded':
+                    # คืนเงินไปแล้ว (เช่น admin คืนเอง) - ปิดสถานะ participant ไม่ให้ค้าง
+                    participant.payment_status = 'refunded'
+                    db.session.commit()
         
         return {
             'success': True,
@@ -130,36 +139,15 @@ def process_single_refund(payment: GroupBuyPayment, reason: str) -> dict:
         return {'success': False, 'error': str(e)}
 
 
-def process_expired_payments():
+def process_expired_payments(chunk_size=DEFAULT_CHUNK_SIZE):
     """
     ตรวจสอบและยกเลิก payments ที่หมดเวลา (timeout)
     ควรรันเป็น scheduled task ทุก 5-10 นาที
+    
+    ทำเป็นชุดละ chunk_size แถว (SKIP LOCKED, UPDATE แบบ set-based, commit ต่อชุด)
     """
     try:
-        now = datetime.utcnow()
-        
-        # ดึง payments ที่หมดเวลาแล้วแต่ยังค้าง
-        expired_payments = GroupBuyPayment.query.filter(
-            GroupBuyPayment.payment_status == 'pending',
-            GroupBuyPayment.payment_timeout < now
-        ).all()
-        
-        cancelled_count = 0
-        
-        for payment in expired_payments:
-            payment.payment_status = 'failed'
-            payment.admin_notes = 'Payment timeout - auto cancelled'
-            payment.updated_at = now
-            
-            # อัพเดต participant status
-            participant = GroupBuyParticipant.query.filter_by(payment_id=payment.id).first()
-            if participant:
-                participant.payment_status = 'failed'
-            
-            cancelled_count += 1
-            logger.info(f"⏰ Cancelled expired payment {payment.id}")
-        
-        db.session.commit()
+        cancelled_count = GroupBuyExpiryService.expire_payments(chunk_size=chunk_size)
         
         return {
             'success': True,
@@ -179,25 +167,25 @@ def auto_refund_failed_groups():
     """
     try:
         # ดึงกลุ่มที่ expire หรือ cancelled และยังไม่ได้คืนเงิน
-        failed_groups = GroupBuyGroup.query.filter(
-            GroupBuyGroup.status.in_(['expired', 'cancelled'])
-        ).all()
-        
+        # เฉพาะกลุ่มที่ยังมีสมาชิกชำระเงินค้างอยู่ (query เดียวต่อชุด แทน COUNT ต่อกลุ่ม)
+        statuses = ['expired', 'cancelled']
+        payment_statuses = ['paid']
+        if Config.GROUP_BUY_AUTO_REFUND_FAILED:
+            # กลุ่ม failed จาก GroupBuyExpiryService: สมาชิกที่ชำระแล้วอยู่ในสถานะ refund_pending
+            statuses.append('failed')
+            payment_statuses.append('refund_pending')
         total_refunded = 0
         groups_processed = 0
         
-        for group in failed_groups:
-            # ตรวจสอบว่ามีสมาชิกที่ยังชำระเงินค้างอยู่หรือไม่
-            paid_participants = GroupBuyParticipant.query.filter_by(
-                group_id=group.id,
-                payment_status='paid'
-            ).count()
-            
-            if paid_participants > 0:
-                result = process_failed_group_refunds(group.id)
-                if result.get('success'):
+        for group_ids in GroupBuyExpiryService.refund_candidate_groups(statuses, payment_statuses):
+            for group_id in group_ids:
+                result = process_failed_group_refunds(group_id, statuses, payment_statuses)
+                # นับเฉพาะกลุ่มที่คืนเงินได้จริง (กลุ่มที่ค้างจะถูกเลือกซ้ำทุกรอบ)
+                if result.get('success') and result.get('refunded_count'):
                     total_refunded += result.get('total_refunded', 0)
                     groups_processed += 1
+            # ไม่ถือ object ของชุดก่อนไว้ใน session
+            db.session.expunge_all()
         
         logger.info(f"✅ Auto refund completed: {groups_processed} groups, ฿{total_refunded:,.2f} refunded")
         
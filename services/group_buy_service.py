@@ -389,22 +389,19 @@ class GroupBuyService:
             logger.error(f"Error creating participant booking: {e}")
             return None
     
-    def check_expired_groups(self):
-        """ตรวจสอบและจัดการกลุ่มที่หมดเวลา (ใช้กับ Cron Job)"""
+    def check_expired_groups(self, chunk_size=None):
+        """ตรวจสอบและจัดการกลุ่มที่หมดเวลา (ใช้กับ Cron Job)
+        
+        ประมวลผลเป็นชุด (SKIP LOCKED + commit ต่อชุด) ผ่าน GroupBuyExpiryService
+        Returns จำนวนกลุ่มที่ถูกปิดเป็น failed
+        """
+        from services.group_buy_expiry_service import GroupBuyExpiryService, DEFAULT_CHUNK_SIZE
+        
         try:
-            expired_groups = GroupBuyGroup.query.filter(
-                GroupBuyGroup.status == 'active',
-                GroupBuyGroup.expires_at < naive_utc_now()
-            ).all()
-            
-            for group in expired_groups:
-                if not group.is_full:
-                    self._handle_group_failed(group)
-            
-            db.session.commit()
+            failed_count = GroupBuyExpiryService.expire_groups(chunk_size=chunk_size or DEFAULT_CHUNK_SIZE)
             
-            logger.info(f"Checked {len(expired_groups)} expired groups")
-            return len(expired_groups)
+            logger.info(f"Checked expired groups: {failed_count} failed")
+            return failed_count
             
         except Exception as e:
             logger.error(f"Error checking expired groups: {e}")
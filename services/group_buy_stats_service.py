@@ -0,0 +1,127 @@
+"""
+Group Buy Stats Service
+สถิติแคมเปญ Group Buy แบบ set-based - หนึ่ง query ต่อหน้า แทน COUNT ต่อแคมเปญ
+
+One grouped query returns, per (campaign, group status): group count,
+participant total and active pax. Campaign-level figures (inventory used,
+success rate, revenue) are derived in Python and can be attached to the
+campaign objects so ``inventory_used`` / ``inventory_remaining`` stop
+issuing a COUNT per read.
+"""
+
+import logging
+from collections import defaultdict
+
+from sqlalchemy import func
+
+from extensions import db
+from models.group_buy import GroupBuyGroup, GroupBuyParticipant
+
+logger = logging.getLogger(__name__)
+
+# Groups that hold inventory / count towards campaign pax
+INVENTORY_STATUSES = ('active', 'success')
+GROUP_STATUSES = ('pending', 'active', 'success', 'failed', 'cancelled')
+
+
+class GroupBuyStatsService:
+    """Per-campaign group statistics in one grouped query"""
+
+    @staticmethod
+    def _empty():
+        return {
+            'groups_by_status': {status: 0 for status in GROUP_STATUSES},
+            'total_groups': 0,
+            'successful_groups': 0,
+            'active_groups': 0,
+            'failed_groups': 0,
+            'cancelled_groups': 0,
+            'total_participants': 0,
+            'successful_participants': 0,
+            'total_pax': 0,
+            'inventory_used': 0,
+        }
+
+    @classmethod
+    def campaign_stats(cls, campaign_ids=None):
+        """Return {campaign_id: stats} for the given campaigns (all when None).
+
+        Pax counts only active participants of active/success groups, the
+        same rule as ``GroupBuyGroup.total_pax_for_campaign``.
+        """
+        if campaign_ids is not None:
+            campaign_ids = list(campaign_ids)
+            if not campaign_ids:
+                return {}
+
+        pax_per_group = db.session.query(
+            GroupBuyParticipant.group_id.label('group_id'),
+            func.sum(GroupBuyParticipant.pax_count).label('pax'),
+        ).filter(
+            GroupBuyParticipant.status == 'active'
+        ).group_by(GroupBuyParticipant.group_id).subquery()
+
+        query = db.session.query(
+            GroupBuyGroup.campaign_id,
+            GroupBuyGroup.status,
+            func.count(GroupBuyGroup.id),
+            func.coalesce(func.sum(GroupBuyGroup.current_participants), 0),
+            func.coalesce(func.sum(pax_per_group.c.pax), 0),
+        ).outerjoin(
+            pax_per_group, pax_per_group.c.group_id == GroupBuyGroup.id
+        ).group_by(GroupBuyGroup.campaign_id, GroupBuyGroup.status)
+
+        if campaign_ids is not None:
+            query = query.filter(GroupBuyGroup.campaign_id.in_(campaign_ids))
+
+        stats = defaultdict(cls._empty)
+        for campaign_id in campaign_ids or ():
+            stats[campaign_id]  # campaigns without groups still get zeros
+        for campaign_id, status, groups, participants, pax in query.all():
+            row = stats[campaign_id]
+            groups, participants, pax = int(groups), int(participants or 0), int(pax or 0)
+            row['groups_by_status'][status] = row['groups_by_status'].get(status, 0) + groups
+            row['total_groups'] += groups
+            row['total_participants'] += participants
+            if status in INVENTORY_STATUSES:
+                row['inventory_used'] += groups
+                row['total_pax'] += pax
+            if status == 'success':
+                row['successful_participants'] += participants
+
+        for row in stats.values():
+            by_status = row['groups_by_status']
+            row['successful_groups'] = by_status.get('success', 0)
+            row['active_groups'] = by_status.get('active', 0)
+            row['failed_groups'] = by_status.get('failed', 0)
+            row['cancelled_groups'] = by_status.get('cancelled', 0)
+            row['success_rate'] = (
+                row['successful_groups'] / row['total_groups'] * 100 if row['total_groups'] else 0
+            )
+        return dict(stats)
+
+    @classmethod
+    def attach(cls, campaigns):
+        """Load stats for the campaigns in one query and attach them to each object.
+
+        Returns {campaign_id: stats}. Inventory and revenue use the loaded campaign.
+        """
+        campaigns = list(campaigns)
+        stats = cls.campaign_stats([c.id for c in campaigns])
+        for campaign in campaigns:
+            row = stats.setdefault(campaign.id, cls._empty())
+            row['total_slots'] = campaign.total_slots or 0
+            row['inventory_remaining'] = max(0, row['total_slots'] - row['inventory_used']) if campaign.total_slots else 0
+            row['total_revenue'] = float(campaign.group_price or 0) * row['successful_participants']
+            campaign.attach_stats(row)
+        return stats
+
+    @classmethod
+    def totals(cls, stats):
+        """Sum per-campaign stats into dashboard totals"""
+        total = cls._empty()
+        for row in stats.values():
+            for key in ('total_groups', 'successful_groups', 'active_groups', 'failed_groups',
+                        'cancelled_groups', 'total_participants', 'total_pax', 'inventory_used'):
+                total[key] += row[key]
+        return total
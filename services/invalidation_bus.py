@@ -0,0 +1,217 @@
+"""
+After-commit invalidation bus.
+
+SQLAlchemy flush listeners must stay cheap: they run inside the flush, under
+the open DB transaction. Listeners therefore only *record* what changed:
+
+    invalidation_bus.record(session, 'booking', booking.id, 'update', {'status'})
+
+Recorded events are kept on ``session.info`` and merged per entity. When the
+session commits, the bus fans them out to subscribers (artifact caches,
+search indexes, quote sync, ...). A rollback discards them. Subscribers run
+on a small background pool inside a fresh app context, so they can use
+``db.session`` for their own short transactions without blocking the request.
+
+Generated files are tracked per booking by ``ArtifactIndex`` so invalidation
+deletes exactly the booking's files instead of scanning ``static/generated``.
+"""
+
+import logging
+import os
+import threading
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+InvalidationEvent = namedtuple('InvalidationEvent', ['entity', 'entity_id', 'action', 'fields'])
+
+_PENDING_KEY = 'invalidation_events'
+
+
+class InvalidationBus:
+    """Collects entity change events during a transaction and dispatches them after commit."""
+
+    def __init__(self, max_workers=2):
+        self._handlers = defaultdict(list)
+        self._max_workers = max_workers
+        self._executor = None
+        self._installed = False
+        self._lock = threading.Lock()
+        self.async_dispatch = os.environ.get('INVALIDATION_ASYNC', 'true').lower() in {'1', 'true', 'yes'}
+
+    # ------------------------------------------------------------------
+    # Wiring
+    # ------------------------------------------------------------------
+    def install(self):
+        """Attach commit/rollback listeners to every SQLAlchemy session (idempotent)."""
+        with self._lock:
+            if self._installed:
+                return
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+            self._installed = True
+        logger.info('Invalidation bus installed')
+
+    def subscribe(self, entity, handler):
+        """Register ``handler(event)`` for an entity name, or '*' for every entity."""
+        if handler not in self._handlers[entity]:
+            self._handlers[entity].append(handler)
+
+    # ------------------------------------------------------------------
+    # Recording (called from flush listeners - must stay cheap)
+    # ------------------------------------------------------------------
+    def record(self, session, entity, entity_id, action, fields=()):
+        if session is None or entity_id is None:
+            return
+        pending = session.info.setdefault(_PENDING_KEY, {})
+        key = (entity, entity_id)
+        previous = pending.get(key)
+        if previous is None:
+            pending[key] = InvalidationEvent(entity, entity_id, action, frozenset(fields))
+            return
+        # Merge: insert stays insert, delete wins over everything else.
+        if action == 'delete' or previous.action == 'delete':
+            merged_action = 'delete'
+        elif previous.action == 'insert':
+            merged_action = 'insert'
+        else:
+            merged_action = action
+        pending[key] = InvalidationEvent(entity, entity_id, merged_action, previous.fields | frozenset(fields))
+
+    def _after_rollback(self, session):
+        session.info.pop(_PENDING_KEY, None)
+
+    def _after_commit(self, session):
+        pending = session.info.pop(_PENDING_KEY, None)
+        if pending:
+            self.dispatch(list(pending.values()))
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+    def dispatch(self, events):
+        app = self._current_app()
+        for evt in events:
+            for handler in self._handlers.get(evt.entity, []) + self._handlers.get('*', []):
+                if self.async_dispatch and app is not None:
+                    self._pool().submit(self._run, app, handler, evt)
+                else:
+                    # A fresh app context gets its own db.session: the committing
+                    # session cannot emit SQL from inside after_commit
+                    self._run(app, handler, evt)
+
+    def _run(self, app, handler, evt):
+        try:
+            if app is None:
+                handler(evt)
+            else:
+                with app.app_context():
+                    handler(evt)
+        except Exception as e:
+            logger.error(f'Invalidation handler {getattr(handler, "__name__", handler)} failed for {evt}: {e}')
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._max_workers, thread_name_prefix='invalidation'
+                    )
+        return self._executor
+
+    @staticmethod
+    def _current_app():
+        try:
+            from flask import current_app
+            return current_app._get_current_object()
+        except Exception:
+            return None
+
+
+class ArtifactIndex:
+    """Per-booking list of generated files (PDF/PNG).
+
+    With a shared cache (Redis) the list is a set in the ``artifacts``
+    namespace, visible to every worker and host. Otherwise each booking gets
+    a small append-only index file next to the files; appends of a single
+    short line are atomic, which keeps this safe across gunicorn workers on
+    one host. Either way invalidating a booking reads one small index instead
+    of listing the whole output directory. Registered files are also tracked
+    by StorageLifecycleService (size, expiry, deletion journal).
+    """
+
+    NAMESPACE = 'artifacts'
+
+    def __init__(self, base_dir=None, cache=None):
+        self.base_dir = base_dir or os.path.join('static', 'generated', '.artifacts')
+        self._cache = cache
+
+    def _shared_cache(self):
+        from services.cache_service import get_cache
+        cache = self._cache or get_cache()
+        return cache if cache.shared else None
+
+    def _index_path(self, booking_id):
+        return os.path.join(self.base_dir, f'booking_{booking_id}.idx')
+
+    def register(self, booking_id, path, kind='document', ttl=None):
+        if booking_id is None or not path:
+            return
+        from services.storage_lifecycle_service import StorageLifecycleService
+        StorageLifecycleService.track(path, kind, ttl=ttl, booking_id=booking_id)
+        cache = self._shared_cache()
+        if cache is not None:
+            cache.add_members(self.NAMESPACE, booking_id, path)
+            return
+        try:
+            os.makedirs(self.base_dir, exist_ok=True)
+            with open(self._index_path(booking_id), 'a', encoding='utf-8') as fh:
+                fh.write(f'{path}\n')
+        except OSError as e:
+            logger.warning(f'Could not index artifact {path} for booking {booking_id}: {e}')
+
+    def paths(self, booking_id):
+        # File entries are read as well so nothing is lost when the backend changes
+        paths = []
+        cache = self._shared_cache()
+        if cache is not None:
+            paths.extend(sorted(cache.members(self.NAMESPACE, booking_id)))
+        try:
+            with open(self._index_path(booking_id), encoding='utf-8') as fh:
+                paths.extend(line.strip() for line in fh if line.strip())
+        except FileNotFoundError:
+            pass
+        return paths
+
+    def purge(self, booking_id):
+        """Delete every indexed artifact of a booking. Returns number of files removed."""
+        from services.storage_lifecycle_service import StorageLifecycleService
+        removed = 0
+        gone = []
+        for path in dict.fromkeys(self.paths(booking_id)):
+            try:
+                os.remove(path)
+                removed += 1
+                gone.append(path)
+                logger.info(f'Removed outdated artifact: {os.path.basename(path)}')
+            except FileNotFoundError:
+                gone.append(path)
+            except OSError as e:
+                logger.warning(f'Could not remove artifact {path}: {e}')
+        StorageLifecycleService.forget(gone, reason='purged')
+        cache = self._shared_cache()
+        if cache is not None:
+            cache.delete(self.NAMESPACE, booking_id)
+        try:
+            os.remove(self._index_path(booking_id))
+        except FileNotFoundError:
+            pass
+        return removed
+
+
+invalidation_bus = InvalidationBus()
+artifact_index = ArtifactIndex()
@@ -0,0 +1,462 @@
+"""
+Metrics Service
+วัดผลระดับ request: latency ต่อ endpoint, จำนวน/เวลา SQL ต่อ request (จับ N+1)
+และเวลา render (WeasyPrint / ReportLab / PyMuPDF / Tesseract)
+
+- ``init_app(app)`` installs the request hooks, the SQLAlchemy cursor hooks and
+  the render timers, and adds a ``Server-Timing`` header in debug mode or for admins.
+- ``timed(engine)`` times any other block (shows up as ``render_duration_seconds``).
+- ``render_prometheus()`` returns the text exposition served at ``/api/metrics``.
+
+Each gunicorn worker keeps its own registry and writes a snapshot to
+``METRICS_DIR`` at most every ``METRICS_FLUSH_SECONDS``; the metrics endpoint
+merges the snapshots of all live workers, so a scrape sees the whole server
+rather than whichever worker answered.
+"""
+
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+
+from flask import current_app, g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SQL_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+RENDER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+MAX_TRACE_STATEMENTS = 5000
+
+METRIC_HELP = {
+    'http_request_duration_seconds': ('histogram', 'Request latency by endpoint'),
+    'http_request_sql_queries': ('histogram', 'SQL statements executed per request'),
+    'http_request_sql_seconds': ('histogram', 'Time spent in SQL per request'),
+    'render_duration_seconds': ('histogram', 'PDF/PNG rendering and OCR calls'),
+    'sql_n_plus_one_total': ('counter', 'Requests that repeated one SELECT at least the N+1 threshold'),
+    'cache_operations_total': ('counter', 'Shared cache operations by namespace and result'),
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram (per-bucket counts; cumulated on export)"""
+
+    def __init__(self, buckets, counts=None, total=0.0, count=0):
+        self.buckets = tuple(buckets)
+        self.counts = list(counts) if counts else [0] * (len(self.buckets) + 1)
+        self.sum = total
+        self.count = count
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe in-process registry of histograms and counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = defaultdict(float)
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, name, value, buckets, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            self._counters[self._key(name, labels)] += amount
+
+    def snapshot(self):
+        """JSON-serialisable copy of every series"""
+        with self._lock:
+            return {
+                'histograms': [
+                    {'name': name, 'labels': dict(labels), 'buckets': list(h.buckets),
+                     'counts': list(h.counts), 'sum': h.sum, 'count': h.count}
+                    for (name, labels), h in self._histograms.items()
+                ],
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in self._counters.items()
+                ],
+            }
+
+
+def merge_snapshots(snapshots):
+    """Sum snapshots from several workers series by series"""
+    histograms, counters = {}, defaultdict(float)
+    for snap in snapshots:
+        for row in snap.get('histograms', []):
+            key = (row['name'], tuple(sorted(row['labels'].items())))
+            existing = histograms.get(key)
+            if existing is None or existing.buckets != tuple(row['buckets']):
+                histograms[key] = Histogram(row['buckets'], row['counts'], row['sum'], row['count'])
+            else:
+                existing.counts = [a + b for a, b in zip(existing.counts, row['counts'])]
+                existing.sum += row['sum']
+                existing.count += row['count']
+        for row in snap.get('counters', []):
+            counters[(row['name'], tuple(sorted(row['labels'].items())))] += row['value']
+    return histograms, counters
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (list(extra.items()) if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label(v)}"' for k, v in items) + '}'
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def format_prometheus(histograms, counters):
+    """Prometheus text exposition format 0.0.4"""
+    lines = []
+    by_name = defaultdict(list)
+    for (name, labels), histogram in histograms.items():
+        by_name[name].append((labels, histogram))
+    for (name, labels), value in counters.items():
+        by_name[name].append((labels, value))
+
+    for name in sorted(by_name):
+        kind, help_text = METRIC_HELP.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, series in sorted(by_name[name], key=lambda item: item[0]):
+            if isinstance(series, Histogram):
+                cumulative = 0
+                for bound, count in zip(series.buckets, series.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels, {"le": bound})} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(labels, {"le": "+Inf"})} {series.count}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {series.sum:.6f}')
+                lines.append(f'{name}_count{_format_labels(labels)} {series.count}')
+            else:
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(series)}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+_state = {
+    'dir': None,
+    'flush_seconds': 5.0,
+    'last_flush': 0.0,
+    'n_plus_one_threshold': 10,
+    'sql_hooks': False,
+    'renderers': False,
+}
+
+
+# ----------------------------------------------------------------------
+# Per-request stats
+# ----------------------------------------------------------------------
+class RequestStats:
+    """SQL and render totals for the current request (kept on flask.g)"""
+
+    __slots__ = ('started', 'sql_count', 'sql_seconds', 'statements', 'render_seconds', 'status', 'trace')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.statements = Counter()
+        self.render_seconds = defaultdict(float)
+        self.status = None
+        self.trace = None  # list of statements when a recorder asks for them (profiling_service)
+
+    def add_query(self, statement, elapsed):
+        self.sql_count += 1
+        self.sql_seconds += elapsed
+        self.statements[fingerprint(statement)] += 1
+        if self.trace is not None and len(self.trace) < MAX_TRACE_STATEMENTS:
+            self.trace.append({
+                'at_ms': round((time.perf_counter() - self.started - elapsed) * 1000, 2),
+                'duration_ms': round(elapsed * 1000, 3),
+                'statement': statement[:2000],
+            })
+
+
+def current_stats():
+    """RequestStats of the active request, or None outside a request"""
+    if has_request_context():
+        return g.get('_request_metrics')
+    return None
+
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAM_LIST_RE = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)')
+_SPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement):
+    """Statement shape without literals / IN-list lengths (to spot N+1 repeats)"""
+    shape = _LITERAL_RE.sub('?', statement)
+    shape = _PARAM_LIST_RE.sub('(?+)', shape)
+    return _SPACE_RE.sub(' ', shape).strip()
+
+
+# ----------------------------------------------------------------------
+# Timers
+# ----------------------------------------------------------------------
+@contextmanager
+def timed(engine):
+    """Time a block as render_duration_seconds{engine=...} (and on the request)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        registry.observe('render_duration_seconds', elapsed, RENDER_BUCKETS, engine=engine)
+        stats = current_stats()
+        if stats is not None:
+            stats.render_seconds[engine] += elapsed
+
+
+def _wrap(owner, attr, engine):
+    original = getattr(owner, attr, None)
+    if original is None or getattr(original, '_metrics_engine', None):
+        return False
+
+    @wraps(original)
+    def wrapper(*args, **kwargs):
+        with timed(engine):
+            return original(*args, **kwargs)
+
+    wrapper._metrics_engine = engine
+    setattr(owner, attr, wrapper)
+    return True
+
+
+def instrument_renderers():
+    """Wrap the library entry points every generator goes through (optional deps skipped)"""
+    if _state['renderers']:
+        return
+    _state['renderers'] = True
+    targets = (
+        ('weasyprint', lambda m: m.HTML, 'write_pdf', 'weasyprint'),
+        ('reportlab.platypus.doctemplate', lambda m: m.BaseDocTemplate, 'build', 'reportlab'),
+        ('fitz', lambda m: m.Page, 'get_pixmap', 'fitz'),
+        ('pytesseract', lambda m: m, 'image_to_string', 'tesseract'),
+        ('pytesseract', lambda m: m, 'image_to_data', 'tesseract'),
+    )
+    for module_name, owner_of, attr, engine in targets:
+        try:
+            module = __import__(module_name, fromlist=['_'])
+            _wrap(owner_of(module), attr, engine)
+        except Exception as e:
+            logger.debug(f'Render timer for {module_name}.{attr} not installed: {e}')
+
+
+# ----------------------------------------------------------------------
+# SQL hooks
+# ----------------------------------------------------------------------
+def _install_sql_hooks():
+    if _state['sql_hooks']:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('_metrics_started')
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        stats = current_stats()
+        if stats is not None:
+            stats.add_query(statement, elapsed)
+
+    @event.listens_for(Engine, 'handle_error')
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('_metrics_started'):
+            conn.info['_metrics_started'].pop()
+
+    _state['sql_hooks'] = True
+
+
+# ----------------------------------------------------------------------
+# Request hooks
+# ----------------------------------------------------------------------
+def _endpoint():
+    return request.endpoint or 'unmatched'
+
+
+def _before_request():
+    g._request_metrics = RequestStats()
+
+
+def _server_timing_allowed():
+    """Server-Timing exposes SQL counts and render times: debug mode or admins only"""
+    if current_app.debug:
+        return True
+    try:
+        from flask_login import current_user
+        return bool(current_user and current_user.is_authenticated and getattr(current_user, 'is_admin', False))
+    except Exception:
+        return False
+
+
+def _after_request(response):
+    stats = current_stats()
+    if stats is None:
+        return response
+    stats.status = response.status_code
+    if not _server_timing_allowed():
+        return response
+    elapsed_ms = (time.perf_counter() - stats.started) * 1000
+    timings = [f'app;dur={elapsed_ms:.1f}', f'sql;dur={stats.sql_seconds * 1000:.1f};desc="{stats.sql_count} queries"']
+    for engine, seconds in stats.render_seconds.items():
+        timings.append(f'{engine};dur={seconds * 1000:.1f}')
+    response.headers.add('Server-Timing', ', '.join(timings))
+    return response
+
+
+def _teardown_request(exc):
+    stats = current_stats()
+    if stats is None or request.endpoint == 'static':
+        return
+    g._request_metrics = None
+    elapsed = time.perf_counter() - stats.started
+    endpoint = _endpoint()
+    status = stats.status or (500 if exc else 200)
+
+    registry.observe('http_request_duration_seconds', elapsed, LATENCY_BUCKETS,
+                     endpoint=endpoint, method=request.method, status=status)
+    registry.observe('http_request_sql_queries', stats.sql_count, SQL_COUNT_BUCKETS, endpoint=endpoint)
+    registry.observe('http_request_sql_seconds', stats.sql_seconds, LATENCY_BUCKETS, endpoint=endpoint)
+
+    threshold = _state['n_plus_one_threshold']
+    repeated = [(count, shape) for shape, count in stats.statements.items()
+                if count >= threshold and shape.lstrip('( ').upper().startswith('SELECT')]
+    if repeated:
+        registry.inc('sql_n_plus_one_total', endpoint=endpoint)
+        count, shape = max(repeated)
+        logger.warning(f'⚠️ Possible N+1 on {endpoint}: {count}x {shape[:300]} '
+                       f'({stats.sql_count} queries, {stats.sql_seconds * 1000:.0f}ms SQL)')
+
+    if time.monotonic() - _state['last_flush'] >= _state['flush_seconds']:
+        flush()
+
+
+# ----------------------------------------------------------------------
+# Cross-worker snapshots
+# ----------------------------------------------------------------------
+def _snapshot_with_cache():
+    snap = registry.snapshot()
+    try:
+        from services.cache_service import get_cache
+        for namespace, counts in get_cache().stats().get('namespaces', {}).items():
+            for result in ('hits', 'misses', 'sets', 'errors'):
+                snap['counters'].append({'name': 'cache_operations_total',
+                                         'labels': {'namespace': namespace, 'result': result},
+                                         'value': counts.get(result, 0)})
+    except Exception:
+        pass
+    return snap
+
+
+def flush():
+    """Write this worker's snapshot to METRICS_DIR (atomic replace)"""
+    _state['last_flush'] = time.monotonic()
+    directory = _state['dir']
+    if not directory:
+        return
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'worker-{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(_snapshot_with_cache(), f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f'Could not write metrics snapshot: {e}')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect():
+    """Snapshots of every live worker (this one read from memory)"""
+    snapshots = [_snapshot_with_cache()]
+    directory = _state['dir']
+    if not directory or not os.path.isdir(directory):
+        return snapshots
+    for filename in os.listdir(directory):
+        match = re.match(r'worker-(\d+)\.json$', filename)
+        if not match or int(match.group(1)) == os.getpid():
+            continue
+        path = os.path.join(directory, filename)
+        if not _pid_alive(int(match.group(1))):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def render_prometheus():
+    """Merged metrics of all live workers in Prometheus text format"""
+    histograms, counters = merge_snapshots(collect())
+    return format_prometheus(histograms, counters)
+
+
+def init_app(app):
+    """Install request/SQL/render instrumentation (METRICS_ENABLED=false to skip)"""
+    if str(app.config.get('METRICS_ENABLED', os.environ.get('METRICS_ENABLED', 'true'))).lower() in ('0', 'false', 'no'):
+        logger.info('📉 Request metrics disabled')
+        return
+
+    _state['dir'] = app.config.get('METRICS_DIR') or os.path.join(app.instance_path, 'metrics')
+    _state['flush_seconds'] = float(app.config.get('METRICS_FLUSH_SECONDS', 5))
+    _state['n_plus_one_threshold'] = int(app.config.get('METRICS_N_PLUS_ONE_THRESHOLD', 10))
+
+    _install_sql_hooks()
+    instrument_renderers()
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.extensions['metrics'] = registry
+    logger.info(f"📈 Request metrics enabled (snapshots in {_state['dir']})")
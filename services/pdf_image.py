@@ -1,22 +1,95 @@
 import fitz  # PyMuPDF
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 from PIL import Image
 import io
 import os
+import struct
+import zlib
 from utils.logging_config import get_logger
 
+try:  # optional: faster page blitting into the stacked canvas
+    import numpy as np
+except ImportError:  # pragma: no cover - Pillow fallback is used instead
+    np = None
+
 logger = get_logger(__name__)
 
 
+class RasterSession:
+    """One parsed PDF document shared by every raster operation of a request.
+
+    The module-level helpers below each open the PDF on their own, so a
+    caller that counts pages and then renders them one by one parses the
+    document N+1 times. A session parses it once::
+
+        with RasterSession(pdf_bytes, zoom=2.0) as session:
+            for i in range(session.page_count):
+                png = session.render_png(i)
+
+    Pages are rendered sequentially: PyMuPDF documents must not be shared
+    between threads.
+    """
+
+    def __init__(self, pdf_bytes: bytes, zoom: float = 2.0):
+        self.doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        self.zoom = zoom
+        self.matrix = fitz.Matrix(zoom, zoom)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        if self.doc is not None:
+            self.doc.close()
+            self.doc = None
+
+    @property
+    def page_count(self) -> int:
+        return len(self.doc) if self.doc is not None else 0
+
+    def page_size(self, page_index: int) -> Tuple[int, int]:
+        """Pixel size of a page at this zoom, without rasterizing it."""
+        rect = (self.doc[page_index].rect * self.matrix).irect
+        return rect.width, rect.height
+
+    def pixmap(self, page_index: int) -> "fitz.Pixmap":
+        """Rasterize one page to an RGB pixmap (no alpha)."""
+        page = self.doc.load_page(page_index)
+        return page.get_pixmap(
+            matrix=self.matrix,
+            alpha=False,  # No transparency for better compression
+            colorspace=fitz.csRGB  # Ensure RGB colorspace
+        )
+
+    def render_png(self, page_index: int) -> bytes:
+        """Render one page to PNG bytes; empty bytes for an invalid index or render error."""
+        if page_index < 0 or page_index >= self.page_count:
+            return b""
+        try:
+            png_bytes = self.pixmap(page_index).tobytes("png")
+            logger.debug(f"✅ Page {page_index+1}/{self.page_count} rendered ({len(png_bytes):,} bytes)")
+            return png_bytes
+        except Exception as e:
+            logger.error(f"❌ Failed to render page {page_index}: {e}")
+            return b""
+
+    def iter_png(self, page_indexes: Optional[List[int]] = None) -> Iterator[Tuple[int, bytes]]:
+        """Yield (page_index, png_bytes) for the requested pages (all pages by default)."""
+        indexes = range(self.page_count) if page_indexes is None else page_indexes
+        for i in indexes:
+            yield i, self.render_png(i)
+
+
 def pdf_page_count(pdf_bytes: bytes) -> int:
     """Get number of pages in PDF bytes."""
     if not pdf_bytes:
         return 0
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        count = len(doc)
-        doc.close()
-        return count
+        with RasterSession(pdf_bytes) as session:
+            return session.page_count
     except Exception as e:
         logger.error(f"Failed to count PDF pages: {e}")
         return 0
@@ -37,28 +110,8 @@ def pdf_page_to_png_bytes(pdf_bytes: bytes, page_index: int, zoom: float = 2.0)
         return b""
     
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        if page_index < 0 or page_index >= len(doc):
-            doc.close()
-            return b""
-        
-        # High quality rendering matrix
-        matrix = fitz.Matrix(zoom, zoom)
-        page = doc.load_page(page_index)
-        
-        # Render with high quality settings
-        pix = page.get_pixmap(
-            matrix=matrix, 
-            alpha=False,  # No transparency for better compression
-            colorspace=fitz.csRGB  # Ensure RGB colorspace
-        )
-        
-        png_bytes = pix.tobytes("png")
-        doc.close()
-        
-        logger.debug(f"✅ Rendered page {page_index} to PNG ({len(png_bytes):,} bytes)")
-        return png_bytes
-        
+        with RasterSession(pdf_bytes, zoom=zoom) as session:
+            return session.render_png(page_index)
     except Exception as e:
         logger.error(f"❌ Failed to render page {page_index} to PNG: {e}")
         return b""
@@ -70,26 +123,9 @@ def pdf_to_png_bytes_list(pdf_bytes: bytes, zoom: float = 2.0) -> List[bytes]:
         return []
     
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        matrix = fitz.Matrix(zoom, zoom)
-        out: List[bytes] = []
-        
-        for i in range(len(doc)):
-            try:
-                page = doc.load_page(i)
-                pix = page.get_pixmap(
-                    matrix=matrix, 
-                    alpha=False,
-                    colorspace=fitz.csRGB
-                )
-                png_bytes = pix.tobytes("png")
-                out.append(png_bytes)
-                logger.debug(f"✅ Page {i+1}/{len(doc)} rendered ({len(png_bytes):,} bytes)")
-            except Exception as e:
-                logger.error(f"❌ Failed to render page {i}: {e}")
-                out.append(b"")  # Add empty bytes to maintain index
-        
-        doc.close()
+        with RasterSession(pdf_bytes, zoom=zoom) as session:
+            # Empty bytes for pages that fail to render keep the index stable
+            out = [png for _, png in session.iter_png()]
         logger.info(f"🎯 Converted PDF to {len(out)} PNG pages")
         return out
         
@@ -112,41 +148,227 @@ def pdf_to_long_png_bytes(pdf_bytes: bytes, zoom: float = 2.0, page_spacing: int
     if not pdf_bytes:
         return b""
     
-    # Get all pages as PNG bytes
-    png_pages = pdf_to_png_bytes_list(pdf_bytes, zoom)
-    if not png_pages:
+    try:
+        with StackedImageBuilder(pdf_bytes, zoom=zoom, page_spacing=page_spacing) as builder:
+            return builder.to_bytes('png')
+    except Exception as e:
+        logger.error(f"❌ Failed to build long PNG: {e}")
         return b""
-    
-    # If only one page, return it directly
-    if len(png_pages) == 1:
-        return png_pages[0]
-    
-    # Open all PNG images
-    images = []
-    total_width = 0
-    total_height = 0
-    
-    for png_bytes in png_pages:
-        img = Image.open(io.BytesIO(png_bytes))
-        images.append(img)
-        total_width = max(total_width, img.width)
-        total_height += img.height
-    
-    # Add spacing between pages (except for the last page)
-    total_height += page_spacing * (len(images) - 1)
-    
-    # Create new image with white background
-    combined = Image.new('RGB', (total_width, total_height), 'white')
-    
-    # Paste each page
-    y_offset = 0
-    for img in images:
-        # Center the image horizontally if it's narrower than total_width
-        x_offset = (total_width - img.width) // 2
-        combined.paste(img, (x_offset, y_offset))
-        y_offset += img.height + page_spacing
-    
-    # Convert to bytes
-    output_buffer = io.BytesIO()
-    combined.save(output_buffer, format='PNG', optimize=True)
-    return output_buffer.getvalue()
+
+
+class StackedImageBuilder:
+    """Stack all PDF pages vertically into one image, rasterizing each page once.
+
+    Page pixmaps are copied straight from ``pix.samples`` into a preallocated
+    RGB buffer (NumPy when available, Pillow otherwise), so there is no
+    PNG encode/decode round trip per page. Output options:
+
+    * ``to_bytes('png' | 'jpeg' | 'webp')`` - one image for the whole document
+    * ``iter_png()`` - row-streaming PNG, holding only one page in memory
+    * ``tiles(max_height, fmt)`` - split into images no taller than max_height
+
+    Usage::
+
+        with StackedImageBuilder(pdf_bytes, zoom=2.0, page_spacing=30) as b:
+            png = b.to_bytes('png')
+    """
+
+    # Hard limits of the encoders (JPEG is 16-bit, libwebp is 14-bit).
+    MAX_DIMENSION = {'jpeg': 65535, 'webp': 16383}
+
+    def __init__(self, pdf_bytes: Optional[bytes] = None, zoom: float = 2.0, page_spacing: int = 20,
+                 background: int = 255, session: Optional[RasterSession] = None):
+        # Reuse a caller's session (and its zoom) when given; it stays open on close().
+        self._owns_session = session is None
+        self.session = session or RasterSession(pdf_bytes, zoom=zoom)
+        self.page_spacing = max(0, int(page_spacing))
+        self.background = background
+        self._last_page: Optional[Tuple[int, "fitz.Pixmap"]] = None
+
+        # Layout from page geometry only; nothing is rasterized yet.
+        self.page_sizes: List[Tuple[int, int]] = [
+            self.session.page_size(i) for i in range(self.session.page_count)
+        ]
+        self.width = max((w for w, _ in self.page_sizes), default=0)
+        self.page_offsets: List[int] = []
+        y = 0
+        for _, h in self.page_sizes:
+            self.page_offsets.append(y)
+            y += h + self.page_spacing
+        self.height = max(0, y - self.page_spacing) if self.page_sizes else 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._last_page = None
+        if self._owns_session:
+            self.session.close()
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_sizes)
+
+    # ------------------------------------------------------------------
+    # Rasterization
+    # ------------------------------------------------------------------
+    def _pixmap(self, index: int) -> "fitz.Pixmap":
+        """Render one page (kept until the next page is requested, for tiles that split a page)."""
+        if self._last_page is not None and self._last_page[0] == index:
+            return self._last_page[1]
+        pix = self.session.pixmap(index)
+        self._last_page = (index, pix)
+        logger.debug(f"✅ Page {index+1}/{self.page_count} rasterized ({pix.width}x{pix.height})")
+        return pix
+
+    def render_band(self, y0: int, y1: int):
+        """Return rows [y0, y1) of the stacked canvas as a contiguous RGB buffer.
+
+        Returns a ``(height, width, 3)`` uint8 array when NumPy is available,
+        otherwise raw RGB bytes.
+        """
+        y0, y1 = max(0, y0), min(self.height, y1)
+        band_h = max(0, y1 - y0)
+        width = self.width
+        if np is not None:
+            band = np.full((band_h, width, 3), self.background, dtype=np.uint8)
+        else:
+            band = Image.new('RGB', (width, band_h), (self.background,) * 3)
+
+        for index, top in enumerate(self.page_offsets):
+            page_w, page_h = self.page_sizes[index]
+            if top >= y1 or top + page_h <= y0:
+                continue
+            pix = self._pixmap(index)
+            # Actual pixmap size can differ by a pixel from the predicted layout.
+            pw, ph = min(pix.width, width), min(pix.height, page_h)
+            src0, src1 = max(0, y0 - top), min(ph, y1 - top)
+            if src1 <= src0:
+                continue
+            dst0 = top + src0 - y0
+            x = (width - pw) // 2
+            if np is not None:
+                samples = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)
+                rows = samples[src0:src1, :pw * 3].reshape(src1 - src0, pw, 3)
+                band[dst0:dst0 + (src1 - src0), x:x + pw] = rows
+            else:
+                page_img = Image.frombuffer('RGB', (pix.width, pix.height), pix.samples, 'raw', 'RGB', pix.stride, 1)
+                band.paste(page_img.crop((0, src0, pw, src1)), (x, dst0))
+        return band
+
+    def _band_to_image(self, band) -> Image.Image:
+        if np is not None:
+            return Image.fromarray(band, 'RGB')
+        return band
+
+    def _filtered_rows(self, band, prev_row):
+        """Encode scanlines for IDAT; returns (bytes, last_row).
+
+        With NumPy every row uses PNG filter 2 (Up), which turns the long
+        runs of identical rows in documents into zeros and compresses far
+        better. The Pillow fallback uses filter 0 (None).
+        """
+        row_bytes = self.width * 3
+        if np is not None:
+            rows = band.reshape(band.shape[0], row_bytes)
+            if prev_row is None:
+                prev_row = np.zeros(row_bytes, dtype=np.uint8)
+            out = np.empty((rows.shape[0], row_bytes + 1), dtype=np.uint8)
+            out[:, 0] = 2
+            out[0, 1:] = rows[0] - prev_row
+            out[1:, 1:] = rows[1:] - rows[:-1]
+            return out.tobytes(), rows[-1].copy()
+        raw = band.tobytes()
+        out = bytearray()
+        for start in range(0, len(raw), row_bytes):
+            out += b'\x00'
+            out += raw[start:start + row_bytes]
+        return bytes(out), None
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    def iter_png(self, compress_level: int = 6) -> Iterator[bytes]:
+        """Yield a PNG file in chunks, encoding one page-sized band at a time."""
+        width, height = self.width, self.height
+        yield b'\x89PNG\r\n\x1a\n'
+        yield _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        compressor = zlib.compressobj(compress_level)
+        prev_row = None
+        y = 0
+        while y < height:
+            # One band per page plus its trailing spacing.
+            band_end = height
+            for top in self.page_offsets:
+                if top > y:
+                    band_end = top
+                    break
+            scanlines, prev_row = self._filtered_rows(self.render_band(y, band_end), prev_row)
+            data = compressor.compress(scanlines)
+            if data:
+                yield _png_chunk(b'IDAT', data)
+            y = band_end
+        tail = compressor.flush()
+        if tail:
+            yield _png_chunk(b'IDAT', tail)
+        yield _png_chunk(b'IEND', b'')
+
+    def to_bytes(self, fmt: str = 'png', quality: int = 85) -> bytes:
+        """Encode the whole stacked document as a single image."""
+        fmt = fmt.lower()
+        if self.page_count == 0:
+            return b""
+        if fmt == 'png':
+            return b''.join(self.iter_png())
+        return self._encode(self.render_band(0, self.height), fmt, quality)
+
+    def tiles(self, max_height: int, fmt: str = 'png', quality: int = 85) -> List[bytes]:
+        """Encode the stacked document as several images no taller than max_height.
+
+        Tiles break at page boundaries when a page fits; pages taller than
+        max_height are sliced. Peak memory is one tile.
+        """
+        fmt = fmt.lower()
+        limit = self.MAX_DIMENSION.get(fmt)
+        max_height = max(1, min(max_height, limit) if limit else max_height)
+        out: List[bytes] = []
+        for y0, y1 in self._tile_ranges(max_height):
+            out.append(self._encode(self.render_band(y0, y1), fmt, quality))
+        return out
+
+    def _tile_ranges(self, max_height: int) -> List[Tuple[int, int]]:
+        ranges: List[Tuple[int, int]] = []
+        page_ends = [top + size[1] for top, size in zip(self.page_offsets, self.page_sizes)]
+        y0 = 0
+        while y0 < self.height:
+            y1 = min(self.height, y0 + max_height)
+            if y1 < self.height:
+                # Prefer ending the tile at the last page boundary inside it.
+                ends = [end for end in page_ends if y0 < end <= y1]
+                if ends:
+                    y1 = ends[-1]
+            ranges.append((y0, y1))
+            y0 = y1
+            # Do not start the next tile with the blank gap between pages.
+            next_tops = [top for top in self.page_offsets if top >= y0]
+            if next_tops and next_tops[0] - y0 <= self.page_spacing:
+                y0 = next_tops[0]
+        return ranges
+
+    def _encode(self, band, fmt: str, quality: int) -> bytes:
+        img = self._band_to_image(band)
+        buf = io.BytesIO()
+        if fmt in ('jpg', 'jpeg'):
+            img.save(buf, format='JPEG', quality=quality, optimize=True)
+        elif fmt == 'webp':
+            img.save(buf, format='WEBP', quality=quality, method=4)
+        else:
+            img.save(buf, format='PNG', optimize=True)
+        return buf.getvalue()
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
@@ -0,0 +1,351 @@
+"""
+Profiling Service
+Sampling profiler + flight recorder สำหรับ request ที่ช้า (เปิดใช้ด้วย PROFILING_ENABLED)
+
+- ``arm(seconds)`` samples every thread of this worker for N seconds.
+- The flight recorder samples each request's own thread while it runs; a
+  request slower than ``PROFILING_SLOW_REQUEST_MS`` is saved together with
+  its SQL trace (from ``metrics_service``), faster ones are discarded.
+
+Sampling runs in one background thread that reads ``sys._current_frames()``
+every ``PROFILING_SAMPLE_INTERVAL_MS`` and only while something is being
+recorded. A signal timer is not used because ``ITIMER_PROF`` only interrupts
+the main thread and requests run on gthread worker threads.
+
+Profiles are written to ``PROFILING_DIR`` (default ``instance/profiles``) as
+``<id>.collapsed.txt`` (flamegraph.pl / speedscope), ``<id>.speedscope.json``,
+``<id>.sql.json`` (flight recorder) and ``<id>.meta.json`` for the index page.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+MAX_STACK_DEPTH = 128
+SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+PROFILE_SUFFIXES = ('.collapsed.txt', '.speedscope.json', '.sql.json', '.meta.json')
+
+_config = {
+    'enabled': False,
+    'dir': None,
+    'interval': 0.01,
+    'slow_seconds': 2.0,
+    'max_profiles': 200,
+    'max_arm_seconds': 60,
+    'endpoints': None,
+}
+
+
+# ----------------------------------------------------------------------
+# Stack sampling
+# ----------------------------------------------------------------------
+_frame_labels = {}
+
+
+def _frame_label(code):
+    label = _frame_labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        for prefix in sys.path:
+            if prefix and filename.startswith(prefix):
+                filename = filename[len(prefix):].lstrip(os.sep)
+                break
+        label = _frame_labels[code] = f'{code.co_name} ({filename}:{code.co_firstlineno})'
+    return label
+
+
+def _collapse(frame):
+    """Root-first ``a;b;c`` stack for one frame"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ';'.join(labels)
+
+
+class StackSampler:
+    """Background sampler shared by the flight recorder and armed captures"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads = {}      # thread id -> Counter of collapsed stacks (flight recorder)
+        self._captures = []     # [deadline, Counter, on_done] for arm()
+        self._thread = None
+
+    def _ensure_running(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def watch(self, thread_id):
+        with self._lock:
+            stacks = self._threads[thread_id] = Counter()
+        self._ensure_running()
+        return stacks
+
+    def unwatch(self, thread_id):
+        with self._lock:
+            return self._threads.pop(thread_id, Counter())
+
+    def capture(self, seconds, on_done):
+        """Sample all threads for ``seconds``; ``on_done(stacks)`` runs on the sampler thread"""
+        with self._lock:
+            self._captures.append([time.monotonic() + seconds, Counter(), on_done])
+        self._ensure_running()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                idle = not self._threads and not self._captures
+            if idle:
+                self._wake.clear()
+                self._wake.wait(timeout=30)
+                continue
+
+            frames = sys._current_frames()
+            now = time.monotonic()
+            finished = []
+            with self._lock:
+                for thread_id, stacks in self._threads.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[_collapse(frame)] += 1
+                if self._captures:
+                    collapsed = [_collapse(frame) for thread_id, frame in frames.items() if thread_id != own_id]
+                    for capture in self._captures:
+                        capture[1].update(collapsed)
+                    finished = [c for c in self._captures if c[0] <= now]
+                    self._captures = [c for c in self._captures if c[0] > now]
+            del frames
+
+            for _, stacks, on_done in finished:
+                try:
+                    on_done(stacks)
+                except Exception as e:
+                    logger.error(f'❌ Error saving armed profile: {e}')
+            time.sleep(_config['interval'])
+
+
+sampler = StackSampler()
+
+
+# ----------------------------------------------------------------------
+# Output files
+# ----------------------------------------------------------------------
+def to_collapsed(stacks):
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+def to_speedscope(stacks, name, interval):
+    """Speedscope "sampled" profile; one sample per distinct stack weighted by its count"""
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, count in stacks.most_common():
+        sample = []
+        for label in stack.split(';'):
+            if label not in index:
+                index[label] = len(frames)
+                func, _, location = label.partition(' (')
+                file_name, _, line = location.rstrip(')').rpartition(':')
+                frames.append({'name': func, 'file': file_name, 'line': int(line) if line.isdigit() else None})
+            sample.append(index[label])
+        samples.append(sample)
+        weights.append(round(count * interval, 6))
+    total = round(sum(weights), 6)
+    return {
+        '$schema': SPEEDSCOPE_SCHEMA,
+        'name': name,
+        'exporter': 'voucher profiling_service',
+        'activeProfileIndex': 0,
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': total,
+            'samples': samples,
+            'weights': weights,
+        }],
+    }
+
+
+def _slug(value):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', value or 'unknown')[:60]
+
+
+def save_profile(kind, label, stacks, meta, sql_trace=None):
+    """Write the profile files; returns the profile id"""
+    directory = _config['dir']
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')[:-3]}-{kind}-{_slug(label)}-{os.getpid()}"
+    interval = _config['interval']
+    name = f'{kind}: {label}'
+
+    with open(os.path.join(directory, f'{profile_id}.collapsed.txt'), 'w') as f:
+        f.write(to_collapsed(stacks))
+    with open(os.path.join(directory, f'{profile_id}.speedscope.json'), 'w') as f:
+        json.dump(to_speedscope(stacks, name, interval), f)
+    if sql_trace is not None:
+        with open(os.path.join(directory, f'{profile_id}.sql.json'), 'w') as f:
+            json.dump(sql_trace, f, ensure_ascii=False, indent=1)
+
+    meta = dict(meta, id=profile_id, kind=kind, label=label, pid=os.getpid(),
+                samples=sum(stacks.values()), interval_ms=interval * 1000,
+                created_at=datetime.now().isoformat(timespec='seconds'))
+    with open(os.path.join(directory, f'{profile_id}.meta.json'), 'w') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    prune()
+    return profile_id
+
+
+def list_profiles():
+    """Metadata of saved profiles, newest first"""
+    directory = _config['dir']
+    if not directory or not os.path.isdir(directory):
+        return []
+    profiles = []
+    for filename in os.listdir(directory):
+        if not filename.endswith('.meta.json'):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        meta['files'] = [suffix for suffix in PROFILE_SUFFIXES
+                         if os.path.exists(os.path.join(directory, meta['id'] + suffix))]
+        profiles.append(meta)
+    profiles.sort(key=lambda m: m['id'], reverse=True)
+    return profiles
+
+
+def prune():
+    """Keep only the newest PROFILING_MAX_PROFILES profiles"""
+    for meta in list_profiles()[_config['max_profiles']:]:
+        for suffix in PROFILE_SUFFIXES:
+            try:
+                os.remove(os.path.join(_config['dir'], meta['id'] + suffix))
+            except OSError:
+                pass
+
+
+def profile_path(filename):
+    """Absolute path of a profile file, or None for names outside the profile directory"""
+    if not _config['dir'] or not filename.endswith(PROFILE_SUFFIXES) or os.path.basename(filename) != filename:
+        return None
+    path = os.path.join(_config['dir'], filename)
+    return path if os.path.isfile(path) else None
+
+
+# ----------------------------------------------------------------------
+# Armed capture
+# ----------------------------------------------------------------------
+def is_enabled():
+    return _config['enabled']
+
+
+def settings():
+    """Current profiler settings (for the index page)"""
+    return dict(_config, endpoints=sorted(_config['endpoints'] or []))
+
+
+def arm(seconds, requested_by=None):
+    """Sample every thread of this worker for ``seconds`` (clamped to PROFILING_MAX_ARM_SECONDS)"""
+    if not _config['enabled']:
+        raise RuntimeError('Profiling is disabled (PROFILING_ENABLED)')
+    seconds = max(1, min(int(seconds), _config['max_arm_seconds']))
+    started_at = datetime.now().isoformat(timespec='seconds')
+
+    def _done(stacks):
+        profile_id = save_profile('armed', f'{seconds}s', stacks, {
+            'duration_ms': seconds * 1000,
+            'started_at': started_at,
+            'requested_by': requested_by,
+        })
+        logger.info(f'🔬 Armed profile saved: {profile_id}')
+
+    sampler.capture(seconds, _done)
+    logger.info(f'🔬 Profiler armed for {seconds}s in worker {os.getpid()} by {requested_by}')
+    return seconds
+
+
+# ----------------------------------------------------------------------
+# Flight recorder
+# ----------------------------------------------------------------------
+def _recording():
+    endpoints = _config['endpoints']
+    return request.endpoint != 'static' and (not endpoints or request.endpoint in endpoints)
+
+
+def _before_request():
+    if not _recording():
+        return
+    from services.metrics_service import current_stats
+    stats = current_stats()
+    if stats is not None:
+        stats.trace = []
+    g._flight_recorder = (time.perf_counter(), sampler.watch(threading.get_ident()))
+
+
+def _teardown_request(exc):
+    recorder = g.pop('_flight_recorder', None)
+    if recorder is None:
+        return
+    started, _ = recorder
+    stacks = sampler.unwatch(threading.get_ident())
+    elapsed = time.perf_counter() - started
+    if elapsed < _config['slow_seconds']:
+        return
+
+    from services.metrics_service import current_stats
+    stats = current_stats()
+    endpoint = request.endpoint or 'unmatched'
+    try:
+        profile_id = save_profile('slow', endpoint, stacks, {
+            'endpoint': endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': (stats.status if stats else None) or (500 if exc else None),
+            'duration_ms': round(elapsed * 1000, 1),
+            'sql_count': stats.sql_count if stats else None,
+            'sql_ms': round(stats.sql_seconds * 1000, 1) if stats else None,
+            'error': repr(exc) if exc else None,
+        }, sql_trace=stats.trace if stats else None)
+        logger.warning(f'🐢 Slow request {request.method} {request.path} ({elapsed * 1000:.0f}ms) recorded as {profile_id}')
+    except Exception as e:
+        logger.error(f'❌ Error saving slow-request profile: {e}')
+
+
+def init_app(app):
+    """Enable the profiler and flight recorder when PROFILING_ENABLED is set"""
+    _config['dir'] = app.config.get('PROFILING_DIR') or os.path.join(app.instance_path, 'profiles')
+    _config['enabled'] = str(app.config.get('PROFILING_ENABLED', False)).lower() in ('1', 'true', 'yes')
+    if not _config['enabled']:
+        return
+
+    _config['interval'] = max(0.001, float(app.config.get('PROFILING_SAMPLE_INTERVAL_MS', 10)) / 1000)
+    _config['slow_seconds'] = float(app.config.get('PROFILING_SLOW_REQUEST_MS', 2000)) / 1000
+    _config['max_profiles'] = int(app.config.get('PROFILING_MAX_PROFILES', 200))
+    _config['max_arm_seconds'] = int(app.config.get('PROFILING_MAX_ARM_SECONDS', 60))
+    endpoints = app.config.get('PROFILING_ENDPOINTS')
+    _config['endpoints'] = {e.strip() for e in endpoints.split(',') if e.strip()} if endpoints else None
+
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
+    logger.info(f"🔬 Profiling enabled: slow requests > {_config['slow_seconds'] * 1000:.0f}ms saved to {_config['dir']}")
@@ -9,8 +9,11 @@ from datetime import datetime, timedelta
 from urllib.parse import urljoin
 from flask import url_for, current_app
 import qrcode
-from PIL import Image, ImageDraw, ImageFont
 import secrets
+from config import Config
+from services.social_card_renderer import SocialCardRenderer
+from services.storage_lifecycle_service import StorageLifecycleService
+from utils.datetime_utils import naive_utc_now
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +33,10 @@ class PublicShareService:
         os.makedirs(self.share_dir, exist_ok=True)
         os.makedirs(f"{self.share_dir}/qr", exist_ok=True)
         os.makedirs(f"{self.share_dir}/social", exist_ok=True)
+        self.social_renderer = SocialCardRenderer(f"{self.share_dir}/social")
+        self.asset_ttl = timedelta(days=Config.SHARE_ASSET_TTL_DAYS)
+        StorageLifecycleService.register_root('share_qr', f"{self.share_dir}/qr", self.asset_ttl)
+        StorageLifecycleService.register_root('share_social', f"{self.share_dir}/social", self.asset_ttl)
     
     def generate_share_token(self, document_type, document_id, expires_days=90):
         """
@@ -105,6 +112,7 @@ class PublicShareService:
             qr_filename = f"qr_{filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
             qr_path = f"{self.share_dir}/qr/{qr_filename}"
             qr_image.save(qr_path)
+            StorageLifecycleService.track(qr_path, 'share_qr', ttl=self.asset_ttl)
             
             logger.info(f"✅ QR code generated: {qr_path}")
             return qr_path
@@ -117,6 +125,9 @@ class PublicShareService:
         """
         Create optimized social media sharing image
         
+        Cards are content-addressed: re-sharing the same document returns the
+        existing file instead of rendering a new one.
+        
         Args:
             document_type: 'booking', 'quote', 'invoice'
             document_data: Document data dictionary
@@ -126,170 +137,14 @@ class PublicShareService:
             str: Path to social media image
         """
         try:
-            # Create social media image (1200x630 for Facebook/Twitter)
-            img_width, img_height = 1200, 630
-            
-            # Create image with gradient background
-            img = Image.new('RGB', (img_width, img_height), color='white')
-            draw = ImageDraw.Draw(img)
-            
-            # Create gradient background
-            self._create_gradient_background(draw, img_width, img_height, document_type)
-            
-            # Add company branding
-            self._add_company_branding(draw, img_width, img_height)
-            
-            # Add document information
-            self._add_document_info(draw, img_width, img_height, document_type, document_data, document_number)
-            
-            # Add social media elements
-            self._add_social_elements(draw, img_width, img_height, document_type)
-            
-            # Save social media image
-            social_filename = f"social_{document_type}_{document_number}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-            social_path = f"{self.share_dir}/social/{social_filename}"
-            img.save(social_path, quality=95)
-            
-            logger.info(f"✅ Social media image generated: {social_path}")
-            return social_path
-            
+            path = self.social_renderer.render(document_type, document_data, document_number)
+            # Re-sharing an existing card pushes its expiry forward
+            StorageLifecycleService.track(path, 'share_social', ttl=self.asset_ttl)
+            return path
         except Exception as e:
             logger.error(f"❌ Error generating social media image: {str(e)}")
             return None
     
-    def _create_gradient_background(self, draw, width, height, document_type):
-        """Create gradient background based on document type"""
-        # Color schemes for different document types
-        color_schemes = {
-            'booking': ((23, 162, 184), (13, 202, 240)),    # Blue gradient
-            'quote': ((46, 134, 171), (162, 59, 114)),      # Blue to purple
-            'invoice': ((220, 53, 69), (253, 126, 20))      # Red to orange
-        }
-        
-        start_color, end_color = color_schemes.get(document_type, ((108, 117, 125), (173, 181, 189)))
-        
-        # Create vertical gradient
-        for y in range(height):
-            ratio = y / height
-            r = int(start_color[0] * (1 - ratio) + end_color[0] * ratio)
-            g = int(start_color[1] * (1 - ratio) + end_color[1] * ratio)
-            b = int(start_color[2] * (1 - ratio) + end_color[2] * ratio)
-            draw.line([(0, y), (width, y)], fill=(r, g, b))
-    
-    def _add_company_branding(self, draw, width, height):
-        """Add company branding to social image"""
-        try:
-            # Company name
-            company_font = ImageFont.truetype("Arial", 48)
-            company_text = "Dhakul Chan Tours & Travel"
-            
-            # Get text size
-            bbox = draw.textbbox((0, 0), company_text, font=company_font)
-            text_width = bbox[2] - bbox[0]
-            text_x = (width - text_width) // 2
-            
-            # Add company name with shadow
-            draw.text((text_x + 2, 52), company_text, fill=(0, 0, 0, 128), font=company_font)  # Shadow
-            draw.text((text_x, 50), company_text, fill=(255, 255, 255), font=company_font)     # Main text
-            
-        except Exception:
-            # Fallback without custom font
-            company_text = "Dhakul Chan Tours & Travel"
-            bbox = draw.textbbox((0, 0), company_text)
-            text_width = bbox[2] - bbox[0]
-            text_x = (width - text_width) // 2
-            draw.text((text_x, 50), company_text, fill=(255, 255, 255))
-    
-    def _add_document_info(self, draw, width, height, document_type, document_data, document_number):
-        """Add document information to social image"""
-        try:
-            # Document title
-            title_font = ImageFont.truetype("Arial", 36)
-            title_map = {
-                'booking': 'BOOKING CONFIRMATION',
-                'quote': 'TRAVEL QUOTE',
-                'invoice': 'INVOICE'
-            }
-            title_text = title_map.get(document_type, 'DOCUMENT')
-            
-            bbox = draw.textbbox((0, 0), title_text, font=title_font)
-            text_width = bbox[2] - bbox[0]
-            text_x = (width - text_width) // 2
-            
-            draw.text((text_x + 2, 152), title_text, fill=(0, 0, 0, 128), font=title_font)  # Shadow
-            draw.text((text_x, 150), title_text, fill=(255, 255, 255), font=title_font)     # Main text
-            
-            # Document number
-            number_font = ImageFont.truetype("Arial", 32)
-            number_text = f"#{document_number}"
-            
-            bbox = draw.textbbox((0, 0), number_text, font=number_font)
-            text_width = bbox[2] - bbox[0]
-            text_x = (width - text_width) // 2
-            
-            draw.text((text_x + 2, 202), number_text, fill=(0, 0, 0, 128), font=number_font)  # Shadow
-            draw.text((text_x, 200), number_text, fill=(255, 255, 255), font=number_font)     # Main text
-            
-            # Additional info based on document type
-            info_font = ImageFont.truetype("Arial", 24)
-            
-            if document_type == 'booking' and 'customer_name' in document_data:
-                info_text = f"Customer: {document_data['customer_name']}"
-            elif document_type == 'quote' and 'total_amount' in document_data:
-                info_text = f"Total: ฿{document_data['total_amount']:,.2f}"
-            elif document_type == 'invoice' and 'total_amount' in document_data:
-                info_text = f"Amount: ฿{document_data['total_amount']:,.2f}"
-            else:
-                info_text = "View Details Online"
-            
-            bbox = draw.textbbox((0, 0), info_text, font=info_font)
-            text_width = bbox[2] - bbox[0]
-            text_x = (width - text_width) // 2
-            
-            draw.text((text_x + 1, 261), info_text, fill=(0, 0, 0, 128), font=info_font)  # Shadow
-            draw.text((text_x, 260), info_text, fill=(255, 255, 255), font=info_font)     # Main text
-            
-        except Exception:
-            # Fallback without custom fonts
-            title_text = f"{document_type.upper()} #{document_number}"
-            bbox = draw.textbbox((0, 0), title_text)
-            text_width = bbox[2] - bbox[0]
-            text_x = (width - text_width) // 2
-            draw.text((text_x, 200), title_text, fill=(255, 255, 255))
-    
-    def _add_social_elements(self, draw, width, height, document_type):
-        """Add social media elements"""
-        try:
-            # Call-to-action
-            cta_font = ImageFont.truetype("Arial", 28)
-            cta_text = "📱 Scan QR Code or Click Link to View"
-            
-            bbox = draw.textbbox((0, 0), cta_text, font=cta_font)
-            text_width = bbox[2] - bbox[0]
-            text_x = (width - text_width) // 2
-            
-            draw.text((text_x + 2, 402), cta_text, fill=(0, 0, 0, 128), font=cta_font)  # Shadow
-            draw.text((text_x, 400), cta_text, fill=(255, 255, 255), font=cta_font)     # Main text
-            
-            # Website
-            website_font = ImageFont.truetype("Arial", 20)
-            website_text = "www.dhakulchan.net"
-            
-            bbox = draw.textbbox((0, 0), website_text, font=website_font)
-            text_width = bbox[2] - bbox[0]
-            text_x = (width - text_width) // 2
-            
-            draw.text((text_x + 1, 451), website_text, fill=(0, 0, 0, 128), font=website_font)  # Shadow
-            draw.text((text_x, 450), website_text, fill=(255, 255, 255), font=website_font)     # Main text
-            
-        except Exception:
-            # Fallback without custom fonts
-            cta_text = "View Online - www.dhakulchan.net"
-            bbox = draw.textbbox((0, 0), cta_text)
-            text_width = bbox[2] - bbox[0]
-            text_x = (width - text_width) // 2
-            draw.text((text_x, 400), cta_text, fill=(255, 255, 255))
-    
     def create_shareable_content(self, document_type, document_instance, document_data):
         """
         Create complete shareable content package
@@ -403,35 +258,14 @@ class PublicShareService:
         })
     
     def cleanup_expired_shares(self, days_old=90):
-        """Clean up expired sharing files"""
+        """Clean up sharing files not generated / re-shared within days_old days"""
         try:
-            import os
-            import time
-            
-            current_time = time.time()
-            cutoff_time = current_time - (days_old * 24 * 60 * 60)
-            
-            # Clean up QR codes
-            qr_dir = f"{self.share_dir}/qr"
-            if os.path.exists(qr_dir):
-                for filename in os.listdir(qr_dir):
-                    file_path = os.path.join(qr_dir, filename)
-                    if os.path.isfile(file_path):
-                        if os.path.getmtime(file_path) < cutoff_time:
-                            os.remove(file_path)
-                            logger.info(f"🗑️ Cleaned up old QR code: {filename}")
-            
-            # Clean up social images
-            social_dir = f"{self.share_dir}/social"
-            if os.path.exists(social_dir):
-                for filename in os.listdir(social_dir):
-                    file_path = os.path.join(social_dir, filename)
-                    if os.path.isfile(file_path):
-                        if os.path.getmtime(file_path) < cutoff_time:
-                            os.remove(file_path)
-                            logger.info(f"🗑️ Cleaned up old social image: {filename}")
+            # expires_at = last share + asset_ttl, so "older than days_old" is an expiry cutoff
+            cutoff = naive_utc_now() + self.asset_ttl - timedelta(days=days_old)
+            result = StorageLifecycleService.sweep(now=cutoff, kinds=['share_qr', 'share_social'])
             
-            logger.info(f"✅ Cleanup completed for files older than {days_old} days")
+            logger.info(f"✅ Cleanup completed for files older than {days_old} days "
+                        f"({result['files']} removed, {result['bytes']} bytes)")
             
         except Exception as e:
             logger.error(f"❌ Error during cleanup: {str(e)}")
@@ -1,32 +1,240 @@
 import qrcode
 import qrcode.image.svg
 from io import BytesIO
+import base64
+import hashlib
 import os
+import threading
+from collections import OrderedDict
 from config import Config
-from functools import lru_cache
-from datetime import datetime, timezone
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
-class QRGenerator:
-    def __init__(self):
-        # Use adaptive path for development vs production
-        self.qr_dir = '/opt/bitnami/apache/htdocs/static/qr_codes' if os.path.exists('/opt/bitnami') else 'static/qr_codes'
+QR_BOX_SIZE = 10
+QR_BORDER = 4
+ERROR_CORRECTION = {
+    'L': qrcode.constants.ERROR_CORRECT_L,
+    'M': qrcode.constants.ERROR_CORRECT_M,
+    'Q': qrcode.constants.ERROR_CORRECT_Q,
+    'H': qrcode.constants.ERROR_CORRECT_H,
+}
+MIME_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# Disk files are pruned (oldest first) every PRUNE_EVERY writes once over the limit
+PRUNE_EVERY = 50
+
+
+def default_qr_dir():
+    """Directory for QR files handed to callers that need a path (ReportLab, send_file)"""
+    if getattr(Config, 'QR_CACHE_DIR', ''):
+        return Config.QR_CACHE_DIR
+    # Use adaptive path for development vs production
+    return '/opt/bitnami/apache/htdocs/static/qr_codes' if os.path.exists('/opt/bitnami') else 'static/qr_codes'
+
+
+def render_qr(data, fmt='png', error_correction='L'):
+    """Build the QR matrix for ``data`` and encode it as PNG or SVG bytes"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=ERROR_CORRECTION[error_correction],
+        box_size=QR_BOX_SIZE,
+        border=QR_BORDER,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    if fmt == 'svg':
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer)
+    return buffer.getvalue()
+
+
+class QRCodeCache:
+    """Content-addressed QR images keyed by a hash of the payload.
+
+    Entries live in a bounded in-process LRU. The disk tier (``QR_CACHE_DISK_ENABLED``)
+    also reads and writes ``<hash>.<fmt>`` files so other workers and restarts reuse
+    them; files requested through ``path()`` always go there. A payload change gives
+    a new hash, so entries never need a TTL.
+    """
+
+    def __init__(self, max_entries=512, disk_dir=None, disk_enabled=False, disk_max_files=2000):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir or default_qr_dir()
+        self.disk_enabled = disk_enabled
+        self.disk_max_files = disk_max_files
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dir_ready = False
+        self._writes = 0
+        self.hits = self.misses = self.disk_hits = 0
+
+    @staticmethod
+    def key(data, fmt='png', error_correction='L'):
+        material = f'{fmt}:{error_correction}:{QR_BOX_SIZE}:{QR_BORDER}\n{data}'
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, data, fmt='png', error_correction='L'):
+        """PNG / SVG bytes for ``data`` (memory -> disk -> render)"""
+        key = self.key(data, fmt, error_correction)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return body
+
+        body = self._read_file(key, fmt) if self.disk_enabled else None
+        if body is None:
+            body = render_qr(data, fmt, error_correction)
+            with self._lock:
+                self.misses += 1
+            if self.disk_enabled:
+                self._write_file(key, fmt, body)
+        else:
+            with self._lock:
+                self.disk_hits += 1
+        self._remember(key, body)
+        return body
+
+    def path(self, data, fmt='png', error_correction='L'):
+        """File path of the QR image for callers that need one"""
+        key = self.key(data, fmt, error_correction)
+        path = self._file_path(key, fmt)
+        if not os.path.exists(path):
+            self._write_file(key, fmt, self.get(data, fmt, error_correction))
+        return path
+
+    def data_uri(self, data, fmt='png', error_correction='L'):
+        """``data:`` URI for <img src> in WeasyPrint templates (no file round trip)"""
+        encoded = base64.b64encode(self.get(data, fmt, error_correction)).decode('ascii')
+        return f'data:{MIME_TYPES[fmt]};base64,{encoded}'
+
+    def svg_markup(self, data, error_correction='L'):
+        """Inline <svg> element (XML declaration stripped)"""
+        svg = self.get(data, 'svg', error_correction).decode('utf-8')
+        return svg[svg.index('?>') + 2:].lstrip() if svg.startswith('<?xml') else svg
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'disk_dir': self.disk_dir if self.disk_enabled else None,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _file_path(self, key, fmt):
+        return os.path.join(self.disk_dir, f'{key}.{fmt}')
+
+    def _ensure_dir(self):
+        if self._dir_ready:
+            return
         try:
-            os.makedirs(self.qr_dir, exist_ok=True)
+            os.makedirs(self.disk_dir, exist_ok=True)
             # Ensure proper permissions for Apache
-            os.chmod(self.qr_dir, 0o755)
-            logger.info(f"✅ QR directory ready: {self.qr_dir}")
+            os.chmod(self.disk_dir, 0o755)
+            logger.info(f"✅ QR directory ready: {self.disk_dir}")
         except Exception as e:
             logger.error(f"❌ Failed to create QR directory: {e}")
             # Fallback to relative path for development
-            self.qr_dir = 'static/qr_codes'
-            os.makedirs(self.qr_dir, exist_ok=True)
-    
-    def generate_voucher_qr(self, booking):
-        """Generate QR code for voucher"""
-        qr_text = (
+            self.disk_dir = 'static/qr_codes'
+            os.makedirs(self.disk_dir, exist_ok=True)
+        self._dir_ready = True
+
+    def _read_file(self, key, fmt):
+        try:
+            with open(self._file_path(key, fmt), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_file(self, key, fmt, body):
+        self._ensure_dir()
+        path = self._file_path(key, fmt)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("QR cache write failed %s: %s", path, e)
+            return
+        with self._lock:
+            self._writes += 1
+            due = self._writes % PRUNE_EVERY == 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Drop the oldest files beyond ``disk_max_files``; returns files removed"""
+        try:
+            files = [entry for entry in os.scandir(self.disk_dir)
+                     if entry.is_file() and entry.name.endswith(('.png', '.svg'))]
+        except OSError:
+            return 0
+        excess = len(files) - self.disk_max_files
+        if excess <= 0:
+            return 0
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        removed = 0
+        for entry in files[:excess]:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except OSError:
+                pass
+        logger.info("QR cache pruned %d files in %s", removed, self.disk_dir)
+        return removed
+
+
+_qr_cache = None
+_qr_cache_lock = threading.Lock()
+
+
+def get_qr_cache():
+    """Process-wide QRCodeCache configured from Config"""
+    global _qr_cache
+    if _qr_cache is None:
+        with _qr_cache_lock:
+            if _qr_cache is None:
+                _qr_cache = QRCodeCache(
+                    max_entries=int(getattr(Config, 'QR_CACHE_MAX_ENTRIES', 512)),
+                    disk_enabled=bool(getattr(Config, 'QR_CACHE_DISK_ENABLED', False)),
+                    disk_max_files=int(getattr(Config, 'QR_CACHE_DISK_MAX_FILES', 2000)),
+                )
+    return _qr_cache
+
+
+class QRGenerator:
+    """Booking QR payloads on top of the shared QRCodeCache (cheap to construct)"""
+
+    def __init__(self):
+        self.cache = get_qr_cache()
+
+    @property
+    def qr_dir(self):
+        self.cache._ensure_dir()
+        return self.cache.disk_dir
+
+    def voucher_qr_text(self, booking):
+        return (
             f"Tour Voucher\n"
             f"Reference: {booking.booking_reference}\n"
             f"Customer: {booking.customer.name}\n"
@@ -34,8 +242,23 @@ class QRGenerator:
             f"PAX: {booking.total_pax}\n"
             f"Verify: {Config.COMPANY_NAME}/verify/{booking.booking_reference}"
         )
-        return self._generate_qr_code(qr_text, f"voucher_{booking.booking_reference}")
-    
+
+    def generate_voucher_qr(self, booking):
+        """Generate QR code for voucher"""
+        return self._generate_qr_code(self.voucher_qr_text(booking), f"voucher_{booking.booking_reference}")
+
+    def png_bytes(self, data):
+        """PNG bytes of a QR code (cached)"""
+        return self.cache.get(data, 'png')
+
+    def data_uri(self, data, fmt='png'):
+        """Inline ``data:`` URI of a QR code for HTML/WeasyPrint templates (cached)"""
+        return self.cache.data_uri(data, fmt)
+
+    def svg_markup(self, data):
+        """Inline <svg> markup of a QR code for HTML/WeasyPrint templates (cached)"""
+        return self.cache.svg_markup(data)
+
     def generate_booking_qr(self, booking):
         """Generate QR code for booking confirmation"""
         qr_text = f"""Booking Confirmation
@@ -75,29 +298,10 @@ Customer: {booking.customer.name}"""
         return self._generate_qr_code(qr_text, f"mpv_{booking.booking_reference}")
     
     def _generate_qr_code(self, data, filename):
-        """Generate (and optionally cache) QR code image path.
-        If PDF_QR_CACHE_TTL > 0 and existing file newer than TTL, reuse it."""
+        """Path of the PNG QR code for ``data`` (content-addressed file, reused across renders)"""
         try:
-            ttl = getattr(Config, 'PDF_QR_CACHE_TTL', 0)
-            qr_path = os.path.join(self.qr_dir, f"{filename}.png")
-            if ttl > 0 and os.path.exists(qr_path):
-                mtime = os.path.getmtime(qr_path)
-                age = (datetime.now(timezone.utc) - datetime.fromtimestamp(mtime, timezone.utc)).total_seconds()
-                if age < ttl:
-                    logger.debug("QR cache hit %s age=%.1fs < ttl=%ss", filename, age, ttl)
-                    return qr_path
-            # Create QR code instance
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(data)
-            qr.make(fit=True)
-            img = qr.make_image(fill_color="black", back_color="white")
-            img.save(qr_path)
-            logger.debug("QR generated %s -> %s (cache ttl=%s)", filename, qr_path, ttl)
+            qr_path = self.cache.path(data, 'png')
+            logger.debug("QR %s -> %s", filename, qr_path)
             return qr_path
         except Exception as e:
             logger.error("QR generation error filename=%s err=%s", filename, e)
@@ -106,28 +310,7 @@ Customer: {booking.customer.name}"""
     def generate_svg_qr_code(self, data, filename):
         """Generate QR code as SVG"""
         try:
-            # Create QR code instance for SVG
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            
-            # Add data
-            qr.add_data(data)
-            qr.make(fit=True)
-            
-            # Create SVG image
-            factory = qrcode.image.svg.SvgPathImage
-            img = qr.make_image(image_factory=factory)
-            
-            # Save SVG
-            svg_path = os.path.join(self.qr_dir, f"{filename}.svg")
-            img.save(svg_path)
-            
-            return svg_path
-        
+            return self.cache.path(data, 'svg')
         except Exception as e:
             logger.error("QR SVG generation error filename=%s err=%s", filename, e)
             raise Exception(f"SVG QR code generation failed: {str(e)}")
@@ -3,8 +3,8 @@ Quote Service for enhanced booking workflow
 """
 from models.quote import Quote
 from models.booking import Booking
-from extensions import db
 from services.booking_invoice import BookingInvoiceService
+from services.sequence_service import SequenceService
 from decimal import Decimal
 import os
 import logging
@@ -29,67 +29,9 @@ class QuoteService:
             tax_amount = self._calculate_tax(subtotal)
             total_amount = subtotal + tax_amount
             
-            # Generate unique quote number using app_settings
-            try:
-                # Get next_quote_number from app_settings
-                result = db.session.execute(
-                    db.text("SELECT setting_value FROM app_settings WHERE setting_key = 'next_quote_number'")
-                ).fetchone()
-                
-                if result and result[0]:
-                    current_value = str(result[0]).strip()
-                    
-                    # Remove QT prefix if exists
-                    if current_value.startswith('QT'):
-                        current_value = current_value[2:]
-                    
-                    try:
-                        next_number = int(current_value)
-                        quote_number = f'QT{next_number}'
-                        
-                        # Verify uniqueness
-                        exists_check = db.session.execute(
-                            db.text("SELECT COUNT(*) as count FROM quotes WHERE quote_number = :quote_number"),
-                            {"quote_number": quote_number}
-                        ).fetchone()
-                        
-                        if exists_check.count > 0:
-                            # If exists, increment until we find unique
-                            max_attempts = 100
-                            for attempt in range(max_attempts):
-                                next_number += 1
-                                quote_number = f'QT{next_number}'
-                                exists_check = db.session.execute(
-                                    db.text("SELECT COUNT(*) as count FROM quotes WHERE quote_number = :quote_number"),
-                                    {"quote_number": quote_number}
-                                ).fetchone()
-                                if exists_check.count == 0:
-                                    break
-                        
-                        # Update app_settings with next number
-                        db.session.execute(
-                            db.text("UPDATE app_settings SET setting_value = :next_value, updated_at = NOW() WHERE setting_key = 'next_quote_number'"),
-                            {"next_value": str(next_number + 1)}
-                        )
-                    except ValueError:
-                        # Fallback to default
-                        quote_number = 'QT2601001'
-                        db.session.execute(
-                            db.text("UPDATE app_settings SET setting_value = '2601002', updated_at = NOW() WHERE setting_key = 'next_quote_number'")
-                        )
-                else:
-                    # Initialize if not exists
-                    quote_number = 'QT2601001'
-                    db.session.execute(
-                        db.text("INSERT INTO app_settings (setting_key, setting_value, updated_at) VALUES ('next_quote_number', '2601002', NOW()) ON DUPLICATE KEY UPDATE setting_value = '2601002', updated_at = NOW()")
-                    )
-                    
-            except Exception as e:
-                self.logger.error(f"Error generating quote number from app_settings: {e}")
-                # Fallback to timestamp
-                import time
-                timestamp = int(time.time()) % 10000000
-                quote_number = f"QT{timestamp}"
+            # Allocate quote number from the central sequence (one atomic round trip).
+            # No timestamp fallback: it could collide with numbers the sequence has issued.
+            quote_number = SequenceService.next_number('quote')
             
             self.logger.info(f"Generated unique quote number: {quote_number}")
             
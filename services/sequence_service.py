@@ -0,0 +1,274 @@
+"""
+Sequence Service - central allocation of document numbers.
+
+Quote, invoice and booking reference numbers come from one counter row per
+(sequence, period) in ``document_sequences``:
+
+    quote    QT + YYMM   + 3 digits   QT2601001
+    invoice  AR + YYMM   + 4 digits   AR26010001
+    booking       YYMMDD + 4 digits   2601150001
+
+Allocation is one atomic ``UPDATE`` that returns the new value
+(``LAST_INSERT_ID(expr)`` on MariaDB/MySQL, ``RETURNING`` elsewhere). By
+default the counter is updated inside the caller's transaction: the row lock
+serializes concurrent staff, and a rollback returns the number, so numbers
+stay gap-free. The first allocation of a new period seeds the counter from
+the highest number already stored, so it never collides with old data.
+
+Optional block pre-allocation (``SEQUENCE_BLOCK_SIZE`` > 1) reserves a range
+per worker process in a separate short transaction. That removes the row
+lock from hot paths but leaves gaps when a worker exits with unused numbers.
+
+Audit existing numbers from the command line:
+
+    python -m services.sequence_service audit quote
+    python -m services.sequence_service audit invoice --fix
+"""
+
+import logging
+import os
+import re
+import threading
+from collections import namedtuple, defaultdict
+from datetime import datetime
+
+from sqlalchemy import text
+
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+SequenceSpec = namedtuple('SequenceSpec', ['prefix', 'period_format', 'width', 'sources'])
+
+SEQUENCES = {
+    'quote': SequenceSpec('QT', '%y%m', 3, (('quotes', 'quote_number'), ('bookings', 'quote_number'))),
+    'invoice': SequenceSpec('AR', '%y%m', 4, (('bookings', 'invoice_number'),)),
+    'booking': SequenceSpec('', '%y%m%d', 4, (('bookings', 'booking_reference'),)),
+}
+
+
+class SequenceError(Exception):
+    """Raised when a number cannot be allocated"""
+    pass
+
+
+class SequenceService:
+    """Allocate and audit document numbers"""
+
+    _blocks = {}  # (name, period) -> [next_value, last_value] reserved by this process
+    _lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Formatting
+    # ------------------------------------------------------------------
+    @staticmethod
+    def spec(name):
+        try:
+            return SEQUENCES[name]
+        except KeyError:
+            raise SequenceError(f'Unknown sequence: {name}')
+
+    @classmethod
+    def period_for(cls, name, when=None):
+        return (when or datetime.now()).strftime(cls.spec(name).period_format)
+
+    @classmethod
+    def format_number(cls, name, period, value):
+        spec = cls.spec(name)
+        return f'{spec.prefix}{period}{value:0{spec.width}d}'
+
+    @classmethod
+    def parse_number(cls, name, number):
+        """Split a stored number into (period, value); None if it does not follow the scheme."""
+        spec = cls.spec(name)
+        period_len = len(datetime(2000, 1, 1).strftime(spec.period_format))
+        match = re.fullmatch(rf'{re.escape(spec.prefix)}(\d{{{period_len}}})(\d+)', (number or '').strip())
+        if not match:
+            return None
+        return match.group(1), int(match.group(2))
+
+    # ------------------------------------------------------------------
+    # Allocation
+    # ------------------------------------------------------------------
+    @classmethod
+    def next_number(cls, name, when=None, block_size=None):
+        """Allocate the next formatted number for a sequence.
+
+        Args:
+            name: 'quote', 'invoice' or 'booking'
+            when: datetime used for the period (default: now)
+            block_size: reserve this many numbers per process (default: SEQUENCE_BLOCK_SIZE or 1)
+        """
+        period = cls.period_for(name, when)
+        if block_size is None:
+            block_size = int(os.environ.get('SEQUENCE_BLOCK_SIZE', '1') or 1)
+        if block_size > 1:
+            value = cls._next_from_block(name, period, block_size)
+        else:
+            value = cls.allocate(name, period, db.session.connection())
+        return cls.format_number(name, period, value)
+
+    @classmethod
+    def allocate(cls, name, period, connection, count=1):
+        """Atomically reserve ``count`` values; returns the last one. One round trip when the row exists."""
+        value = cls._increment(connection, name, period, count)
+        if value is None:
+            cls._seed(connection, name, period)
+            value = cls._increment(connection, name, period, count)
+        if value is None:
+            raise SequenceError(f'Could not allocate {name} number for period {period}')
+        return value
+
+    @classmethod
+    def _next_from_block(cls, name, period, block_size):
+        key = (name, period)
+        with cls._lock:
+            block = cls._blocks.get(key)
+            if not block or block[0] > block[1]:
+                # Own short transaction: the block must survive a rollback of the caller.
+                with db.engine.begin() as connection:
+                    last = cls.allocate(name, period, connection, count=block_size)
+                block = [last - block_size + 1, last]
+                cls._blocks[key] = block
+                logger.info(f'Reserved {name} numbers {block[0]}-{block[1]} for period {period}')
+            value = block[0]
+            block[0] += 1
+            return value
+
+    @staticmethod
+    def _increment(connection, name, period, count):
+        params = {'name': name, 'period': period, 'count': count, 'now': datetime.utcnow()}
+        if connection.dialect.name in ('mysql', 'mariadb'):
+            result = connection.execute(text(
+                'UPDATE document_sequences '
+                'SET last_value = LAST_INSERT_ID(last_value + :count), updated_at = :now '
+                'WHERE name = :name AND period = :period'
+            ), params)
+            return result.lastrowid if result.rowcount else None
+        return connection.execute(text(
+            'UPDATE document_sequences '
+            'SET last_value = last_value + :count, updated_at = :now '
+            'WHERE name = :name AND period = :period '
+            'RETURNING last_value'
+        ), params).scalar()
+
+    @classmethod
+    def _seed(cls, connection, name, period):
+        """Create the counter row for a new period, starting after the highest stored number."""
+        start = cls._max_existing(connection, name, period)
+        insert = 'INSERT IGNORE INTO' if connection.dialect.name in ('mysql', 'mariadb') else 'INSERT INTO'
+        conflict = '' if connection.dialect.name in ('mysql', 'mariadb') else ' ON CONFLICT DO NOTHING'
+        connection.execute(text(
+            f'{insert} document_sequences (name, period, last_value, updated_at) '
+            f'VALUES (:name, :period, :start, :now){conflict}'
+        ), {'name': name, 'period': period, 'start': start, 'now': datetime.utcnow()})
+        logger.info(f'Seeded {name} sequence for period {period} at {start}')
+
+    @classmethod
+    def _max_existing(cls, connection, name, period):
+        spec = cls.spec(name)
+        highest = 0
+        for table, column in spec.sources:
+            try:
+                rows = connection.execute(
+                    text(f'SELECT {column} FROM {table} WHERE {column} LIKE :pattern'),
+                    {'pattern': f'{spec.prefix}{period}%'}
+                )
+            except Exception as e:
+                logger.warning(f'Could not scan {table}.{column} while seeding {name}: {e}')
+                continue
+            for (number,) in rows:
+                parsed = cls.parse_number(name, number)
+                if parsed and parsed[0] == period:
+                    highest = max(highest, parsed[1])
+        return highest
+
+    # ------------------------------------------------------------------
+    # Audit
+    # ------------------------------------------------------------------
+    @classmethod
+    def audit(cls, name, period=None, fix=False):
+        """Report duplicates, gaps and counters that lag behind stored numbers.
+
+        Returns a dict keyed by period. With ``fix=True`` lagging counters are
+        raised to the highest stored number (and missing counters created).
+        """
+        spec = cls.spec(name)
+        values = defaultdict(set)
+        duplicates = defaultdict(list)
+        unparsed = 0
+        for table, column in spec.sources:
+            seen = defaultdict(int)
+            pattern = f'{spec.prefix}{period or ""}%'
+            rows = db.session.execute(
+                text(f'SELECT {column} FROM {table} WHERE {column} LIKE :pattern'), {'pattern': pattern}
+            )
+            for (number,) in rows:
+                parsed = cls.parse_number(name, number)
+                if not parsed:
+                    unparsed += 1
+                    continue
+                seen[number] += 1
+                values[parsed[0]].add(parsed[1])
+            for number, count in seen.items():
+                if count > 1:
+                    duplicates[cls.parse_number(name, number)[0]].append(f'{table}.{column}={number} x{count}')
+
+        counters = {
+            row.period: row.last_value
+            for row in db.session.execute(
+                text('SELECT period, last_value FROM document_sequences WHERE name = :name'), {'name': name}
+            )
+        }
+
+        report = {}
+        for p in sorted(set(values) | ({period} if period else set(counters))):
+            used = values.get(p, set())
+            highest = max(used) if used else 0
+            counter = counters.get(p)
+            gaps = sorted(set(range(1, highest + 1)) - used)
+            report[p] = {
+                'count': len(used),
+                'max': highest,
+                'counter': counter,
+                'counter_behind': counter is not None and counter < highest,
+                'gaps': gaps[:50],
+                'gap_count': len(gaps),
+                'duplicates': duplicates.get(p, []),
+            }
+            if fix and (counter is None or counter < highest):
+                if counter is None:
+                    cls._seed(db.session.connection(), name, p)
+                else:
+                    db.session.execute(
+                        text('UPDATE document_sequences SET last_value = :v WHERE name = :name AND period = :period'),
+                        {'v': highest, 'name': name, 'period': p}
+                    )
+                report[p]['fixed'] = True
+        if fix:
+            db.session.commit()
+        if unparsed:
+            logger.info(f'{unparsed} {name} numbers do not follow the sequence format and were skipped')
+        return report
+
+
+def main(argv=None):
+    import argparse
+    import json
+    from app import app
+
+    parser = argparse.ArgumentParser(description='Audit document number sequences')
+    sub = parser.add_subparsers(dest='command', required=True)
+    audit_cmd = sub.add_parser('audit', help='Report duplicates, gaps and lagging counters')
+    audit_cmd.add_argument('name', choices=sorted(SEQUENCES))
+    audit_cmd.add_argument('--period', help='Only this period, e.g. 2601')
+    audit_cmd.add_argument('--fix', action='store_true', help='Raise lagging counters to the highest stored number')
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        report = SequenceService.audit(args.name, period=args.period, fix=args.fix)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""Social card renderer for public share links.
+
+Renders the 1200x630 Open Graph / Twitter card used by PublicShareService.
+The expensive parts of the card (vertical gradient + company branding) do not
+depend on the document, so they are rendered once per document type and kept
+in memory. Loaded fonts are cached as well. The final card is written to disk
+under a content-hash filename, so sharing the same document again reuses the
+existing file instead of writing a new timestamped PNG.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont, features
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CARD_WIDTH = 1200
+CARD_HEIGHT = 630
+
+# Bump when the layout changes so old cached cards are not reused.
+RENDERER_VERSION = 1
+
+COMPANY_TEXT = "Dhakul Chan Tours & Travel"
+WEBSITE_TEXT = "www.dhakulchan.net"
+CTA_TEXT = "📱 Scan QR Code or Click Link to View"
+CTA_FALLBACK_TEXT = "View Online - www.dhakulchan.net"
+
+COLOR_SCHEMES = {
+    'booking': ((23, 162, 184), (13, 202, 240)),    # Blue gradient
+    'quote': ((46, 134, 171), (162, 59, 114)),      # Blue to purple
+    'invoice': ((220, 53, 69), (253, 126, 20)),     # Red to orange
+}
+DEFAULT_SCHEME = ((108, 117, 125), (173, 181, 189))
+
+TITLE_MAP = {
+    'booking': 'BOOKING CONFIRMATION',
+    'quote': 'TRAVEL QUOTE',
+    'invoice': 'INVOICE',
+}
+
+WHITE = (255, 255, 255)
+SHADOW = (0, 0, 0)
+
+_SAFE_NAME_RE = re.compile(r'[^A-Za-z0-9_-]+')
+
+
+@lru_cache(maxsize=32)
+def load_font(name: str, size: int) -> Optional[ImageFont.FreeTypeFont]:
+    """Load a TrueType font once per (name, size). Returns None if unavailable."""
+    try:
+        return ImageFont.truetype(name, size)
+    except Exception:
+        return None
+
+
+def webp_supported() -> bool:
+    try:
+        return bool(features.check('webp'))
+    except Exception:
+        return False
+
+
+class SocialCardRenderer:
+    """Render and cache social share cards for bookings, quotes and invoices."""
+
+    _base_layers: Dict[Tuple[str, int, int], Image.Image] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, output_dir: str, image_format: Optional[str] = None):
+        self.output_dir = output_dir
+        fmt = (image_format or os.environ.get('SOCIAL_CARD_FORMAT', 'webp')).lower()
+        if fmt == 'webp' and not webp_supported():
+            fmt = 'png'
+        self.image_format = fmt if fmt in ('webp', 'png') else 'png'
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def render(self, document_type: str, document_data: dict, document_number) -> str:
+        """Return path to the card for this document, rendering it only if needed."""
+        info_text = self._info_text(document_type, document_data or {})
+        digest = self.content_hash(document_type, document_number, info_text)
+        path = os.path.join(self.output_dir, self._filename(document_type, document_number, digest))
+
+        if os.path.exists(path):
+            # Refresh mtime so the age-based cleanup treats a re-share as fresh.
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+            logger.debug("Social card cache hit %s", path)
+            return path
+
+        img = self._base_layer(document_type).copy()
+        draw = ImageDraw.Draw(img)
+        self._draw_document_info(draw, document_type, document_number, info_text)
+        self._draw_social_elements(draw)
+        self._save_atomic(img, path)
+        logger.info(f"✅ Social media image generated: {path}")
+        return path
+
+    def content_hash(self, document_type: str, document_number, info_text: str) -> str:
+        key = '\x1f'.join([
+            str(RENDERER_VERSION), self.image_format, document_type or '',
+            str(document_number), info_text,
+        ])
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        with cls._lock:
+            cls._base_layers.clear()
+        load_font.cache_clear()
+
+    # ------------------------------------------------------------------
+    # Base layer (gradient + branding), cached per document type
+    # ------------------------------------------------------------------
+    def _base_layer(self, document_type: str) -> Image.Image:
+        key = (document_type, CARD_WIDTH, CARD_HEIGHT)
+        base = self._base_layers.get(key)
+        if base is not None:
+            return base
+        with self._lock:
+            base = self._base_layers.get(key)
+            if base is None:
+                base = self._gradient(document_type, CARD_WIDTH, CARD_HEIGHT)
+                self._draw_company_branding(ImageDraw.Draw(base), CARD_WIDTH)
+                self._base_layers[key] = base
+        return base
+
+    @staticmethod
+    def _gradient(document_type: str, width: int, height: int) -> Image.Image:
+        """Build the vertical gradient as a 1px column and stretch it horizontally."""
+        start, end = COLOR_SCHEMES.get(document_type, DEFAULT_SCHEME)
+        column = Image.new('RGB', (1, height))
+        pixels = []
+        for y in range(height):
+            ratio = y / height
+            pixels.append(tuple(int(start[i] * (1 - ratio) + end[i] * ratio) for i in range(3)))
+        column.putdata(pixels)
+        return column.resize((width, height), Image.NEAREST)
+
+    def _draw_company_branding(self, draw: ImageDraw.ImageDraw, width: int) -> None:
+        font = load_font("Arial", 48)
+        if font is None:
+            self._centered(draw, width, 50, COMPANY_TEXT, None)
+            return
+        self._centered(draw, width, 50, COMPANY_TEXT, font, shadow=2)
+
+    # ------------------------------------------------------------------
+    # Per-document layers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _info_text(document_type: str, document_data: dict) -> str:
+        if document_type == 'booking' and 'customer_name' in document_data:
+            return f"Customer: {document_data['customer_name']}"
+        if document_type == 'quote' and 'total_amount' in document_data:
+            return f"Total: ฿{document_data['total_amount']:,.2f}"
+        if document_type == 'invoice' and 'total_amount' in document_data:
+            return f"Amount: ฿{document_data['total_amount']:,.2f}"
+        return "View Details Online"
+
+    def _draw_document_info(self, draw, document_type, document_number, info_text) -> None:
+        title_font = load_font("Arial", 36)
+        number_font = load_font("Arial", 32)
+        info_font = load_font("Arial", 24)
+        if not (title_font and number_font and info_font):
+            self._centered(draw, CARD_WIDTH, 200, f"{document_type.upper()} #{document_number}", None)
+            return
+        self._centered(draw, CARD_WIDTH, 150, TITLE_MAP.get(document_type, 'DOCUMENT'), title_font, shadow=2)
+        self._centered(draw, CARD_WIDTH, 200, f"#{document_number}", number_font, shadow=2)
+        self._centered(draw, CARD_WIDTH, 260, info_text, info_font, shadow=1)
+
+    def _draw_social_elements(self, draw) -> None:
+        cta_font = load_font("Arial", 28)
+        website_font = load_font("Arial", 20)
+        if not (cta_font and website_font):
+            self._centered(draw, CARD_WIDTH, 400, CTA_FALLBACK_TEXT, None)
+            return
+        self._centered(draw, CARD_WIDTH, 400, CTA_TEXT, cta_font, shadow=2)
+        self._centered(draw, CARD_WIDTH, 450, WEBSITE_TEXT, website_font, shadow=1)
+
+    @staticmethod
+    def _centered(draw, width, y, text, font, shadow: int = 0) -> None:
+        bbox = draw.textbbox((0, 0), text, font=font)
+        x = (width - (bbox[2] - bbox[0])) // 2
+        if shadow:
+            draw.text((x + shadow, y + shadow), text, fill=SHADOW, font=font)
+        draw.text((x, y), text, fill=WHITE, font=font)
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    def _filename(self, document_type, document_number, digest: str) -> str:
+        safe_number = _SAFE_NAME_RE.sub('_', str(document_number))[:40]
+        return f"social_{document_type}_{safe_number}_{digest[:16]}.{self.image_format}"
+
+    def _save_atomic(self, img: Image.Image, path: str) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        if self.image_format == 'webp':
+            img.save(tmp_path, format='WEBP', quality=85, method=4)
+        else:
+            img.save(tmp_path, format='PNG', optimize=True)
+        os.replace(tmp_path, path)
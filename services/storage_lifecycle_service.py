@@ -0,0 +1,471 @@
+"""
+Storage Lifecycle Service - expiry of generated and uploaded files.
+
+Every file the app writes and later has to delete is recorded in
+``stored_artifacts`` (path, kind, booking / owner, size, expires_at):
+
+    voucher_file  - shared voucher files (static/uploads/voucher_files)
+    png_cache     - voucher page PNGs (static/generated/png_cache)
+    share_qr      - public share QR codes
+    share_social  - public share social cards
+    document      - generated PDFs / PNGs registered with ArtifactIndex
+
+``sweep()`` reads expired rows through the ``expires_at`` index in chunks of
+STORAGE_SWEEP_CHUNK, removes the files, deletes the rows and writes one
+``artifact_deletions`` journal row per file, committing per chunk. The cost
+follows the number of expired files, not the number of files on disk.
+Directories are only listed by ``reconcile()``, which adds untracked files
+(with the expiry of their owning row when the root has a ``lookup``,
+otherwise ``ttl`` after their mtime) and drops rows whose file is gone:
+
+    python -m services.storage_lifecycle_service sweep
+    python -m services.storage_lifecycle_service reconcile
+    python -m services.storage_lifecycle_service report --days 30
+"""
+
+import logging
+import os
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, bindparam, case, delete, func, insert, or_, select, text, update
+
+from extensions import db
+from utils.datetime_utils import naive_utc_now
+
+logger = logging.getLogger(__name__)
+
+STORAGE_TABLE = 'stored_artifacts'
+JOURNAL_TABLE = 'artifact_deletions'
+
+SWEEP_CHUNK_SIZE = 500
+SWEEP_LOCK_NAME = 'storage_lifecycle_sweep'
+JOURNAL_RETENTION_DAYS = 180
+
+KINDS = ('voucher_file', 'png_cache', 'share_qr', 'share_social', 'document')
+
+
+def _config(name, default):
+    try:
+        from flask import current_app
+        return current_app.config.get(name, default)
+    except RuntimeError:
+        return default
+
+
+def _as_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def _as_timedelta(ttl):
+    if ttl is None or isinstance(ttl, timedelta):
+        return ttl
+    return timedelta(seconds=ttl)
+
+
+class StorageLifecycleService:
+    """Track, expire and reconcile files on disk"""
+
+    # kind -> (directory, ttl) scanned by reconcile(); registered by the modules that write there
+    _roots = {}
+    # kind -> lookup(filenames) -> {filename: {'expires_at', 'booking_id', 'owner_id'}}
+    _lookups = {}
+
+    @classmethod
+    def register_root(cls, kind, directory, ttl=None, lookup=None):
+        """Declare a directory whose files are of ``kind``; untracked files expire ``ttl`` after mtime.
+
+        ``lookup`` maps file names to the row that owns them; reconcile() uses
+        that row's expiry / booking / owner and falls back to ``ttl`` for the rest.
+        """
+        cls._roots[kind] = (os.path.abspath(directory), _as_timedelta(ttl))
+        if lookup is not None:
+            cls._lookups[kind] = lookup
+        else:
+            cls._lookups.pop(kind, None)
+
+    @classmethod
+    def roots(cls):
+        return dict(cls._roots)
+
+    @staticmethod
+    def _tables():
+        from models.stored_artifact import ArtifactDeletion, StoredArtifact
+        return StoredArtifact.__table__, ArtifactDeletion.__table__
+
+    # ------------------------------------------------------------------
+    # Tracking
+    # ------------------------------------------------------------------
+    @classmethod
+    def track(cls, path, kind, ttl=None, expires_at=None, booking_id=None, owner_id=None, size=None):
+        """Record (or refresh) a file. ``ttl`` (seconds / timedelta) or ``expires_at``; neither = no expiry.
+
+        Runs in its own short transaction and never raises: a file that is
+        not tracked is picked up by the next reconcile().
+        """
+        if not path:
+            return False
+        path = os.path.abspath(path)
+        try:
+            if size is None:
+                size = os.path.getsize(path)
+            now = naive_utc_now()
+            ttl = _as_timedelta(ttl)
+            row = {
+                'path': path, 'kind': kind, 'booking_id': booking_id, 'owner_id': owner_id,
+                'size_bytes': size, 'created_at': now,
+                'expires_at': _as_datetime(expires_at) or (now + ttl if ttl is not None else None),
+            }
+            with db.engine.begin() as connection:
+                cls._upsert(connection, [row])
+            return True
+        except Exception as e:
+            logger.warning(f'⚠️ Could not track {kind} artifact {path}: {e}')
+            return False
+
+    @staticmethod
+    def _upsert(connection, rows):
+        """Insert rows; an existing path keeps created_at and gets the new kind / owner / size / expiry."""
+        columns = '(path, kind, booking_id, owner_id, size_bytes, created_at, expires_at)'
+        values = '(:path, :kind, :booking_id, :owner_id, :size_bytes, :created_at, :expires_at)'
+        if connection.dialect.name in ('mysql', 'mariadb'):
+            sql = (
+                f'INSERT INTO {STORAGE_TABLE} {columns} VALUES {values} '
+                'ON DUPLICATE KEY UPDATE kind = VALUES(kind), '
+                'booking_id = COALESCE(VALUES(booking_id), booking_id), '
+                'owner_id = COALESCE(VALUES(owner_id), owner_id), '
+                'size_bytes = VALUES(size_bytes), expires_at = VALUES(expires_at)'
+            )
+        else:
+            sql = (
+                f'INSERT INTO {STORAGE_TABLE} {columns} VALUES {values} '
+                'ON CONFLICT (path) DO UPDATE SET kind = excluded.kind, '
+                f'booking_id = COALESCE(excluded.booking_id, {STORAGE_TABLE}.booking_id), '
+                f'owner_id = COALESCE(excluded.owner_id, {STORAGE_TABLE}.owner_id), '
+                'size_bytes = excluded.size_bytes, expires_at = excluded.expires_at'
+            )
+        connection.execute(text(sql), rows)
+
+    @classmethod
+    def forget(cls, paths, reason='purged'):
+        """Drop rows for files already removed by the caller (journaled with ``reason``)"""
+        paths = list(dict.fromkeys(os.path.abspath(p) for p in paths if p))
+        if not paths:
+            return 0
+        artifacts, _ = cls._tables()
+        forgotten = 0
+        try:
+            with db.engine.begin() as connection:
+                for start in range(0, len(paths), SWEEP_CHUNK_SIZE):
+                    rows = connection.execute(
+                        select(artifacts).where(artifacts.c.path.in_(paths[start:start + SWEEP_CHUNK_SIZE]))
+                    ).fetchall()
+                    cls._retire(connection, [(row, reason) for row in rows])
+                    forgotten += len(rows)
+        except Exception as e:
+            logger.warning(f'⚠️ Could not forget {len(paths)} artifacts: {e}')
+        return forgotten
+
+    @classmethod
+    def _retire(cls, connection, entries):
+        """Delete the rows of removed files, journal them and deactivate owning voucher_files rows"""
+        if not entries:
+            return
+        artifacts, journal = cls._tables()
+        now = naive_utc_now()
+        connection.execute(delete(artifacts).where(artifacts.c.id.in_([row.id for row, _ in entries])))
+        connection.execute(insert(journal), [{
+            'path': row.path, 'kind': row.kind, 'booking_id': row.booking_id, 'owner_id': row.owner_id,
+            'size_bytes': row.size_bytes or 0, 'reason': reason, 'deleted_at': now,
+        } for row, reason in entries])
+
+        voucher_file_ids = [row.owner_id for row, _ in entries if row.kind == 'voucher_file' and row.owner_id]
+        if voucher_file_ids:
+            from models.voucher_sharing import VoucherFile
+            files = VoucherFile.__table__
+            connection.execute(update(files).where(files.c.id.in_(voucher_file_ids)).values(is_active=False))
+
+    # ------------------------------------------------------------------
+    # Expiry
+    # ------------------------------------------------------------------
+    @staticmethod
+    @contextmanager
+    def _sweep_lock():
+        """One sweeper at a time across gunicorn workers (MariaDB named lock)"""
+        if db.engine.dialect.name not in ('mysql', 'mariadb'):
+            yield True
+            return
+        with db.engine.connect() as connection:
+            acquired = connection.execute(
+                text('SELECT GET_LOCK(:name, 0)'), {'name': SWEEP_LOCK_NAME}).scalar() == 1
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    connection.execute(text('SELECT RELEASE_LOCK(:name)'), {'name': SWEEP_LOCK_NAME})
+
+    @classmethod
+    def sweep(cls, now=None, kinds=None, created_before=None, chunk_size=None, max_chunks=None):
+        """Delete expired files in chunks.
+
+        With ``created_before`` the files of ``kinds`` created before that
+        time are removed regardless of expires_at (age-based cache cleanup).
+        Returns {'files', 'bytes', 'missing', 'errors', 'chunks', 'skipped'}.
+        """
+        artifacts, _ = cls._tables()
+        now = now or naive_utc_now()
+        chunk_size = chunk_size or _config('STORAGE_SWEEP_CHUNK', SWEEP_CHUNK_SIZE)
+        result = {'files': 0, 'bytes': 0, 'missing': 0, 'errors': 0, 'chunks': 0, 'skipped': False}
+
+        if created_before is not None:
+            sort_column = artifacts.c.created_at
+            condition = sort_column <= created_before
+        else:
+            sort_column = artifacts.c.expires_at
+            condition = sort_column <= now
+        if kinds:
+            condition = and_(condition, artifacts.c.kind.in_(list(kinds)))
+
+        with cls._sweep_lock() as acquired:
+            if not acquired:
+                logger.info('Storage sweep already running in another worker')
+                result['skipped'] = True
+                return result
+
+            # Keyset over (sort_column, id): files that could not be removed stay for the next sweep
+            last = None
+            while max_chunks is None or result['chunks'] < max_chunks:
+                query = select(artifacts).where(condition)
+                if last is not None:
+                    query = query.where(or_(sort_column > last[0], and_(sort_column == last[0], artifacts.c.id > last[1])))
+                with db.engine.begin() as connection:
+                    rows = connection.execute(
+                        query.order_by(sort_column, artifacts.c.id).limit(chunk_size)).fetchall()
+                    if not rows:
+                        break
+                    last = (rows[-1]._mapping[sort_column.name], rows[-1].id)
+                    cls._retire(connection, cls._remove_files(rows, result))
+                result['chunks'] += 1
+
+            if result['chunks']:
+                cls._prune_journal(now)
+
+        if result['files'] or result['missing'] or result['errors']:
+            logger.info(f"🗑️ Storage sweep: {result['files']} files removed "
+                        f"({result['bytes'] / (1024 * 1024):.1f} MB), {result['missing']} already gone, "
+                        f"{result['errors']} errors")
+        return result
+
+    @staticmethod
+    def _remove_files(rows, result):
+        """Remove the files of ``rows``; returns [(row, reason)] for the ones that are gone now"""
+        removed = []
+        for row in rows:
+            try:
+                os.remove(row.path)
+                result['files'] += 1
+                result['bytes'] += row.size_bytes or 0
+                removed.append((row, 'expired'))
+            except FileNotFoundError:
+                result['missing'] += 1
+                removed.append((row, 'missing'))
+            except OSError as e:
+                result['errors'] += 1
+                logger.warning(f'⚠️ Could not remove expired artifact {row.path}: {e}')
+        return removed
+
+    @classmethod
+    def _prune_journal(cls, now):
+        _, journal = cls._tables()
+        cutoff = now - timedelta(days=_config('STORAGE_JOURNAL_RETENTION_DAYS', JOURNAL_RETENTION_DAYS))
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(delete(journal).where(journal.c.deleted_at < cutoff))
+        except Exception as e:
+            logger.warning(f'⚠️ Could not prune {JOURNAL_TABLE}: {e}')
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+    @classmethod
+    def reconcile(cls, chunk_size=SWEEP_CHUNK_SIZE):
+        """Track untracked files in the registered roots and drop rows whose file is missing.
+
+        Returns {'scanned', 'added', 'missing'}.
+        """
+        artifacts, _ = cls._tables()
+        scanned = added = missing = 0
+
+        for kind, (directory, ttl) in cls.roots().items():
+            if not os.path.isdir(directory):
+                continue
+            batch = []
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.is_file() or entry.name.startswith('.'):
+                        continue
+                    stat = entry.stat()
+                    batch.append((os.path.abspath(entry.path), stat.st_size, stat.st_mtime))
+                    if len(batch) >= chunk_size:
+                        added += cls._add_untracked(kind, ttl, batch)
+                        scanned += len(batch)
+                        batch = []
+            if batch:
+                added += cls._add_untracked(kind, ttl, batch)
+                scanned += len(batch)
+
+        last_id = 0
+        while True:
+            with db.engine.begin() as connection:
+                rows = connection.execute(
+                    select(artifacts).where(artifacts.c.id > last_id).order_by(artifacts.c.id).limit(chunk_size)
+                ).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                gone = [(row, 'missing') for row in rows if not os.path.exists(row.path)]
+                cls._retire(connection, gone)
+                missing += len(gone)
+
+        if added or missing:
+            logger.warning(f'⚠️ Storage reconcile: {added} untracked files added, {missing} missing files dropped')
+        else:
+            logger.info(f'✅ Storage index consistent ({scanned} files scanned)')
+        return {'scanned': scanned, 'added': added, 'missing': missing}
+
+    @classmethod
+    def _add_untracked(cls, kind, ttl, batch):
+        artifacts, _ = cls._tables()
+        owners = {}
+        lookup = cls._lookups.get(kind)
+        if lookup is not None:
+            owners = lookup([os.path.basename(path) for path, _, _ in batch]) or {}
+        with db.engine.begin() as connection:
+            known = set(connection.execute(
+                select(artifacts.c.path).where(artifacts.c.path.in_(bindparam('paths', expanding=True))),
+                {'paths': [path for path, _, _ in batch]},
+            ).scalars())
+            rows = []
+            for path, size, mtime in batch:
+                if path in known:
+                    continue
+                created = datetime.utcfromtimestamp(mtime)
+                owner = owners.get(os.path.basename(path))
+                if owner is not None:
+                    expires_at = _as_datetime(owner.get('expires_at'))
+                else:
+                    expires_at = created + ttl if ttl is not None else None
+                rows.append({
+                    'path': path, 'kind': kind, 'size_bytes': size, 'created_at': created, 'expires_at': expires_at,
+                    'booking_id': owner.get('booking_id') if owner else None,
+                    'owner_id': owner.get('owner_id') if owner else None,
+                })
+            if rows:
+                cls._upsert(connection, rows)
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    @classmethod
+    def report(cls, days=30, now=None):
+        """Tracked files / bytes per kind, and files / bytes reclaimed in the last ``days`` per reason"""
+        artifacts, journal = cls._tables()
+        now = now or naive_utc_now()
+        with db.engine.connect() as connection:
+            tracked = connection.execute(
+                select(artifacts.c.kind, func.count(), func.coalesce(func.sum(artifacts.c.size_bytes), 0),
+                       func.sum(case((artifacts.c.expires_at <= now, 1), else_=0)))
+                .group_by(artifacts.c.kind)
+            ).fetchall()
+            reclaimed = connection.execute(
+                select(journal.c.reason, func.count(), func.coalesce(func.sum(journal.c.size_bytes), 0))
+                .where(journal.c.deleted_at >= now - timedelta(days=days))
+                .group_by(journal.c.reason)
+            ).fetchall()
+        return {
+            'tracked': {kind: {'files': int(count), 'bytes': int(size or 0), 'expired': int(expired or 0)}
+                        for kind, count, size, expired in tracked},
+            'reclaimed': {reason: {'files': int(count), 'bytes': int(size or 0)}
+                          for reason, count, size in reclaimed},
+            'days': days,
+        }
+
+
+def register_default_roots():
+    """Import the modules that register their roots (for CLI / cron runs outside requests)"""
+    try:
+        import routes.voucher  # noqa: F401  (png_cache, voucher_file)
+        from services.public_share_service import PublicShareService
+        PublicShareService()  # share_qr, share_social
+    except Exception as e:
+        logger.warning(f'⚠️ Not every storage root could be registered: {e}')
+
+
+_sweeper_pid = None
+
+
+def start_background_sweep(app, interval=None):
+    """Sweep every ``interval`` seconds (STORAGE_SWEEP_INTERVAL) on a daemon thread in this process.
+
+    Call it from the serving process, not from create_app(): under gunicorn
+    with preload_app the app is created in the master, which must not hold
+    DB connections or threads. deploy/gunicorn.conf.py starts it in post_fork
+    (workers are serialized by the sweep lock on MariaDB); the development
+    server starts it in app.py. Interval 0 disables it - run
+    cleanup_expired_files.py from cron instead. Returns the thread or None.
+    """
+    global _sweeper_pid
+    import threading
+    import time
+
+    if interval is None:
+        interval = int(app.config.get('STORAGE_SWEEP_INTERVAL', 3600) or 0)
+    if interval <= 0 or _sweeper_pid == os.getpid():
+        return None
+    _sweeper_pid = os.getpid()
+
+    def _loop():
+        while True:
+            try:
+                with app.app_context():
+                    StorageLifecycleService.sweep()
+            except Exception as e:
+                logger.warning(f'Storage sweep failed: {e}')
+            time.sleep(interval)
+
+    thread = threading.Thread(target=_loop, name='storage-sweep', daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    import argparse
+    import json
+    from app import app
+
+    parser = argparse.ArgumentParser(description='Generated / uploaded file lifecycle')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('sweep', help='Delete expired files')
+    sub.add_parser('reconcile', help='Track untracked files and drop rows of missing files')
+    report = sub.add_parser('report', help='Tracked and reclaimed bytes')
+    report.add_argument('--days', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        if args.command == 'sweep':
+            result = StorageLifecycleService.sweep()
+        elif args.command == 'reconcile':
+            register_default_roots()
+            result = StorageLifecycleService.reconcile()
+        else:
+            result = StorageLifecycleService.report(days=args.days)
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""
+Task Query Service
+รายการ BookingTask แบบ eager-load + keyset pagination และตัวนับแจ้งเตือนต่อผู้ใช้ (cache)
+
+List pages load assignee, creator, booking and customer in the same query
+(``list_options()``), so serialising a page costs one query instead of up to
+four per task. Pages are ordered by (completed, no-deadline last, deadline,
+newest id) and continued with a ``completed|deadline|id`` cursor.
+
+The navbar badge polls ``alert_counts(user_id)``; the overdue / due-today
+counts are cached per user and day in the ``task_alerts`` namespace. Task
+writes record the affected assignees on the invalidation bus and their
+entries are dropped after commit. The TTL bounds staleness for writes that
+bypass the ORM.
+"""
+
+import logging
+from datetime import date, timedelta
+
+from sqlalchemy import and_, case, event, func, inspect, or_
+from sqlalchemy.orm import joinedload
+
+from extensions import db
+from models.booking_task import BookingTask
+
+logger = logging.getLogger(__name__)
+
+TASK_PAGE_SIZE = 100
+TASK_PAGE_MAX = 500
+ALERT_CACHE_NAMESPACE = 'task_alerts'
+ALERT_CACHE_TTL = 300
+
+# BookingTask attributes that change somebody's overdue / due-today count
+ALERT_FIELDS = ('assigned_to', 'deadline', 'is_completed', 'parent_task_id')
+
+DEADLINE_WINDOWS = ('overdue', 'today', 'this_week', 'upcoming')
+
+
+class TaskQueryService:
+    """Task list queries and cached per-user alert counters"""
+
+    _listeners_installed = False
+
+    # ------------------------------------------------------------------
+    # Loading plans
+    # ------------------------------------------------------------------
+    @staticmethod
+    def list_options():
+        """Eager loads for list rows: to_dict() users + booking reference / customer name"""
+        from models.booking import Booking
+        return (
+            joinedload(BookingTask.assignee),
+            joinedload(BookingTask.creator),
+            joinedload(BookingTask.booking).joinedload(Booking.customer),
+        )
+
+    # ------------------------------------------------------------------
+    # Listing
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _completed():
+        return func.coalesce(BookingTask.is_completed, False)
+
+    @staticmethod
+    def _no_deadline():
+        return case((BookingTask.deadline.is_(None), 1), else_=0)
+
+    @classmethod
+    def filtered_query(cls, assigned_to=None, status=None, priority=None, deadline=None,
+                       deadline_from=None, deadline_to=None, booking_id=None, today=None):
+        """Top-level tasks matching the filters.
+
+        ``assigned_to`` is a user id or 'unassigned'; ``deadline`` is one of
+        DEADLINE_WINDOWS (same rules as the task list page), or use an explicit
+        ``deadline_from`` / ``deadline_to`` range.
+        """
+        today = today or date.today()
+        query = BookingTask.query.filter(BookingTask.parent_task_id.is_(None))
+
+        if assigned_to == 'unassigned':
+            query = query.filter(BookingTask.assigned_to.is_(None))
+        elif assigned_to is not None:
+            query = query.filter(BookingTask.assigned_to == int(assigned_to))
+        if status:
+            query = query.filter(BookingTask.status == status)
+        if priority:
+            query = query.filter(BookingTask.priority == priority)
+        if booking_id:
+            query = query.filter(BookingTask.booking_id == int(booking_id))
+
+        if deadline == 'overdue':
+            query = query.filter(BookingTask.deadline < today)
+        elif deadline == 'today':
+            query = query.filter(BookingTask.deadline == today)
+        elif deadline == 'this_week':
+            query = query.filter(BookingTask.deadline.between(today, today + timedelta(days=7)))
+        elif deadline == 'upcoming':
+            query = query.filter(BookingTask.deadline > today)
+        if deadline_from:
+            query = query.filter(BookingTask.deadline >= deadline_from)
+        if deadline_to:
+            query = query.filter(BookingTask.deadline <= deadline_to)
+        return query
+
+    @staticmethod
+    def encode_cursor(task):
+        deadline = task.deadline.isoformat() if task.deadline else ''
+        return f'{1 if task.is_completed else 0}|{deadline}|{task.id}'
+
+    @classmethod
+    def _after_cursor(cls, query, cursor):
+        completed, deadline, last_id = cursor.split('|')
+        completed, last_id = bool(int(completed)), int(last_id)
+        if deadline:
+            deadline = date.fromisoformat(deadline)
+            same_group = or_(
+                BookingTask.deadline.is_(None),
+                BookingTask.deadline > deadline,
+                and_(BookingTask.deadline == deadline, BookingTask.id < last_id),
+            )
+        else:
+            same_group = and_(BookingTask.deadline.is_(None), BookingTask.id < last_id)
+        condition = and_(cls._completed() == completed, same_group)
+        if not completed:
+            condition = or_(cls._completed() == True, condition)  # noqa: E712
+        return query.filter(condition)
+
+    @classmethod
+    def page(cls, query, cursor=None, limit=TASK_PAGE_SIZE):
+        """Keyset page of ``query``; returns (tasks, next_cursor)"""
+        if cursor:
+            try:
+                query = cls._after_cursor(query, cursor)
+            except ValueError:
+                logger.warning(f'Ignoring invalid task list cursor: {cursor!r}')
+
+        tasks = query.options(*cls.list_options()).order_by(
+            cls._completed().asc(),
+            cls._no_deadline().asc(),
+            BookingTask.deadline.asc(),
+            BookingTask.id.desc(),
+        ).limit(limit + 1).all()
+        next_cursor = cls.encode_cursor(tasks[limit - 1]) if len(tasks) > limit else None
+        return tasks[:limit], next_cursor
+
+    @staticmethod
+    def serialize(task):
+        """to_dict() plus booking reference and customer name (already eager-loaded)"""
+        task_dict = task.to_dict(include_subtasks=False)
+        booking = task.booking
+        if booking:
+            task_dict['booking_reference'] = booking.booking_reference
+            task_dict['customer_name'] = booking.customer.name if booking.customer else None
+        return task_dict
+
+    @classmethod
+    def summary(cls, user_id, today=None):
+        """Counts for the task list cards (open top-level tasks) in one query"""
+        today = today or date.today()
+        week_end = today + timedelta(days=7)
+        open_tasks = and_(BookingTask.parent_task_id.is_(None), cls._completed() == False)  # noqa: E712
+
+        def count_if(condition):
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+        row = db.session.query(
+            count_if(BookingTask.deadline < today),
+            count_if(BookingTask.deadline == today),
+            count_if(BookingTask.deadline.between(today, week_end)),
+            count_if(BookingTask.assigned_to == user_id),
+        ).filter(open_tasks).one()
+        return {
+            'overdue': int(row[0] or 0),
+            'due_today': int(row[1] or 0),
+            'this_week': int(row[2] or 0),
+            'my_tasks': int(row[3] or 0),
+        }
+
+    # ------------------------------------------------------------------
+    # Per-user alert counters
+    # ------------------------------------------------------------------
+    @staticmethod
+    def count_alerts(user_id, today=None):
+        """Overdue and due-today open top-level tasks assigned to the user (DB)"""
+        today = today or date.today()
+        overdue, due_today = db.session.query(
+            func.coalesce(func.sum(case((BookingTask.deadline < today, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((BookingTask.deadline == today, 1), else_=0)), 0),
+        ).filter(
+            BookingTask.deadline <= today,
+            BookingTask.is_completed == False,  # noqa: E712
+            BookingTask.assigned_to == user_id,
+            BookingTask.parent_task_id.is_(None),
+        ).one()
+        return {'overdue': int(overdue or 0), 'due_today': int(due_today or 0)}
+
+    @classmethod
+    def alert_counts(cls, user_id, today=None):
+        """Cached ``{'overdue', 'due_today', 'total'}`` for the navbar badge"""
+        from services.cache_service import get_cache
+
+        today = today or date.today()
+        cache = get_cache()
+        cached = cache.get(ALERT_CACHE_NAMESPACE, str(user_id))
+        if cached and cached.get('date') == today.isoformat():
+            return cached
+
+        counts = cls.count_alerts(user_id, today)
+        counts['total'] = counts['overdue'] + counts['due_today']
+        counts['date'] = today.isoformat()
+        cache.set(ALERT_CACHE_NAMESPACE, str(user_id), counts, ttl=ALERT_CACHE_TTL)
+        return counts
+
+    @staticmethod
+    def invalidate_alerts(*user_ids):
+        from services.cache_service import get_cache
+        keys = [str(user_id) for user_id in user_ids if user_id is not None]
+        if keys:
+            get_cache().delete(ALERT_CACHE_NAMESPACE, *keys)
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+    @classmethod
+    def setup_listeners(cls):
+        """Drop cached alert counts of affected assignees after task writes commit (idempotent)"""
+        if cls._listeners_installed:
+            return
+        from services.invalidation_bus import invalidation_bus
+
+        # active_history keeps the previous assignee when it is changed after a commit
+        event.listen(BookingTask.assigned_to, 'set', cls._track_set, active_history=True)
+        event.listen(BookingTask, 'after_insert', cls.after_task_insert)
+        event.listen(BookingTask, 'after_update', cls.after_task_update)
+        event.listen(BookingTask, 'after_delete', cls.after_task_delete)
+        invalidation_bus.install()
+        invalidation_bus.subscribe('task_alerts', cls._on_alerts_committed)
+        cls._listeners_installed = True
+        logger.info('✅ Task alert counter listeners installed')
+
+    @staticmethod
+    def _track_set(target, value, oldvalue, initiator):
+        """No-op; registered only for ``active_history``."""
+
+    @staticmethod
+    def _record_affected_users(target, previous=()):
+        from services.invalidation_bus import invalidation_bus
+        session = inspect(target).session
+        for user_id in {target.assigned_to, *previous} - {None}:
+            invalidation_bus.record(session, 'task_alerts', user_id, 'update')
+
+    @classmethod
+    def after_task_insert(cls, mapper, connection, target):
+        cls._record_affected_users(target)
+
+    @classmethod
+    def after_task_update(cls, mapper, connection, target):
+        state = inspect(target)
+        if any(state.attrs[name].history.has_changes() for name in ALERT_FIELDS):
+            cls._record_affected_users(target, state.attrs.assigned_to.history.deleted)
+
+    @classmethod
+    def after_task_delete(cls, mapper, connection, target):
+        cls._record_affected_users(target)
+
+    @classmethod
+    def _on_alerts_committed(cls, evt):
+        cls.invalidate_alerts(evt.entity_id)
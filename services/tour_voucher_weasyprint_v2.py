@@ -78,11 +78,8 @@ class TourVoucherWeasyPrintV2:
             try:
                 booking_ref = getattr(booking, 'booking_reference', '')
                 if booking_ref:
-                    qr_url = f"https://dhakulchan.com/booking/{booking_ref}"
-                    qr_code_path = self.qr_generator.generate_voucher_qr(booking)
-                    if qr_code_path:
-                        # Convert to relative path for template
-                        qr_code_path = f"file://{os.path.abspath(qr_code_path)}"
+                    # Inline data URI from the shared QR cache (no file round trip)
+                    qr_code_path = self.qr_generator.data_uri(self.qr_generator.voucher_qr_text(booking))
             except Exception as e:
                 self.logger.warning(f"Failed to generate QR code: {e}")
                 
@@ -484,11 +481,8 @@ class TourVoucherWeasyPrintV2:
             try:
                 booking_ref = getattr(booking, 'booking_reference', '')
                 if booking_ref:
-                    qr_url = f"https://dhakulchan.com/booking/{booking_ref}"
-                    qr_code_path = self.qr_generator.generate_voucher_qr(booking)
-                    if qr_code_path:
-                        # Convert to relative path for template
-                        qr_code_path = f"file://{os.path.abspath(qr_code_path)}"
+                    # Inline data URI from the shared QR cache (no file round trip)
+                    qr_code_path = self.qr_generator.data_uri(self.qr_generator.voucher_qr_text(booking))
             except Exception as e:
                 self.logger.warning(f"Failed to generate QR code: {e}")
                 
@@ -70,14 +70,18 @@ class UniversalBookingExtractor:
                 return None
     
     @staticmethod
-    def extract_all_booking_fields(booking):
-        """ดึงทุก fields จาก booking สำหรับ template แบบครบถ้วน Real-time"""
+    def extract_all_booking_fields(booking, refresh=True):
+        """ดึงทุก fields จาก booking สำหรับ template แบบครบถ้วน Real-time
+        
+        refresh=False เมื่อ booking เพิ่งโหลดสดมาแล้ว (เช่น WeasyPrintQuoteGenerator.load_booking)
+        """
         extracted_data = {}
         
         try:
             # Force refresh booking data
-            from extensions import db
-            db.session.refresh(booking)
+            if refresh:
+                from extensions import db
+                db.session.refresh(booking)
             
             # ดึงทุก attributes ของ booking
             booking_attrs = [attr for attr in dir(booking) if not attr.startswith('_') and not callable(getattr(booking, attr))]
@@ -4,28 +4,45 @@ Universal Sync Hooks - Real-time Booking to Quote Data Synchronization
 """
 
 import logging
-import os
-import shutil
 from datetime import datetime
-from sqlalchemy import event
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from services.invalidation_bus import invalidation_bus, artifact_index
+from services.sequence_service import SequenceService
+from services.cache_service import get_cache
 
 logger = logging.getLogger(__name__)
 
 class UniversalSyncHooks:
-    """ระบบ hooks สำหรับ auto-sync ข้อมูล booking และ quote แบบ real-time"""
+    """ระบบ hooks สำหรับ auto-sync ข้อมูล booking และ quote แบบ real-time
+
+    Flush listeners only record ``(entity, id, fields_changed)`` on the
+    invalidation bus; cache clearing, PDF invalidation and quote sync run
+    after the transaction commits (see services/invalidation_bus.py).
+    """
+    
+    # Fields written by the quote sync itself - changes limited to these
+    # do not need another sync round.
+    QUOTE_SYNC_FIELDS = frozenset({'quote_number', 'quote_id', 'quote_date', 'quote_valid_until', 'updated_at'})
+    
+    _listeners_installed = False
     
     @staticmethod
     def setup_booking_sync_listeners():
-        """ตั้งค่า SQLAlchemy event listeners สำหรับ auto-sync"""
+        """ตั้งค่า SQLAlchemy event listeners สำหรับ auto-sync (idempotent)"""
+        if UniversalSyncHooks._listeners_installed:
+            return
         try:
             from models.booking import Booking
             
             # ตั้งค่า listeners สำหรับ booking model
             event.listen(Booking, 'after_update', UniversalSyncHooks.after_booking_update)
             event.listen(Booking, 'after_insert', UniversalSyncHooks.after_booking_insert)
-            event.listen(Booking, 'before_update', UniversalSyncHooks.before_booking_update)
-            event.listen(Booking, 'before_delete', UniversalSyncHooks.before_booking_delete)
+            event.listen(Booking, 'after_delete', UniversalSyncHooks.after_booking_delete)
+            
+            # Work happens after commit
+            invalidation_bus.install()
+            invalidation_bus.subscribe('booking', UniversalSyncHooks.on_booking_committed)
+            UniversalSyncHooks._listeners_installed = True
             
             logger.info('Universal Sync Hooks: Booking sync listeners setup complete')
             
@@ -34,62 +51,70 @@ class UniversalSyncHooks:
         except Exception as e:
             logger.error(f'Error setting up sync listeners: {e}')
     
+    @staticmethod
+    def _record(target, action):
+        """บันทึก event ลง invalidation bus (ทำงานใน flush - ต้องเร็ว)"""
+        state = inspect(target)
+        fields = state.committed_state.keys() if action == 'update' else ()
+        invalidation_bus.record(state.session, 'booking', target.id, action, fields)
+    
     @staticmethod
     def after_booking_update(mapper, connection, target):
-        """หลังจากมีการ update booking - ทำ sync ทันที"""
+        """หลังจากมีการ update booking - บันทึก event ไว้ sync หลัง commit"""
         try:
-            booking_id = target.id
-            logger.info(f'Universal Sync: Booking {booking_id} updated - triggering sync')
-            
-            # ล้างแคช data เก่า
-            UniversalSyncHooks._clear_booking_cache(booking_id)
-            
-            # อัปเดต quote data ให้ตรงกับ booking
-            UniversalSyncHooks._sync_quote_data(target)
-            
-            # ลบ PDF เก่าที่ generate ไว้ (ให้ generate ใหม่)
-            UniversalSyncHooks._invalidate_generated_pdfs(booking_id)
-            
+            UniversalSyncHooks._record(target, 'update')
         except Exception as e:
             logger.error(f'Error in after_booking_update hook: {e}')
     
     @staticmethod
     def after_booking_insert(mapper, connection, target):
-        """หลังจากสร้าง booking ใหม่ - ตั้งค่าเริ่มต้น"""
+        """หลังจากสร้าง booking ใหม่ - บันทึก event ไว้ตั้งค่าเริ่มต้นหลัง commit"""
         try:
-            booking_id = target.id
-            logger.info(f'Universal Sync: New booking {booking_id} created - initializing sync')
-            
-            # ตั้งค่า quote data เริ่มต้น
-            UniversalSyncHooks._initialize_quote_data(target)
-            
+            UniversalSyncHooks._record(target, 'insert')
         except Exception as e:
             logger.error(f'Error in after_booking_insert hook: {e}')
     
     @staticmethod
-    def before_booking_update(mapper, connection, target):
-        """ก่อนการ update booking - เตรียมข้อมูล"""
+    def after_booking_delete(mapper, connection, target):
+        """หลังจากลบ booking - บันทึก event ไว้ทำความสะอาดหลัง commit"""
         try:
-            # บันทึกสถานะก่อนการอัปเดต
-            if hasattr(target, 'id') and target.id:
-                UniversalSyncHooks._backup_current_state(target)
-                
+            UniversalSyncHooks._record(target, 'delete')
         except Exception as e:
-            logger.error(f'Error in before_booking_update hook: {e}')
+            logger.error(f'Error in after_booking_delete hook: {e}')
     
     @staticmethod
-    def before_booking_delete(mapper, connection, target):
-        """ก่อนการลบ booking - ทำความสะอาด"""
-        try:
-            booking_id = target.id
-            logger.info(f'Universal Sync: Booking {booking_id} being deleted - cleaning up')
-            
-            # ลบ cache และ generated files
-            UniversalSyncHooks._clear_booking_cache(booking_id)
-            UniversalSyncHooks._invalidate_generated_pdfs(booking_id)
-            
-        except Exception as e:
-            logger.error(f'Error in before_booking_delete hook: {e}')
+    def on_booking_committed(evt):
+        """Invalidation bus subscriber - runs after commit in its own app context"""
+        booking_id = evt.entity_id
+        logger.info(f'Universal Sync: Booking {booking_id} {evt.action} committed - triggering sync')
+        
+        # ล้างแคช data เก่า
+        UniversalSyncHooks._clear_booking_cache(booking_id)
+
+        # commit ของ quote sync เอง (เช่น generator เขียน quote_number ระหว่าง render)
+        # ไม่เปลี่ยนเนื้อหาเอกสาร - ถ้าลบ PDF ตรงนี้จะลบไฟล์ที่ request เดียวกันเพิ่ง register
+        sync_only = evt.action == 'update' and evt.fields <= UniversalSyncHooks.QUOTE_SYNC_FIELDS
+        if sync_only:
+            return
+
+        # ลบ PDF เก่าที่ generate ไว้ (ให้ generate ใหม่)
+        UniversalSyncHooks._invalidate_generated_pdfs(booking_id)
+
+        if evt.action == 'delete':
+            return
+        
+        # อัปเดต quote data ให้ตรงกับ booking (transaction ของตัวเอง)
+        from extensions import db
+        from models.booking import Booking
+        booking = Booking.query.get(booking_id)
+        if not booking:
+            return
+        if evt.action == 'insert':
+            UniversalSyncHooks._initialize_quote_data(booking)
+        else:
+            UniversalSyncHooks._sync_quote_data(booking)
+        if db.session.dirty:
+            db.session.commit()
     
     @staticmethod
     def _sync_quote_data(booking):
@@ -151,41 +176,13 @@ class UniversalSyncHooks:
     
     @staticmethod
     def _generate_new_quote_number():
-        """Generate new quote number in format QT25110001"""
-        try:
-            from models.booking import Booking
-            
-            # Find the highest existing quote number with new format QT251100XX
-            booking_with_latest_quote = Booking.query.filter(
-                Booking.quote_number.like('QT2511%')
-            ).order_by(Booking.quote_number.desc()).first()
-            
-            if booking_with_latest_quote and booking_with_latest_quote.quote_number.startswith('QT2511'):
-                try:
-                    # Extract numeric part from quote number (last 4 digits)
-                    numeric_part = booking_with_latest_quote.quote_number[6:]  # Remove 'QT2511' prefix
-                    last_number = int(numeric_part)
-                    new_number = last_number + 1
-                except (ValueError, IndexError):
-                    # If parsing fails, start from 0001
-                    new_number = 1
-            else:
-                # No existing quote with new format, start from 0001
-                new_number = 1
-            
-            # Make sure the number is unique by checking if it already exists
-            while True:
-                candidate_number = f'QT2511{new_number:04d}'
-                existing = Booking.query.filter(Booking.quote_number == candidate_number).first()
-                if not existing:
-                    return candidate_number
-                new_number += 1
-                
-        except Exception as e:
-            logger.error(f'Error generating quote number: {e}')
-            # Fallback to a timestamp-based number
-            import time
-            return f'QT2511{int(time.time()) % 10000:04d}'
+        """Generate new quote number (QT + YYMM + running number) from the central sequence
+
+        No fallback: a made-up number can collide with one the sequence has
+        issued. Errors propagate; the booking keeps no quote number and the
+        next sync round tries again.
+        """
+        return SequenceService.next_number('quote')
     
     @staticmethod
     def sync_all_quote_numbers():
@@ -244,72 +241,22 @@ class UniversalSyncHooks:
     
     @staticmethod
     def _clear_booking_cache(booking_id):
-        """ล้างแคช data ของ booking"""
+        """ล้างแคช data ของ booking (ทุก entry ที่ tag ด้วย booking:<id> และ stats รวมของ bookings)"""
         try:
-            # ล้าง memory cache ถ้ามี
-            cache_key = f'booking_{booking_id}'
-            
-            # ลองล้าง Flask-Caching ถ้ามี
-            try:
-                from flask import current_app
-                if hasattr(current_app, 'cache'):
-                    current_app.cache.delete(cache_key)
-            except:
-                pass
-            
-            logger.debug(f'Cache cleared for booking {booking_id}')
+            removed = get_cache().invalidate_tags([f'booking:{booking_id}', 'bookings'])
+            logger.debug(f'Cache cleared for booking {booking_id} ({removed} entries)')
             
         except Exception as e:
             logger.warning(f'Error clearing cache for booking {booking_id}: {e}')
     
     @staticmethod
     def _invalidate_generated_pdfs(booking_id):
-        """ลบ PDF files ที่ generate ไว้แล้ว เพื่อให้ generate ใหม่"""
+        """ลบ PDF/PNG files ที่ generate ไว้แล้ว เพื่อให้ generate ใหม่"""
         try:
-            # ลบ PDF files ใน static/generated
-            generated_dir = os.path.join('static', 'generated')
-            if os.path.exists(generated_dir):
-                # หา files ที่มี booking_id หรือ booking_reference
-                for filename in os.listdir(generated_dir):
-                    if (filename.startswith(f'quote_') and 
-                        (f'_{booking_id}_' in filename or str(booking_id) in filename)):
-                        
-                        file_path = os.path.join(generated_dir, filename)
-                        try:
-                            os.remove(file_path)
-                            logger.info(f'Removed outdated PDF: {filename}')
-                        except OSError:
-                            pass
-            
+            # ใช้ artifact index ของ booking แทนการ scan static/generated ทั้ง directory
+            artifact_index.purge(booking_id)
         except Exception as e:
             logger.warning(f'Error invalidating PDFs for booking {booking_id}: {e}')
-    
-    @staticmethod
-    def _backup_current_state(booking):
-        """บันทึกสถานะปัจจุบันก่อนการอัปเดต"""
-        try:
-            # สำหรับการ audit หรือ rollback ถ้าจำเป็น
-            backup_data = {
-                'booking_id': booking.id,
-                'backup_time': datetime.now().isoformat(),
-                'previous_state': {}
-            }
-            
-            # เก็บ fields สำคัญ
-            important_fields = [
-                'total_amount', 'adults', 'children', 'infants',
-                'special_request', 'description', 'quote_number'
-            ]
-            
-            for field in important_fields:
-                if hasattr(booking, field):
-                    backup_data['previous_state'][field] = getattr(booking, field)
-            
-            # บันทึกไว้ใน log หรือ temporary storage
-            logger.debug(f'Backed up state for booking {booking.id}')
-            
-        except Exception as e:
-            logger.warning(f'Error backing up state for booking {booking.id}: {e}')
 
 class RealTimeSyncManager:
     """ตัวจัดการ Real-time sync ระหว่าง booking และ quote"""
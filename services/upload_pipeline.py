@@ -0,0 +1,149 @@
+"""
+Upload Pipeline
+รับไฟล์อัปโหลดแบบ stream ลงดิสก์ทีละ chunk พร้อม hash (กันไฟล์ซ้ำ) แล้วส่งงาน resize ไป background pool
+
+Request handlers only copy each upload into its final directory in
+``CHUNK_SIZE`` pieces while hashing it (SHA-256) and enforcing the size cap;
+nothing is decoded on the request thread. Image files are then downscaled /
+re-encoded by ``optimize_image`` on a small thread pool, written to a temp
+file and swapped in with ``os.replace`` so the URL returned to the browser
+is valid immediately (original first, optimised copy once the job finishes).
+
+Jobs live in the worker process: if it exits before a job runs the original
+upload simply stays in place.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+# Formats re-encoded after resizing (animated GIFs are left untouched)
+OPTIMIZE_FORMATS = {'JPEG', 'WEBP', 'PNG'}
+
+
+class UploadTooLarge(Exception):
+    """Upload exceeded the configured size limit"""
+
+
+def stream_to_disk(file_storage, directory, max_bytes=None, chunk_size=CHUNK_SIZE):
+    """Copy an uploaded file into ``directory`` in chunks while hashing it.
+
+    Returns ``(part_path, sha256_hex, size)``; the caller moves ``part_path``
+    into place with ``finalize()`` or removes it with ``discard()``.
+    Raises UploadTooLarge (and removes the partial file) past ``max_bytes``.
+    """
+    os.makedirs(directory, exist_ok=True)
+    part_path = os.path.join(directory, f'.upload-{uuid.uuid4().hex}.part')
+    digest = hashlib.sha256()
+    size = 0
+    stream = getattr(file_storage, 'stream', file_storage)
+    try:
+        with open(part_path, 'wb') as out:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise UploadTooLarge(f'{size} bytes > {max_bytes}')
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        discard(part_path)
+        raise
+    return part_path, digest.hexdigest(), size
+
+
+def finalize(part_path, final_path):
+    """Move a streamed upload into place; returns False when identical content already exists there"""
+    if os.path.exists(final_path):
+        discard(part_path)
+        return False
+    os.replace(part_path, final_path)
+    os.chmod(final_path, 0o644)
+    return True
+
+
+def discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def optimize_image(path, max_width=1600, quality=85):
+    """Downscale to ``max_width`` and re-encode in place (atomic swap); returns True if rewritten"""
+    from PIL import Image, ImageOps
+
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    try:
+        with Image.open(path) as im:
+            im_format = im.format
+            if im_format not in OPTIMIZE_FORMATS or getattr(im, 'is_animated', False):
+                return False
+            # Apply EXIF orientation before the metadata is dropped by re-encoding
+            im = ImageOps.exif_transpose(im)
+            resized = im.width > max_width
+            if resized:
+                im = im.resize((max_width, int(im.height * max_width / float(im.width))), Image.LANCZOS)
+            if im_format == 'JPEG' and im.mode not in ('RGB', 'L'):
+                im = im.convert('RGB')
+            save_kwargs = {'optimize': True}
+            if im_format in ('JPEG', 'WEBP'):
+                save_kwargs['quality'] = quality
+            im.save(tmp_path, format=im_format, **save_kwargs)
+
+        if not resized and os.path.getsize(tmp_path) >= os.path.getsize(path):
+            # Already small and well compressed - keep the original bytes
+            discard(tmp_path)
+            return False
+        os.replace(tmp_path, path)
+        os.chmod(path, 0o644)
+        return True
+    except Exception as e:
+        logger.warning(f'⚠️ Image optimise failed for {os.path.basename(path)}: {e}')
+        discard(tmp_path)
+        return False
+
+
+class UploadWorkerPool:
+    """Small background pool for post-upload image work"""
+
+    def __init__(self, max_workers=None):
+        self._max_workers = max_workers or int(os.environ.get('UPLOAD_WORKERS', '2'))
+        self._executor = None
+        self._lock = threading.Lock()
+        self.async_processing = os.environ.get('UPLOAD_ASYNC', 'true').lower() in {'1', 'true', 'yes'}
+
+    def submit(self, fn, *args, **kwargs):
+        """Run ``fn`` in the background (inline when UPLOAD_ASYNC=false)"""
+        if not self.async_processing:
+            return self._run(fn, *args, **kwargs)
+        return self._pool().submit(self._run, fn, *args, **kwargs)
+
+    @staticmethod
+    def _run(fn, *args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            logger.error(f'❌ Upload job {getattr(fn, "__name__", fn)} failed: {e}')
+            return None
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._max_workers, thread_name_prefix='upload'
+                    )
+        return self._executor
+
+
+upload_pool = UploadWorkerPool()
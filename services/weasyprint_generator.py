@@ -13,6 +13,7 @@ from weasyprint import HTML, CSS
 
 from config import Config
 from utils.logging_config import get_logger
+from utils.script_segments import contains_thai
 
 logger = get_logger(__name__)
 
@@ -515,7 +516,7 @@ class WeasyPrintGenerator:
     def _build_customer_section(self, name: str, email: str, phone: str) -> str:
         """Build customer information section with modern card design."""
         # Detect if name contains Thai characters
-        has_thai = any('\u0e00' <= c <= '\u0e7f' for c in name)
+        has_thai = contains_thai(name)
         name_class = "thai-text" if has_thai else "english-text"
         
         return f"""
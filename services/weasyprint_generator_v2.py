@@ -14,6 +14,7 @@ from weasyprint import HTML, CSS
 
 from config import Config
 from utils.logging_config import get_logger
+from utils.script_segments import contains_thai
 
 logger = get_logger(__name__)
 
@@ -796,7 +797,7 @@ class ModernWeasyPrintGenerator:
     def _build_modern_customer_section(self, name: str, email: str, phone: str, address: str = '', nationality: str = '') -> str:
         """Build customer information section matching D.C.T.S style."""
         # Detect if name contains Thai characters
-        has_thai = any('\u0e00' <= c <= '\u0e7f' for c in name)
+        has_thai = contains_thai(name)
         name_class = "thai-text" if has_thai else "english-text"
         
         return f"""
@@ -864,7 +865,7 @@ class ModernWeasyPrintGenerator:
         
         description_info = ""
         if description:
-            has_thai = any('\u0e00' <= c <= '\u0e7f' for c in description)
+            has_thai = contains_thai(description)
             desc_class = "thai-text" if has_thai else "english-text"
             description_info = f"""
                     <div class="info-item">
@@ -906,7 +907,7 @@ class ModernWeasyPrintGenerator:
         price = booking_data.get('price', 0)
         
         # Detect if tour name contains Thai characters
-        has_thai_tour = any('\u0e00' <= c <= '\u0e7f' for c in tour_name)
+        has_thai_tour = contains_thai(tour_name)
         tour_class = "thai-text" if has_thai_tour else "english-text"
         
         return f"""
@@ -960,7 +961,7 @@ class ModernWeasyPrintGenerator:
         
         items_html = ""
         for i, item in enumerate(itinerary_items, 1):
-            has_thai = any('\u0e00' <= c <= '\u0e7f' for c in item)
+            has_thai = contains_thai(item)
             item_class = "thai-text" if has_thai else "english-text"
             items_html += f"""
                 <div class="itinerary-item">
@@ -1031,7 +1032,7 @@ class ModernWeasyPrintGenerator:
         
         # Flight Info
         if flight_info:
-            has_thai = any('\u0e00' <= c <= '\u0e7f' for c in flight_info)
+            has_thai = contains_thai(flight_info)
             flight_class = "thai-text" if has_thai else "english-text"
             flight_section = f"""
             <div class="service-subsection">
@@ -1042,7 +1043,7 @@ class ModernWeasyPrintGenerator:
         
         # Daily Services
         if daily_services:
-            has_thai = any('\u0e00' <= c <= '\u0e7f' for c in daily_services)
+            has_thai = contains_thai(daily_services)
             services_class = "thai-text" if has_thai else "english-text"
             services_section = f"""
             <div class="service-subsection">
@@ -1137,7 +1138,7 @@ class ModernWeasyPrintGenerator:
             total_price = float(product.get('total_price', 0))
             
             # Detect Thai in description
-            has_thai = any('\u0e00' <= c <= '\u0e7f' for c in description)
+            has_thai = contains_thai(description)
             desc_class = "mixed-text" if has_thai else "english-text"
             
             products_html += f"""
@@ -5,13 +5,18 @@ Features: Thai fonts, responsive design, real-time data sync
 """
 
 import os
+import hashlib
 import logging
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from weasyprint import HTML, CSS
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from flask import current_app
 from dotenv import load_dotenv
 from services.smart_price_calculator import ProductDataExtractor
+from services.invalidation_bus import artifact_index
+from config import Config
 import tempfile
 import base64
 
@@ -24,37 +29,121 @@ class QuoteTemplateError(Exception):
     """Custom exception for quote template errors"""
     pass
 
+# Template hierarchies (first existing template wins)
+QUOTE_TEMPLATE_HIERARCHY = (
+    'quote_template_final_v2_production.html',
+    'quote_template_final_v2.html',
+    'quote_template_final_enhanced.html',
+    'quote_template_final_fixed.html',
+    'quote_template_final_qt.html',
+    'quote_template_modern.html',
+    'quote_template.html'
+)
+QUOTE_BYTES_TEMPLATE_HIERARCHY = (
+    'quote_template_final_v2_production.html',
+    'quote_template_final_v2.html',
+    'quote_test_simple.html'
+)
+
+# Rendered quotes are memoized by booking content hash (bump to invalidate all)
+QUOTE_RENDER_VERSION = 1
+QUOTE_RENDER_TTL = Config.QUOTE_RENDER_TTL
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THAI_FONTS_CSS = os.path.join(PROJECT_ROOT, 'static', 'css', 'thai-fonts.css')
+
+# Additional print optimizations
+PRINT_CSS = """
+    @page {
+        -webkit-print-color-adjust: exact;
+        color-adjust: exact;
+    }
+    body {
+        -webkit-font-smoothing: antialiased;
+        -moz-osx-font-smoothing: grayscale;
+    }
+    .page-break {
+        page-break-before: always;
+    }
+    .no-break {
+        page-break-inside: avoid;
+    }
+"""
+
+# ---------------------------------------------------------------------------
+# Per-process state: one Jinja environment (compiled templates are cached by
+# Jinja itself), resolved template names, parsed stylesheets and one render
+# lock per content hash so concurrent downloads of the same quote share one
+# render.
+# ---------------------------------------------------------------------------
+_jinja_env = None
+_jinja_env_lock = threading.Lock()
+_resolved_templates = {}
+_stylesheets = {}
+_render_locks = {}
+_render_locks_guard = threading.Lock()
+
+
+def _get_jinja_env(generator):
+    """Build the shared Jinja2 environment once per process"""
+    global _jinja_env
+    if _jinja_env is None:
+        with _jinja_env_lock:
+            if _jinja_env is None:
+                template_dir = os.path.join(PROJECT_ROOT, 'templates', 'pdf')
+                if not os.path.exists(template_dir):
+                    logger.warning(f'Template directory not found: {template_dir}')
+                logger.info(f'📁 WeasyPrint template directory: {template_dir}')
+
+                # Enhanced Jinja2 Environment with security features
+                env = Environment(
+                    loader=FileSystemLoader(template_dir),
+                    autoescape=select_autoescape(['html', 'xml']),
+                    trim_blocks=True,
+                    lstrip_blocks=True,
+                    optimized=True
+                )
+
+                # Add custom filters for Thai formatting
+                env.filters['thai_number'] = generator._format_thai_number
+                env.filters['thai_currency'] = generator._format_thai_currency
+                env.filters['thai_date'] = generator._format_thai_date
+                _jinja_env = env
+    return _jinja_env
+
+
+def _get_stylesheet(key, factory):
+    """Parse a WeasyPrint stylesheet once per process"""
+    sheet = _stylesheets.get(key)
+    if sheet is None:
+        sheet = _stylesheets[key] = factory()
+    return sheet
+
+
+@contextmanager
+def _single_flight(key):
+    """Serialize renders of the same content hash within this process"""
+    with _render_locks_guard:
+        entry = _render_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _render_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                _render_locks.pop(key, None)
+
 class WeasyPrintQuoteGenerator:
     """Enhanced WeasyPrint-based Quote PDF Generator with Jinja2(3.1.4) + WeasyPrint(62.3)"""
     
     def __init__(self):
-        # Setup enhanced Jinja2 environment for template rendering
-        # Get absolute path to ensure correct template directory
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(current_dir)
-        template_dir = os.path.join(project_root, 'templates', 'pdf')
-        
-        # Verify template directory exists
-        if not os.path.exists(template_dir):
-            logger.warning(f'Template directory not found: {template_dir}')
-            # Fallback to relative path
-            template_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates', 'pdf')
-        
-        logger.info(f'📁 WeasyPrint template directory: {template_dir}')
-        
-        # Enhanced Jinja2 Environment with security features
-        self.jinja_env = Environment(
-            loader=FileSystemLoader(template_dir),
-            autoescape=select_autoescape(['html', 'xml']),
-            trim_blocks=True,
-            lstrip_blocks=True,
-            optimized=True
-        )
+        # Shared Jinja2 environment - templates compile once per process
+        self.jinja_env = _get_jinja_env(self)
         
-        # Add custom filters for Thai formatting
-        self.jinja_env.filters['thai_number'] = self._format_thai_number
-        self.jinja_env.filters['thai_currency'] = self._format_thai_currency
-        self.jinja_env.filters['thai_date'] = self._format_thai_date
+        # quote_number ล่าสุดจากตาราง quotes ที่โหลดมาพร้อม booking (load_booking)
+        self._preloaded_quote_numbers = {}
         
         # WeasyPrint configuration
         self.weasyprint_config = {
@@ -62,7 +151,7 @@ class WeasyPrintQuoteGenerator:
             'optimize_size': ('fonts',)
         }
         
-        logger.info('🎨 Enhanced WeasyPrint Quote Generator initialized with Jinja2(3.1.4) + WeasyPrint(62.3)')
+        logger.debug('🎨 Enhanced WeasyPrint Quote Generator initialized with Jinja2(3.1.4) + WeasyPrint(62.3)')
     
     def _format_thai_number(self, value):
         """Format numbers in Thai style"""
@@ -93,112 +182,204 @@ class WeasyPrintQuoteGenerator:
         except:
             return str(value)
         
+    @staticmethod
+    def load_booking(booking_id):
+        """Load booking + customer + latest quote number in one query (Real-time Data Sync)
+        
+        populate_existing() overwrites any stale copy in the identity map, which
+        replaces the old expire_all() + refresh(booking) + refresh(customer) sequence.
+        Returns (booking, latest_quote_number) or (None, None).
+        """
+        from extensions import db
+        from models.booking import Booking
+        from models.quote import Quote
+        
+        latest_quote_number = db.session.query(Quote.quote_number).filter(
+            Quote.booking_id == Booking.id
+        ).order_by(Quote.created_at.desc()).limit(1).correlate(Booking).scalar_subquery()
+        
+        row = db.session.query(Booking, latest_quote_number.label('latest_quote_number')).options(
+            db.joinedload(Booking.customer)
+        ).populate_existing().filter(Booking.id == booking_id).first()
+        
+        if not row:
+            return None, None
+        return row[0], row[1]
+    
+    def fresh_booking(self, booking_id):
+        """Load a fresh booking for this generator (None if not found)
+        
+        Later calls on the same generator reuse it instead of querying again.
+        """
+        booking, quote_number = self.load_booking(booking_id)
+        if booking is not None:
+            self._preloaded_quote_numbers[booking.id] = quote_number
+        return booking
+    
+    def _load_fresh_booking(self, booking):
+        """Fresh copy of booking for rendering; falls back to the object passed in"""
+        if booking.id in self._preloaded_quote_numbers:
+            return booking
+        try:
+            fresh_booking = self.fresh_booking(booking.id)
+            if fresh_booking is not None:
+                return fresh_booking
+            logger.error(f'Could not fetch fresh booking data for {booking.id}')
+        except Exception as e:
+            logger.warning(f'Could not load fresh booking {booking.id}: {e}')
+            from extensions import db
+            db.session.rollback()
+        return booking
+    
+    def _content_hash(self, *objects, extra=()):
+        """Hash every mapped column of the given objects plus extra render inputs"""
+        from sqlalchemy import inspect as sa_inspect
+        
+        digest = hashlib.sha256(f'v{QUOTE_RENDER_VERSION}'.encode('utf-8'))
+        for obj in objects:
+            if obj is None:
+                digest.update(b'\x1eNone')
+                continue
+            mapper = sa_inspect(obj).mapper
+            digest.update(f'\x1e{mapper.class_.__name__}'.encode('utf-8'))
+            for attr in mapper.column_attrs:
+                digest.update(f'\x1f{attr.key}={getattr(obj, attr.key, None)!r}'.encode('utf-8'))
+        for value in extra:
+            digest.update(f'\x1f{value!r}'.encode('utf-8'))
+        # ข้อมูลบริษัทจาก .env อยู่ในเอกสารด้วย
+        for name in ('COMPANY_NAME_EN', 'COMPANY_ADDRESS_EN', 'COMPANY_PHONE', 'COMPANY_WEBSITE', 'COMPANY_EMAIL'):
+            digest.update(f'\x1f{os.getenv(name)!r}'.encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _template_fingerprint(self, template):
+        """Template name + mtime so edited templates invalidate memoized renders"""
+        try:
+            return template.name, os.path.getmtime(template.filename)
+        except (OSError, TypeError):
+            return template.name, None
+    
+    def _memo_get(self, namespace, key):
+        """Memoized render for this content hash (path must still exist)"""
+        from services.cache_service import get_cache
+        entry = get_cache().get(namespace, key)
+        if entry and entry.get('path') and os.path.exists(entry['path']):
+            return entry
+        return None
+    
+    def _memo_set(self, namespace, key, booking_id, **entry):
+        from services.cache_service import get_cache
+        tags = [f'booking:{booking_id}'] if booking_id else []
+        get_cache().set(namespace, key, entry, ttl=QUOTE_RENDER_TTL, tags=tags)
+    
+    def render_quote_html(self, booking, product_data=None):
+        """Render quote HTML for a (fresh) booking; memoized by booking content hash
+        
+        Returns (html_content, content_hash).
+        """
+        from services.cache_service import get_cache
+        
+        template = self._load_template_with_fallback()
+        key = self._content_hash(
+            booking, booking.customer,
+            extra=(self._preloaded_quote_numbers.get(booking.id), self._template_fingerprint(template))
+        )
+        
+        html_content = get_cache().get('quote_html', key)
+        if html_content is not None:
+            return html_content, key
+        
+        # ดึงข้อมูล Product แบบ Smart Price Calculation (Real-time)
+        if product_data is None:
+            product_data = ProductDataExtractor.extract_complete_product_data(booking)
+        logger.info(f'Smart Price Calculation Status: {product_data["calculation_status"]}')
+        logger.info(f'Data Quality: {product_data["data_quality"]["grade"]} ({product_data["data_quality"]["score"]}%)')
+        
+        # Prepare template data using Real-time Fresh Data
+        template_data = self._prepare_template_data(booking, product_data)
+        
+        # 🔥 FORCE: Override template_data with direct booking data
+        template_data.update({
+            'service_detail': booking.description or 'No service detail',
+            'name_list': booking.guest_list or 'No guest list', 
+            'flight_info': booking.flight_info or 'No flight info'
+        })
+        
+        # Render HTML template with enhanced data
+        html_content = template.render(**template_data)
+        get_cache().set('quote_html', key, html_content, ttl=QUOTE_RENDER_TTL, tags=[f'booking:{booking.id}'])
+        return html_content, key
+    
     def generate_quote_pdf(self, booking):
-        """Generate Quote PDF using WeasyPrint and HTML template - using Real-time Data Sync"""
+        """Generate Quote PDF using WeasyPrint and HTML template - using Real-time Data Sync
+        
+        Same booking content -> same PDF: renders are memoized by content hash and
+        concurrent requests for the same quote wait for one render.
+        """
         try:
             logger.info(f'Generating Quote PDF for booking {booking.booking_reference if hasattr(booking, "booking_reference") else booking.id}')
             
-            # ⭐ REAL-TIME DATA SYNC: ดึงข้อมูล booking ใหม่จาก database เสมอ
-            from services.universal_booking_extractor import UniversalBookingExtractor
-            from services.smart_price_calculator import ProductDataExtractor
-            from extensions import db
-            
-            # Force expire current session to get fresh data
-            db.session.expire_all()
+            # ⭐ REAL-TIME DATA SYNC: booking + customer + quote number ใน query เดียว
+            fresh_booking = self._load_fresh_booking(booking)
             
-            # ดึงข้อมูล booking ใหม่จาก database (Real-time sync)
-            fresh_booking = UniversalBookingExtractor.get_fresh_booking_data(booking.id)
-            if not fresh_booking:
-                logger.error(f'Could not fetch fresh booking data for {booking.id}')
-                # Fallback: Try to refresh original booking
-                try:
-                    db.session.refresh(booking)
-                    fresh_booking = booking
-                except:
-                    fresh_booking = booking  # final fallback
-                    
             logger.info(f'Using fresh booking data: {fresh_booking.booking_reference} (updated: {fresh_booking.updated_at if hasattr(fresh_booking, "updated_at") else "N/A"})')
             
-            # ดึงข้อมูล Product แบบ Smart Price Calculation (Real-time)
-            product_data = ProductDataExtractor.extract_complete_product_data(fresh_booking)
-            
-            logger.info(f'Smart Price Calculation Status: {product_data["calculation_status"]}')
-            logger.info(f'Data Quality: {product_data["data_quality"]["grade"]} ({product_data["data_quality"]["score"]}%)')
-            
-            # Prepare template data using Real-time Fresh Data
-            template_data = self._prepare_template_data(fresh_booking, product_data)
-            
-            # Generate timestamp for filename with version tracking (Real-time updated file)
-            current_time = datetime.now()
-            date_stamp = current_time.strftime('%Y%m%d')
-            time_stamp = current_time.strftime('%H%M%S')
-            
-            # New filename format: Quote_BK20250922O8NP_20250922_151030.pdf
-            filename = f'Quote_{fresh_booking.booking_reference}_{date_stamp}_{time_stamp}.pdf'
-            
-            logger.info(f'Generating Quote PDF with real-time data: {filename}')
-            
-            # Ensure output directory exists
-            output_dir = os.path.join('static', 'generated')
-            os.makedirs(output_dir, exist_ok=True)
-            output_path = os.path.join(output_dir, filename)
-            
-            # Enhanced template rendering with error handling
             template = self._load_template_with_fallback()
-            
-            # 🔥 FORCE: Override template_data with direct booking data
-            template_data.update({
-                'service_detail': fresh_booking.description or 'No service detail',
-                'name_list': fresh_booking.guest_list or 'No guest list', 
-                'flight_info': fresh_booking.flight_info or 'No flight info'
-            })
-            
-            # 🔥 DEBUG: Log all booking data before template rendering
-            logger.info(f"=== BOOKING DATA DEBUG ===")
-            logger.info(f"Booking ID: {fresh_booking.id}")
-            logger.info(f"Booking Reference: {fresh_booking.booking_reference}")
-            logger.info(f"Description: {repr(fresh_booking.description)}")
-            logger.info(f"Guest List: {repr(fresh_booking.guest_list)}")
-            logger.info(f"Flight Info: {repr(fresh_booking.flight_info)}")
-            logger.info(f"Template data service_detail: {template_data.get('service_detail', 'N/A')}")
-            logger.info(f"Template data name_list: {template_data.get('name_list', 'N/A')}")
-            logger.info(f"Template data flight_info: {template_data.get('flight_info', 'N/A')}")
-            logger.info(f"=== END DEBUG ===")
-            
-            # Render HTML template with enhanced data
-            html_content = template.render(**template_data)
-            
-            # Generate PDF using enhanced WeasyPrint configuration
-            pdf_bytes = self._generate_pdf_with_enhanced_styling(html_content)
-            
-            # Save PDF to file
-            with open(output_path, 'wb') as f:
-                f.write(pdf_bytes)
-            
-            file_size = os.path.getsize(output_path)
-            logger.info(f'✅ Generated Enhanced WeasyPrint Quote PDF: {filename} ({file_size:,} bytes)')
-            return filename
+            render_key = self._content_hash(
+                fresh_booking, fresh_booking.customer,
+                extra=('pdf', self._preloaded_quote_numbers.get(fresh_booking.id), self._template_fingerprint(template))
+            )
+            
+            with _single_flight(render_key):
+                memo = self._memo_get('quote_pdf', render_key)
+                if memo:
+                    logger.info(f'♻️ Reusing Quote PDF {memo["filename"]} (content unchanged)')
+                    return memo['filename']
+                
+                html_content, _ = self.render_quote_html(fresh_booking)
+                
+                # Generate timestamp for filename with version tracking (Real-time updated file)
+                current_time = datetime.now()
+                date_stamp = current_time.strftime('%Y%m%d')
+                time_stamp = current_time.strftime('%H%M%S')
+                
+                # New filename format: Quote_BK20250922O8NP_20250922_151030.pdf
+                filename = f'Quote_{fresh_booking.booking_reference}_{date_stamp}_{time_stamp}.pdf'
+                
+                logger.info(f'Generating Quote PDF with real-time data: {filename}')
+                
+                # Ensure output directory exists
+                output_dir = os.path.join('static', 'generated')
+                os.makedirs(output_dir, exist_ok=True)
+                output_path = os.path.join(output_dir, filename)
+                
+                # Generate PDF using enhanced WeasyPrint configuration
+                pdf_bytes = self._generate_pdf_with_enhanced_styling(html_content)
+                
+                # Save PDF to file
+                with open(output_path, 'wb') as f:
+                    f.write(pdf_bytes)
+                
+                artifact_index.register(fresh_booking.id, output_path)
+                self._memo_set('quote_pdf', render_key, fresh_booking.id, filename=filename, path=output_path)
+                
+                logger.info(f'✅ Generated Enhanced WeasyPrint Quote PDF: {filename} ({len(pdf_bytes):,} bytes)')
+                return filename
             
         except Exception as e:
             logger.error(f'❌ Error generating Enhanced WeasyPrint Quote PDF: {str(e)}')
             raise QuoteTemplateError(f'PDF generation failed: {str(e)}')
     
-    def _load_template_with_fallback(self):
-        """Load quote template with intelligent fallback system"""
-        template_hierarchy = [
-            'quote_template_final_v2_production.html',
-            'quote_template_final_v2.html',
-            'quote_template_final_enhanced.html', 
-            'quote_template_final_fixed.html',
-            'quote_template_final_qt.html',
-            'quote_template_modern.html',
-            'quote_template.html'
-        ]
+    def _load_template_with_fallback(self, template_hierarchy=QUOTE_TEMPLATE_HIERARCHY):
+        """Load quote template with intelligent fallback system (resolved once per process)"""
+        template_name = _resolved_templates.get(template_hierarchy)
+        if template_name:
+            return self.jinja_env.get_template(template_name)
         
         for template_name in template_hierarchy:
             try:
                 template = self.jinja_env.get_template(template_name)
                 logger.info(f'📄 Using template: {template_name} (Jinja2 + WeasyPrint)')
+                _resolved_templates[template_hierarchy] = template_name
                 return template
             except Exception as e:
                 logger.warning(f'Template {template_name} not found: {e}')
@@ -206,36 +387,23 @@ class WeasyPrintQuoteGenerator:
         
         raise QuoteTemplateError('No valid quote template found in hierarchy')
     
+    def _thai_fonts_stylesheet(self):
+        """Thai fonts CSS, or None when the file is missing"""
+        if not os.path.exists(THAI_FONTS_CSS):
+            return None
+        return _get_stylesheet('thai_fonts', lambda: CSS(filename=THAI_FONTS_CSS))
+    
     def _generate_pdf_with_enhanced_styling(self, html_content):
         """Generate PDF with enhanced WeasyPrint styling and Thai font support"""
         try:
             # Prepare CSS stylesheets
             stylesheets = []
             
-            # Thai font CSS
-            thai_css_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'css', 'thai-fonts.css')
-            if os.path.exists(thai_css_path):
-                stylesheets.append(CSS(filename=thai_css_path))
-                logger.info('📝 Thai fonts CSS loaded')
-            
-            # Additional print optimizations
-            print_css = CSS(string="""
-                @page {
-                    -webkit-print-color-adjust: exact;
-                    color-adjust: exact;
-                }
-                body {
-                    -webkit-font-smoothing: antialiased;
-                    -moz-osx-font-smoothing: grayscale;
-                }
-                .page-break {
-                    page-break-before: always;
-                }
-                .no-break {
-                    page-break-inside: avoid;
-                }
-            """)
-            stylesheets.append(print_css)
+            # Thai font CSS + print optimizations (parsed once per process)
+            thai_css = self._thai_fonts_stylesheet()
+            if thai_css is not None:
+                stylesheets.append(thai_css)
+            stylesheets.append(_get_stylesheet('print', lambda: CSS(string=PRINT_CSS)))
             
             # Set base URL for relative paths (images, fonts, etc.)
             base_url = f"file://{os.path.dirname(os.path.dirname(__file__))}/"
@@ -260,108 +428,79 @@ class WeasyPrintQuoteGenerator:
                 raise QuoteTemplateError(f'Both enhanced and fallback PDF generation failed: {fallback_error}')
     
     def generate_quote_pdf_bytes(self, quote, booking):
-        """Generate Quote PDF as bytes for direct download - WeasyPrint + Jinja2"""
+        """Generate Quote PDF as bytes for direct download - WeasyPrint + Jinja2
+        
+        Memoized by quote + booking content hash, like generate_quote_pdf.
+        """
         try:
             logger.info(f'🎯 Generating Quote PDF bytes for {quote.quote_number} using WeasyPrint + Jinja2')
             logger.info(f'📋 Using booking: {booking.booking_reference if booking else "No booking"}')
             
-            # ⭐ REAL-TIME DATA SYNC: ดึงข้อมูล booking ใหม่จาก database เสมอ
-            from services.universal_booking_extractor import UniversalBookingExtractor
-            from services.smart_price_calculator import ProductDataExtractor
-            from extensions import db
-            
-            # Force expire current session to get fresh data
-            db.session.expire_all()
-            
-            # ดึงข้อมูล booking ใหม่จาก database (Real-time sync)
-            fresh_booking = UniversalBookingExtractor.get_fresh_booking_data(booking.id) if booking else None
-            if not fresh_booking and booking:
-                logger.warning(f'Could not fetch fresh booking data for {booking.id}, using provided booking')
-                try:
-                    db.session.refresh(booking)
-                    fresh_booking = booking
-                except:
-                    fresh_booking = booking  # final fallback
-                    
-            booking_to_use = fresh_booking if fresh_booking else booking
+            # ⭐ REAL-TIME DATA SYNC: booking + customer ใน query เดียว
+            booking_to_use = self._load_fresh_booking(booking) if booking else None
             logger.info(f'✅ Using fresh booking data: {booking_to_use.booking_reference if booking_to_use else "N/A"}')
             
-            # ดึงข้อมูล Product แบบ Smart Price Calculation (Real-time)
-            product_data = ProductDataExtractor.extract_complete_product_data(booking_to_use) if booking_to_use else {}
-            
-            # Prepare template data using Real-time Fresh Data
-            template_data = self._prepare_template_data_for_quote(quote, booking_to_use, product_data)
-            
-            # Generate timestamp for filename
-            current_time = datetime.now()
-            date_stamp = current_time.strftime('%Y%m%d')
-            time_stamp = current_time.strftime('%H%M%S')
-            
             # Filename format for Quote: Quote_BK20250922O8NP_QT1760048606.pdf
             filename = f'Quote_{booking_to_use.booking_reference if booking_to_use else "NOBK"}_{quote.quote_number}.pdf'
             
-            logger.info(f'📄 Generating Quote PDF with WeasyPrint: {filename}')
-            
             # Render HTML template - use production template v2
-            try:
-                template = self.jinja_env.get_template('quote_template_final_v2_production.html')
-                logger.info('✅ Using quote_template_final_v2_production.html for production')
-            except Exception as e:
-                logger.warning(f'⚠️ Could not load quote_template_final_v2_production.html: {e}, falling back')
-                try:
-                    template = self.jinja_env.get_template('quote_template_final_v2.html')
-                    logger.info('✅ Using quote_template_final_v2.html as fallback')
-                except Exception as e2:
-                    logger.warning(f'⚠️ Could not load quote_template_final_v2.html: {e2}, trying test template')
-                    try:
-                        template = self.jinja_env.get_template('quote_test_simple.html')
-                        logger.info('✅ Using quote_test_simple.html as final fallback')
-                    except Exception as e3:
-                        logger.error(f'❌ Could not load any template: {e3}')
-                        raise Exception(f"Template loading failed: {e3}")
-            
-            # 🔥 FORCE: Override template_data with direct booking data
-            if booking_to_use:
-                template_data.update({
-                    'service_detail': booking_to_use.description or 'No service detail',
-                    'name_list': booking_to_use.guest_list or 'No guest list', 
-                    'flight_info': booking_to_use.flight_info or 'No flight info'
-                })
+            template = self._load_template_with_fallback(QUOTE_BYTES_TEMPLATE_HIERARCHY)
+            render_key = self._content_hash(
+                quote, booking_to_use, booking_to_use.customer if booking_to_use else None,
+                extra=('pdf_bytes', self._template_fingerprint(template))
+            )
+            
+            with _single_flight(render_key):
+                memo = self._memo_get('quote_pdf', render_key)
+                if memo:
+                    with open(memo['path'], 'rb') as f:
+                        pdf_bytes = f.read()
+                    logger.info(f'♻️ Reusing Quote PDF bytes for {filename} (content unchanged)')
+                    return pdf_bytes, filename
                 
-                # 🔥 DEBUG: Log all booking data before template rendering
-                logger.info(f"=== BOOKING DATA DEBUG ===")
-                logger.info(f"Booking ID: {booking_to_use.id}")
-                logger.info(f"Booking Reference: {booking_to_use.booking_reference}")
-                logger.info(f"Description: {repr(booking_to_use.description)}")
-                logger.info(f"Guest List: {repr(booking_to_use.guest_list)}")
-                logger.info(f"Flight Info: {repr(booking_to_use.flight_info)}")
-                logger.info(f"Template data service_detail: {template_data.get('service_detail', 'N/A')}")
-                logger.info(f"Template data name_list: {template_data.get('name_list', 'N/A')}")
-                logger.info(f"Template data flight_info: {template_data.get('flight_info', 'N/A')}")
-                logger.info(f"=== END DEBUG ===")
-            
-            html_content = template.render(**template_data)
-            logger.info(f'✅ Template rendered successfully, HTML length: {len(html_content)}')
-            
-            # Debug: Log first 200 characters of rendered HTML
-            logger.info(f'HTML preview: {html_content[:200]}...')
-            
-            # Add Thai font CSS
-            thai_css_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'css', 'thai-fonts.css')
-            
-            # Set base URL for relative paths (for images)
-            base_url = f"file://{os.path.dirname(os.path.dirname(__file__))}/"
-            
-            # Generate PDF bytes using WeasyPrint
-            html_doc = HTML(string=html_content, base_url=base_url)
-            if os.path.exists(thai_css_path):
-                css = CSS(filename=thai_css_path)
-                pdf_bytes = html_doc.write_pdf(stylesheets=[css])
-            else:
-                pdf_bytes = html_doc.write_pdf()
-            
-            logger.info(f'✅ Generated WeasyPrint Quote PDF bytes: {filename} ({len(pdf_bytes)} bytes)')
-            return pdf_bytes, filename
+                # ดึงข้อมูล Product แบบ Smart Price Calculation (Real-time)
+                product_data = ProductDataExtractor.extract_complete_product_data(booking_to_use) if booking_to_use else {}
+                
+                # Prepare template data using Real-time Fresh Data
+                template_data = self._prepare_template_data_for_quote(quote, booking_to_use, product_data)
+                
+                logger.info(f'📄 Generating Quote PDF with WeasyPrint: {filename}')
+                
+                # 🔥 FORCE: Override template_data with direct booking data
+                if booking_to_use:
+                    template_data.update({
+                        'service_detail': booking_to_use.description or 'No service detail',
+                        'name_list': booking_to_use.guest_list or 'No guest list', 
+                        'flight_info': booking_to_use.flight_info or 'No flight info'
+                    })
+                
+                html_content = template.render(**template_data)
+                logger.info(f'✅ Template rendered successfully, HTML length: {len(html_content)}')
+                
+                # Set base URL for relative paths (for images)
+                base_url = f"file://{PROJECT_ROOT}/"
+                
+                # Generate PDF bytes using WeasyPrint (Thai font CSS parsed once per process)
+                html_doc = HTML(string=html_content, base_url=base_url)
+                thai_css = self._thai_fonts_stylesheet()
+                if thai_css is not None:
+                    pdf_bytes = html_doc.write_pdf(stylesheets=[thai_css])
+                else:
+                    pdf_bytes = html_doc.write_pdf()
+                
+                # เก็บไฟล์ไว้ให้ worker อื่น/ครั้งถัดไปใช้ซ้ำ
+                output_dir = os.path.join('static', 'generated')
+                os.makedirs(output_dir, exist_ok=True)
+                output_path = os.path.join(output_dir, f'{filename[:-4]}_{render_key[:12]}.pdf')
+                with open(output_path, 'wb') as f:
+                    f.write(pdf_bytes)
+                booking_id = booking_to_use.id if booking_to_use else None
+                if booking_id:
+                    artifact_index.register(booking_id, output_path)
+                self._memo_set('quote_pdf', render_key, booking_id, filename=filename, path=output_path)
+                
+                logger.info(f'✅ Generated WeasyPrint Quote PDF bytes: {filename} ({len(pdf_bytes)} bytes)')
+                return pdf_bytes, filename
             
         except Exception as e:
             logger.error(f'❌ Error generating WeasyPrint Quote PDF bytes: {str(e)}')
@@ -383,6 +522,11 @@ class WeasyPrintQuoteGenerator:
             png_filename = pdf_filename.replace('.pdf', '.png')
             png_path = os.path.join('static', 'generated', png_filename)
             
+            # PDF เดิม (เนื้อหาไม่เปลี่ยน) -> PNG เดิมใช้ต่อได้
+            if os.path.exists(png_path) and os.path.getmtime(png_path) >= os.path.getmtime(pdf_path):
+                logger.info(f'♻️ Reusing Quote PNG: {png_filename}')
+                return png_filename
+            
             # Try PDF to PNG conversion using PyMuPDF
             try:
                 import fitz  # PyMuPDF
@@ -395,6 +539,7 @@ class WeasyPrintQuoteGenerator:
                 img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
                 img.save(png_path, "PNG", optimize=True, quality=95)
                 doc.close()
+                artifact_index.register(booking.id, png_path)
                 
                 logger.info(f'Generated WeasyPrint Quote PNG: {png_filename}')
                 return png_filename
@@ -408,6 +553,7 @@ class WeasyPrintQuoteGenerator:
                                       capture_output=True, text=True)
                 
                 if result.returncode == 0 and os.path.exists(png_path):
+                    artifact_index.register(booking.id, png_path)
                     logger.info(f'Generated WeasyPrint Quote PNG via ImageMagick: {png_filename}')
                     return png_filename
                 else:
@@ -426,7 +572,9 @@ class WeasyPrintQuoteGenerator:
         # ✅ ดึงข้อมูลทุก fields จาก booking แบบ Real-time
         # ดึงข้อมูลแบบครบถ้วน
         try:
-            all_booking_fields = UniversalBookingExtractor.extract_all_booking_fields(booking)
+            all_booking_fields = UniversalBookingExtractor.extract_all_booking_fields(
+                booking, refresh=booking.id not in self._preloaded_quote_numbers
+            )
             if not isinstance(all_booking_fields, dict):
                 logger.error(f"extract_all_booking_fields returned {type(all_booking_fields)}, expected dict")
                 all_booking_fields = {}
@@ -817,39 +965,17 @@ class WeasyPrintQuoteGenerator:
         return '+66123456789'
 
     def _get_quote_number_from_quotes_table(self, booking_id):
-        """ดึง quote_number จากตาราง quotes"""
+        """ดึง quote_number จากตาราง quotes (ใช้ค่าที่โหลดมาพร้อม booking ถ้ามี)"""
+        if booking_id in self._preloaded_quote_numbers:
+            return self._preloaded_quote_numbers[booking_id]
         try:
-            import mysql.connector
-            from config import Config
-            from urllib.parse import urlparse
-            
-            # Parse DATABASE_URL from config
-            db_uri = Config.SQLALCHEMY_DATABASE_URI
-            parsed = urlparse(db_uri)
-            
-            mariadb_config = {
-                'user': parsed.username or 'voucher_user',
-                'password': parsed.password or 'VoucherSecure2026!',
-                'host': parsed.hostname or 'localhost',
-                'port': parsed.port or 3306,
-                'database': parsed.path.lstrip('/').split('?')[0] or 'voucher_enhanced',
-                'charset': 'utf8mb4'
-            }
-            
-            conn = mysql.connector.connect(**mariadb_config)
-            cursor = conn.cursor()
+            from extensions import db
+            from models.quote import Quote
             
             # ดึง quote_number จากตาราง quotes ที่เกี่ยวข้องกับ booking_id
-            cursor.execute("""
-                SELECT quote_number 
-                FROM quotes 
-                WHERE booking_id = %s 
-                ORDER BY created_at DESC 
-                LIMIT 1
-            """, (booking_id,))
-            
-            result = cursor.fetchone()
-            conn.close()
+            result = db.session.query(Quote.quote_number).filter(
+                Quote.booking_id == booking_id
+            ).order_by(Quote.created_at.desc()).limit(1).first()
             
             if result:
                 return result[0]
@@ -1026,6 +1152,7 @@ class WeasyPrintQuoteGenerator:
             logger.info('Converting Tour Voucher HTML to PDF using WeasyPrint...')
             html_doc = HTML(string=html_content, base_url='file://' + os.getcwd() + '/')
             html_doc.write_pdf(output_path)
+            artifact_index.register(booking.id, output_path)
             
             logger.info(f'✅ Tour Voucher PDF generated successfully: {filename}')
             return filename
@@ -1047,7 +1174,9 @@ class WeasyPrintQuoteGenerator:
             
             if booking:
                 try:
-                    all_booking_fields = UniversalBookingExtractor.extract_all_booking_fields(booking)
+                    all_booking_fields = UniversalBookingExtractor.extract_all_booking_fields(
+                        booking, refresh=booking.id not in self._preloaded_quote_numbers
+                    )
                     if not isinstance(all_booking_fields, dict):
                         logger.error(f"extract_all_booking_fields returned {type(all_booking_fields)}, expected dict")
                         all_booking_fields = {}
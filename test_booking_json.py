@@ -0,0 +1,58 @@
+"""Tests for Booking JSON column writes (utils/json_codec.py, models/booking.py _json_text)"""
+import json
+
+import pytest
+
+from models.booking import Booking
+from utils import json_codec
+
+
+@pytest.mark.parametrize('text, valid', [
+    ('[]', True),
+    ('[{"name": "ทัวร์", "price": 1250.5}]', True),
+    ('"\\ud800"', True),  # lone surrogate escape: valid JSON text, orjson rejects it
+    ('[{"price": NaN}]', False),
+    ('[Infinity]', False),
+    ('[-Infinity]', False),
+    ('', False),
+    ('<p>Guest 1<br>Guest 2</p>', False),
+    (None, False),
+])
+def test_is_valid_is_strict(text, valid):
+    assert json_codec.is_valid(text) is valid
+
+
+def test_dumps_writes_non_finite_floats_as_null():
+    value = [{'price': float('nan'), 'amount': 10.0, 'tags': (float('inf'), 'x')}, float('-inf')]
+    text = json_codec.dumps(value)
+    assert text == '[{"price": null, "amount": 10.0, "tags": [null, "x"]}, null]'
+    assert json_codec.is_valid(text)
+    assert json_codec.dumps([1, 'ก']) == json.dumps([1, 'ก'])  # finite values keep the json.dumps format
+
+
+def test_set_products_stores_valid_json():
+    booking = Booking()
+    booking.set_products([{'name': 'Disneyland', 'price': float('nan'), 'quantity': 2}])
+    assert json_codec.is_valid(booking.products)
+    assert booking.get_products() == [{'name': 'Disneyland', 'price': None, 'quantity': 2}]
+
+
+def test_json_strings_with_nan_are_converted_not_dropped():
+    booking = Booking()
+    booking.set_daily_services('[{"type": "Tour", "price": NaN}, {"type": "Hotel", "price": 900}]')
+    assert json_codec.is_valid(booking.daily_services)
+    assert booking.get_daily_services() == [{'type': 'Tour', 'price': None}, {'type': 'Hotel', 'price': 900}]
+
+
+def test_undecodable_strings_are_stored_as_null():
+    booking = Booking()
+    booking.set_voucher_album_ids('1, 2, 3')
+    assert booking.voucher_album_ids is None
+    assert booking.get_voucher_album_ids() == []
+
+
+def test_voucher_rows_store_valid_json():
+    booking = Booking()
+    booking.set_voucher_rows([{'arrival': float('nan'), 'service_by': 'Big Bus Tours'}])
+    assert json_codec.is_valid(booking.daily_services)
+    assert booking.get_voucher_rows()[0]['service_by'] == 'Big Bus Tours'
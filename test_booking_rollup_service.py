@@ -0,0 +1,208 @@
+"""Tests for services/booking_rollup_service.py and the dashboard stats fallback (routes/dashboard.py)"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+from sqlalchemy import event, text
+
+import models  # noqa: F401  (registers every mapper Booking refers to)
+from extensions import db
+from models.booking import Booking
+from models.booking_rollup import BookingDailyRollup  # noqa: F401  (table for create_all)
+from routes import dashboard
+from services.booking_rollup_service import TRACKED_FIELDS, BookingRollupService
+
+DAY = date(2025, 3, 10)
+
+
+def _remove_listeners():
+    if not BookingRollupService._listeners_installed:
+        return
+    for name in TRACKED_FIELDS:
+        event.remove(getattr(Booking, name), 'set', BookingRollupService._track_set)
+    event.remove(Booking, 'after_insert', BookingRollupService.after_booking_insert)
+    event.remove(Booking, 'after_update', BookingRollupService.after_booking_update)
+    event.remove(Booking, 'after_delete', BookingRollupService.after_booking_delete)
+    BookingRollupService._listeners_installed = False
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.delenv('BOOKING_ROLLUPS_ENABLED', raising=False)
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'app.db'}",
+                      SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    _remove_listeners()
+
+
+@pytest.fixture
+def rollups(app):
+    assert BookingRollupService.setup_listeners() is True
+    assert BookingRollupService.is_available()
+    return app
+
+
+_refs = iter(range(1, 10 ** 6))
+
+
+def _booking(status='confirmed', booking_type='tour', amount='1000.00', created_at=None):
+    booking = Booking(customer_id=1, booking_reference=f'BK-{next(_refs)}', booking_type=booking_type,
+                      status=status, total_amount=Decimal(amount), time_limit=datetime(2025, 3, 1, 12),
+                      created_at=created_at or datetime.combine(DAY, datetime.min.time()) + timedelta(hours=9))
+    db.session.add(booking)
+    db.session.commit()
+    return booking
+
+
+def _rollup_rows():
+    return {
+        (str(row.day), row.status, row.booking_type): (row.booking_count, Decimal(str(row.revenue)))
+        for row in db.session.execute(text('SELECT * FROM booking_daily_rollups'))
+        if row.booking_count
+    }
+
+
+# ---------------------------------------------------------------------------
+# Listeners
+# ---------------------------------------------------------------------------
+def test_setup_is_skipped_without_the_table(app):
+    db.session.execute(text('DROP TABLE booking_daily_rollups'))
+    db.session.commit()
+    assert BookingRollupService.setup_listeners() is False
+    assert not BookingRollupService.is_available()
+
+
+def test_setup_is_skipped_when_disabled(app, monkeypatch):
+    monkeypatch.setenv('BOOKING_ROLLUPS_ENABLED', 'false')
+    assert BookingRollupService.setup_listeners() is False
+    assert not BookingRollupService.is_available()
+
+
+def test_insert_increments(rollups):
+    _booking(amount='1000.00')
+    _booking(amount='250.50')
+    _booking(status='pending', booking_type='hotel', amount='300.00')
+    assert _rollup_rows() == {
+        (str(DAY), 'confirmed', 'tour'): (2, Decimal('1250.50')),
+        (str(DAY), 'pending', 'hotel'): (1, Decimal('300.00')),
+    }
+
+
+def test_update_moves_between_rows(rollups):
+    booking = _booking(status='pending', amount='1000.00')
+    booking.status = 'confirmed'
+    db.session.commit()
+    assert _rollup_rows() == {(str(DAY), 'confirmed', 'tour'): (1, Decimal('1000.00'))}
+
+    booking.total_amount = Decimal('1500.00')
+    db.session.commit()
+    assert _rollup_rows() == {(str(DAY), 'confirmed', 'tour'): (1, Decimal('1500.00'))}
+
+    booking.booking_type = 'hotel'
+    booking.total_amount = Decimal('900.00')
+    db.session.commit()
+    assert _rollup_rows() == {(str(DAY), 'confirmed', 'hotel'): (1, Decimal('900.00'))}
+
+
+def test_untracked_update_leaves_rollups(rollups):
+    booking = _booking()
+    before = _rollup_rows()
+    booking.description = 'changed'
+    db.session.commit()
+    assert _rollup_rows() == before
+
+
+def test_delete_decrements(rollups):
+    keep = _booking(amount='100.00')
+    gone = _booking(amount='200.00')
+    db.session.delete(gone)
+    db.session.commit()
+    assert keep.id
+    assert _rollup_rows() == {(str(DAY), 'confirmed', 'tour'): (1, Decimal('100.00'))}
+
+
+def test_rollback_discards_deltas(rollups):
+    _booking()
+    before = _rollup_rows()
+    db.session.add(Booking(customer_id=1, booking_reference='BK-ROLLBACK', booking_type='tour', status='confirmed',
+                           total_amount=Decimal('5.00'), time_limit=datetime(2025, 3, 1, 12)))
+    db.session.flush()
+    db.session.rollback()
+    assert _rollup_rows() == before
+
+
+# ---------------------------------------------------------------------------
+# Queries / reconcile
+# ---------------------------------------------------------------------------
+def test_summary_matches_a_live_scan(rollups):
+    _booking(amount='1000.00')
+    _booking(status='pending', booking_type='hotel', amount='300.00')
+    _booking(amount='50.00', created_at=datetime(2025, 2, 20, 8))
+
+    summary = BookingRollupService.summary(DAY, DAY)
+    assert summary['total_bookings'] == 2
+    assert summary['status_counts'] == {'confirmed': 1, 'pending': 1}
+    assert summary['confirmed_revenue'] == Decimal('1000.00')
+
+    assert BookingRollupService.summary(revenue_from=date(2025, 2, 1))['confirmed_revenue'] == Decimal('1050.00')
+    assert BookingRollupService.daily_series(date(2025, 2, 1), DAY) == [
+        ('2025-02-20', 1, Decimal('50.00')), (str(DAY), 2, Decimal('1300.00')),
+    ]
+
+
+def test_reconcile_corrects_drift(rollups):
+    _booking(amount='1000.00')
+    # A write that bypasses the ORM listeners
+    db.session.execute(text("UPDATE bookings SET status = 'cancelled'"))
+    db.session.commit()
+    assert BookingRollupService.reconcile() == {'rows': 1, 'drifted': 2}
+    assert _rollup_rows() == {(str(DAY), 'cancelled', 'tour'): (1, Decimal('1000.00'))}
+    assert BookingRollupService.reconcile()['drifted'] == 0
+
+
+# ---------------------------------------------------------------------------
+# Dashboard
+# ---------------------------------------------------------------------------
+def test_dashboard_scans_bookings_when_rollups_are_not_maintained(app):
+    # Table exists, but nobody maintains it (listeners never installed)
+    db.session.execute(text(
+        "INSERT INTO booking_daily_rollups (day, status, booking_type, booking_count, revenue) "
+        "VALUES ('2025-03-10', 'confirmed', 'tour', 99, 99999)"
+    ))
+    db.session.commit()
+    _booking(amount='1000.00')
+    assert not BookingRollupService.is_available()
+
+    stats = dashboard._booking_stats(DAY, DAY)
+    assert stats['total_bookings'] == 1
+    assert float(stats['confirmed_revenue']) == 1000.0
+    assert dashboard._booking_daily_series(DAY, DAY) == [(str(DAY), 1, Decimal('1000'))]
+
+
+def test_dashboard_uses_rollups_when_maintained(rollups):
+    _booking(amount='1000.00')
+    db.session.execute(text("UPDATE booking_daily_rollups SET booking_count = 7"))
+    db.session.commit()
+    assert dashboard._booking_stats(DAY, DAY)['total_bookings'] == 7
+
+
+def test_both_paths_use_the_same_month_boundary(app, rollups, monkeypatch):
+    now = datetime(2025, 3, 31, 20, 0)
+    monkeypatch.setattr('routes.dashboard.naive_utc_now', lambda: now)
+    monkeypatch.setattr('services.booking_rollup_service.naive_utc_now', lambda: now)
+    _booking(amount='100.00', created_at=datetime(2025, 3, 5, 9))
+
+    from_rollups = dashboard._booking_stats()
+    BookingRollupService._listeners_installed = False
+    try:
+        from_scan = dashboard._booking_stats()
+    finally:
+        BookingRollupService._listeners_installed = True
+    assert Decimal(str(from_rollups['confirmed_revenue'])) == Decimal(str(from_scan['confirmed_revenue'])) == Decimal('100.00')
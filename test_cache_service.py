@@ -0,0 +1,214 @@
+"""Tests for services/cache_service.py: Redis backend (fakeredis) and the in-process LRU fallback"""
+import fakeredis
+import pytest
+import redis
+
+from services import cache_service
+from services.cache_service import Cache, MemoryBackend, RedisBackend, create_cache
+
+
+@pytest.fixture
+def fake_client():
+    return fakeredis.FakeRedis(server=fakeredis.FakeServer())
+
+
+@pytest.fixture(params=['redis', 'memory'])
+def cache(request, fake_client):
+    if request.param == 'redis':
+        return Cache(RedisBackend(fake_client), prefix='test')
+    return Cache(MemoryBackend(max_entries=16), prefix='test')
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_service.time, 'time', fake)
+    return fake
+
+
+# ---------------------------------------------------------------------------
+# get / set / ttl
+# ---------------------------------------------------------------------------
+def test_get_set_round_trip(cache):
+    assert cache.get('ns', 'missing') is None
+    assert cache.get('ns', 'missing', default='x') == 'x'
+    assert cache.set('ns', 'k', {'a': [1, 2], 'b': 'ไทย'}) is True
+    assert cache.get('ns', 'k') == {'a': [1, 2], 'b': 'ไทย'}
+    assert cache.get('other', 'k') is None  # namespaces are separate
+
+    stats = cache.stats()['namespaces']['ns']
+    assert (stats['hits'], stats['misses'], stats['sets']) == (1, 2, 1)
+
+
+def test_get_or_set_calls_factory_once(cache):
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return {'count': 3}
+
+    assert cache.get_or_set('ns', 'k', factory, ttl=60) == {'count': 3}
+    assert cache.get_or_set('ns', 'k', factory, ttl=60) == {'count': 3}
+    assert len(calls) == 1
+
+
+def test_pop_update_incr(cache):
+    cache.set('ns', 'k', {'n': 1})
+    assert cache.update('ns', 'k', lambda v: {'n': v['n'] + 1}) == {'n': 2}
+    assert cache.pop('ns', 'k') == {'n': 2}
+    assert cache.pop('ns', 'k') is None
+    assert cache.update('ns', 'k', lambda v: v) is None
+    assert cache.incr('ns', 'counter') == 1
+    assert cache.incr('ns', 'counter', 4) == 5
+
+
+def test_redis_ttl(fake_client):
+    cache = Cache(RedisBackend(fake_client), prefix='test')
+    cache.set('ns', 'k', 'v', ttl=30)
+    cache.set('ns', 'forever', 'v')
+    assert 0 < fake_client.ttl('test:ns:k') <= 30
+    assert fake_client.ttl('test:ns:forever') == -1
+    cache.update('ns', 'k', lambda v: 'w')  # update keeps the TTL
+    assert 0 < fake_client.ttl('test:ns:k') <= 30
+    cache.incr('ns', 'counter', ttl=10)
+    assert 0 < fake_client.ttl('test:ns:counter') <= 10
+
+
+def test_memory_ttl_expiry(clock):
+    cache = Cache(MemoryBackend(), prefix='test')
+    cache.set('ns', 'k', 'v', ttl=30)
+    cache.set('ns', 'forever', 'v')
+    clock.now += 29
+    assert cache.get('ns', 'k') == 'v'
+    clock.now += 2
+    assert cache.get('ns', 'k') is None
+    assert cache.get('ns', 'forever') == 'v'
+
+
+def test_memory_lru_eviction():
+    cache = Cache(MemoryBackend(max_entries=2), prefix='test')
+    cache.set('ns', 'a', 1)
+    cache.set('ns', 'b', 2)
+    cache.get('ns', 'a')  # a is now most recently used
+    cache.set('ns', 'c', 3)
+    assert cache.get('ns', 'b') is None
+    assert (cache.get('ns', 'a'), cache.get('ns', 'c')) == (1, 3)
+
+
+# ---------------------------------------------------------------------------
+# Tags
+# ---------------------------------------------------------------------------
+def test_invalidate_tags(cache):
+    cache.set('list', 'page1', [1], tags=['bookings'])
+    cache.set('view', '42', {'id': 42}, tags=['booking:42', 'bookings'])
+    cache.set('view', '43', {'id': 43}, tags=['booking:43'])
+
+    assert cache.invalidate_tags(['booking:42']) == 1
+    assert cache.get('view', '42') is None
+    assert cache.get('list', 'page1') == [1]
+
+    assert cache.invalidate_tags(['bookings']) == 1
+    assert cache.get('list', 'page1') is None
+    assert cache.get('view', '43') == {'id': 43}
+    assert cache.invalidate_tags(['unknown']) == 0
+
+
+def test_memory_tag_sets_shrink_with_entries():
+    backend = MemoryBackend()
+    cache = Cache(backend, prefix='test')
+    cache.set('ns', 'k', 1, tags=['t'])
+    cache.delete('ns', 'k')
+    assert not backend._tags and not backend._key_tags
+
+
+# ---------------------------------------------------------------------------
+# Member sets / delete / clear
+# ---------------------------------------------------------------------------
+def test_add_members_and_delete(cache):
+    cache.add_members('seen', 'booking:1', 'a', 'b')
+    cache.add_members('seen', 'booking:1', 'b', 3)
+    assert cache.members('seen', 'booking:1') == {'a', 'b', '3'}
+    assert cache.members('seen', 'booking:2') == set()
+
+    cache.set('ns', 'x', 1)
+    cache.set('ns', 'y', 2)
+    cache.delete('ns', 'x', 'y')
+    cache.delete('seen', 'booking:1')
+    assert cache.get('ns', 'x') is None and cache.get('ns', 'y') is None
+    assert cache.members('seen', 'booking:1') == set()
+
+
+def test_clear_namespace(cache):
+    cache.set('a', '1', 1)
+    cache.set('b', '1', 1)
+    cache.clear('a')
+    assert cache.get('a', '1') is None
+    assert cache.get('b', '1') == 1
+
+
+def test_publish_wakes_subscriber(cache):
+    with cache.subscribe('nfc', 'token') as subscription:
+        cache.publish('nfc', 'token')
+        # Redis may hand back the subscribe confirmation first (wait() returns early)
+        assert any(subscription.wait(0.5) for _ in range(3))
+
+
+# ---------------------------------------------------------------------------
+# Redis unreachable
+# ---------------------------------------------------------------------------
+@pytest.fixture
+def unreachable_client():
+    # Nothing listens on port 1: every command fails fast with ConnectionError
+    return redis.Redis(host='127.0.0.1', port=1, socket_timeout=0.2, socket_connect_timeout=0.2)
+
+
+def test_create_cache_falls_back_to_memory(monkeypatch):
+    monkeypatch.delenv('CACHE_BACKEND', raising=False)
+    cache = create_cache({'REDIS_URL': 'redis://127.0.0.1:1/0', 'CACHE_KEY_PREFIX': 'test'})
+    assert isinstance(cache.backend, MemoryBackend)
+    assert cache.shared is False
+    cache.set('ns', 'k', 'v')
+    assert cache.get('ns', 'k') == 'v'
+
+
+def test_create_cache_memory_backend_skips_redis():
+    cache = create_cache({'CACHE_BACKEND': 'memory', 'REDIS_URL': 'redis://127.0.0.1:1/0'})
+    assert isinstance(cache.backend, MemoryBackend)
+
+
+def test_create_cache_fakeredis_url():
+    cache = create_cache({'CACHE_BACKEND': 'redis', 'REDIS_URL': 'fakeredis://'})
+    assert isinstance(cache.backend, RedisBackend)
+    assert cache.shared is True
+
+
+def test_redis_errors_degrade_to_misses(unreachable_client):
+    cache = Cache(RedisBackend(unreachable_client), prefix='test')
+    assert cache.set('ns', 'k', 'v') is False
+    assert cache.get('ns', 'k', default='fallback') == 'fallback'
+    assert cache.get_or_set('ns', 'k', lambda: 'computed') == 'computed'
+    assert cache.pop('ns', 'k') is None
+    assert cache.incr('ns', 'counter') is None
+    assert cache.invalidate_tags(['t']) == 0
+    assert cache.members('ns', 'set') == set()
+    cache.add_members('ns', 'set', 'a')
+    cache.delete('ns', 'k')
+    cache.publish('ns', 'k')
+    assert cache.stats()['namespaces']['ns']['errors'] >= 7
+
+
+def test_subscribe_falls_back_to_polling_when_redis_is_down(unreachable_client, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(cache_service.time, 'sleep', sleeps.append)
+    cache = Cache(RedisBackend(unreachable_client), prefix='test')
+    with cache.subscribe('nfc', 'token') as subscription:
+        assert subscription.wait(5) is False
+    assert sleeps == [1.0]
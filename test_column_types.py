@@ -0,0 +1,145 @@
+"""Tests for models/column_types.py (DATETIME / TIME conversion)"""
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, select
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from models.column_types import SafeDateTime, SafeTime, to_datetime, to_time
+
+
+# ---------------------------------------------------------------------------
+# to_datetime
+# ---------------------------------------------------------------------------
+@pytest.mark.parametrize('value, expected', [
+    (None, None),
+    (datetime(2025, 3, 1, 9, 30, 5, 120000), datetime(2025, 3, 1, 9, 30, 5, 120000)),
+    (date(2025, 3, 1), datetime(2025, 3, 1)),
+    ('2025-03-01 09:30:05', datetime(2025, 3, 1, 9, 30, 5)),
+    ('2025-03-01 09:30:05.250000', datetime(2025, 3, 1, 9, 30, 5, 250000)),
+    ('2025-03-01T09:30:05Z', datetime(2025, 3, 1, 9, 30, 5)),
+    (' 2025-03-01 ', datetime(2025, 3, 1)),
+    (b'2025-03-01 09:30:05', datetime(2025, 3, 1, 9, 30, 5)),
+    (bytearray(b'2025-03-01 09:30:05'), datetime(2025, 3, 1, 9, 30, 5)),
+    ('0000-00-00 00:00:00', None),
+    ('0000-00-00', None),
+    (b'0000-00-00 00:00:00', None),
+    ('2025-00-10 00:00:00', None),
+    ('', None),
+    ('garbage', None),
+    (12345, None),
+])
+def test_to_datetime(value, expected):
+    assert to_datetime(value) == expected
+
+
+# ---------------------------------------------------------------------------
+# to_time
+# ---------------------------------------------------------------------------
+@pytest.mark.parametrize('value, expected', [
+    (None, None),
+    (time(18, 0), time(18, 0)),
+    (datetime(2025, 3, 1, 7, 45), time(7, 45)),
+    (timedelta(hours=9, minutes=5), time(9, 5)),
+    (timedelta(hours=9, microseconds=500), time(9, 0, 0, 500)),
+    (timedelta(0), time(0, 0)),
+    (timedelta(hours=23, minutes=59, seconds=59), time(23, 59, 59)),
+    ('07:45:00', time(7, 45)),
+    ('9:30:00', time(9, 30)),
+    ('7:45', time(7, 45)),
+    (b'09:30:00', time(9, 30)),
+    ('', None),
+    ('garbage', None),
+])
+def test_to_time(value, expected):
+    assert to_time(value) == expected
+
+
+@pytest.mark.parametrize('value', [
+    '838:59:59',       # MySQL TIME maximum
+    '-01:00:00',
+    '24:00:00',
+    b'838:59:59',
+    timedelta(hours=24),
+    timedelta(hours=25),
+    timedelta(hours=-1),
+    timedelta(days=-1, hours=23),
+    timedelta(days=34, hours=22, minutes=59, seconds=59),
+])
+def test_to_time_outside_clock_day_is_none(value):
+    assert to_time(value) is None
+
+
+# ---------------------------------------------------------------------------
+# Result processors
+# ---------------------------------------------------------------------------
+def test_mysql_result_processors_use_fast_converters():
+    dialect = mysql.dialect()
+    assert SafeDateTime().result_processor(dialect, None) is to_datetime
+    assert SafeTime().result_processor(dialect, None) is to_time
+
+    datetime_proc = SafeDateTime()._cached_result_processor(dialect, None)
+    time_proc = SafeTime()._cached_result_processor(dialect, None)
+    assert datetime_proc('0000-00-00 00:00:00') is None
+    assert datetime_proc(datetime(2025, 3, 1)) == datetime(2025, 3, 1)
+    assert time_proc(timedelta(hours=9, minutes=30)) == time(9, 30)
+    assert time_proc('838:59:59') is None
+
+
+def test_sqlite_result_processors_keep_standard_processing():
+    dialect = sqlite.dialect()
+    assert SafeDateTime().result_processor(dialect, None) is not to_datetime
+    assert SafeTime().result_processor(dialect, None) is not to_time
+
+    # SQLite stores text: the impl types' processors parse it
+    datetime_proc = SafeDateTime()._cached_result_processor(dialect, None)
+    time_proc = SafeTime()._cached_result_processor(dialect, None)
+    assert datetime_proc('2025-03-01 09:30:05.000000') == datetime(2025, 3, 1, 9, 30, 5)
+    assert time_proc('09:30:00.000000') == time(9, 30)
+
+
+def test_sqlite_round_trip():
+    engine = create_engine('sqlite://')
+    table = Table('t', MetaData(), Column('id', Integer, primary_key=True),
+                  Column('at', SafeDateTime), Column('pickup', SafeTime))
+    table.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(table), [{'at': datetime(2025, 3, 1, 9, 30), 'pickup': time(8, 15)}])
+        row = conn.execute(select(table.c.at, table.c.pickup)).one()
+    assert row == (datetime(2025, 3, 1, 9, 30), time(8, 15))
+
+
+# ---------------------------------------------------------------------------
+# Bind parameters
+# ---------------------------------------------------------------------------
+@pytest.mark.parametrize('dialect', [mysql.dialect(), sqlite.dialect()], ids=['mysql', 'sqlite'])
+def test_process_bind_param(dialect):
+    safe_datetime, safe_time = SafeDateTime(), SafeTime()
+    assert safe_datetime.process_bind_param('2025-03-01 09:30:05', dialect) == datetime(2025, 3, 1, 9, 30, 5)
+    assert safe_datetime.process_bind_param('0000-00-00 00:00:00', dialect) is None
+    assert safe_datetime.process_bind_param('garbage', dialect) is None
+    assert safe_datetime.process_bind_param(datetime(2025, 3, 1), dialect) == datetime(2025, 3, 1)
+    assert safe_datetime.process_bind_param(None, dialect) is None
+    assert safe_time.process_bind_param('9:30', dialect) == time(9, 30)
+    assert safe_time.process_bind_param(timedelta(hours=7), dialect) == time(7, 0)
+    assert safe_time.process_bind_param(timedelta(hours=30), dialect) is None
+    assert safe_time.process_bind_param(time(7, 0), dialect) == time(7, 0)
+
+
+def test_unparseable_time_limit_binds_none_and_violates_not_null():
+    from models.booking import Booking
+
+    column = Booking.__table__.c.time_limit
+    assert isinstance(column.type, SafeDateTime)
+    assert column.nullable is False
+    assert column.type.process_bind_param('not a date', mysql.dialect()) is None
+
+    # The bound None reaches the database, so NOT NULL rejects the row instead of storing garbage
+    engine = create_engine('sqlite://')
+    table = Table('bookings_probe', MetaData(), Column('id', Integer, primary_key=True),
+                  Column('time_limit', SafeDateTime, nullable=False))
+    table.create(engine)
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(insert(table), [{'time_limit': 'not a date'}])
@@ -0,0 +1,165 @@
+"""Tests for utils/script_segments.py (Thai / Latin / CJK runs)
+
+The corpus and the legacy per-character scans below are also used by
+scripts/script_segment_benchmark.py for timing.
+"""
+import random
+
+import pytest
+
+from utils import script_segments
+from utils.script_segments import CJK, LATIN, THAI
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+NAMES = ['สมชาย ใจดี', 'John Smith', 'Wang Wei 王伟', 'นางสาว Anna Müller', 'คุณ Lee Ka-ho 李家豪', 'O\'Brien']
+TOURS = ['ทัวร์ฮ่องกง 3 วัน 2 คืน', 'Hong Kong Disneyland 1-Day Pass', '香港迪士尼乐园 Disneyland',
+         'เกาะลันเตา + Big Buddha 天坛大佛', 'Victoria Peak Tram (สายพีค)', 'マカオ Macau day trip']
+DETAILS = ['รับที่โรงแรม 08:00 น.', 'Pickup at hotel lobby 08:00', 'รวมค่าเข้าชม 「天坛大佛」。',
+           'ราคา ฿1,250 / ท่าน', 'Price HKD 650 per person', 'หมายเหตุ: ไม่รวมอาหารกลางวัน<br />ติดต่อ 081-234-5678',
+           'Day 1: BKK → HKG\nDay 2: ดิสนีย์แลนด์\nDay 3: HKG → BKK', 'เลขไทย ๑๒๓๔๕ และ 12345', '😀 emoji ทดสอบ']
+FLIGHTS = ['TG 600 BKK-HKG 08:00-11:50', 'CX 700 HKG-BKK 19:35-21:25', 'เที่ยวบิน FD 502 DMK-HKG']
+
+# (character, script) on either side of every SCRIPT_RANGES boundary
+BOUNDARIES = [
+    ('\u0dff', LATIN), ('\u0e00', THAI), ('\u0e7f', THAI), ('\u0e80', LATIN),
+    ('\u2fff', LATIN), ('\u3000', CJK), ('\u303f', CJK), ('\u3040', LATIN),
+    ('\u4dff', LATIN), ('\u4e00', CJK), ('\u9fff', CJK), ('\ua000', LATIN),
+]
+BOUNDARY_CHARS = [char for char, _script in BOUNDARIES]
+
+
+def build_corpus(count=300, seed=42):
+    rng = random.Random(seed)
+    corpus = ['a', 'ก', '中', ' ', ''.join(BOUNDARY_CHARS), 'x'.join(BOUNDARY_CHARS)]
+    corpus += NAMES + TOURS + DETAILS + FLIGHTS
+    pools = NAMES + TOURS + DETAILS + FLIGHTS + BOUNDARY_CHARS
+    while len(corpus) < count:
+        parts = rng.sample(pools, rng.randint(1, 6))
+        corpus.append(rng.choice([' ', '\n', ' | ', '']).join(parts))
+    return corpus[:count]
+
+
+CORPUS = build_corpus()
+
+
+# ---------------------------------------------------------------------------
+# Legacy implementations (the per-character scans the module replaced)
+# ---------------------------------------------------------------------------
+def legacy_has_thai(text):
+    """ClassicPDFGenerator.has_thai_text / WeasyPrint any(...) checks"""
+    if not text:
+        return False
+    for char in text:
+        if '\u0e00' <= char <= '\u0e7f':
+            return True
+    return False
+
+
+def legacy_scripts(text):
+    """utils.pdf_fonts.select_font_for_text detection"""
+    has_thai = any('\u0e00' <= ch <= '\u0e7f' for ch in text)
+    has_cjk = any('\u4e00' <= ch <= '\u9fff' for ch in text)
+    if not has_cjk:
+        has_cjk = any('\u3000' <= ch <= '\u303f' for ch in text)
+    return has_thai, has_cjk
+
+
+def legacy_format_mixed_text(text):
+    """ClassicPDFGenerator.format_mixed_text"""
+    if not text:
+        return ""
+    clean_text = str(text)
+    if legacy_has_thai(clean_text):
+        result = ""
+        i = 0
+        while i < len(clean_text):
+            char = clean_text[i]
+            if '\u0e00' <= char <= '\u0e7f':
+                thai_segment = ""
+                while i < len(clean_text) and '\u0e00' <= clean_text[i] <= '\u0e7f':
+                    thai_segment += clean_text[i]
+                    i += 1
+                result += f'<font name="NotoSansThai-Regular">{thai_segment}</font>'
+            else:
+                non_thai_segment = ""
+                while i < len(clean_text) and not ('\u0e00' <= clean_text[i] <= '\u0e7f'):
+                    non_thai_segment += clean_text[i]
+                    i += 1
+                result += f'<font name="Helvetica">{non_thai_segment}</font>'
+        return result
+    return f'<font name="Helvetica">{clean_text}</font>'
+
+
+def current_scripts(text):
+    scripts = script_segments.scripts_in(text)
+    return THAI in scripts, CJK in scripts
+
+
+PARITY = [
+    ('has_thai', legacy_has_thai, script_segments.contains_thai),
+    ('font_scripts', legacy_scripts, current_scripts),
+    ('format_mixed_text', legacy_format_mixed_text, script_segments.font_markup),
+]
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+@pytest.fixture(autouse=True)
+def _fresh_caches():
+    script_segments.clear_caches()
+    yield
+    script_segments.clear_caches()
+
+
+@pytest.mark.parametrize('char, script', BOUNDARIES, ids=[f'U+{ord(c):04X}' for c, _ in BOUNDARIES])
+def test_script_of_range_boundaries(char, script):
+    assert script_segments.script_of(char) == script
+    assert script_segments.segment(char) == ((script, char),)
+
+
+@pytest.mark.parametrize('text', CORPUS)
+def test_segment_round_trip(text):
+    runs = script_segments.segment(text)
+    assert ''.join(run for _script, run in runs) == text
+    assert all(run for _script, run in runs)
+    # Adjacent runs always change script, and every character agrees with script_of()
+    assert all(a[0] != b[0] for a, b in zip(runs, runs[1:]))
+    assert all(script_segments.script_of(ch) == script for script, run in runs for ch in run)
+
+
+@pytest.mark.parametrize('name, legacy, current', PARITY, ids=[name for name, _, _ in PARITY])
+def test_parity_with_legacy_scans(name, legacy, current):
+    for text in CORPUS:
+        assert current(text) == legacy(text), text
+
+
+def test_segment_example():
+    assert script_segments.segment('Tour ภูเก็ต 天坛') == (
+        (LATIN, 'Tour '), (THAI, 'ภูเก็ต'), (LATIN, ' '), (CJK, '天坛'),
+    )
+
+
+@pytest.mark.parametrize('value', ['', None])
+def test_empty_input(value):
+    assert script_segments.segment(value) == ()
+    assert script_segments.scripts_in(value) == frozenset()
+    assert script_segments.contains_thai(value) is False
+    assert script_segments.contains_cjk(value) is False
+    assert script_segments.font_markup(value) == ''
+
+
+def test_results_are_memoized_per_string():
+    text = 'Victoria Peak Tram (สายพีค)'
+    first = script_segments.segment(text)
+    assert script_segments.segment(text) is first
+    assert script_segments.cache_info()['segment']['hits'] == 1
+
+
+def test_long_inputs_bypass_the_memo():
+    text = 'ทัวร์ Hong Kong ' * (script_segments.MEMO_MAX_CHARS // 10)
+    assert len(text) > script_segments.MEMO_MAX_CHARS
+    assert script_segments.font_markup(text) == legacy_format_mixed_text(text)
+    assert script_segments.cache_info()['font_markup']['currsize'] == 0
@@ -0,0 +1,91 @@
+"""Tests for services/storage_lifecycle_service.py reconcile() expiry of untracked files"""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+import models  # noqa: F401  (registers every mapper VoucherFile refers to)
+from extensions import db
+from models.stored_artifact import StoredArtifact
+from models.voucher_sharing import VoucherFile
+from routes import voucher
+from services.storage_lifecycle_service import StorageLifecycleService
+
+NOW = datetime(2025, 3, 10, 12, 0)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'app.db'}",
+                      SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+    monkeypatch.setattr(StorageLifecycleService, '_roots', {})
+    monkeypatch.setattr(StorageLifecycleService, '_lookups', {})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def voucher_dir(app, tmp_path):
+    directory = tmp_path / 'voucher_files'
+    directory.mkdir()
+    StorageLifecycleService.register_root('voucher_file', str(directory), voucher.VOUCHER_FILE_TTL,
+                                          lookup=voucher._voucher_file_owners)
+    return directory
+
+
+def _file(directory, name, mtime=NOW):
+    path = directory / name
+    path.write_bytes(b'voucher')
+    stamp = (mtime - datetime(1970, 1, 1)).total_seconds()
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def _artifact(path):
+    return db.session.query(StoredArtifact).filter_by(path=os.path.abspath(path)).one()
+
+
+def test_reconcile_uses_the_voucher_file_expiry(voucher_dir):
+    expires_at = datetime(2025, 9, 1)
+    path = _file(voucher_dir, 'abc_ticket.pdf')
+    row = VoucherFile(voucher_id=7, filename='abc_ticket.pdf', original_filename='ticket.pdf',
+                      file_path=str(path), expires_at=expires_at)
+    db.session.add(row)
+    db.session.commit()
+
+    assert StorageLifecycleService.reconcile()['added'] == 1
+    artifact = _artifact(path)
+    assert artifact.expires_at == expires_at
+    assert (artifact.booking_id, artifact.owner_id) == (7, row.id)
+
+
+def test_reconcile_expires_orphan_voucher_files_after_the_ttl(voucher_dir):
+    path = _file(voucher_dir, 'orphan.pdf')
+    StorageLifecycleService.reconcile()
+    assert _artifact(path).expires_at == NOW + timedelta(days=120)
+
+
+def test_adopted_voucher_files_are_swept_when_expired(voucher_dir):
+    path = _file(voucher_dir, 'old_ticket.pdf')
+    db.session.add(VoucherFile(voucher_id=7, filename='old_ticket.pdf', original_filename='ticket.pdf',
+                               file_path=str(path), expires_at=NOW - timedelta(days=1)))
+    db.session.commit()
+    StorageLifecycleService.reconcile()
+
+    assert StorageLifecycleService.sweep(now=NOW)['files'] == 1
+    assert not path.exists()
+
+
+def test_roots_without_lookup_use_the_ttl_only(app, tmp_path):
+    directory = tmp_path / 'png_cache'
+    directory.mkdir()
+    StorageLifecycleService.register_root('png_cache', str(directory), timedelta(hours=6))
+    path = _file(directory, 'page1.png')
+    StorageLifecycleService.reconcile()
+    assert _artifact(path).expires_at == NOW + timedelta(hours=6)
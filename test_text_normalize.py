@@ -0,0 +1,240 @@
+"""Tests for utils/text_normalize.py (HTML-to-text filters and PDF helpers)
+
+The corpus and the legacy implementations below (as they were in app.py,
+utils/pdf_html.py, utils/pdf_sanitize.py and ClassicPDFGenerator.clean_html_tags)
+are also used by scripts/text_normalize_benchmark.py for timing.
+"""
+import random
+import re
+from html import unescape
+
+import pytest
+
+from utils import text_normalize
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+FLIGHTS = ['TG 600 BKK-HKG 08:00-11:50', 'CX 700 HKG-BKK 19:35-21:25', 'FD 502 DMK-HKG 07:10-10:55',
+           'HX 768 HKG-BKK 13:00-14:55', 'UO 701 BKK-HKG 17:20-21:05']
+SERVICES = [
+    'รับที่สนามบินฮ่องกง - ส่งโรงแรม', 'City Tour: Victoria Peak &amp; Madame Tussauds',
+    'นั่งกระเช้านองปิง 360 &nbsp; (Standard Cabin)', 'Disneyland 1 Day Pass', 'ไหว้พระวัดหวังต้าเซียน',
+    'Dinner at <b>Jumbo Kingdom</b>', 'อิสระช้อปปิ้ง  Mongkok   Ladies Market',
+]
+
+
+def build_corpus(count=200, seed=42):
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        kind = i % 5
+        if kind == 0:  # flight info from the editor
+            picks = rng.sample(FLIGHTS, rng.randint(1, 3))
+            corpus.append(rng.choice(['<br>', '<br/>', '<br />', '</p><p>']).join(picks)
+                          + rng.choice(['', '\r\n', '<p>&nbsp;</p>']))
+        elif kind == 1:  # daily services (Quill HTML)
+            days = [f'<p><strong>Day {d}</strong> {rng.choice(SERVICES)}</p>' for d in range(1, rng.randint(2, 6))]
+            if rng.random() < 0.4:
+                days.append(f'<p>คลิกดูเพิ่ม https://example.com/tour/{rng.randint(100, 999)}</p>')
+            corpus.append(''.join(days))
+        elif kind == 2:  # plain textarea text
+            lines = [rng.choice(SERVICES) for _ in range(rng.randint(1, 5))]
+            corpus.append(rng.choice(['\n', '\r\n']).join(lines))
+        elif kind == 3:  # description with bullets
+            lines = [f"{rng.choice(['•', '▪', '-', ''])} {rng.choice(SERVICES)}" for _ in range(rng.randint(2, 6))]
+            corpus.append('\n'.join(lines + ['•••', '  ']))
+        else:  # escaped newlines / pipes stored by older imports
+            corpus.append('\\n'.join(rng.sample(SERVICES, 3)) + ' | ' + rng.choice(FLIGHTS))
+    return corpus
+
+
+# Tag / whitespace / sanitizer corners the random corpus does not reach
+EDGE_CASES = [
+    ' ', 'a', '<P class="x">Day 1</P><BR>Day 2', '<br class="x">x<br  />y', '<p></p><p></p><p></p>x',
+    '<a href="https://example.com">link</a> <b>bold</b>', 'A &amp; B &lt;b&gt;', 'x|y||z',
+    '\r\nline\r\n\r\n\r\nline\t\t end  ', 'tab\\nesc\\r\\nx', '<p>&nbsp;</p>',
+    '<!-- note --><script>alert(1)</script>ok', '<span style="color:red">hidden</span> shown',
+    '<div onclick="go()">javascript:go data:x</div>', "<b onmouseover='x()'>b</b>", '<ul><li>a</li><LI>b</li></ul>',
+    '• one\n▪▪\n  ■ two  three •', '\x01ctl\x07\n', 'คลิกดูเพิ่ม https://example.com/tour/123?day=1',
+]
+
+CORPUS = EDGE_CASES + build_corpus()
+
+
+# ---------------------------------------------------------------------------
+# Legacy implementations (the re.sub chains the module replaced)
+# ---------------------------------------------------------------------------
+def legacy_html_to_linebreaks(content):
+    if not content:
+        return ""
+    content = unescape(content)
+    content = re.sub(r'คลิกดูเพิ่ม\s+(https?://[^\s<]+)', r'<a href="\1" target="_blank">คลิกดูเพิ่ม</a>', content)
+    content = re.sub(r'<p[^>]*>', '', content, flags=re.IGNORECASE)
+    content = re.sub(r'</p>', '\n\n', content, flags=re.IGNORECASE)
+    content = re.sub(r'<br\s*/?>', '\n', content, flags=re.IGNORECASE)
+    content = re.sub(r'<br[^>]*>', '\n', content, flags=re.IGNORECASE)
+    content = re.sub(r'<(?!/?a\b)[^>]+>', '', content, flags=re.IGNORECASE)
+    content = re.sub(r'[ \t]+', ' ', content)
+    content = re.sub(r'\n[ \t]+', '\n', content)
+    content = re.sub(r'[ \t]+\n', '\n', content)
+    content = re.sub(r'\n{3,}', '\n\n', content)
+    return content.strip()
+
+
+def legacy_nl2br(text):
+    if not text:
+        return ""
+    text = str(text)
+    text = re.sub(r'คลิกดูเพิ่ม\s+(https?://[^\s<]+)', r'<a href="\1" target="_blank">คลิกดูเพิ่ม</a>', text)
+    return text.replace('\r\n', '<br>').replace('\r', '<br>').replace('\n', '<br>')
+
+
+def legacy_flight_info_to_text(content):
+    if not content:
+        return ''
+    result = content.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
+    result = result.replace('</p>', '\n')
+    result = result.replace('<p>', '').replace('<div>', '').replace('</div>', '')
+    result = re.sub(r'<[^>]+>', '', result)
+    result = result.replace('\r\n', '\n').replace('\r', '\n')
+    return result.strip()
+
+
+def legacy_service_detail_to_text(content):
+    if not content:
+        return ''
+    result = content.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
+    result = result.replace('</p>', '\n')
+    result = result.replace('<p>', '').replace('<div>', '').replace('</div>', '')
+    result = re.sub(r'<[^>]+>', '', result)
+    result = result.replace('\\n', '\n').replace('\\r\\n', '\n').replace('\\r', '\n')
+    result = result.replace('\r\n', '\n').replace('\r', '\n')
+    return result.strip()
+
+
+def legacy_clean_simple_html(text):
+    if not text:
+        return ''
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = re.sub(r'\n+', '\n', text)
+    text = re.sub(r'<\s*(script|style|iframe|object|embed|link|meta)[^>]*>.*?<\s*/\s*\1>', '', text, flags=re.I | re.S)
+    text = re.sub(r'on[a-zA-Z]+\s*=\s*"[^"]*"', '', text)
+    text = re.sub(r"on[a-zA-Z]+\s*=\s*'[^']*'", '', text)
+    text = re.sub(r'(?i)javascript:', '', text)
+    text = re.sub(r'(?i)data:', '', text)
+    allowed = text_normalize._allowed_pdf_tags()
+    if 'span' not in allowed:
+        text = re.sub(r'<span[^>]*>.*?</span>', '', text, flags=re.I | re.S)
+    text = text.replace('\n', '<br/>')
+
+    def repl_tag(m):
+        slash, tag = m.group(1), m.group(2).lower()
+        if tag in allowed:
+            return '<br/>' if tag == 'br' else f"<{slash}{tag}>"
+        return ''
+    text = re.sub(r'<(/?)([A-Za-z0-9]+)(?:\s+[^>]*)?>', repl_tag, text)
+    text = re.sub(r'<!--.*?-->', '', text, flags=re.S)
+    return text.replace('\x00', '')
+
+
+def legacy_sanitize_text_block(text):
+    bullets = text_normalize.BULLET_CHARS
+    if not text:
+        return ''
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = ''.join(ch for ch in text if (32 <= ord(ch) or ch in ('\n', '\t')))
+    cleaned_lines = []
+    for raw in text.split('\n'):
+        line = raw.strip()
+        if not line or all(c in bullets for c in line):
+            continue
+        line = re.sub(r'^[%s]+\s*' % re.escape(bullets), '', line)
+        line = re.sub(r'\s{2,}', ' ', line)
+        if any(c in line for c in bullets):
+            line = line.translate({ord(c): '-' for c in bullets})
+        cleaned_lines.append(line)
+    return '\n'.join(cleaned_lines).strip()
+
+
+def legacy_pdf_plain_text(text):
+    if not text:
+        return ""
+    text = str(text)
+    text = text.replace('\r\n', '<br />').replace('\r', '<br />').replace('\n', '<br />')
+    text = re.sub(r'<br\s*/?>', '<br />', text, flags=re.IGNORECASE)
+    text = re.sub(r'<p\s*>', '<br />', text, flags=re.IGNORECASE)
+    text = re.sub(r'</p\s*>', '<br />', text, flags=re.IGNORECASE)
+    text = text.replace('|', '<br />')
+    text = re.sub(re.compile(r'<(?!br\s)[^>]*>'), '', text)
+    text = text.replace('<br />', '\n')
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r'\n{2}', '\n', text)
+    clean_lines = [line.strip() for line in text.split('\n')]
+    while clean_lines and not clean_lines[0]:
+        clean_lines.pop(0)
+    while clean_lines and not clean_lines[-1]:
+        clean_lines.pop()
+    return '\n'.join(clean_lines)
+
+
+PARITY = [
+    ('html_to_linebreaks', legacy_html_to_linebreaks, text_normalize.html_to_linebreaks),
+    ('nl2br', legacy_nl2br, text_normalize.nl2br),
+    ('flight_info_to_text', legacy_flight_info_to_text, text_normalize.flight_info_to_text),
+    ('service_detail_to_text', legacy_service_detail_to_text, text_normalize.service_detail_to_text),
+    ('clean_simple_html', legacy_clean_simple_html, text_normalize.clean_simple_html),
+    ('sanitize_text_block', legacy_sanitize_text_block, text_normalize.sanitize_text_block),
+    ('pdf_plain_text', legacy_pdf_plain_text, text_normalize.pdf_plain_text),
+]
+FILTERS = {name: current for name, _legacy, current in PARITY}
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+@pytest.fixture(autouse=True)
+def _fresh_caches():
+    text_normalize.clear_caches()
+    yield
+    text_normalize.clear_caches()
+
+
+@pytest.mark.parametrize('name, legacy, current', PARITY, ids=[name for name, _, _ in PARITY])
+def test_parity_with_legacy_filters(name, legacy, current):
+    for text in CORPUS:
+        assert current(text) == legacy(text), text
+
+
+# Intended change: a stray '<' used to swallow the text up to the next tag
+@pytest.mark.parametrize('name, text, expected', [
+    ('html_to_linebreaks', 'price < 500 <b>THB</b>', 'price < 500 THB'),
+    ('flight_info_to_text', 'price < 500 <b>THB</b>', 'price < 500 THB'),
+    ('service_detail_to_text', 'price < 500 <b>THB</b>', 'price < 500 THB'),
+    ('pdf_plain_text', 'price < 500 <b>THB</b>', 'price < 500 THB'),
+    ('pdf_plain_text', 'a<b <br>c', 'a<b\nc'),
+])
+def test_stray_angle_bracket_keeps_text(name, text, expected):
+    legacy = dict((n, fn) for n, fn, _ in PARITY)[name]
+    assert FILTERS[name](text) == expected
+    assert legacy(text) != expected
+
+
+@pytest.mark.parametrize('name', FILTERS)
+@pytest.mark.parametrize('value', ['', None])
+def test_empty_input(name, value):
+    assert FILTERS[name](value) == ''
+
+
+def test_results_are_memoized_per_string():
+    text = '<p><strong>Day 1</strong> Disneyland 1 Day Pass</p>'
+    first = text_normalize.html_to_linebreaks(text)
+    assert text_normalize.html_to_linebreaks(text) is first
+    assert text_normalize.cache_info()['html_to_linebreaks']['hits'] == 1
+
+
+def test_long_inputs_bypass_the_memo():
+    text = '<p>ไหว้พระวัดหวังต้าเซียน</p><br>' * (text_normalize.MEMO_MAX_CHARS // 20)
+    assert len(text) > text_normalize.MEMO_MAX_CHARS
+    assert text_normalize.html_to_linebreaks(text) == legacy_html_to_linebreaks(text)
+    assert text_normalize.cache_info()['html_to_linebreaks']['currsize'] == 0
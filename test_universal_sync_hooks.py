@@ -0,0 +1,131 @@
+"""Tests for services/universal_sync_hooks.py: booking commits purge generated artifacts via the invalidation bus"""
+import os
+
+import pytest
+from flask import Flask
+
+import models  # noqa: F401  (registers every mapper Booking refers to)
+from extensions import db
+from models.booking import Booking
+from models.stored_artifact import StoredArtifact
+from services import cache_service
+from services.cache_service import Cache, MemoryBackend
+from services.invalidation_bus import ArtifactIndex, InvalidationEvent, invalidation_bus
+from services.sequence_service import SequenceError, SequenceService
+from services.universal_sync_hooks import UniversalSyncHooks, initialize_universal_sync
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'app.db'}",
+                      SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+    # Handlers run inline on commit; artifacts are indexed in files under tmp_path
+    monkeypatch.setattr(invalidation_bus, 'async_dispatch', False)
+    monkeypatch.setattr(cache_service, '_cache', Cache(MemoryBackend(), prefix='test'))
+    index = ArtifactIndex(base_dir=str(tmp_path / '.artifacts'))
+    monkeypatch.setattr('services.universal_sync_hooks.artifact_index', index)
+    monkeypatch.setattr(UniversalSyncHooks, '_generate_new_quote_number', staticmethod(lambda: 'QT25010001'))
+    assert initialize_universal_sync() is True
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def index():
+    import services.universal_sync_hooks as hooks
+    return hooks.artifact_index
+
+
+def _booking():
+    booking = Booking(customer_id=1, booking_reference='BK-TEST-1', booking_type='tour', status='draft',
+                      time_limit='2025-03-01 12:00:00')
+    db.session.add(booking)
+    db.session.commit()
+    return booking
+
+
+def _artifact(tmp_path, index, booking, name):
+    path = tmp_path / name
+    path.write_bytes(b'%PDF-1.4 test')
+    index.register(booking.id, str(path))
+    return path
+
+
+def test_setup_is_idempotent(app):
+    assert initialize_universal_sync() is True
+    assert invalidation_bus._handlers['booking'].count(UniversalSyncHooks.on_booking_committed) == 1
+
+
+def test_commit_purges_booking_artifacts(app, index, tmp_path):
+    booking = _booking()
+    pdf = _artifact(tmp_path, index, booking, 'quote.pdf')
+    assert db.session.query(StoredArtifact).filter_by(booking_id=booking.id).count() == 1
+
+    booking.description = 'changed'
+    db.session.commit()
+
+    assert not pdf.exists()
+    assert index.paths(booking.id) == []
+    assert db.session.query(StoredArtifact).filter_by(booking_id=booking.id).count() == 0
+
+
+def test_commit_clears_booking_cache_tags(app):
+    booking = _booking()
+    cache = cache_service.get_cache()
+    cache.set('view', str(booking.id), {'id': booking.id}, tags=[f'booking:{booking.id}'])
+
+    booking.description = 'changed'
+    db.session.commit()
+    assert cache.get('view', str(booking.id)) is None
+
+
+def test_quote_sync_commit_keeps_fresh_artifacts(app, index, tmp_path):
+    booking = _booking()
+    # The insert event already ran the initial quote sync
+    assert booking.quote_number == 'QT25010001'
+    pdf = _artifact(tmp_path, index, booking, 'quote.pdf')
+
+    booking.quote_number = 'QT25010002'
+    db.session.commit()
+
+    assert pdf.exists()
+    assert index.paths(booking.id) == [str(pdf)]
+
+
+@pytest.mark.parametrize('fields', [
+    {'quote_number'},
+    {'quote_date', 'quote_valid_until', 'updated_at'},
+    {'quote_id', 'quote_number', 'quote_date', 'quote_valid_until', 'updated_at'},
+])
+def test_every_field_the_sync_writes_is_sync_only(app, index, tmp_path, fields):
+    booking = _booking()
+    pdf = _artifact(tmp_path, index, booking, 'quote.pdf')
+    UniversalSyncHooks.on_booking_committed(InvalidationEvent('booking', booking.id, 'update', frozenset(fields)))
+    assert pdf.exists()
+
+
+def test_quote_number_has_no_fallback_when_the_sequence_fails(monkeypatch):
+    def unavailable(name, when=None, block_size=None):
+        raise SequenceError(f'Could not allocate {name} number')
+    monkeypatch.setattr(SequenceService, 'next_number', unavailable)
+    with pytest.raises(SequenceError):
+        UniversalSyncHooks._generate_new_quote_number()
+
+    booking = Booking(booking_reference='BK-TEST-2')
+    UniversalSyncHooks._initialize_quote_data(booking)
+    assert booking.quote_number is None
+
+
+def test_rollback_purges_nothing(app, index, tmp_path):
+    booking = _booking()
+    pdf = _artifact(tmp_path, index, booking, 'quote.pdf')
+
+    booking.description = 'changed'
+    db.session.flush()
+    db.session.rollback()
+    assert os.path.exists(pdf)
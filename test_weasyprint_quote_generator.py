@@ -0,0 +1,200 @@
+"""Tests for services/weasyprint_quote_generator.py: content-hash memo, single-flight renders, PNG reuse"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+pytest.importorskip('weasyprint')
+
+import models  # noqa: E402,F401  (registers every mapper Booking refers to)
+from extensions import db  # noqa: E402
+from models.booking import Booking  # noqa: E402
+from models.customer import Customer  # noqa: E402
+from models.quote import Quote  # noqa: E402
+from services import cache_service  # noqa: E402
+from services.cache_service import Cache, MemoryBackend  # noqa: E402
+from services.invalidation_bus import ArtifactIndex  # noqa: E402
+from services.weasyprint_quote_generator import WeasyPrintQuoteGenerator  # noqa: E402
+
+
+def _pdf_bytes():
+    import fitz
+    doc = fitz.open()
+    doc.new_page(width=200, height=200).insert_text((20, 40), 'Quote')
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'app.db'}",
+                      SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+    # Output goes to static/generated under tmp_path; memo entries in an in-process cache
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cache_service, '_cache', Cache(MemoryBackend(), prefix='test'))
+    monkeypatch.setattr('services.weasyprint_quote_generator.artifact_index',
+                        ArtifactIndex(base_dir=str(tmp_path / '.artifacts')))
+    for name in ('COMPANY_NAME_EN', 'COMPANY_ADDRESS_EN', 'COMPANY_PHONE', 'COMPANY_WEBSITE', 'COMPANY_EMAIL'):
+        monkeypatch.delenv(name, raising=False)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Count PDF renders; the HTML step and WeasyPrint itself are replaced by fixed output"""
+    calls = []
+    lock = threading.Lock()
+    pdf = _pdf_bytes()
+
+    def render(self, html_content):
+        with lock:
+            calls.append(html_content)
+        time.sleep(0.05)
+        return pdf
+
+    monkeypatch.setattr(WeasyPrintQuoteGenerator, 'render_quote_html',
+                        lambda self, booking, product_data=None: (f'<p>{booking.description}</p>', None))
+    monkeypatch.setattr(WeasyPrintQuoteGenerator, '_generate_pdf_with_enhanced_styling', render)
+    return calls
+
+
+@pytest.fixture
+def booking(app):
+    customer = Customer(name='Somchai', email='somchai@example.com', phone='0812345678')
+    db.session.add(customer)
+    db.session.flush()
+    booking = Booking(customer_id=customer.id, booking_reference='BK20250301TEST', booking_type='tour',
+                      status='quoted', description='Bangkok city tour', time_limit=datetime(2025, 3, 1, 12))
+    db.session.add(booking)
+    db.session.commit()
+    return booking
+
+
+def _quote(booking, number, created_at):
+    db.session.add(Quote(quote_number=number, booking_id=booking.id, quote_date=created_at,
+                         valid_until=created_at + timedelta(days=30), title='Quote', created_at=created_at))
+    db.session.commit()
+
+
+# ---------------------------------------------------------------------------
+# load_booking
+# ---------------------------------------------------------------------------
+def test_load_booking_is_a_single_query(app, booking):
+    _quote(booking, 'QT25030001', datetime(2025, 3, 1))
+    _quote(booking, 'QT25030002', datetime(2025, 3, 2))
+    booking_id = booking.id
+    db.session.expunge_all()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        loaded, quote_number = WeasyPrintQuoteGenerator.load_booking(booking_id)
+        assert loaded.customer.name == 'Somchai'
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert len(statements) == 1
+    assert quote_number == 'QT25030002'
+
+
+def test_load_booking_overwrites_stale_attributes(app, booking):
+    stale = db.session.get(Booking, booking.id)
+    db.session.execute(Booking.__table__.update().values(description='edited elsewhere'))
+    loaded, quote_number = WeasyPrintQuoteGenerator.load_booking(booking.id)
+    assert loaded is stale
+    assert loaded.description == 'edited elsewhere'
+    assert quote_number is None
+    assert WeasyPrintQuoteGenerator.load_booking(booking.id + 1) == (None, None)
+
+
+# ---------------------------------------------------------------------------
+# Content-hash memo
+# ---------------------------------------------------------------------------
+def test_unchanged_booking_reuses_the_pdf(app, booking, renders):
+    first = WeasyPrintQuoteGenerator().generate_quote_pdf(booking)
+    second = WeasyPrintQuoteGenerator().generate_quote_pdf(booking)
+    assert first == second
+    assert len(renders) == 1
+
+
+def test_booking_change_renders_again(app, booking, renders):
+    WeasyPrintQuoteGenerator().generate_quote_pdf(booking)
+    booking.description = 'Bangkok city tour + dinner cruise'
+    db.session.commit()
+    WeasyPrintQuoteGenerator().generate_quote_pdf(booking)
+    assert renders == ['<p>Bangkok city tour</p>', '<p>Bangkok city tour + dinner cruise</p>']
+
+
+def test_company_details_change_renders_again(app, booking, renders, monkeypatch):
+    WeasyPrintQuoteGenerator().generate_quote_pdf(booking)
+    monkeypatch.setenv('COMPANY_PHONE', '+66 2 123 4567')
+    WeasyPrintQuoteGenerator().generate_quote_pdf(booking)
+    WeasyPrintQuoteGenerator().generate_quote_pdf(booking)
+    assert len(renders) == 2
+
+
+def test_deleted_pdf_is_rendered_again(app, booking, renders, tmp_path):
+    filename = WeasyPrintQuoteGenerator().generate_quote_pdf(booking)
+    (tmp_path / 'static' / 'generated' / filename).unlink()
+    WeasyPrintQuoteGenerator().generate_quote_pdf(booking)
+    assert len(renders) == 2
+
+
+def test_concurrent_calls_render_once(app, booking, renders):
+    booking_id = booking.id
+    barrier = threading.Barrier(6)
+    results, errors = [], []
+
+    def download():
+        try:
+            with app.app_context():
+                fresh = db.session.get(Booking, booking_id)
+                barrier.wait()
+                results.append(WeasyPrintQuoteGenerator().generate_quote_pdf(fresh))
+                db.session.remove()
+        except Exception as e:  # surfaced by the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=download) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(renders) == 1
+    assert len(set(results)) == 1 and len(results) == 6
+
+
+# ---------------------------------------------------------------------------
+# PNG
+# ---------------------------------------------------------------------------
+def test_png_is_reused_while_the_pdf_is_unchanged(app, booking, renders, tmp_path, monkeypatch):
+    import fitz
+    opened = []
+    real_open = fitz.open
+    monkeypatch.setattr(fitz, 'open', lambda *args, **kwargs: opened.append(args) or real_open(*args, **kwargs))
+
+    first = WeasyPrintQuoteGenerator().generate_quote_png(booking)
+    second = WeasyPrintQuoteGenerator().generate_quote_png(booking)
+    assert first == second
+    assert (tmp_path / 'static' / 'generated' / first).exists()
+    assert len(renders) == 1
+    assert len(opened) == 1
+
+    booking.description = 'changed'
+    db.session.commit()
+    assert WeasyPrintQuoteGenerator().generate_quote_png(booking)
+    assert len(renders) == 2
+    assert len(opened) == 2
@@ -3,11 +3,16 @@ import string
 from datetime import datetime
 
 def generate_booking_reference():
-    """Generate a unique booking reference"""
-    today = datetime.now()
-    date_part = today.strftime('%Y%m%d')[2:]  # Remove first 2 digits (20) from year
-    random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-    return f"{date_part}{random_part}"
+    """Generate a unique booking reference (YYMMDD + daily running number)"""
+    try:
+        from services.sequence_service import SequenceService
+        return SequenceService.next_number('booking')
+    except Exception:
+        # No app context / sequence table yet: fall back to random suffix
+        today = datetime.now()
+        date_part = today.strftime('%Y%m%d')[2:]  # Remove first 2 digits (20) from year
+        random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
+        return f"{date_part}{random_part}"
 
 def generate_invoice_reference():
     """Generate a unique invoice reference"""
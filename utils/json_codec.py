@@ -0,0 +1,71 @@
+"""JSON decoding for TEXT / JSON columns: orjson when installed, stdlib json otherwise.
+
+Writes go through ``dumps`` (``json.dumps`` with non-finite floats stored as
+null), so stored text keeps its current format and passes MariaDB's
+JSON_VALID() check.
+"""
+from __future__ import annotations
+
+import json
+import math
+
+try:  # optional: several times faster on large itineraries / product lists
+    import orjson
+except ImportError:  # pragma: no cover - stdlib json is used instead
+    orjson = None
+
+JSONDecodeError = json.JSONDecodeError  # orjson.JSONDecodeError subclasses it
+
+
+def loads(text):
+    """Decode JSON text (str or bytes); raises JSONDecodeError like json.loads"""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # NaN / Infinity and lone surrogates: older rows hold them, orjson rejects them
+            pass
+    return json.loads(text)
+
+
+def _reject_constant(name):
+    raise ValueError(f'{name} is not valid JSON')
+
+
+def is_valid(text):
+    """True when ``text`` is strict JSON: NaN / Infinity fail, like MariaDB JSON_VALID()"""
+    if orjson is not None:
+        try:
+            orjson.loads(text)
+            return True
+        except orjson.JSONDecodeError:
+            pass  # lone surrogate escapes are still valid JSON text
+        except TypeError:
+            return False
+    try:
+        json.loads(text, parse_constant=_reject_constant)
+    except (ValueError, TypeError):  # JSONDecodeError subclasses ValueError
+        return False
+    return True
+
+
+def finite(value):
+    """Copy of ``value`` with NaN / Infinity floats (at any depth) replaced by None"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, (list, tuple)):
+        return [finite(item) for item in value]
+    if isinstance(value, dict):
+        return {key: finite(item) for key, item in value.items()}
+    return value
+
+
+def dumps(value):
+    """Encode for a JSON column: ``json.dumps`` output, NaN / Infinity written as null"""
+    try:
+        return json.dumps(value, allow_nan=False)
+    except ValueError:
+        return json.dumps(finite(value), allow_nan=False)
+
+
+__all__ = ['loads', 'dumps', 'is_valid', 'finite', 'JSONDecodeError', 'orjson']
@@ -0,0 +1,32 @@
+"""Per-string LRU memoization for text helpers (utils/text_normalize.py, utils/script_segments.py)"""
+from __future__ import annotations
+
+from functools import lru_cache
+
+
+def memoized(maxsize=1024, max_chars=20000):
+    """LRU-cache ``fn(text, *args)`` for inputs up to ``max_chars``; longer inputs run uncached.
+
+    ``text`` is passed on as a plain ``str`` (Markup would escape replacement
+    strings). The wrapper exposes ``cache_info``, ``cache_clear`` and the
+    undecorated function as ``uncached``.
+    """
+    def decorator(fn):
+        cached = lru_cache(maxsize=maxsize)(fn)
+
+        def wrapper(text, *args):
+            text = str(text)
+            if len(text) > max_chars:
+                return fn(text, *args)
+            return cached(text, *args)
+
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
+
+
+__all__ = ['memoized']
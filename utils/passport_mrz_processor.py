@@ -17,6 +17,16 @@ from PIL import Image, ExifTags
 
 logger = logging.getLogger(__name__)
 
+# PDF pages are rasterized with PyMuPDF straight into NumPy arrays.
+# 300 DPI puts the OCR-B MRZ characters (~2.5 mm) at ~30 px cap height, which
+# Tesseract reads reliably; the long side is capped at the size
+# preprocess_image() would downscale to anyway.
+PDF_RENDER_DPI = int(os.environ.get('PASSPORT_PDF_DPI', '300'))
+PDF_RENDER_MAX_SIDE = 4000
+
+# Debug crops of the MRZ contain personal data (PDPA); only written when enabled
+DEBUG_SAVE_ENABLED = os.environ.get('PASSPORT_OCR_DEBUG_SAVE', 'false').lower() in {'1', 'true', 'yes'}
+
 class PassportMRZProcessor:
     """Process passport images and extract MRZ data"""
     
@@ -891,24 +901,27 @@ class PassportMRZProcessor:
         """
         return self.full_page_text_extract(image)
     
-    def process_passport(self, image_path: str, debug_save: bool = False) -> Dict:
+    def process_passport(self, image_path, debug_save: bool = False, label: Optional[str] = None) -> Dict:
         """
         Main processing pipeline:
         1. Try Full Page Text Extraction (iPhone Text Scanner method) FIRST
         2. Fall back to MRZ OCR if full page fails
         
         Args:
-            image_path: Path to passport image
-            debug_save: If True, saves preprocessed images for debugging
+            image_path: Path to passport image, or a BGR image array
+                        (e.g. a PDF page from render_pdf_pages())
+            debug_save: If True (or PASSPORT_OCR_DEBUG_SAVE=true), saves MRZ crops for debugging
+            label: Name used in logs and debug file names (defaults to the file name)
         """
-        import os
-        debug_save = True  # Always save debug images
+        debug_save = debug_save or DEBUG_SAVE_ENABLED
+        from_array = isinstance(image_path, np.ndarray)
+        label = label or ('page' if from_array else os.path.basename(image_path))
         
         try:
-            logger.info(f"Processing passport image: {os.path.basename(image_path)}")
+            logger.info(f"Processing passport image: {label}")
             
             # Load original image
-            original_img = cv2.imread(image_path)
+            original_img = image_path if from_array else cv2.imread(image_path)
             if original_img is None:
                 return {'success': False, 'error': 'Cannot read image file'}
             
@@ -916,7 +929,8 @@ class PassportMRZProcessor:
             logger.info(f"Original image size: {orig_width}x{orig_height}")
             
             debug_dir = os.path.join(tempfile.gettempdir(), 'mrz_debug')
-            os.makedirs(debug_dir, exist_ok=True)
+            if debug_save:
+                os.makedirs(debug_dir, exist_ok=True)
             
             # ============================================
             # STEP 1: Try Full Page Text Extraction FIRST
@@ -961,7 +975,7 @@ class PassportMRZProcessor:
             
             # Save high-res MRZ
             if debug_save:
-                highres_path = os.path.join(debug_dir, f"{os.path.basename(image_path)}_1_highres_mrz.jpg")
+                highres_path = os.path.join(debug_dir, f"{label}_1_highres_mrz.jpg")
                 cv2.imwrite(highres_path, mrz_high_res)
                 logger.info(f"💾 Debug: High-res MRZ saved to {highres_path}")
             
@@ -969,7 +983,7 @@ class PassportMRZProcessor:
             processed_mrz = self._preprocess_mrz_only(mrz_high_res)
             
             if debug_save:
-                processed_path = os.path.join(debug_dir, f"{os.path.basename(image_path)}_2_processed_mrz.jpg")
+                processed_path = os.path.join(debug_dir, f"{label}_2_processed_mrz.jpg")
                 cv2.imwrite(processed_path, processed_mrz)
                 logger.info(f"💾 Debug: Processed MRZ saved to {processed_path}")
                 logger.info(f"🔍 Check these images in: {debug_dir}")
@@ -1089,7 +1103,7 @@ class PassportMRZProcessor:
                     alt_mrz = orig_gray[int(orig_height * crop_start):orig_height, :]
                     
                     if debug_save:
-                        alt_path = os.path.join(debug_dir, f"{os.path.basename(image_path)}_4_alt_{int(crop_start*100)}.jpg")
+                        alt_path = os.path.join(debug_dir, f"{label}_4_alt_{int(crop_start*100)}.jpg")
                         cv2.imwrite(alt_path, alt_mrz)
                     
                     # Try raw first
@@ -1111,14 +1125,14 @@ class PassportMRZProcessor:
             if len(mrz_lines) < 2:
                 logger.info("Trying RAW grayscale OCR without preprocessing...")
                 # Load original image and convert to grayscale only
-                raw_img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+                raw_img = orig_gray if from_array else cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
                 if raw_img is not None:
                     # Extract MRZ from raw image - BOTTOM 15-18% only
                     h, w = raw_img.shape[:2]
                     raw_mrz = raw_img[int(h * 0.82):h, :]
                     
                     if debug_save:
-                        raw_path = os.path.join(debug_dir, f"{os.path.basename(image_path)}_3_raw_mrz.jpg")
+                        raw_path = os.path.join(debug_dir, f"{label}_3_raw_mrz.jpg")
                         cv2.imwrite(raw_path, raw_mrz)
                         logger.info(f"💾 Debug: Raw MRZ saved to {raw_path}")
                     
@@ -1185,8 +1199,8 @@ class PassportMRZProcessor:
                 
                 if debug_save:
                     logger.error(f"❌ EXTRACTION FAILED - Check debug images in: {debug_dir}")
-                    logger.error(f"   1. Preprocessed full image: {os.path.basename(image_path)}_1_preprocessed.jpg")
-                    logger.error(f"   2. Extracted MRZ region: {os.path.basename(image_path)}_2_mrz_region.jpg")
+                    logger.error(f"   1. Preprocessed full image: {label}_1_preprocessed.jpg")
+                    logger.error(f"   2. Extracted MRZ region: {label}_2_mrz_region.jpg")
                 
                 # Provide specific guidance based on what we found
                 tips = [
@@ -1373,29 +1387,61 @@ class PassportMRZProcessor:
             }
 
 
+def render_pdf_pages(pdf_source, pages=(0,), dpi: int = PDF_RENDER_DPI) -> list:
+    """
+    Rasterize PDF pages in memory with PyMuPDF
+    
+    Args:
+        pdf_source: PDF bytes or a file path
+        pages: Page indexes to render (default: first page, the passport data page);
+               None renders every page
+        dpi: Render resolution, reduced per page so the long side stays <= PDF_RENDER_MAX_SIDE
+    
+    Returns list of BGR uint8 arrays (same layout as cv2.imread), nothing written to disk
+    """
+    import fitz  # PyMuPDF
+    
+    if isinstance(pdf_source, (bytes, bytearray)):
+        doc = fitz.open(stream=bytes(pdf_source), filetype='pdf')
+    else:
+        doc = fitz.open(pdf_source)
+    
+    try:
+        indexes = range(doc.page_count) if pages is None else [i for i in pages if 0 <= i < doc.page_count]
+        images = []
+        for index in indexes:
+            page = doc[index]
+            zoom = dpi / 72.0
+            long_side = max(page.rect.width, page.rect.height) * zoom
+            if long_side > PDF_RENDER_MAX_SIDE:
+                zoom *= PDF_RENDER_MAX_SIDE / long_side
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+            rows = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+            rgb = np.ascontiguousarray(rows[:, :pix.width * 3]).reshape(pix.height, pix.width, 3)
+            images.append(cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR))
+        logger.info(f"Rendered {len(images)} PDF page(s) in memory at up to {dpi} DPI")
+        return images
+    finally:
+        doc.close()
+
+
 def convert_pdf_to_images(pdf_path: str) -> list:
     """
     Convert PDF to images
-    Returns list of temporary image paths
+    Returns list of temporary image paths (prefer render_pdf_pages(), which keeps pages in memory)
     """
     try:
-        from pdf2image import convert_from_path
-        
         logger.info(f"Converting PDF to images: {pdf_path}")
         
-        # Convert PDF pages to images
-        images = convert_from_path(pdf_path, dpi=300)
-        
-        # Save to temp files
         temp_paths = []
-        for i, image in enumerate(images):
+        for i, image in enumerate(render_pdf_pages(pdf_path, pages=None)):
             temp_file = tempfile.NamedTemporaryFile(
                 delete=False, 
-                suffix=f'_page{i}.jpg'
+                suffix=f'_page{i}.png'
             )
-            image.save(temp_file.name, 'JPEG')
-            temp_paths.append(temp_file.name)
             temp_file.close()
+            cv2.imwrite(temp_file.name, image)
+            temp_paths.append(temp_file.name)
         
         logger.info(f"Converted {len(temp_paths)} pages from PDF")
         return temp_paths
@@ -2,6 +2,7 @@
 from __future__ import annotations
 from config import Config
 from utils.logging_config import get_logger
+from utils.script_segments import CJK, THAI, scripts_in
 
 _font_logger = get_logger(__name__)
 
@@ -9,18 +10,17 @@ def select_font_for_text(base_font: str, text: str, registered_fonts=None) -> st
     """Adaptive font selection for Thai & CJK content.
 
     Strategy:
-      1. Detect Thai (U+0E00–U+0E7F) and CJK Unified Ideographs (U+4E00–U+9FFF) plus basic CJK punctuation (U+3000–U+303F).
+      1. Detect Thai (U+0E00–U+0E7F) and CJK Unified Ideographs (U+4E00–U+9FFF) plus basic CJK punctuation (U+3000–U+303F)
+         via utils.script_segments (memoized per string).
       2. Reorder configured fallback list so fonts whose names imply coverage (cjk, chinese, sourcehan, sc, thai) are tried first.
       3. Return first registered match. Provide debug logs if PDF_FONT_DEBUG enabled.
     """
     try:
         if not text:
             return base_font
-        has_thai = any('\u0E00' <= ch <= '\u0E7F' for ch in text)
-        has_cjk = any('\u4e00' <= ch <= '\u9fff' for ch in text)
-        if not has_cjk:
-            # CJK punctuation block
-            has_cjk = any('\u3000' <= ch <= '\u303F' for ch in text)
+        scripts = scripts_in(text)
+        has_thai = THAI in scripts
+        has_cjk = CJK in scripts
         if not (has_thai or has_cjk):
             return base_font
         from reportlab.pdfbase import pdfmetrics
@@ -0,0 +1,145 @@
+"""Thai / Latin / CJK script runs for mixed-language PDF text.
+
+Font choice in the ReportLab generators (``format_mixed_text``,
+``has_thai_text``), ``utils.pdf_fonts.select_font_for_text`` and the
+WeasyPrint section builders all ask the same question of the same strings:
+which scripts does this text contain, and where do the runs start and end.
+
+- scripts come from one codepoint range table (``SCRIPT_RANGES``); the run
+  pattern and the single-character lookup are both built from it at import
+- a string is segmented in one regex pass instead of a Python loop per char
+- results are memoized per input string (LRU), so a customer name or tour
+  description checked for the style, then formatted, is segmented once
+
+Everything outside the table is ``latin`` (Latin letters, digits, symbols,
+whitespace): it renders with the Latin font, as before.
+"""
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+
+from utils.memo import memoized
+
+MEMO_SIZE = 2048
+MEMO_MAX_CHARS = 20000  # longer inputs are segmented without caching
+
+THAI = 'thai'
+CJK = 'cjk'
+LATIN = 'latin'
+
+# (first codepoint, last codepoint, script), sorted and non-overlapping
+SCRIPT_RANGES = (
+    (0x0E00, 0x0E7F, THAI),   # Thai
+    (0x3000, 0x303F, CJK),    # CJK symbols and punctuation
+    (0x4E00, 0x9FFF, CJK),    # CJK unified ideographs
+)
+
+_STARTS = [start for start, _end, _script in SCRIPT_RANGES]
+
+
+def _char_class(script):
+    return ''.join(f'\\u{start:04x}-\\u{end:04x}' for start, end, name in SCRIPT_RANGES if name == script)
+
+
+_THAI_CLASS = _char_class(THAI)
+_CJK_CLASS = _char_class(CJK)
+_RUNS = re.compile(f'([{_THAI_CLASS}]+)|([{_CJK_CLASS}]+)|([^{_THAI_CLASS}{_CJK_CLASS}]+)')
+_ANY_THAI = re.compile(f'[{_THAI_CLASS}]')
+_ANY_CJK = re.compile(f'[{_CJK_CLASS}]')
+_GROUP_SCRIPTS = (None, THAI, CJK, LATIN)
+
+
+def script_of(char):
+    """Script of one character from SCRIPT_RANGES ('latin' when outside the table)"""
+    code = ord(char)
+    i = bisect_right(_STARTS, code) - 1
+    if i >= 0 and code <= SCRIPT_RANGES[i][1]:
+        return SCRIPT_RANGES[i][2]
+    return LATIN
+
+
+_memoized = memoized(MEMO_SIZE, MEMO_MAX_CHARS)
+
+
+@_memoized
+def _segment(text):
+    return tuple((_GROUP_SCRIPTS[m.lastindex], m.group(0)) for m in _RUNS.finditer(text))
+
+
+def segment(text):
+    """Split text into ``(script, run)`` tuples, e.g. (('latin', 'Tour '), ('thai', 'ภูเก็ต'))"""
+    if not text:
+        return ()
+    return _segment(text)
+
+
+@_memoized
+def _scripts_in(text):
+    found = set()
+    if _ANY_THAI.search(text):
+        found.add(THAI)
+    if _ANY_CJK.search(text):
+        found.add(CJK)
+    return frozenset(found)
+
+
+def scripts_in(text):
+    """Non-Latin scripts present in text: a frozenset of 'thai' / 'cjk'"""
+    if not text:
+        return frozenset()
+    return _scripts_in(text)
+
+
+def contains_thai(text):
+    # One C-level regex search with early exit: cheaper than a memo lookup
+    return bool(text) and _ANY_THAI.search(str(text)) is not None
+
+
+def contains_cjk(text):
+    return bool(text) and _ANY_CJK.search(str(text)) is not None
+
+
+@_memoized
+def _font_markup(text, thai_font, latin_font):
+    if not contains_thai(text):
+        return f'<font name="{latin_font}">{text}</font>'
+    parts = []
+    latin_run = ''
+    for script, run in segment(text):
+        if script == THAI:
+            if latin_run:
+                parts.append(f'<font name="{latin_font}">{latin_run}</font>')
+                latin_run = ''
+            parts.append(f'<font name="{thai_font}">{run}</font>')
+        else:
+            # CJK stays with the Latin font here, as in the per-character scan this replaces
+            latin_run += run
+    if latin_run:
+        parts.append(f'<font name="{latin_font}">{latin_run}</font>')
+    return ''.join(parts)
+
+
+def font_markup(text, thai_font='NotoSansThai-Regular', latin_font='Helvetica'):
+    """ReportLab <font> markup: Thai runs in thai_font, everything else in latin_font"""
+    if not text:
+        return ''
+    return _font_markup(text, thai_font, latin_font)
+
+
+MEMOIZED = (_segment, _scripts_in, _font_markup)
+
+
+def cache_info():
+    return {fn.__name__.lstrip('_'): fn.cache_info()._asdict() for fn in MEMOIZED}
+
+
+def clear_caches():
+    for fn in MEMOIZED:
+        fn.cache_clear()
+
+
+__all__ = [
+    'THAI', 'CJK', 'LATIN', 'SCRIPT_RANGES', 'script_of', 'segment', 'scripts_in',
+    'contains_thai', 'contains_cjk', 'font_markup', 'cache_info', 'clear_caches',
+]
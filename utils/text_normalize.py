@@ -0,0 +1,260 @@
+"""Shared HTML-to-text normalization for templates and PDF generators.
+
+One module for the template filters (``html_to_linebreaks``, ``nl2br``,
+``flight_info_to_text``, ``service_detail_to_text``) and the PDF helpers
+(``clean_simple_html``, ``sanitize_text_block``, ``pdf_plain_text``):
+
+- patterns are compiled once at import
+- tags are rewritten in one tokenizer pass (``<...>`` token -> replacement)
+  instead of one ``re.sub`` per tag kind
+- results are memoized per input string (LRU), so the same daily services or
+  flight info rendered in the list, the view and the PDF is normalized once
+
+A stray ``<`` in text (e.g. "price < 500") no longer swallows the text up
+to the next tag: tokens never contain another ``<``.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from html import unescape
+
+from utils.memo import memoized
+
+MEMO_SIZE = 1024
+MEMO_MAX_CHARS = 20000  # longer inputs are normalized without caching
+
+BULLET_CHARS = '•▪■□●◦'
+
+# Tokens: one tag, never spanning another '<'
+_TAG = re.compile(r'<[^<>]+>')
+_ANCHOR = re.compile(r'</?a\b', re.I)
+
+MORE_LINK_MARKER = 'คลิกดูเพิ่ม'
+_MORE_LINK = re.compile(MORE_LINK_MARKER + r'\s+(https?://[^\s<]+)')
+_MORE_LINK_HTML = r'<a href="\1" target="_blank">คลิกดูเพิ่ม</a>'
+
+_SPACES = re.compile(r'[ \t]+')
+_SPACE_AROUND_NEWLINE = re.compile(r' ?\n ?')
+_BLANK_LINES = re.compile(r'\n{3,}')
+_NEWLINE_RUNS = re.compile(r'\n+')
+_MULTI_NEWLINES = re.compile(r'\n{2,}')
+
+# PDF (clean_simple_html)
+_PDF_SAFE_TAGS = frozenset({'b', 'strong', 'i', 'em', 'u', 'br', 'p', 'ul', 'ol', 'li'})
+_DANGEROUS_BLOCKS = re.compile(r'<\s*(script|style|iframe|object|embed|link|meta)[^>]*>.*?<\s*/\s*\1>', re.I | re.S)
+_EVENT_HANDLERS = re.compile(r'''on[a-zA-Z]+\s*=\s*(?:"[^"]*"|'[^']*')''')
+_UNSAFE_PROTOCOLS = re.compile(r'(?i)javascript:|data:')
+_SPAN_BLOCKS = re.compile(r'<span[^>]*>.*?</span>', re.I | re.S)
+_SIMPLE_TAG = re.compile(r'<(/?)([A-Za-z0-9]+)(?:\s+[^>]*)?>')
+_COMMENTS = re.compile(r'<!--.*?-->', re.S)
+
+# PDF (pdf_plain_text): line breaks, pipes and tags in one pass
+_PLAIN_TOKEN = re.compile(r'\r\n|[\r\n|]|<[^<>]*>')
+_PLAIN_BREAK_TAG = re.compile(r'<(?:br\s*/?|p\s*|/p\s*)>', re.I)
+
+# sanitize_text_block
+_CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b-\x1f]')
+_LEADING_BULLETS = re.compile(r'^[%s]+\s*' % re.escape(BULLET_CHARS))
+_WHITESPACE_RUNS = re.compile(r'\s{2,}')
+_BULLET_TO_HYPHEN = {ord(c): '-' for c in BULLET_CHARS}
+
+# flight_info_to_text / service_detail_to_text: exact tags kept as line breaks
+_TEXT_BREAKS = {'<br>': '\n', '<br/>': '\n', '<br />': '\n', '</p>': '\n'}
+
+
+_memoized = memoized(MEMO_SIZE, MEMO_MAX_CHARS)
+
+
+# ---------------------------------------------------------------------------
+# Template filters
+# ---------------------------------------------------------------------------
+def _linebreak_tag(match):
+    tag = match.group(0)
+    if _ANCHOR.match(tag):
+        return tag
+    lower = tag[:4].lower()
+    if lower == '</p>' and len(tag) == 4:
+        return '\n\n'
+    if lower.startswith('<br'):
+        return '\n'
+    return ''
+
+
+def _more_links(text):
+    return _MORE_LINK.sub(_MORE_LINK_HTML, text) if MORE_LINK_MARKER in text else text
+
+
+@_memoized
+def _html_to_linebreaks(content):
+    content = _more_links(unescape(content))
+    if '<' in content:
+        content = _TAG.sub(_linebreak_tag, content)
+    if '\t' in content or '  ' in content:
+        content = _SPACES.sub(' ', content)
+    if ' \n' in content or '\n ' in content:
+        content = _SPACE_AROUND_NEWLINE.sub('\n', content)
+    if '\n\n\n' in content:
+        content = _BLANK_LINES.sub('\n\n', content)
+    return content.strip()
+
+
+def html_to_linebreaks(content):
+    """HTML to text with line breaks; keeps <a> tags and links "คลิกดูเพิ่ม <url>" (returns str, not Markup)"""
+    if not content:
+        return ''
+    return _html_to_linebreaks(content)
+
+
+@_memoized
+def _nl2br(text):
+    text = _more_links(text)
+    return text.replace('\r\n', '<br>').replace('\r', '<br>').replace('\n', '<br>')
+
+
+def nl2br(text):
+    """Newlines to <br> and "คลิกดูเพิ่ม <url>" to a link (returns str, not Markup)"""
+    if not text:
+        return ''
+    return _nl2br(text)
+
+
+def _text_break(match):
+    return _TEXT_BREAKS.get(match.group(0), '')
+
+
+@_memoized
+def _flight_info_to_text(content):
+    result = _TAG.sub(_text_break, content) if '<' in content else content
+    return result.replace('\r\n', '\n').replace('\r', '\n').strip()
+
+
+def flight_info_to_text(content):
+    """HTML flight info to textarea-friendly text"""
+    if not content:
+        return ''
+    return _flight_info_to_text(content)
+
+
+@_memoized
+def _service_detail_to_text(content):
+    result = _TAG.sub(_text_break, content) if '<' in content else content
+    # Literal "\n" / "\r" stored escaped in the database
+    result = result.replace('\\n', '\n').replace('\\r', '\n')
+    return result.replace('\r\n', '\n').replace('\r', '\n').strip()
+
+
+def service_detail_to_text(content):
+    """Service detail content to display text with line breaks (also unescapes literal \\n)"""
+    if not content:
+        return ''
+    return _service_detail_to_text(content)
+
+
+# ---------------------------------------------------------------------------
+# PDF helpers
+# ---------------------------------------------------------------------------
+@lru_cache(maxsize=1)
+def _allowed_pdf_tags():
+    from config import Config
+    cfg_allowed = frozenset(getattr(Config, 'PDF_ALLOWED_TAGS', _PDF_SAFE_TAGS))
+    return cfg_allowed & _PDF_SAFE_TAGS or _PDF_SAFE_TAGS
+
+
+@_memoized
+def _clean_simple_html(text, allowed):
+    text = _NEWLINE_RUNS.sub('\n', text.replace('\r\n', '\n').replace('\r', '\n'))
+    text = _DANGEROUS_BLOCKS.sub('', text)
+    text = _EVENT_HANDLERS.sub('', text)
+    text = _UNSAFE_PROTOCOLS.sub('', text)
+    if 'span' not in allowed:
+        text = _SPAN_BLOCKS.sub('', text)
+    text = text.replace('\n', '<br/>')
+
+    def repl_tag(m):
+        slash, tag = m.group(1), m.group(2).lower()
+        if tag in allowed:
+            return '<br/>' if tag == 'br' else f'<{slash}{tag}>'
+        return ''
+
+    text = _COMMENTS.sub('', _SIMPLE_TAG.sub(repl_tag, text))
+    if '\x00' in text:
+        text = text.replace('\x00', '')
+    return text
+
+
+def clean_simple_html(text):
+    """Simple HTML sanitizer for PDF Paragraphs: whitelisted tags only, newlines to <br/>"""
+    if not text:
+        return ''
+    return _clean_simple_html(text, _allowed_pdf_tags())
+
+
+@_memoized
+def _sanitize_text_block(text):
+    text = _CONTROL_CHARS.sub('', text.replace('\r\n', '\n').replace('\r', '\n'))
+    cleaned_lines = []
+    for raw in text.split('\n'):
+        line = raw.strip()
+        if not line or not line.strip(BULLET_CHARS):
+            continue
+        line = _WHITESPACE_RUNS.sub(' ', _LEADING_BULLETS.sub('', line))
+        # Remaining bullet glyphs render as squares with the fallback fonts
+        cleaned_lines.append(line.translate(_BULLET_TO_HYPHEN))
+    return '\n'.join(cleaned_lines).strip()
+
+
+def sanitize_text_block(text):
+    """Drop control characters and bullet-only lines, strip leading bullets, collapse whitespace"""
+    if not text:
+        return ''
+    return _sanitize_text_block(text)
+
+
+def _plain_token(match):
+    token = match.group(0)
+    if token[0] != '<' or _PLAIN_BREAK_TAG.fullmatch(token):
+        return '\n'
+    # Other "<br ...>" tags are left as they are (matches the previous output)
+    if token.startswith('<br') and token[3:4].isspace():
+        return token
+    return ''
+
+
+@_memoized
+def _pdf_plain_text(text):
+    text = _MULTI_NEWLINES.sub('\n', _PLAIN_TOKEN.sub(_plain_token, text))
+    lines = [line.strip() for line in text.split('\n')]
+    start, end = 0, len(lines)
+    while start < end and not lines[start]:
+        start += 1
+    while end > start and not lines[end - 1]:
+        end -= 1
+    return '\n'.join(lines[start:end])
+
+
+def pdf_plain_text(text):
+    """Plain text for ReportLab: <br>, <p>, newlines and '|' become line breaks, other tags are dropped"""
+    if not text:
+        return ''
+    return _pdf_plain_text(text)
+
+
+MEMOIZED = (_html_to_linebreaks, _nl2br, _flight_info_to_text, _service_detail_to_text,
+            _clean_simple_html, _sanitize_text_block, _pdf_plain_text)
+
+
+def cache_info():
+    return {fn.__name__.lstrip('_'): fn.cache_info()._asdict() for fn in MEMOIZED}
+
+
+def clear_caches():
+    for fn in MEMOIZED:
+        fn.cache_clear()
+
+
+__all__ = [
+    'html_to_linebreaks', 'nl2br', 'flight_info_to_text', 'service_detail_to_text',
+    'clean_simple_html', 'sanitize_text_block', 'pdf_plain_text', 'BULLET_CHARS',
+    'cache_info', 'clear_caches',
+]